@@ -0,0 +1,422 @@
+"""
+Archive code for the OCTA toolbox
+Module to store many stimuli in a single file with memory-mapped element arrays
+
+The Order & Complexity Toolbox for Aesthetics (OCTA) Python library is a tool for researchers
+to create stimuli varying in order and complexity on different dimensions.
+Copyright (C) 2021  Eline Van Geert, Christophe Bossens, and Johan Wagemans
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU Lesser General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU Lesser General Public License for more details.
+
+You should have received a copy of the GNU Lesser General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+Contact: eline.vangeert@kuleuven.be
+
+"""
+import os
+import json
+import shutil
+import struct
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+from .ElementTable import ElementTable
+from .StimulusJSON import StimulusToDict, StimulusFromDict, _encode, _Decoder
+
+SCHEMA = "octa-archive"
+SCHEMA_VERSION = 1
+
+# File layout: magic bytes, length of the JSON index, the JSON index, and
+# the raw arrays. Each array starts at a multiple of _ALIGNMENT bytes.
+_MAGIC = b"OCTAARC\x00"
+_ALIGNMENT = 64
+
+# Size of the blocks in which arrays are copied into the archive
+_COPY_BUFFER_SIZE = 1 << 20
+
+# Attribute columns that are also stored as numbers (NaN if not numeric)
+_numeric_columns = ['orientation', 'borderwidth', 'opacity']
+
+def SaveArchive(stimuli, filename, folder = None):
+    """
+    Saves stimuli to a single .octa archive. For each stimulus, the archive
+    holds the compact JSON data of GetJSON(compact = True) and the rendered
+    element parameters of GetElementsDF as typed arrays.
+
+    Element attributes are stored as integer codes into a palette with the
+    distinct values across all stimuli. Positions, boundingboxes,
+    orientations, borderwidths and opacities are also stored as numbers.
+    
+    The arrays of each stimulus are written to temporary files as soon as
+    the stimulus is rendered, so only the palettes are kept in memory.
+
+    Parameters
+    ----------
+    stimuli : iterable
+        Stimuli to save. Each stimulus is rendered if needed.
+    filename : string
+        Name of the archive, without extension.
+    folder : string, optional
+        Name of the folder in which the archive needs to be saved.
+
+    Returns
+    -------
+    int
+        Number of stimuli that were saved.
+
+    """
+    archive_filename = "%s.octa"%filename
+    if folder is not None:
+        archive_filename = os.path.join(folder, archive_filename)
+
+    arrays = {'element_offsets':   _ArrayWriter(np.int64),
+              'spec_offsets':      _ArrayWriter(np.int64),
+              'specs':             _ArrayWriter(np.uint8),
+              'integer_positions': _ArrayWriter(np.bool_),
+              'x':                 _ArrayWriter(np.float64),
+              'y':                 _ArrayWriter(np.float64),
+              'boundingbox':       _ArrayWriter(np.float64, (2,)),
+              'overridden':        _ArrayWriter(np.uint16),
+              'element_order':     _ArrayWriter(np.int32)}
+    arrays.update((column, _ArrayWriter(np.float64)) for column in _numeric_columns)
+    arrays.update(('%s_code'%column, _ArrayWriter(np.int32)) for column in ElementTable.attribute_columns)
+    
+    palettes = {column: [] for column in ElementTable.attribute_columns}
+    palette_lookup = {column: {} for column in ElementTable.attribute_columns}
+
+    n_stimuli = 0
+    n_elements_total = 0
+    n_spec_bytes = 0
+    arrays['element_offsets'].Append([0])
+    arrays['spec_offsets'].Append([0])
+    
+    try:
+        for stimulus in stimuli:
+            # The parameters are taken before rendering, as rendering can replace some of them
+            spec = json.dumps(StimulusToDict(stimulus), separators = (',', ':')).encode('utf-8')
+    
+            stimulus.Render()
+            table = stimulus.dwg_elements
+            n_elements = len(table)
+            x = np.asarray(table.x)
+            y = np.asarray(table.y)
+    
+            n_stimuli += 1
+            n_elements_total += n_elements
+            n_spec_bytes += len(spec)
+            arrays['element_offsets'].Append([n_elements_total])
+            arrays['spec_offsets'].Append([n_spec_bytes])
+            arrays['specs'].Append(np.frombuffer(spec, dtype = np.uint8))
+            
+            # Positions are stored as floats; integer positions are converted back when they are read
+            arrays['integer_positions'].Append([np.issubdtype(x.dtype, np.integer) and np.issubdtype(y.dtype, np.integer)])
+            arrays['x'].Append(x)
+            arrays['y'].Append(y)
+    
+            order = getattr(stimulus, '_element_presentation_order', None)
+            arrays['element_order'].Append(np.asarray(order if order is not None else range(n_elements), dtype = np.int32)[:n_elements])
+    
+            overridden = np.zeros(n_elements, dtype = np.uint16)
+            for bit, column in enumerate(ElementTable.attribute_columns):
+                overridden |= table.overridden[column].astype(np.uint16) << bit
+            arrays['overridden'].Append(overridden)
+    
+            for column in ElementTable.attribute_columns:
+                table_codes, categories = table.GetCategories(column)
+    
+                # Map the codes of this stimulus to codes in the archive palette
+                lookup = palette_lookup[column]
+                mapping = np.empty(len(categories), dtype = np.int32)
+                for i, value in enumerate(categories):
+                    encoded = _encode(value)
+                    key = json.dumps(encoded, sort_keys = True)
+                    if key not in lookup:
+                        lookup[key] = len(palettes[column])
+                        palettes[column].append(encoded)
+                    mapping[i] = lookup[key]
+                arrays['%s_code'%column].Append(mapping[table_codes] if n_elements > 0 else np.zeros(0, dtype = np.int32))
+    
+                if column in _numeric_columns:
+                    numbers = np.array([_as_number(value) for value in categories] + [np.nan], dtype = np.float64)
+                    arrays[column].Append(numbers[table_codes])
+                elif column == 'boundingbox':
+                    sizes = np.array([_as_size(value) for value in categories] + [(np.nan, np.nan)], dtype = np.float64)
+                    arrays['boundingbox'].Append(sizes[table_codes])
+    
+        _WriteArchive(archive_filename, arrays, {'n_stimuli': n_stimuli,
+                                                 'n_elements': n_elements_total,
+                                                 'palettes': palettes})
+    finally:
+        for writer in arrays.values():
+            writer.Close()
+
+    return n_stimuli
+
+class Archive:
+    """
+    Reader for .octa archives. The arrays in the archive are memory-mapped,
+    so a single stimulus or a single element column can be read without
+    reading the rest of the file.
+
+    Parameters
+    ----------
+    filename : string
+        Name of the archive, without extension.
+    folder : string, optional
+        Name of the folder that contains the archive.
+
+    """
+    def __init__(self, filename, folder = None):
+        archive_filename = "%s.octa"%filename
+        if folder is not None:
+            archive_filename = os.path.join(folder, archive_filename)
+        self.filename = archive_filename
+
+        with open(archive_filename, 'rb') as f:
+            if f.read(len(_MAGIC)) != _MAGIC:
+                raise ValueError("WARNING: %s is not an OCTA archive"%archive_filename)
+            (index_length,) = struct.unpack("<Q", f.read(8))
+            index = json.loads(f.read(index_length).decode('utf-8'))
+
+        if index['schema'] != SCHEMA or index['version'] > SCHEMA_VERSION:
+            raise ValueError("WARNING: version %s of the %s format is not supported"%(index['version'], index['schema']))
+
+        self._index = index
+        self._data_start = _aligned(len(_MAGIC) + 8 + index_length)
+        self._arrays = {}
+        self._palettes = {}
+
+        self.n_stimuli = index['n_stimuli']
+        self.n_elements = index['n_elements']
+        self.element_offsets = self.GetArray('element_offsets')
+
+    def __len__(self):
+        return self.n_stimuli
+
+    def GetArray(self, name):
+        """
+        Returns a stored array, memory-mapped from the archive file.
+
+        Parameters
+        ----------
+        name : string
+            Name of the array, e.g. 'x', 'boundingbox' or 'fillcolor_code'.
+
+        Returns
+        -------
+        numpy.ndarray
+            Read-only array.
+
+        """
+        array = self._arrays.get(name)
+        if array is None:
+            info = self._index['arrays'][name]
+            shape = tuple(info['shape'])
+            if np.prod(shape) == 0:
+                array = np.zeros(shape, dtype = info['dtype'])
+            else:
+                array = np.memmap(self.filename, dtype = info['dtype'], mode = 'r',
+                                  offset = self._data_start + info['offset'], shape = shape)
+            self._arrays[name] = array
+
+        return array
+
+    def GetColumn(self, column, stimulus = None):
+        """
+        Returns an element column for all stimuli, or for a single stimulus.
+
+        Parameters
+        ----------
+        column : string
+            'x', 'y', 'boundingbox', 'orientation', 'borderwidth', 'opacity',
+            'overridden', 'element_order', or the name of an attribute
+            column followed by '_code'.
+        stimulus : int, optional
+            Index of the stimulus. If None, the column of all stimuli is
+            returned; use element_offsets to find the elements of each stimulus.
+
+        Returns
+        -------
+        numpy.ndarray
+            Values of the column.
+
+        """
+        array = self.GetArray(column)
+        if stimulus is None:
+            return array
+
+        return array[self.element_offsets[stimulus]:self.element_offsets[stimulus + 1]]
+
+    def GetPalette(self, column):
+        """
+        Returns the distinct values of an attribute column across all stimuli.
+        The codes in the '<column>_code' array refer to this list.
+
+        Parameters
+        ----------
+        column : string
+            Name of an attribute column, e.g. 'fillcolor'.
+
+        Returns
+        -------
+        list
+            Value for each code.
+
+        """
+        palette = self._palettes.get(column)
+        if palette is None:
+            palette = _Decoder().decode(self._index['palettes'][column])
+            self._palettes[column] = palette
+
+        return palette
+
+    def GetJSON(self, stimulus):
+        """
+        Returns the compact JSON data of a single stimulus.
+
+        Parameters
+        ----------
+        stimulus : int
+            Index of the stimulus.
+
+        Returns
+        -------
+        dict
+            JSON data of the stimulus, as returned by GetJSON(compact = True).
+
+        """
+        offsets = self.GetArray('spec_offsets')
+        spec = self.GetArray('specs')[offsets[stimulus]:offsets[stimulus + 1]]
+
+        return json.loads(spec.tobytes().decode('utf-8'))
+
+    def GetStimulus(self, stimulus):
+        """
+        Creates a single stimulus from the archive.
+
+        Parameters
+        ----------
+        stimulus : int
+            Index of the stimulus.
+
+        Returns
+        -------
+        Stimulus
+            The stimulus object.
+
+        """
+        return StimulusFromDict(self.GetJSON(stimulus))
+
+    def GetElementsDF(self, stimulus):
+        """
+        Gets a dataframe with the element information of a single stimulus,
+        with the same columns as the GetElementsDF method of the stimulus.
+
+        Parameters
+        ----------
+        stimulus : int
+            Index of the stimulus.
+
+        Returns
+        -------
+        pandas.DataFrame
+            Element information.
+
+        """
+        x = self.GetColumn('x', stimulus)
+        y = self.GetColumn('y', stimulus)
+        if 'integer_positions' in self._index['arrays'] and self.GetArray('integer_positions')[stimulus]:
+            x = x.astype(np.int64)
+            y = y.astype(np.int64)
+        x = x.tolist()
+        y = y.tolist()
+
+        df = {'element_id': list(range(len(x))), 'position': list(zip(x, y))}
+        for column in ElementTable.attribute_columns:
+            palette = self.GetPalette(column)
+            df[column] = [palette[code] for code in self.GetColumn('%s_code'%column, stimulus).tolist()]
+
+        return pd.DataFrame(df, columns = ElementTable.columns)
+
+    def __iter__(self):
+        for i in range(self.n_stimuli):
+            yield self.GetStimulus(i)
+
+class _ArrayWriter:
+    """
+    Collects the chunks of an archive array in a temporary file.
+
+    Parameters
+    ----------
+    dtype : numpy.dtype
+        Type of the array values.
+    item_shape : tuple, optional
+        Shape of each item, e.g. (2,) for boundingboxes. The default is ().
+
+    """
+    def __init__(self, dtype, item_shape = ()):
+        self.dtype = np.dtype(dtype)
+        self.item_shape = tuple(item_shape)
+        self.length = 0
+        self.file = tempfile.TemporaryFile()
+        
+    def Append(self, chunk):
+        chunk = np.ascontiguousarray(chunk, dtype = self.dtype).reshape((-1,) + self.item_shape)
+        self.file.write(chunk.tobytes())
+        self.length += len(chunk)
+        
+    def Close(self):
+        self.file.close()
+
+def _WriteArchive(archive_filename, arrays, header):
+    """
+    Writes the JSON index of an archive and copies the arrays from their
+    temporary files.
+
+    """
+    index = {'schema': SCHEMA, 'version': SCHEMA_VERSION, 'arrays': {}}
+    index.update(header)
+
+    offset = 0
+    for name, writer in arrays.items():
+        index['arrays'][name] = {'dtype': writer.dtype.str, 'shape': [writer.length] + list(writer.item_shape), 'offset': offset}
+        offset = _aligned(offset + writer.length * writer.dtype.itemsize * int(np.prod(writer.item_shape)))
+
+    index_bytes = json.dumps(index, separators = (',', ':')).encode('utf-8')
+    data_start = _aligned(len(_MAGIC) + 8 + len(index_bytes))
+
+    with open(archive_filename, 'wb') as f:
+        f.write(_MAGIC)
+        f.write(struct.pack("<Q", len(index_bytes)))
+        f.write(index_bytes)
+        for name, writer in arrays.items():
+            f.seek(data_start + index['arrays'][name]['offset'])
+            writer.file.seek(0)
+            shutil.copyfileobj(writer.file, f, _COPY_BUFFER_SIZE)
+        f.truncate(data_start + offset)
+
+def _aligned(n_bytes):
+    return -(-n_bytes // _ALIGNMENT) * _ALIGNMENT
+
+def _as_number(value):
+    if isinstance(value, (int, float, np.number)) and not isinstance(value, bool):
+        return float(value)
+
+    return np.nan
+
+def _as_size(value):
+    if isinstance(value, (list, tuple)) and len(value) == 2:
+        return (_as_number(value[0]), _as_number(value[1]))
+
+    return (np.nan, np.nan)
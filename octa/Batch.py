@@ -0,0 +1,209 @@
+"""
+Batch code for the OCTA toolbox
+Module to generate and export many stimuli in parallel
+
+The Order & Complexity Toolbox for Aesthetics (OCTA) Python library is a tool for researchers
+to create stimuli varying in order and complexity on different dimensions.
+Copyright (C) 2021  Eline Van Geert, Christophe Bossens, and Johan Wagemans
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU Lesser General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU Lesser General Public License for more details.
+
+You should have received a copy of the GNU Lesser General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+Contact: eline.vangeert@kuleuven.be
+
+"""
+import csv
+import hashlib
+import json
+import os
+import random
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+
+from .Stimulus import Stimulus
+
+_EXPORT_FORMATS = ["svg", "json", "csv", "png", "jpg", "pdf"]
+
+def GenerateStimuli(source, n_stimuli = None, folder = None, formats = ["svg"], n_workers = None,
+                    seed = None, filename = "stimulus_%05d", scale = None, backend = "html2image", progress = None):
+    """
+    Creates and exports many stimuli, using several processes in parallel.
+
+    Each stimulus gets its own seed, derived from the batch seed and the
+    index of the stimulus. The random module is seeded with this value
+    before the stimulus is created and exported, so that every stimulus can
+    be regenerated independently of the number of workers. Stimuli created
+    without an explicit seed draw their own seed from the random module,
+    and specifications saved with a seed are regenerated exactly. The exported
+    files are written by the workers as soon as a stimulus is ready, and a
+    manifest.csv file with the index, seed and filename of each stimulus is
+    updated as the batch progresses.
+
+    Parameters
+    ----------
+    source : function or list
+        Either a function that receives the stimulus index and returns a
+        stimulus, or a list of stimulus specifications. A specification is
+        the dictionary returned by GetJSON or the name of a JSON file saved
+        with SaveJSON. A function must be defined at the top level of a
+        module, so that it can be sent to the worker processes.
+    n_stimuli : int, optional
+        Number of stimuli to create with a function. Not used for a list of
+        specifications.
+    folder : string, optional
+        Name of the folder in which the files need to be saved. The default
+        is the current working directory.
+    formats : list, optional
+        File formats to export: "svg", "json", "csv", "png", "jpg" or "pdf".
+        The default is ["svg"].
+    n_workers : int, optional
+        Number of worker processes. The default is the number of CPUs. With
+        a single worker, the stimuli are created in the current process.
+    seed : int, optional
+        Seed for the batch. If None, a random seed is chosen. The seed of
+        each stimulus is stored in the manifest file.
+    filename : string, optional
+        Filename template, which is filled in with the stimulus index.
+        The default is "stimulus_%05d".
+    scale : int or float, optional
+        Scaling factor for the png, jpg and pdf exports.
+    backend : string, optional
+        Rasterization backend for the png and jpg exports, see SavePNG.
+        The default is "html2image", as in SavePNG. The "pil" backend is
+        faster but only supports stimuli without images, text, paths and
+        color gradients.
+    progress : function, optional
+        Function that is called with the number of finished stimuli and the
+        total number of stimuli each time a stimulus is ready.
+
+    Returns
+    -------
+    list
+        For each stimulus, a dictionary with its index, seed and the names of
+        the exported files, ordered by index.
+
+    """
+    if callable(source):
+        assert type(n_stimuli) == int and n_stimuli >= 0, "n_stimuli must be provided when source is a function"
+        tasks = [(source, None, i) for i in range(n_stimuli)]
+    elif type(source) == list:
+        tasks = [(None, spec, i) for i, spec in enumerate(source)]
+    else:
+        raise ValueError("WARNING: source must be a function or a list of stimulus specifications")
+
+    for f in formats:
+        if f not in _EXPORT_FORMATS:
+            raise ValueError("WARNING: %s is not a supported export format"%f)
+
+    if folder is None:
+        folder = os.getcwd()
+    os.makedirs(folder, exist_ok = True)
+
+    if seed is None:
+        seed = random.randrange(2**32)
+
+    if n_workers is None:
+        n_workers = os.cpu_count() or 1
+
+    options = {'folder': folder, 'formats': list(formats), 'filename': filename, 'scale': scale, 'backend': backend}
+    tasks = [(factory, spec, index, StimulusSeed(seed, index), options) for factory, spec, index in tasks]
+
+    results = []
+    with open(os.path.join(folder, "manifest.csv"), "w", newline = "") as manifest_file:
+        manifest = csv.writer(manifest_file)
+        manifest.writerow(["index", "seed", "filename", "formats"])
+
+        def finish(result):
+            results.append(result)
+            manifest.writerow([result['index'], result['seed'], result['filename'], ";".join(result['formats'])])
+            manifest_file.flush()
+            if progress is not None:
+                progress(len(results), len(tasks))
+
+        if n_workers == 1:
+            for task in tasks:
+                finish(_GenerateStimulus(task))
+        else:
+            # Only a limited number of tasks is submitted at once, so that
+            # large batches do not have to be sent to the workers up front
+            with ProcessPoolExecutor(max_workers = n_workers) as executor:
+                pending = set()
+                next_task = 0
+                while next_task < len(tasks) or len(pending) > 0:
+                    while next_task < len(tasks) and len(pending) < 4 * n_workers:
+                        pending.add(executor.submit(_GenerateStimulus, tasks[next_task]))
+                        next_task += 1
+
+                    done, pending = wait(pending, return_when = FIRST_COMPLETED)
+                    for future in done:
+                        finish(future.result())
+
+    return sorted(results, key = lambda r: r['index'])
+
+
+def StimulusSeed(seed, index):
+    """
+    Derives the seed of a single stimulus from the seed of a batch.
+
+    Parameters
+    ----------
+    seed : int
+        Seed of the batch.
+    index : int
+        Index of the stimulus in the batch.
+
+    Returns
+    -------
+    int
+        Seed of the stimulus.
+
+    """
+    digest = hashlib.sha256(("%d:%d"%(seed, index)).encode("ascii")).digest()
+
+    return int.from_bytes(digest[:4], "little")
+
+
+def _GenerateStimulus(task):
+    """
+    Creates and exports a single stimulus. Runs in a worker process.
+
+    """
+    factory, spec, index, stimulus_seed, options = task
+
+    random.seed(stimulus_seed)
+
+    if factory is not None:
+        stimulus = factory(index)
+    elif type(spec) == str:
+        with open(spec, 'r') as input_file:
+            stimulus = Stimulus.LoadFromJSONData(json.load(input_file))
+    else:
+        stimulus = Stimulus.LoadFromJSONData(spec)
+
+    filename = options['filename']%index
+    folder = options['folder']
+
+    for f in options['formats']:
+        if f == "svg":
+            stimulus.SaveSVG(filename, scale = options['scale'], folder = folder)
+        elif f == "json":
+            stimulus.SaveJSON(filename, folder = folder)
+        elif f == "csv":
+            stimulus.SaveElementsDF(filename, folder = folder)
+        elif f == "png":
+            stimulus.SavePNG(filename, scale = options['scale'], folder = folder, backend = options['backend'])
+        elif f == "jpg":
+            stimulus.SaveJPG(filename, scale = options['scale'], folder = folder, backend = options['backend'])
+        elif f == "pdf":
+            stimulus.SavePDF(filename, scale = options['scale'], folder = folder)
+
+    return {'index': index, 'seed': stimulus_seed, 'filename': filename, 'formats': options['formats']}
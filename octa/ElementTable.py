@@ -0,0 +1,300 @@
+"""
+ElementTable code for the OCTA toolbox
+Module to store the parameters of all elements in a rendered stimulus
+
+The Order & Complexity Toolbox for Aesthetics (OCTA) Python library is a tool for researchers
+to create stimuli varying in order and complexity on different dimensions.
+Copyright (C) 2021  Eline Van Geert, Christophe Bossens, and Johan Wagemans
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU Lesser General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU Lesser General Public License for more details.
+
+You should have received a copy of the GNU Lesser General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+Contact: eline.vangeert@kuleuven.be
+
+"""
+import numpy as np
+
+from .patterns.GridPattern import _freeze_value
+
+class ElementTable:
+    """
+    Column-wise storage of the parameters of all elements in a stimulus,
+    in presentation order.
+
+    Positions are stored as NumPy arrays. The other element attributes are
+    stored as categorical columns: an array with an integer code per element
+    and a list with the distinct values, so that values that are repeated
+    across the grid are only stored once. Element attribute overrides are
+    applied only to the elements that have them, and are tracked with a
+    boolean mask per column.
+
+    For compatibility, the table can also be used as a list of dictionaries
+    with one dictionary of parameters per element.
+
+    Parameters
+    ----------
+    x : list
+        x-coordinate of each element, in presentation order.
+    y : list
+        y-coordinate of each element, in presentation order.
+    attributes : dict
+        For each attribute column, the list of pattern values per element.
+    overrides : list
+        Dictionary with attribute overrides for each element.
+    element_order : list
+        Element index shown at each presentation position.
+
+    """
+    columns = ['element_id', 'position', 'shape', 'boundingbox', 'fillcolor', 'orientation', 'borderwidth', 'bordercolor',
+               'opacity', 'mirrorvalue', 'link', 'idlabel', 'classlabel', 'data']
+
+    attribute_columns = ['shape', 'boundingbox', 'fillcolor', 'orientation', 'borderwidth', 'bordercolor',
+                         'opacity', 'mirrorvalue', 'link', 'idlabel', 'classlabel', 'data']
+
+    # Key under which each attribute is stored in the element overrides
+    override_keys = {'shape': 'shape', 'boundingbox': 'boundingbox', 'fillcolor': 'fillcolor', 'orientation': 'orientation',
+                     'borderwidth': 'borderwidth', 'bordercolor': 'bordercolor', 'opacity': 'opacity', 'mirrorvalue': 'mirrorvalues',
+                     'link': 'links', 'idlabel': 'idlabels', 'classlabel': 'classlabels', 'data': 'data'}
+
+    def __init__(self, x, y, attributes, overrides, element_order):
+        n_elements = len(element_order)
+        order = np.asarray(element_order, dtype = np.intp)
+
+        self.element_id = np.arange(n_elements)
+        self.x = _numeric_column(x[:n_elements])
+        self.y = _numeric_column(y[:n_elements])
+
+        self._categories = {}
+        self._category_lookup = {}
+        self._codes = {}
+        self.overridden = {}
+
+        for column in ElementTable.attribute_columns:
+            self._categories[column] = []
+            self._category_lookup[column] = {}
+
+            pattern_codes = np.array([self._encode(column, value) for value in attributes[column]], dtype = np.int32)
+            self._codes[column] = pattern_codes[order] if n_elements > 0 else np.zeros(0, dtype = np.int32)
+            self.overridden[column] = np.zeros(n_elements, dtype = bool)
+
+        # Only the elements with overrides need to be visited
+        for i in range(n_elements):
+            element_overrides = overrides[order[i]]
+            if len(element_overrides) == 0:
+                continue
+            for column in ElementTable.attribute_columns:
+                key = ElementTable.override_keys[column]
+                if key in element_overrides:
+                    self._codes[column][i] = self._encode(column, element_overrides[key])
+                    self.overridden[column][i] = True
+
+    def SetElement(self, i, values, element_overrides):
+        """
+        Replaces the parameters of a single element.
+
+        Parameters
+        ----------
+        i : int
+            Presentation position of the element.
+        values : dict
+            Pattern value of each attribute column for the element.
+        element_overrides : dict
+            Attribute overrides for the element.
+
+        """
+        for column in ElementTable.attribute_columns:
+            key = ElementTable.override_keys[column]
+            if key in element_overrides:
+                self._codes[column][i] = self._encode(column, element_overrides[key])
+                self.overridden[column][i] = True
+            else:
+                self._codes[column][i] = self._encode(column, values[column])
+                self.overridden[column][i] = False
+
+    def _encode(self, column, value):
+        """
+        Returns the code of a value in a categorical column, adding the value
+        to the categories if it is new.
+
+        """
+        key = _freeze_value(value)
+        lookup = self._category_lookup[column]
+        code = lookup.get(key)
+        if code is None:
+            code = len(self._categories[column])
+            lookup[key] = code
+            self._categories[column].append(value)
+
+        return code
+
+    def __len__(self):
+        return len(self.element_id)
+
+    def __getitem__(self, i):
+        """
+        Returns the parameters of a single element as a dictionary.
+
+        """
+        if i < 0:
+            i += len(self)
+        if i < 0 or i >= len(self):
+            raise IndexError("element index out of range")
+
+        row = {'element_id': int(self.element_id[i]),
+               'position': (self.x[i].item(), self.y[i].item())}
+        for column in ElementTable.attribute_columns:
+            row[column] = self._categories[column][self._codes[column][i]]
+
+        return row
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+    def GetColumn(self, column):
+        """
+        Returns the values of a column for all elements.
+
+        Parameters
+        ----------
+        column : string
+            Name of the column.
+
+        Returns
+        -------
+        list
+            Value for each element, in presentation order.
+
+        """
+        if column == 'element_id':
+            return self.element_id.tolist()
+        if column == 'position':
+            return list(zip(self.x.tolist(), self.y.tolist()))
+
+        categories = self._categories[column]
+
+        return [categories[code] for code in self._codes[column].tolist()]
+
+    def GetCategories(self, column):
+        """
+        Returns the categorical representation of an attribute column.
+
+        Parameters
+        ----------
+        column : string
+            Name of an attribute column.
+
+        Returns
+        -------
+        codes : numpy.ndarray
+            Code of the value of each element, in presentation order.
+        categories : list
+            Value for each code.
+
+        """
+        return self._codes[column], self._categories[column]
+
+    def GetUniqueValues(self, column):
+        """
+        Returns the distinct values in a column. Values are compared by type
+        and value, so the result can contain values that compare equal.
+
+        Parameters
+        ----------
+        column : string
+            Name of an attribute column.
+
+        Returns
+        -------
+        list
+            Distinct values that are used by at least one element.
+
+        """
+        categories = self._categories[column]
+
+        return [categories[code] for code in np.unique(self._codes[column]).tolist()]
+
+    def CountUniqueElements(self, columns):
+        """
+        Counts the number of elements that differ in at least one of the
+        given columns. Values are compared by their string representation.
+
+        Parameters
+        ----------
+        columns : list
+            Names of attribute columns.
+
+        Returns
+        -------
+        int
+            Number of distinct elements.
+
+        """
+        if len(self) == 0:
+            return 0
+        if len(columns) == 0:
+            return 1
+
+        string_codes = []
+        for column in columns:
+            # Categories with the same string representation get the same code
+            strings = [str(value) for value in self._categories[column]]
+            string_lookup = {}
+            category_codes = np.array([string_lookup.setdefault(s, len(string_lookup)) for s in strings], dtype = np.int32)
+            string_codes.append(category_codes[self._codes[column]])
+
+        return len(np.unique(np.stack(string_codes, axis = 1), axis = 0))
+
+    def GetDeviants(self, column, pattern_values):
+        """
+        Finds the elements of which the value differs from the pattern value
+        at the same presentation position.
+
+        Parameters
+        ----------
+        column : string
+            Name of an attribute column.
+        pattern_values : list
+            Pattern value for each presentation position.
+
+        Returns
+        -------
+        numpy.ndarray
+            Boolean array that is True for each deviant element.
+
+        """
+        n_elements = len(self)
+        categories = self._categories[column]
+        pattern_codes = np.array([self._encode(column, value) for value in pattern_values[:n_elements]], dtype = np.int32)
+
+        deviants = self._codes[column][:len(pattern_codes)] != pattern_codes
+
+        # Different categories can still hold values that compare equal
+        for i in np.flatnonzero(deviants).tolist():
+            deviants[i] = categories[self._codes[column][i]] != categories[pattern_codes[i]]
+
+        return deviants
+
+
+def _numeric_column(values):
+    """
+    Converts a list of numbers to a NumPy array, using an integer array if
+    all values are integers. NumPy arrays are used as they are.
+
+    """
+    if isinstance(values, np.ndarray):
+        return values
+    if all(type(value) == int for value in values):
+        return np.array(values, dtype = np.int64)
+
+    return np.array(values, dtype = float)
@@ -22,27 +22,28 @@ along with this program.  If not, see <https://www.gnu.org/licenses/>.
 Contact: eline.vangeert@kuleuven.be
 
 """
+import math
 import numpy as np
 import random
-import svgpathtools
-
-from .patterns.Pattern import Pattern
+from .patterns.Pattern import Pattern, _numpy_generator
+from .shapes.PathGeometry import GetArcLengthTable, GetSvgFileOutline, SampleArcLength
 
 class Positions:
     """
-    The Positions object contains two Pattern objects for each of the
-    x and y coordinates.
+    The Positions object contains the (x,y) coordinates of all elements,
+    stored as an (n, 2) NumPy array. The array holds integers when all
+    coordinates are integers, and floats otherwise.
     
-    Getters are defined to immediately access the values in the Pattern
-    objects.
+    Getters are defined to access the x and y coordinates as lists, and
+    the array itself without copying it.
     
     Static methods are defined for generating template position structures
     
     Parameters
     ----------
-    x : Pattern
+    x : Pattern or list
         Object that contains the values for the x-coordinates
-    y : Pattern
+    y : Pattern or list
         Object that contains the values for the y-coordinates
     positiontype : string
         Indicates the type of position definition used
@@ -50,8 +51,7 @@ class Positions:
         Provides the parameters for the positiontype used
     """
     def __init__(self, x, y, positiontype = None, positionparameters = {}):
-        self._x = x
-        self._y = y
+        self._xy = _position_array(x, y)
         self._position_type = positiontype  
         self._position_parameters = positionparameters
         self._deviation = None
@@ -59,10 +59,21 @@ class Positions:
         self._jitter = None
         self._jitter_parameters = {}
         
+    def __setstate__(self, state):
+        # Positions saved by earlier versions store x and y as two Patterns
+        if '_x' in state:
+            state = dict(state)
+            state['_xy'] = _position_array(state.pop('_x'), state.pop('_y'))
+            
+        self.__dict__.update(state)
+        
+    def __len__(self):
+        return len(self._xy)
+        
     @property
     def x(self):
         """
-        Returns the values in the x Pattern
+        Returns the x coordinates
 
         Returns
         -------
@@ -70,23 +81,12 @@ class Positions:
             List with values for the x coordinate.
 
         """
-        # position_jitter = self._CalculatePositionJitter()
-        # position_deviations = self._CalculatePositionDeviations()
-        
-        x = list(self._x.pattern)
-        
-        # for i in range(len(position_deviations['x'])):
-        #     x[i] += position_deviations['x'][i]
-        
-        # for i in range(len(position_jitter['x'])):
-        #     x[i] += position_jitter['x'][i]
-            
-        return x
+        return self._xy[:, 0].tolist()
     
     @property
     def y(self):
         """
-        Returns the values in the y Pattern
+        Returns the y coordinates
 
         Returns
         -------
@@ -94,43 +94,71 @@ class Positions:
             List with values for the y coordinate.
 
         """
-        # position_jitter = self._CalculatePositionJitter()
-        # position_deviations = self._CalculatePositionDeviations()
-        
-        y = list(self._y.pattern)
-        
-        # for i in range(len(position_deviations['y'])):
-        #     y[i] += position_deviations['y'][i]
-        
-        # for i in range(len(position_jitter['y'])):
-        #     y[i] += position_jitter['y'][i]
+        return self._xy[:, 1].tolist()
+    
+    @property
+    def xy(self):
+        """
+        Returns the coordinates without copying them. Position deviations
+        and jitter are not included.
+
+        Returns
+        -------
+        numpy.ndarray
+            Read-only array of shape (n, 2) with the (x,y) coordinates.
 
-        return y
+        """
+        return _read_only(self._xy)
         
-    def GetPositions(self):
+    def GetPositions(self, rng = None):
         """
         Returns the actual position values in the stimulus (including position jitter and position deviations)
 
+        Parameters
+        ----------
+        rng : random.Random or numpy.random.Generator, optional
+            Random number generator that provides the position jitter. The
+            default is the global random module.
+
+        Returns
+        -------
+        tuple
+            List with the x coordinates and list with the y coordinates.
+
         """
-        position_jitter = self._CalculatePositionJitter()
-        position_deviations = self._CalculatePositionDeviations()
-        
-        x = list(self._x.pattern)
-        y = list(self._y.pattern)
-        
-        for i in range(len(position_deviations['x'])):
-            x[i] += position_deviations['x'][i]
+        xy = self.GetPositionArray(rng)
         
-        for i in range(len(position_deviations['y'])):
-            y[i] += position_deviations['y'][i]
-        
-        for i in range(len(position_jitter['x'])):
-            x[i] += position_jitter['x'][i]
+        return (xy[:, 0].tolist(), xy[:, 1].tolist())
+    
+    def GetPositionArray(self, rng = None):
+        """
+        Returns the actual position values in the stimulus (including 
+        position jitter and position deviations) as an array. Without
+        deviations or jitter, the stored coordinates are returned without
+        copying them.
+
+        Parameters
+        ----------
+        rng : random.Random or numpy.random.Generator, optional
+            Random number generator that provides the position jitter. The
+            default is the global random module.
+
+        Returns
+        -------
+        numpy.ndarray
+            Read-only array of shape (n, 2) with the (x,y) coordinates.
+
+        """
+        position_jitter = self._CalculatePositionJitter(rng)
+        position_deviations = self._CalculatePositionDeviations()
         
-        for i in range(len(position_jitter['y'])):
-            y[i] += position_jitter['y'][i]
+        xy = self._xy
+        if position_deviations is not None:
+            xy = xy + position_deviations
+        if position_jitter is not None:
+            xy = xy + position_jitter
         
-        return (x, y)
+        return _read_only(xy)
     
     def SetPositionDeviations(self, element_id = [0], x_offset = None, y_offset = None):
         """
@@ -180,18 +208,20 @@ class Positions:
         return self
     
     def _CalculatePositionDeviations(self):
-        x_deviations = [0 for _ in range(len(self._x.pattern))]
-        y_deviations = [0 for _ in range(len(self._y.pattern))]
-            
-        if self._deviation == True:
-            if self._deviation_parameters['x_offset'] is not None:
-                for i in range(len(self._deviation_parameters['element_id'])):
-                    x_deviations[self._deviation_parameters['element_id'][i]] = self._deviation_parameters['x_offset'][i]
-            if self._deviation_parameters['y_offset'] is not None:
-                for i in range(len(self._deviation_parameters['element_id'])):
-                    y_deviations[self._deviation_parameters['element_id'][i]]  = self._deviation_parameters['y_offset'][i]
+        if self._deviation != True:
+            return None
+        
+        element_id = self._deviation_parameters['element_id']
+        offsets = [_numeric_array(self._deviation_parameters[key]) for key in ['x_offset', 'y_offset']
+                   if self._deviation_parameters[key] is not None]
+        
+        deviations = np.zeros(self._xy.shape, dtype = np.result_type(self._xy, *offsets))
+        if self._deviation_parameters['x_offset'] is not None:
+            deviations[element_id, 0] = self._deviation_parameters['x_offset'][:len(element_id)]
+        if self._deviation_parameters['y_offset'] is not None:
+            deviations[element_id, 1] = self._deviation_parameters['y_offset'][:len(element_id)]
                     
-        return {'x' : x_deviations, 'y' : y_deviations}
+        return deviations
     
     def SetPositionJitter(self, axis = "xy", distribution = "normal", **kwargs):
         """
@@ -244,35 +274,180 @@ class Positions:
         return self
     
     
-    def _CalculatePositionJitter(self):
-        x_jitter = [0 for _ in range(len(self._x.pattern))]
-        y_jitter = [0 for _ in range(len(self._y.pattern))]
-            
+    def _CalculatePositionJitter(self, rng = None):
         if self._jitter == "normal":
-            if self._jitter_parameters['axis'] == 'xy':
-                x_jitter = [random.normalvariate(self._jitter_parameters['mu'], self._jitter_parameters['std']) for _ in range(len(self._x.pattern))]
-                y_jitter = [random.normalvariate(self._jitter_parameters['mu'], self._jitter_parameters['std']) for _ in range(len(self._y.pattern))]
-            elif self._jitter_parameters['axis'] == 'x=y':   
-                x_jitter = [random.normalvariate(self._jitter_parameters['mu'], self._jitter_parameters['std']) for _ in range(len(self._x.pattern))]
-                y_jitter = x_jitter
-            elif self._jitter_parameters['axis'] == 'x':
-                x_jitter = [random.normalvariate(self._jitter_parameters['mu'], self._jitter_parameters['std']) for _ in range(len(self._x.pattern))]
-            elif self._jitter_parameters['axis'] == 'y':
-                y_jitter = [random.normalvariate(self._jitter_parameters['mu'], self._jitter_parameters['std']) for _ in range(len(self._y.pattern))]
-                
+            generator = _numpy_generator(rng)
+            sample = lambda n: generator.normal(self._jitter_parameters['mu'], self._jitter_parameters['std'], n)
         elif self._jitter == "uniform":
-            if self._jitter_parameters['axis'] == 'xy':
-                x_jitter = [random.uniform(self._jitter_parameters['min_val'], self._jitter_parameters['max_val']) for _ in range(len(self._x.pattern))]
-                y_jitter = [random.uniform(self._jitter_parameters['min_val'], self._jitter_parameters['max_val']) for _ in range(len(self._y.pattern))]
-            elif self._jitter_parameters['axis'] == 'x=y':
-                x_jitter = [random.uniform(self._jitter_parameters['min_val'], self._jitter_parameters['max_val']) for _ in range(len(self._x.pattern))]
-                y_jitter = x_jitter        
-            elif self._jitter_parameters['axis'] == 'x':
-                x_jitter = [random.uniform(self._jitter_parameters['min_val'], self._jitter_parameters['max_val']) for _ in range(len(self._x.pattern))]
-            elif self._jitter_parameters['axis'] == 'y':
-                y_jitter = [random.uniform(self._jitter_parameters['min_val'], self._jitter_parameters['max_val']) for _ in range(len(self._y.pattern))]
-        
-        return {'x' : x_jitter, 'y' : y_jitter}
+            generator = _numpy_generator(rng)
+            sample = lambda n: generator.uniform(self._jitter_parameters['min_val'], self._jitter_parameters['max_val'], n)
+        else:
+            return None
+        
+        n_positions = len(self._xy)
+        jitter = np.zeros((n_positions, 2))
+        
+        # The jitter values for each axis are drawn at once
+        if self._jitter_parameters['axis'] == 'xy':
+            jitter[:, 0] = sample(n_positions)
+            jitter[:, 1] = sample(n_positions)
+        elif self._jitter_parameters['axis'] == 'x=y':
+            jitter[:, :] = sample(n_positions)[:, np.newaxis]
+        elif self._jitter_parameters['axis'] == 'x':
+            jitter[:, 0] = sample(n_positions)
+        elif self._jitter_parameters['axis'] == 'y':
+            jitter[:, 1] = sample(n_positions)
+        else:
+            return None
+        
+        return jitter
+    
+    def Transform(self, matrix, offset = (0, 0)):
+        """
+        Applies an affine transformation to all positions: each position p
+        is replaced by matrix @ p + offset.
+        
+        After the transformation, the positions are stored as custom
+        positions.
+
+        Parameters
+        ----------
+        matrix : list or numpy.ndarray
+            2x2 transformation matrix.
+        offset : tuple, optional
+            Translation that is added after the matrix product. The
+            default is (0, 0).
+
+        Returns
+        -------
+        Positions
+            The updated Positions object
+
+        """
+        matrix = np.asarray(matrix, dtype = float)
+        if matrix.shape != (2, 2):
+            raise ValueError("WARNING: the transformation matrix must be a 2x2 matrix")
+            
+        self._SetPositionArray(self._xy @ matrix.T + np.asarray(offset, dtype = float))
+        
+        return self
+    
+    def Translate(self, dx = 0, dy = 0):
+        """
+        Moves all positions.
+
+        Parameters
+        ----------
+        dx : int or float, optional
+            Value added to the x coordinates. The default is 0.
+        dy : int or float, optional
+            Value added to the y coordinates. The default is 0.
+
+        Returns
+        -------
+        Positions
+            The updated Positions object
+
+        """
+        self._SetPositionArray(self._xy + _numeric_array([dx, dy]))
+        
+        return self
+    
+    def Rotate(self, angle, center = None):
+        """
+        Rotates all positions around a center point, in the same direction
+        as the element orientations.
+
+        Parameters
+        ----------
+        angle : int or float
+            Rotation angle in degrees.
+        center : tuple, optional
+            (x,y) coordinates of the rotation center. The default is the
+            center of all positions.
+
+        Returns
+        -------
+        Positions
+            The updated Positions object
+
+        """
+        radians = np.deg2rad(angle)
+        matrix = [[np.cos(radians), -np.sin(radians)],
+                  [np.sin(radians),  np.cos(radians)]]
+        
+        return self._TransformAround(matrix, center)
+    
+    def Scale(self, scale_x, scale_y = None, center = None):
+        """
+        Scales the distances between all positions and a center point.
+
+        Parameters
+        ----------
+        scale_x : int or float
+            Scale factor along the x axis.
+        scale_y : int or float, optional
+            Scale factor along the y axis. The default is scale_x.
+        center : tuple, optional
+            (x,y) coordinates of the center point. The default is the
+            center of all positions.
+
+        Returns
+        -------
+        Positions
+            The updated Positions object
+
+        """
+        if scale_y is None:
+            scale_y = scale_x
+            
+        return self._TransformAround([[scale_x, 0], [0, scale_y]], center)
+    
+    def Shear(self, shear_x = 0, shear_y = 0, center = None):
+        """
+        Shears all positions relative to a center point. The x coordinates
+        move with shear_x times the y distance to the center point, and the
+        y coordinates with shear_y times the x distance.
+
+        Parameters
+        ----------
+        shear_x : int or float, optional
+            Shear factor along the x axis. The default is 0.
+        shear_y : int or float, optional
+            Shear factor along the y axis. The default is 0.
+        center : tuple, optional
+            (x,y) coordinates of the center point. The default is the
+            center of all positions.
+
+        Returns
+        -------
+        Positions
+            The updated Positions object
+
+        """
+        return self._TransformAround([[1, shear_x], [shear_y, 1]], center)
+    
+    def _TransformAround(self, matrix, center = None):
+        """
+        Applies a linear transformation that keeps the center point in place.
+
+        """
+        if center is None:
+            center = self._xy.mean(axis = 0) if len(self._xy) > 0 else np.zeros(2)
+        center = np.asarray(center, dtype = float)
+        
+        return self.Transform(matrix, center - np.asarray(matrix, dtype = float) @ center)
+    
+    def _SetPositionArray(self, xy):
+        """
+        Replaces the coordinates. The new coordinates are stored as custom
+        positions, so that they can be created again from the position
+        parameters.
+
+        """
+        self._xy = xy
+        self._position_type = "CustomPositions"
+        self._position_parameters = {'x': Pattern(self.x), 'y': Pattern(self.y)}
             
         
     def CreateRectGrid(n_rows, n_cols, row_spacing = 50, col_spacing= 50):
@@ -429,6 +604,8 @@ class Positions:
     def CreateShape(n_elements, src = None, path = None, width = 300, height = 300):
         """
         Generates element positions on the circumference of a custom shape (path) in an equally spaced way.
+        The elements are placed at equal distances along the path. For an
+        SVG file, the first path in the file is used.
 
         Parameters
         ----------
@@ -450,51 +627,36 @@ class Positions:
 
         """
         if(src is not None):
-            paths, attributes = svgpathtools.svg2paths(src)    
+            d, (max_xsize, max_ysize) = GetSvgFileOutline(src)
         else:
-            paths = svgpathtools.parse_path(path)
-        
-        n_paths = len(paths)
-        allpaths = []
-        
-        for i in range(0,n_paths):
-            mypath = paths[i]
-            xmin, xmax, ymin, ymax = mypath.bbox()
-            xsize = xmax - xmin
-            ysize = ymax - ymin
-            allpaths.append([xsize, ysize])
+            d = path
+            xmin, xmax, ymin, ymax = GetArcLengthTable(d)[2]
+            max_xsize = xmax - xmin
+            max_ysize = ymax - ymin
             
-        max_xsize = max([item[0] for item in allpaths])
-        max_ysize = max([item[1] for item in allpaths])
         scale_x_parameter = width / max_xsize
         scale_y_parameter = height / max_ysize        
 
-        step_size = float(1 / n_elements)
+        xy = SampleArcLength(d, n_elements)
         
-        xpositions = []
-        ypositions = []
-        
-        for n in range(n_elements):
-            coords = paths[0].point(step_size * n)
-            if '+' in str(coords):
-                x,y = str(coords).replace("(", "").replace(")", "").replace("j", "").split("+")
-            else:
-                x,y = 0, str(coords).replace("(", "").replace(")", "").replace("j", "")
-            xpositions.append(float(x))
-            ypositions.append(float(y))
-                
-        x = Pattern(list( [xposition*scale_x_parameter for xposition in xpositions] ))
-        y = Pattern(list( [yposition*scale_y_parameter for yposition in ypositions] ))
+        x = xy[:, 0] * scale_x_parameter
+        y = xy[:, 1] * scale_y_parameter
 
         positiontype = "Shape"
         positionparameters = {'n_elements' : n_elements, 'src' : src, 'path' : path, 'width' : width, 'height' : height}
         
         return Positions(x, y, positiontype, positionparameters)
     
-    def CreateRandomPositions(n_elements, width = 300, height = 300, min_distance = 30, max_iterations = 10):
+    def CreateRandomPositions(n_elements, width = 300, height = 300, min_distance = 30, max_iterations = 10, seed = None, boundingboxes = None):
         """
         Generates random (x,y) positions
 
+        The positions are drawn uniformly as long as the area is sparsely
+        filled. For dense layouts, the free space is filled with Poisson-disk
+        sampling and the remaining positions are chosen from these samples.
+        A background grid is used to find nearby positions, so the running
+        time grows linearly with the number of elements.
+
         Parameters
         ----------
         n_elements : int
@@ -508,6 +670,15 @@ class Positions:
         max_iterations : int, optional
             How many times the algorithm should try to generate positions if
             the min_distance criterion can not be satisfied. The default is 10.
+        seed : int, optional
+            Seed for the random number generator, stored in the position
+            parameters so that the same positions can be generated again.
+            If None, a seed is drawn from the global random module.
+        boundingboxes : list, optional
+            Boundingbox of each element. If provided, the distance between
+            two elements is at least the sum of the radii of the circles
+            around their boundingboxes, so that elements do not overlap.
+            The list is repeated if it is shorter than n_elements.
 
         Returns
         -------
@@ -515,52 +686,265 @@ class Positions:
             Positions object with the generated (x,y) positions
 
         """
-        outer_iteration_count = 0
-        all_elements_valid = False
-        
-        while all_elements_valid == False and outer_iteration_count < max_iterations:
-            positions = []
+        if seed is None:
+            seed = random.randrange(2**32)
+        rng = random.Random(seed)
+        
+        radii = None
+        if boundingboxes is not None:
+            radii = []
+            for boundingbox in Pattern(boundingboxes).RepeatPatternToSize(n_elements).pattern:
+                if type(boundingbox) == int or type(boundingbox) == float:
+                    boundingbox = (boundingbox, boundingbox)
+                radii.append(0.5 * (boundingbox[0]**2 + boundingbox[1]**2)**0.5)
+        
+        positions = None
+        iteration_count = 0
+        while positions is None and iteration_count < max_iterations:
+            positions = _SampleRandomPositions(n_elements, width, height, min_distance, radii, rng)
+            iteration_count += 1
             
-            # Start generating new positions
-            for i in range(n_elements):
-                valid_point = False
-                inner_iteration_count = 0
-                
-                # Check if the new position is sufficiently separated from previous ones
-                while valid_point == False and inner_iteration_count < max_iterations:                  
-                    x = random.randint(0, width)
-                    y = random.randint(0, height)
-                    
-                    valid_point = True
-                    for p in positions:
-                        if ((p[0] - x)**2 + (p[1] - y)**2)**0.5 < min_distance:
-                            valid_point = False
-                            break
-                        
-                    inner_iteration_count += 1
-                        
-                if valid_point:
-                    positions.append((x, y))
-                else:
-                    break
-                    
-            if len(positions) == n_elements:
-                all_elements_valid = True
-                
-            outer_iteration_count += 1
-            
-        assert all_elements_valid, "CreateRandomPositions failed to produce %d elements with a minimum distance %d\n. Try changin the max_iterations, or decrease the number of elements and/or minimum distance."%(n_elements, min_distance)
+        assert positions is not None, "CreateRandomPositions failed to produce %d elements with a minimum distance %d\n. Try changin the max_iterations, or decrease the number of elements and/or minimum distance."%(n_elements, min_distance)
         
         x = Pattern(list( p[0] for p in positions))
         y = Pattern(list( p[1] for p in positions))
         
         positiontype = "RandomPositions"
         positionparameters = {'n_elements' : n_elements, 'width' : width, 'height' : height,
-                              'min_distance' :  min_distance, 'max_iterations' : max_iterations}
+                              'min_distance' :  min_distance, 'max_iterations' : max_iterations, 'seed' : seed,
+                              'boundingboxes' : boundingboxes}
         
         return Positions(x, y, positiontype, positionparameters)
                        
 
+
+def _numeric_array(values):
+    """
+    Converts numbers to a NumPy array, using an integer array if all values
+    are integers.
+
+    """
+    if isinstance(values, np.ndarray):
+        return values.astype(np.int64 if _is_integer_dtype(values.dtype) else np.float64)
+    
+    values = list(values)
+    if all(isinstance(value, (int, np.integer)) and not isinstance(value, (bool, np.bool_)) for value in values):
+        return np.array(values, dtype = np.int64)
+    
+    return np.array(values, dtype = np.float64)
+
+def _is_integer_dtype(dtype):
+    return np.issubdtype(dtype, np.integer) and not np.issubdtype(dtype, np.bool_)
+
+def _position_array(x, y):
+    """
+    Combines the x and y coordinates into an array of shape (n, 2).
+
+    """
+    if isinstance(x, np.ndarray) and isinstance(y, np.ndarray):
+        if len(x) != len(y):
+            raise ValueError("WARNING: the number of x coordinates (%d) and y coordinates (%d) must be equal"%(len(x), len(y)))
+        return _numeric_array(np.column_stack((x, y)))
+    
+    if isinstance(x, Pattern):
+        x = x.pattern
+    if isinstance(y, Pattern):
+        y = y.pattern
+    if len(x) != len(y):
+        raise ValueError("WARNING: the number of x coordinates (%d) and y coordinates (%d) must be equal"%(len(x), len(y)))
+        
+    xy = _numeric_array(list(x) + list(y))
+    
+    return xy.reshape(2, len(x)).T.copy()
+
+def _read_only(array):
+    """
+    Returns a read-only view on an array.
+
+    """
+    view = array.view()
+    view.flags.writeable = False
+    
+    return view
+
+def _SampleRandomPositions(n_elements, width, height, min_distance, radii, rng, n_candidates = 30):
+    """
+    Draws random positions for all elements in a single attempt.
+    
+    Elements are first placed at uniformly drawn positions. When the area
+    becomes too crowded for this to succeed, the free space is filled with
+    Poisson-disk sampling (Bridson's algorithm) and the remaining elements
+    are placed at randomly chosen positions from this set. A background grid
+    with cells smaller than the minimum distance is used in both steps, so
+    only a few nearby elements need to be checked for each candidate.
+
+    Parameters
+    ----------
+    n_elements : int
+        The number of random positions.
+    width : int or float
+        The width of the area.
+    height : int or float
+        The height of the area.
+    min_distance : int or float
+        Minimum distance between all positions.
+    radii : list or None
+        Radius of each element, or None if only min_distance applies.
+    rng : random.Random
+        Random number generator.
+    n_candidates : int, optional
+        Number of candidates that are tried for an element, or around a
+        position in the Poisson-disk step. The default is 30.
+
+    Returns
+    -------
+    list or None
+        List with an (x,y) tuple per element, or None if the elements
+        could not be placed.
+
+    """
+    if radii is None:
+        radii = [0] * n_elements
+        
+    spacing = max(min_distance, 2 * min(radii)) if n_elements > 0 else min_distance
+    if spacing <= 0:
+        return [(rng.uniform(0, width), rng.uniform(0, height)) for _ in range(n_elements)]
+    
+    cell_size = spacing / 2**0.5
+    max_radius = max(radii)
+    positions = [None] * n_elements
+    grid = {}
+    
+    def fits(element, x, y):
+        reach = int(max(min_distance, radii[element] + max_radius) / cell_size) + 1
+        gx, gy = int(x / cell_size), int(y / cell_size)
+        for nx in range(gx - reach, gx + reach + 1):
+            for ny in range(gy - reach, gy + reach + 1):
+                neighbour = grid.get((nx, ny))
+                if neighbour is not None:
+                    px, py = positions[neighbour]
+                    required_distance = max(min_distance, radii[element] + radii[neighbour])
+                    if (px - x)**2 + (py - y)**2 < required_distance**2:
+                        return False
+        return True
+    
+    def place(element, x, y):
+        positions[element] = (x, y)
+        grid[(int(x / cell_size), int(y / cell_size))] = element
+        
+    # 1. Uniformly drawn positions, largest elements first
+    order = sorted(range(n_elements), key = lambda i: -radii[i])
+    remaining = []
+    for element in order:
+        for _ in range(n_candidates):
+            x, y = rng.uniform(0, width), rng.uniform(0, height)
+            if fits(element, x, y):
+                place(element, x, y)
+                break
+        else:
+            remaining.append(element)
+            
+    if len(remaining) == 0:
+        return positions
+    
+    # 2. Fill the free space with Poisson-disk samples and place the
+    # remaining elements on those
+    placed = [positions[i] for i in range(n_elements) if positions[i] is not None]
+    sites = _PoissonDiskSites(width, height, spacing, rng, placed, n_candidates)
+    rng.shuffle(sites)
+    
+    for element in remaining:
+        for site_index in range(len(sites)):
+            x, y = sites[site_index]
+            if fits(element, x, y):
+                place(element, x, y)
+                sites[site_index] = sites[-1]
+                sites.pop()
+                break
+        else:
+            return None
+        
+    return positions
+
+def _PoissonDiskSites(width, height, spacing, rng, start_sites, n_candidates = 30):
+    """
+    Fills the free space in a rectangular area with random positions that
+    are at least spacing apart, using Bridson's Poisson-disk sampling algorithm.
+
+    Parameters
+    ----------
+    width : int or float
+        The width of the area.
+    height : int or float
+        The height of the area.
+    spacing : int or float
+        Minimum distance between the positions.
+    rng : random.Random
+        Random number generator.
+    start_sites : list
+        Positions that are already taken, as (x,y) tuples. These are not
+        included in the result.
+    n_candidates : int, optional
+        Number of candidates that are tried around a position before it
+        is considered complete. The default is 30.
+
+    Returns
+    -------
+    list
+        List of new (x,y) tuples.
+
+    """
+    # A cell of the background grid contains at most one position, so only
+    # the surrounding cells need to be checked for a new candidate. The
+    # corner cells at distance 2 can never be closer than spacing.
+    cell_size = spacing / 2**0.5
+    neighbour_offsets = [(dx, dy) for dx in range(-2, 3) for dy in range(-2, 3) if abs(dx) + abs(dy) < 4]
+    spacing_squared = spacing**2
+    grid = {}
+    
+    if len(start_sites) == 0:
+        start_sites = [(rng.uniform(0, width), rng.uniform(0, height))]
+        sites = list(start_sites)
+    else:
+        sites = []
+        
+    for x, y in start_sites:
+        grid[(int(x / cell_size), int(y / cell_size))] = (x, y)
+    active = list(start_sites)
+    
+    while len(active) > 0:
+        active_index = rng.randrange(len(active))
+        cx, cy = active[active_index]
+        
+        found_site = False
+        for _ in range(n_candidates):
+            # Candidates are drawn uniformly from the ring between spacing and 2 * spacing
+            distance = spacing * (1 + 3 * rng.random())**0.5
+            angle = 2 * math.pi * rng.random()
+            x = cx + distance * math.cos(angle)
+            y = cy + distance * math.sin(angle)
+            
+            if x < 0 or x > width or y < 0 or y > height:
+                continue
+            
+            gx, gy = int(x / cell_size), int(y / cell_size)
+            for dx, dy in neighbour_offsets:
+                neighbour = grid.get((gx + dx, gy + dy))
+                if neighbour is not None and (neighbour[0] - x)**2 + (neighbour[1] - y)**2 < spacing_squared:
+                    break
+            else:
+                sites.append((x, y))
+                grid[(gx, gy)] = (x, y)
+                active.append((x, y))
+                found_site = True
+                break
+            
+        if not found_site:
+            active[active_index] = active[-1]
+            active.pop()
+            
+    return sites
+
     
 if __name__ == '__main__':
     positions = Positions.CreateSineGrid(3, 5, 50, 50, A = 50, f = 1/250)
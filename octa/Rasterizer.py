@@ -0,0 +1,415 @@
+"""
+Rasterizer code for the OCTA toolbox
+Module to convert rendered stimuli into bitmap images without a browser
+
+The Order & Complexity Toolbox for Aesthetics (OCTA) Python library is a tool for researchers
+to create stimuli varying in order and complexity on different dimensions.
+Copyright (C) 2021  Eline Van Geert, Christophe Bossens, and Johan Wagemans
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU Lesser General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU Lesser General Public License for more details.
+
+You should have received a copy of the GNU Lesser General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+Contact: eline.vangeert@kuleuven.be
+
+"""
+import math
+import re
+
+from PIL import Image, ImageColor, ImageDraw
+
+# Elements that only describe changes over time. The rasterizer draws the
+# static state of the stimulus, so these are skipped.
+_ANIMATION_ELEMENTS = ["animate", "set", "animateTransform", "animateMotion", "animateColor"]
+
+_IDENTITY = (1, 0, 0, 1, 0, 0)
+
+def RasterizeDrawing(dwg, width, height, scale = 1, antialias = 4):
+    """
+    Converts an svgwrite Drawing into a bitmap image.
+
+    Supports rect, ellipse, circle, polygon, polyline and line elements with
+    solid fill and stroke colors, opacity, transforms, clip paths and masks,
+    which covers the Rectangle, Ellipse, Triangle, Polygon and RegularPolygon
+    shapes. Animations are drawn in their initial state. Other elements and
+    color gradients raise a ValueError.
+
+    Parameters
+    ----------
+    dwg : svgwrite.Drawing
+        The drawing to convert, e.g. the dwg attribute of a rendered stimulus.
+    width : float
+        Width of the drawing.
+    height : float
+        Height of the drawing.
+    scale : int or float, optional
+        Scaling factor applied to the drawing size. The default is 1.
+    antialias : int, optional
+        Supersampling factor used for anti-aliasing. The default is 4.
+
+    Returns
+    -------
+    PIL.Image.Image
+        RGB image of the drawing on a white background.
+
+    """
+    assert type(antialias) == int and antialias >= 1, "antialias must be a positive integer"
+
+    out_size = (math.ceil(width * scale), math.ceil(height * scale))
+    canvas_size = (out_size[0] * antialias, out_size[1] * antialias)
+
+    rasterizer = _Rasterizer(dwg, canvas_size)
+    canvas = Image.new("RGB", canvas_size, (255, 255, 255))
+    rasterizer.draw_children(canvas, dwg, _scale_matrix(scale * antialias, scale * antialias), {})
+
+    if antialias > 1:
+        canvas = canvas.resize(out_size, Image.BOX)
+
+    return canvas
+
+
+class _Rasterizer:
+    def __init__(self, dwg, canvas_size):
+        self.canvas_size = canvas_size
+        self.definitions = {}
+        self._collect_definitions(dwg)
+
+    def _collect_definitions(self, element):
+        for child in getattr(element, 'elements', []):
+            if hasattr(child, 'attribs') and 'id' in child.attribs:
+                self.definitions[child.attribs['id']] = child
+            self._collect_definitions(child)
+
+    def draw_children(self, canvas, element, matrix, style):
+        for child in getattr(element, 'elements', []):
+            self.draw_element(canvas, child, matrix, style)
+
+    def draw_element(self, canvas, element, matrix, style):
+        name = getattr(element, 'elementname', None)
+        if name in ["defs", "clipPath", "mask"] or name in _ANIMATION_ELEMENTS:
+            return
+
+        attribs = element.attribs
+        if attribs.get('display') == 'none' or attribs.get('visibility') == 'hidden':
+            return
+
+        if 'transform' in attribs:
+            matrix = _multiply(matrix, _parse_transform(attribs['transform']))
+
+        style = dict(style)
+        for key in ['fill', 'stroke', 'stroke-width', 'fill-opacity', 'stroke-opacity']:
+            if key in attribs:
+                style[key] = attribs[key]
+
+        opacity = _parse_number(attribs.get('opacity', 1))
+        clip_path = _parse_reference(attribs.get('clip-path'))
+        mask = _parse_reference(attribs.get('mask'))
+
+        if name in ["g", "a", "svg", "symbol", "use"]:
+            # A use element is drawn as a group containing the referenced element
+            group = _UseGroup(self._get_use_target(element)) if name == "use" else element
+            if opacity >= 1 and clip_path is None and mask is None:
+                self.draw_children(canvas, group, matrix, style)
+            else:
+                layer = Image.new("RGBA", self.canvas_size, (0, 0, 0, 0))
+                self.draw_children(layer, group, matrix, style)
+                self._composite(canvas, layer, matrix, opacity, clip_path, mask)
+
+        elif name in ["rect", "ellipse", "circle", "polygon", "polyline", "line"]:
+            if clip_path is None and mask is None:
+                self.draw_shape(canvas, element, matrix, style, opacity)
+            else:
+                layer = Image.new("RGBA", self.canvas_size, (0, 0, 0, 0))
+                self.draw_shape(layer, element, matrix, style)
+                self._composite(canvas, layer, matrix, opacity, clip_path, mask)
+
+        else:
+            raise ValueError("WARNING: %s elements cannot be rasterized without a browser, use backend = 'html2image'"%name)
+
+    def draw_shape(self, canvas, element, matrix, style, opacity = 1):
+        points = [_apply(matrix, p) for p in _element_outline(element, matrix)]
+        if len(points) < 2:
+            return
+
+        closed = element.elementname not in ["polyline", "line"]
+        fill = _parse_paint(style.get('fill', 'black'), style.get('fill-opacity', 1))
+        stroke = _parse_paint(style.get('stroke', 'none'), style.get('stroke-opacity', 1))
+        stroke_width = _parse_number(style.get('stroke-width', 1)) * math.sqrt(abs(matrix[0] * matrix[3] - matrix[1] * matrix[2]))
+
+        if element.elementname == "line":
+            fill = None
+        if stroke_width <= 0:
+            stroke = None
+        if fill is None and stroke is None:
+            return
+
+        if fill is None or stroke is None:
+            # with a single paint the opacity can be applied to the color itself
+            fill, stroke = _apply_opacity(fill, opacity), _apply_opacity(stroke, opacity)
+            opacity = 1
+
+        opaque = (fill is None or fill[3] == 255) and (stroke is None or stroke[3] == 255)
+        if opacity >= 1 and (opaque or canvas.mode == "RGB"):
+            _draw_outline(ImageDraw.Draw(canvas, "RGBA"), points, closed, fill, stroke, stroke_width)
+            return
+
+        # Other shapes are drawn on a separate layer covering only the shape,
+        # so that fill and stroke are blended with the canvas as a whole
+        margin = (stroke_width / 2 + 2) if stroke is not None else 2
+        x0 = max(0, int(math.floor(min(p[0] for p in points) - margin)))
+        y0 = max(0, int(math.floor(min(p[1] for p in points) - margin)))
+        x1 = min(self.canvas_size[0], int(math.ceil(max(p[0] for p in points) + margin)))
+        y1 = min(self.canvas_size[1], int(math.ceil(max(p[1] for p in points) + margin)))
+        if x1 <= x0 or y1 <= y0:
+            return
+
+        layer = Image.new("RGBA", (x1 - x0, y1 - y0), (0, 0, 0, 0))
+        shifted = [(p[0] - x0, p[1] - y0) for p in points]
+        _draw_outline(ImageDraw.Draw(layer, "RGBA"), shifted, closed, fill, None, stroke_width)
+        if stroke is not None:
+            # drawing on a transparent layer replaces pixels instead of
+            # blending them, so a translucent stroke gets a layer of its own
+            stroke_layer = layer if stroke[3] == 255 else Image.new("RGBA", layer.size, (0, 0, 0, 0))
+            _draw_outline(ImageDraw.Draw(stroke_layer, "RGBA"), shifted, closed, None, stroke, stroke_width)
+            if stroke_layer is not layer:
+                layer.alpha_composite(stroke_layer)
+
+        if opacity < 1:
+            layer.putalpha(layer.getchannel("A").point(_opacity_table(opacity)))
+
+        _paste_layer(canvas, layer, (x0, y0))
+
+    def _composite(self, canvas, layer, matrix, opacity, clip_path, mask):
+        alpha = layer.getchannel("A")
+
+        if clip_path is not None:
+            alpha = Image.composite(alpha, Image.new("L", self.canvas_size, 0), self._clip_coverage(clip_path, matrix))
+
+        if mask is not None:
+            luminance = self._mask_luminance(mask, matrix)
+            alpha = Image.composite(alpha, Image.new("L", self.canvas_size, 0), luminance)
+
+        if opacity < 1:
+            alpha = alpha.point(_opacity_table(opacity))
+
+        layer.putalpha(alpha)
+        _paste_layer(canvas, layer, (0, 0))
+
+    def _clip_coverage(self, reference, matrix):
+        clip_element = self._get_definition(reference)
+        coverage = Image.new("L", self.canvas_size, 0)
+        draw = ImageDraw.Draw(coverage)
+        for child in _iterate_shapes(clip_element):
+            child_matrix = matrix
+            if 'transform' in child.attribs:
+                child_matrix = _multiply(matrix, _parse_transform(child.attribs['transform']))
+            points = [_apply(child_matrix, p) for p in _element_outline(child, child_matrix)]
+            if len(points) > 2:
+                draw.polygon(points, fill = 255)
+
+        return coverage
+
+    def _mask_luminance(self, reference, matrix):
+        mask_element = self._get_definition(reference)
+        content = Image.new("RGBA", self.canvas_size, (0, 0, 0, 0))
+        self.draw_children(content, mask_element, matrix, {})
+
+        luminance = content.convert("RGB").convert("L")
+        return Image.composite(luminance, Image.new("L", self.canvas_size, 0), content.getchannel("A"))
+
+    def _get_use_target(self, element):
+        href = getattr(element, 'href', None)
+        if href is None:
+            href = element.attribs.get('xlink:href', element.attribs.get('href'))
+        if isinstance(href, str):
+            return self._get_definition(href.lstrip("#"))
+
+        return href
+
+    def _get_definition(self, reference):
+        if reference not in self.definitions:
+            raise ValueError("WARNING: referenced element '%s' could not be found in the drawing"%reference)
+
+        return self.definitions[reference]
+
+
+class _UseGroup:
+    def __init__(self, target):
+        self.elements = [target]
+
+
+def _iterate_shapes(element):
+    for child in getattr(element, 'elements', []):
+        name = getattr(child, 'elementname', None)
+        if name in ["g", "a"]:
+            yield from _iterate_shapes(child)
+        elif name in ["rect", "ellipse", "circle", "polygon", "polyline"]:
+            yield child
+        elif name not in _ANIMATION_ELEMENTS:
+            raise ValueError("WARNING: %s elements cannot be used as clip path without a browser, use backend = 'html2image'"%name)
+
+
+def _paste_layer(canvas, layer, position):
+    """
+    Draws an RGBA layer on top of the canvas. The main canvas is opaque, 
+    intermediate layers can be (partly) transparent themselves.
+
+    """
+    if canvas.mode == "RGBA":
+        canvas.alpha_composite(layer, dest = position)
+    else:
+        canvas.paste(layer, position, layer)
+
+
+def _opacity_table(opacity):
+    opacity = min(1, max(0, opacity))
+    return [int(round(a * opacity)) for a in range(256)]
+
+
+def _apply_opacity(color, opacity):
+    if color is None or opacity >= 1:
+        return color
+
+    return color[:3] + (int(round(color[3] * max(0, opacity))),)
+
+
+def _draw_outline(draw, points, closed, fill, stroke, stroke_width):
+    if fill is not None and closed and len(points) > 2:
+        draw.polygon(points, fill = fill)
+
+    if stroke is not None:
+        line = points + [points[0]] if closed else points
+        draw.line(line, fill = stroke, width = max(1, int(round(stroke_width))), joint = "curve")
+
+
+def _element_outline(element, matrix):
+    """
+    Returns the outline of a basic shape element in its own coordinate system.
+
+    """
+    attribs = element.attribs
+    name = element.elementname
+
+    if name == "rect":
+        x, y = _parse_number(attribs.get('x', 0)), _parse_number(attribs.get('y', 0))
+        w, h = _parse_number(attribs.get('width', 0)), _parse_number(attribs.get('height', 0))
+        return [(x, y), (x + w, y), (x + w, y + h), (x, y + h)]
+
+    if name in ["ellipse", "circle"]:
+        cx, cy = _parse_number(attribs.get('cx', 0)), _parse_number(attribs.get('cy', 0))
+        if name == "circle":
+            rx = ry = _parse_number(attribs.get('r', 0))
+        else:
+            rx, ry = _parse_number(attribs.get('rx', 0)), _parse_number(attribs.get('ry', 0))
+
+        # number of segments depends on the size of the ellipse on the canvas
+        device_radius = max(rx, ry) * math.sqrt(abs(matrix[0] * matrix[3] - matrix[1] * matrix[2]))
+        n_segments = int(min(1024, max(24, device_radius)))
+        return [(cx + rx * math.cos(2 * math.pi * i / n_segments), cy + ry * math.sin(2 * math.pi * i / n_segments)) for i in range(n_segments)]
+
+    if name == "line":
+        return [(_parse_number(attribs.get('x1', 0)), _parse_number(attribs.get('y1', 0))),
+                (_parse_number(attribs.get('x2', 0)), _parse_number(attribs.get('y2', 0)))]
+
+    points = getattr(element, 'points', None)
+    if points is None:
+        values = [float(v) for v in re.split(r"[\s,]+", str(attribs.get('points', '')).strip()) if v != ""]
+        points = list(zip(values[0::2], values[1::2]))
+
+    return [(float(p[0]), float(p[1])) for p in points]
+
+
+def _parse_paint(value, opacity):
+    if value is None:
+        return None
+
+    value = str(value).strip()
+    if value in ["", "none", "transparent"]:
+        return None
+    if value.startswith("url("):
+        raise ValueError("WARNING: color gradients cannot be rasterized without a browser, use backend = 'html2image'")
+
+    try:
+        color = ImageColor.getrgb(value)
+    except ValueError:
+        raise ValueError("WARNING: color value '%s' is not supported"%value)
+
+    alpha = color[3] if len(color) == 4 else 255
+
+    return color[:3] + (int(round(alpha * min(1, max(0, _parse_number(opacity))))),)
+
+
+def _parse_number(value):
+    if type(value) == str:
+        value = value.strip()
+        if value.endswith("px"):
+            value = value[:-2]
+
+    return float(value)
+
+
+def _parse_reference(value):
+    if value is None or value == "none":
+        return None
+
+    match = re.match(r"\s*url\(\s*#([^)\s]+)\s*\)", str(value))
+    if match is None:
+        return None
+
+    return match.group(1)
+
+
+def _parse_transform(transform):
+    """
+    Converts an SVG transform attribute into a single affine matrix.
+
+    """
+    matrix = _IDENTITY
+    for name, arguments in re.findall(r"(matrix|translate|scale|rotate|skewX|skewY)\s*\(([^)]*)\)", str(transform)):
+        values = [float(v) for v in re.split(r"[\s,]+", arguments.strip()) if v != ""]
+
+        if name == "matrix":
+            current = tuple(values[:6])
+        elif name == "translate":
+            current = (1, 0, 0, 1, values[0], values[1] if len(values) > 1 else 0)
+        elif name == "scale":
+            current = _scale_matrix(values[0], values[1] if len(values) > 1 else values[0])
+        elif name == "rotate":
+            angle = math.radians(values[0])
+            current = (math.cos(angle), math.sin(angle), -math.sin(angle), math.cos(angle), 0, 0)
+            if len(values) == 3:
+                current = _multiply(_multiply((1, 0, 0, 1, values[1], values[2]), current), (1, 0, 0, 1, -values[1], -values[2]))
+        elif name == "skewX":
+            current = (1, 0, math.tan(math.radians(values[0])), 1, 0, 0)
+        else:
+            current = (1, math.tan(math.radians(values[0])), 0, 1, 0, 0)
+
+        matrix = _multiply(matrix, current)
+
+    return matrix
+
+
+def _scale_matrix(sx, sy):
+    return (sx, 0, 0, sy, 0, 0)
+
+
+def _multiply(m, n):
+    return (m[0] * n[0] + m[2] * n[1],
+            m[1] * n[0] + m[3] * n[1],
+            m[0] * n[2] + m[2] * n[3],
+            m[1] * n[2] + m[3] * n[3],
+            m[0] * n[4] + m[2] * n[5] + m[4],
+            m[1] * n[4] + m[3] * n[5] + m[5])
+
+
+def _apply(m, point):
+    return (m[0] * point[0] + m[2] * point[1] + m[4], m[1] * point[0] + m[3] * point[1] + m[5])
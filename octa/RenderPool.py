@@ -0,0 +1,323 @@
+"""
+RenderPool code for the OCTA toolbox
+Module to convert many stimuli to PNG images with persistent headless browsers
+
+The Order & Complexity Toolbox for Aesthetics (OCTA) Python library is a tool for researchers
+to create stimuli varying in order and complexity on different dimensions.
+Copyright (C) 2021  Eline Van Geert, Christophe Bossens, and Johan Wagemans
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU Lesser General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU Lesser General Public License for more details.
+
+You should have received a copy of the GNU Lesser General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+Contact: eline.vangeert@kuleuven.be
+
+"""
+import base64
+import json
+import math
+import os
+import queue
+import shutil
+import subprocess
+import tempfile
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor, wait
+
+from websocket import create_connection
+
+try:
+    from html2image.browsers.search_utils import find_chrome
+except ImportError:
+    from html2image.browsers.chrome import _find_chrome as find_chrome
+
+# Page in which the SVG markup of a stimulus is shown, without margins
+_PAGE = ('<!DOCTYPE html><html><head><style>html, body { margin: 0; overflow: hidden; } '
+         'svg { display: block; }</style></head><body>%s</body></html>')
+
+# Resolves once the document and the images in the stimulus are loaded
+_WAIT_FOR_LOAD = ("new Promise(resolve => document.readyState == 'complete' ? resolve() "
+                  ": window.addEventListener('load', () => resolve()))")
+
+class RenderPool:
+    """
+    Pool of long-lived headless browsers that convert stimuli to PNG images.
+
+    Starting a browser takes much longer than taking a screenshot, so the
+    browsers are started once and reused for all stimuli. SVG strings are
+    sent to the browser directly, without temporary files, and the viewport
+    is sized to the stimulus. The rendering is the same as the default
+    html2image backend of SavePNG, so gradients, masks and images are supported.
+
+    Use the pool as a context manager:
+
+        with RenderPool(n_workers = 4) as pool:
+            images = pool.RenderMany(stimuli)
+            stimulus.SavePNG("stimulus", backend = pool)
+
+    Parameters
+    ----------
+    n_workers : int, optional
+        Number of browsers that take screenshots in parallel. The default is 1.
+    browser_executable : string, optional
+        Path to the Chrome or Chromium executable. By default the executable
+        is searched in the same way as html2image does.
+    custom_flags : list, optional
+        Additional command line flags for the browsers.
+    timeout : int or float, optional
+        Number of seconds to wait for a browser before raising an error.
+        The default is 30.
+
+    """
+    def __init__(self, n_workers = 1, browser_executable = None, custom_flags = None, timeout = 30):
+        assert type(n_workers) == int and n_workers > 0, "n_workers must be a positive integer"
+
+        self.n_workers = n_workers
+        self.browser_executable = browser_executable
+        self.custom_flags = [] if custom_flags is None else list(custom_flags)
+        self.timeout = timeout
+
+        self._workers = []
+        self._idle_workers = None
+        self._executor = None
+
+    def __enter__(self):
+        self.Open()
+        return self
+
+    def __exit__(self, *exc):
+        self.Close()
+
+    def Open(self):
+        """
+        Starts the browsers. Called automatically when the pool is used as
+        a context manager.
+
+        """
+        if self._executor is not None:
+            return
+
+        executable = find_chrome(self.browser_executable)
+
+        self._idle_workers = queue.Queue()
+        try:
+            for i in range(self.n_workers):
+                worker = _BrowserWorker(executable, self.custom_flags, self.timeout)
+                self._workers.append(worker)
+                self._idle_workers.put(worker)
+        except Exception:
+            self.Close()
+            raise
+
+        self._executor = ThreadPoolExecutor(max_workers = self.n_workers)
+
+    def Close(self):
+        """
+        Stops the browsers. Called automatically when the pool is used as
+        a context manager.
+
+        """
+        if self._executor is not None:
+            self._executor.shutdown(wait = True)
+            self._executor = None
+
+        for worker in self._workers:
+            worker.close()
+
+        self._workers = []
+        self._idle_workers = None
+
+    def RenderPNG(self, stimulus, scale = None):
+        """
+        Converts a single stimulus to a PNG image.
+
+        Parameters
+        ----------
+        stimulus : Stimulus
+            The stimulus to convert.
+        scale : int or float, optional
+            Number that indicates the scaling factor to use on the original SVG size.
+
+        Returns
+        -------
+        bytes
+            Content of the PNG file.
+
+        """
+        return self.RenderMany([stimulus], scale = scale)[0]
+
+    def RenderMany(self, stimuli, scale = None):
+        """
+        Converts a list of stimuli to PNG images, using all browsers in
+        the pool in parallel.
+
+        Parameters
+        ----------
+        stimuli : list
+            The stimuli to convert.
+        scale : int or float, optional
+            Number that indicates the scaling factor to use on the original SVG size.
+
+        Returns
+        -------
+        list
+            Content of the PNG file for each stimulus, in the same order as
+            the stimuli.
+
+        """
+        if self._executor is None:
+            raise ValueError("WARNING: RenderPool is not running, use it as a context manager or call Open first")
+
+        if scale is None:
+            scale = 1
+
+        # The stimuli are rendered here, only the screenshots run in parallel
+        jobs = []
+        for stimulus in stimuli:
+            svg = stimulus.GetSVG()
+            jobs.append((svg, stimulus.width, stimulus.height))
+
+        futures = [self._executor.submit(self._screenshot, svg, width, height, scale) for svg, width, height in jobs]
+
+        # All browsers are idle again before an error is raised
+        wait(futures)
+
+        return [future.result() for future in futures]
+
+    def _screenshot(self, svg, width, height, scale):
+        worker = self._idle_workers.get()
+        try:
+            return worker.screenshot(svg, width, height, scale)
+        finally:
+            self._idle_workers.put(worker)
+
+
+class _BrowserWorker:
+    """
+    A single headless browser, controlled with the Chrome DevTools Protocol.
+
+    """
+    def __init__(self, executable, flags, timeout):
+        self.timeout = timeout
+        self._message_id = 0
+        self._events = []
+        self._websocket = None
+        self._frame_id = None
+
+        self._user_data_dir = tempfile.mkdtemp(prefix = "octa_renderpool_")
+        command = [executable,
+                   "--headless=new",
+                   "--remote-debugging-port=0",
+                   "--remote-allow-origins=*",
+                   "--user-data-dir=%s"%self._user_data_dir,
+                   "--no-first-run",
+                   "--no-default-browser-check",
+                   "--hide-scrollbars",
+                   "--mute-audio",
+                   *flags,
+                   "about:blank"]
+        self._process = subprocess.Popen(command, stdout = subprocess.DEVNULL, stderr = subprocess.DEVNULL)
+
+        try:
+            self._connect()
+        except Exception:
+            self.close()
+            raise
+
+    def _connect(self):
+        # With port 0 the browser picks a free port and writes it to a file
+        port_file = os.path.join(self._user_data_dir, "DevToolsActivePort")
+        deadline = time.time() + self.timeout
+        port = None
+        while port is None:
+            if self._process.poll() is not None:
+                raise RuntimeError("WARNING: the headless browser stopped unexpectedly")
+            if time.time() > deadline:
+                raise TimeoutError("WARNING: the headless browser did not start within %s seconds"%self.timeout)
+            if os.path.exists(port_file):
+                with open(port_file) as f:
+                    lines = f.read().split("\n")
+                if len(lines) > 1 and lines[0].strip().isdigit():
+                    port = int(lines[0])
+            time.sleep(0.05)
+
+        with urllib.request.urlopen("http://127.0.0.1:%d/json/list"%port, timeout = self.timeout) as response:
+            targets = json.loads(response.read().decode("utf-8"))
+
+        pages = [t for t in targets if t.get("type") == "page"]
+        if len(pages) == 0:
+            raise RuntimeError("WARNING: the headless browser has no page to render in")
+
+        self._websocket = create_connection(pages[0]["webSocketDebuggerUrl"], timeout = self.timeout, suppress_origin = True)
+
+        self._call("Page.enable")
+        self._call("Emulation.setDefaultBackgroundColorOverride", color = {"r": 0, "g": 0, "b": 0, "a": 0})
+        self._frame_id = self._call("Page.getFrameTree")["frameTree"]["frame"]["id"]
+
+    def _call(self, method, **params):
+        """
+        Sends a command to the browser and waits for its result. Events that
+        arrive in the meantime are stored in self._events.
+
+        """
+        self._message_id += 1
+        message_id = self._message_id
+        self._websocket.send(json.dumps({"id": message_id, "method": method, "params": params}))
+
+        while True:
+            message = json.loads(self._websocket.recv())
+            if message.get("id") == message_id:
+                if "error" in message:
+                    raise RuntimeError("WARNING: %s failed: %s"%(method, message["error"].get("message", "")))
+                return message.get("result", {})
+            elif "method" in message:
+                self._events.append(message["method"])
+
+    def screenshot(self, svg, width, height, scale):
+        self._call("Emulation.setDeviceMetricsOverride",
+                   width = int(math.ceil(width)), height = int(math.ceil(height)),
+                   deviceScaleFactor = scale, mobile = False)
+
+        # The markup is written into the open page, because a data URL with
+        # embedded images can be longer than the browser accepts
+        self._events = []
+        self._call("Page.setDocumentContent", frameId = self._frame_id, html = _PAGE%svg)
+        result = self._call("Runtime.evaluate", expression = _WAIT_FOR_LOAD, awaitPromise = True)
+        if "exceptionDetails" in result:
+            raise RuntimeError("WARNING: the stimulus could not be loaded")
+
+        result = self._call("Page.captureScreenshot", format = "png",
+                            clip = {"x": 0, "y": 0, "width": width, "height": height, "scale": 1})
+
+        return base64.b64decode(result["data"])
+
+    def close(self):
+        if self._websocket is not None:
+            try:
+                self._call("Browser.close")
+            except Exception:
+                pass
+            try:
+                self._websocket.close()
+            except Exception:
+                pass
+            self._websocket = None
+
+        if self._process.poll() is None:
+            self._process.terminate()
+            try:
+                self._process.wait(timeout = 5)
+            except subprocess.TimeoutExpired:
+                self._process.kill()
+
+        shutil.rmtree(self._user_data_dir, ignore_errors = True)
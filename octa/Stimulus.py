@@ -25,12 +25,17 @@ Contact: eline.vangeert@kuleuven.be
 import svgwrite
 import svgutils
 import random
+import hashlib
+import collections
+import itertools
 import csv
 import math
 import json
 import jsonpickle
+import numpy as np
 import pandas as pd
 import os
+import io
 from html2image import Html2Image
 from svglib.svglib import svg2rlg
 from reportlab.graphics import renderPDF 
@@ -38,7 +43,12 @@ from IPython.display import SVG, display
 from PIL import Image
 
 from .Positions import Positions
+from .ElementTable import ElementTable
+from .Rasterizer import RasterizeDrawing
+from .SvgSerializer import SerializeDrawing, SerializeElement, WriteDrawing
+from .StimulusJSON import StimulusToDict, StimulusFromDict
 from .patterns import GridPattern, Pattern
+from .patterns.GridPattern import _freeze_value
 from .shapes import Ellipse, Rectangle, Triangle, Polygon
 from .shapes.Image import Image_
 from .shapes.FitImage import FitImage_
@@ -47,6 +57,61 @@ from .shapes.Polygon import Polygon_
 from .shapes.RegularPolygon import RegularPolygon_
 from .shapes.Path import Path_
 from .shapes.PathSvg import PathSvg_
+from .shapes.Gradients import CreatePaintServer, GetGradients, CollectGradientUses, KeepGradients
+from .shapes.Animations import ParseAnimation, RotationAnimation, Link
+
+def _same_render_state(state, previous_state):
+    """
+    Compares two render states. Generated patterns are compared by identity,
+    as generate_cached returns the same object for an unchanged pattern.
+
+    """
+    if previous_state is None:
+        return False
+    
+    positions, patterns = state
+    previous_positions, previous_patterns = previous_state
+    
+    return positions == previous_positions and len(patterns) == len(previous_patterns) and all(a is b for a, b in zip(patterns, previous_patterns))
+
+def _is_render_pool(backend):
+    """
+    Checks whether a rasterization backend is a RenderPool. The RenderPool
+    module needs websocket-client, so it is only imported when the backend
+    is not one of the backend names.
+
+    """
+    if isinstance(backend, str):
+        return False
+    
+    from .RenderPool import RenderPool
+    return isinstance(backend, RenderPool)
+
+def _symbol_key(element_parameters):
+    """
+    Identifies the geometry of an element in symbol mode: its shape, data
+    and boundingbox.
+
+    """
+    shape = element_parameters['shape']
+    boundingbox = _freeze_value(element_parameters['boundingbox'])
+    if issubclass(shape, (Image_, FitImage_)):
+        # Images of the same file share a symbol, also when they come from different Image() calls
+        return (Image_ if issubclass(shape, Image_) else FitImage_, getattr(shape, 'source', element_parameters['data']), boundingbox)
+    
+    return (shape, _freeze_value(element_parameters['data']), boundingbox)
+
+def _has_static_geometry(el):
+    """
+    Checks whether an element can be drawn as a reference to a shared symbol.
+    Elements with animations or hyperlinks are drawn in full.
+
+    """
+    for animation in ['fillcolor_animation', 'bordercolor_animation', 'borderwidth_animation', 'opacity_animation', 'rotation_animation']:
+        if getattr(el, animation, "") != "":
+            return False
+        
+    return el.link == ""
 
 class Stimulus:
     """ 
@@ -84,13 +149,28 @@ class Stimulus:
         If specified, defines the class label that can be used to add javascript or css changes to the stimulus. 
     stim_idlabel: string, optional
         If specified, defines the id label that can be used to add javascript or css changes to the stimulus.        
+    seed: int, optional
+        Seed for all random components of the stimulus (pattern jitter and
+        randomizations, position jitter, random element changes and swaps).
+        If None, a seed is drawn from the global random module. The seed
+        is stored in the JSON output, so the stimulus can be regenerated exactly.
 
     """
+    _element_attributes = []
+    
+    # Assigning any of these attributes requires a full render of the stimulus
+    _render_attributes = frozenset(["_x_margin", "_y_margin", "size", "_autosize", "_autosize_method", "width", "height",
+                                    "background_color", "background_shape", "stim_mask", "stim_orientation", "stim_mirrorvalue",
+                                    "stim_link", "stim_classlabel", "stim_idlabel", "_seed", "positions", "use_symbols"])
+    
+    # Attributes of an element node that can differ between elements with the same geometry
+    _instance_attributes = ["fill", "opacity", "stroke", "stroke-width", "transform", "class", "id"]
     
     def __init__(self, x_margin = 20, y_margin = 20, size = None, 
                  background_color = "white", background_shape = None, 
                  stim_mask = None, stim_orientation = 0, stim_mirrorvalue = None, 
-                 stim_link = None, stim_classlabel = None, stim_idlabel = None):
+                 stim_link = None, stim_classlabel = None, stim_idlabel = None,
+                 seed = None):
         """
         Instantiates a stimulus object.
 
@@ -116,6 +196,7 @@ class Stimulus:
         self.stim_link = stim_link
         self.stim_classlabel = stim_classlabel
         self.stim_idlabel = stim_idlabel
+        self.seed = seed
         
         if background_shape == None:
             self.background_shape = "auto"
@@ -132,8 +213,19 @@ class Stimulus:
 
         self._autosize_method = "maximum_boundingbox" # can be 'tight_fit' or 'maximum_boundingbox'
         
+        # If True, each distinct element geometry is defined once as a symbol
+        # that is reused by all elements with that geometry
+        self.use_symbols = False
+        
         self.dwg_elements = None
         self.dwg = None
+        self._render_state = None
+        self._dirty_elements = set()
+        
+    def __setattr__(self, name, value):
+        if name in self._render_attributes:
+            object.__setattr__(self, "_render_dirty", True)
+        object.__setattr__(self, name, value)
         
 
     def SaveSVG(self, filename, scale = None, folder = None):
@@ -155,10 +247,9 @@ class Stimulus:
         if folder is not None:
             svg_filename = os.path.join(folder, svg_filename)  
             
-        if self.dwg_elements is None:
-            self.Render() 
+        self.Render() 
             
-        self.dwg.saveas(svg_filename , pretty = True)
+        self.__WriteSVG(svg_filename)
         
         if scale is not None:
             originalSVG = svgutils.compose.SVG(svg_filename)
@@ -166,17 +257,52 @@ class Stimulus:
             newSVG = svgutils.compose.Figure(float(self.width) * scale, float(self.height) * scale, originalSVG)
             newSVG.save(svg_filename)
             
-    def GetSVG(self):
+    def GetSVG(self, compatibility = False):
         """
         Gives the current stimulus as an SVG string.
 
+        Parameters
+        ----------
+        compatibility : Boolean, optional
+            If True, the SVG string is created by svgwrite, which also validates
+            all attribute values. Otherwise the string is written directly, reusing
+            the SVG text of the elements that did not change since the previous
+            call. Both options give the same string. The default is False.
+
         """
         # if self.dwg_elements is None:
         self.Render() 
+        
+        if compatibility:
+            return self.dwg.tostring()
             
-        return self.dwg.tostring()
+        return SerializeDrawing(self.dwg, self.__GetSerializedElements())
+    
+    def __GetSerializedElements(self):
+        """
+        Returns the SVG text of all element nodes, with the id of the node as
+        key. Only nodes that changed since the previous call are serialized.
+
+        """
+        serialized = {}
+        for i in range(len(self._element_nodes)):
+            node = self._element_nodes[i][0]
+            if node is None:
+                continue
+            if self._element_svg[i] is None:
+                self._element_svg[i] = SerializeElement(node)
+            serialized[id(node)] = (node, self._element_svg[i])
+            
+        return serialized
+    
+    def __WriteSVG(self, svg_filename):
+        """
+        Writes the current stimulus to an indented SVG file.
+
+        """
+        WriteDrawing(self.dwg, svg_filename, svg = self.GetSVG(), pretty = True)
     
-    def SavePNG(self, filename, scale = None, folder = None): 
+    def SavePNG(self, filename, scale = None, folder = None, backend = "html2image"): 
         """
         Saves the current stimulus as a PNG file.
 
@@ -188,11 +314,23 @@ class Stimulus:
             Number that indicates the scaling factor to use on the original SVG size.
         folder : string, optional
             Name of the folder in which the png file needs to be saved.
+        backend : string or RenderPool, optional
+            Rasterization backend. "html2image" takes a screenshot of the SVG 
+            in a headless browser. "pil" draws the stimulus directly with 
+            Pillow, which is much faster but only supports elements without
+            images, text, paths and color gradients. A running RenderPool 
+            takes the screenshot in one of its browsers. The default is "html2image".
 
         """ 
         # limitations using svglib:
         # clipping is limited to single paths, no mask support
         # color gradients not supported
+        
+        if backend == "pil" or _is_render_pool(backend):
+            self.__SaveRaster("%s.png"%filename, scale, folder, backend)
+            return
+        elif backend != "html2image":
+            raise ValueError("WARNING: backend must be 'html2image', 'pil' or a RenderPool")
 
         svg_filename = "%s_scaled.svg"%filename
         png_filename = "%s.png"%filename
@@ -203,7 +341,7 @@ class Stimulus:
         # if self.dwg_elements is None:
         self.Render() 
             
-        self.dwg.saveas(svg_filename , pretty = True)
+        self.__WriteSVG(svg_filename)
         
         if scale is not None:
             originalSVG = svgutils.compose.SVG(svg_filename)
@@ -254,7 +392,7 @@ class Stimulus:
             
         self.Render() 
             
-        self.dwg.saveas(svg_filename, pretty = True)
+        self.__WriteSVG(svg_filename)
         
         if scale is not None:
             originalSVG = svgutils.compose.SVG(svg_filename)
@@ -318,7 +456,7 @@ class Stimulus:
 
     #     os.remove(svg_filename) 
 
-    def SaveJPG(self, filename, scale = None, folder = None): 
+    def SaveJPG(self, filename, scale = None, folder = None, backend = "html2image"): 
         """
         Saves the current stimulus as a JPG file.
 
@@ -330,11 +468,23 @@ class Stimulus:
             Number that indicates the scaling factor to use on the original SVG size.
         folder : string, optional
             Name of the folder in which the jpg file needs to be saved.
+        backend : string or RenderPool, optional
+            Rasterization backend. "html2image" takes a screenshot of the SVG 
+            in a headless browser. "pil" draws the stimulus directly with 
+            Pillow, which is much faster but only supports elements without
+            images, text, paths and color gradients. A running RenderPool 
+            takes the screenshot in one of its browsers. The default is "html2image".
 
         """ 
         # limitations using svglib:
         # clipping is limited to single paths, no mask support
         # color gradients not supported
+        
+        if backend == "pil" or _is_render_pool(backend):
+            self.__SaveRaster("%s.jpg"%filename, scale, folder, backend)
+            return
+        elif backend != "html2image":
+            raise ValueError("WARNING: backend must be 'html2image', 'pil' or a RenderPool")
 
         svg_filename = "%s_scaled.svg"%filename
         jpg_filename = "%s.jpg"%filename
@@ -344,7 +494,7 @@ class Stimulus:
 
         self.Render() 
             
-        self.dwg.saveas(svg_filename, pretty = True)
+        self.__WriteSVG(svg_filename)
         
         if scale is not None:
             originalSVG = svgutils.compose.SVG(svg_filename)
@@ -369,7 +519,36 @@ class Stimulus:
 
         os.remove(svg_filename)        
         
-    def SaveJSON(self, filename, folder = None):
+    def __SaveRaster(self, image_filename, scale, folder, backend):
+        """
+        Saves the current stimulus as a bitmap image without starting a new
+        browser. The image format is derived from the file extension.
+
+        """
+        if folder is not None:
+            image_filename = os.path.join(folder, image_filename)
+            
+        if scale is None:
+            scale = 1
+            
+        if _is_render_pool(backend):
+            png = backend.RenderPNG(self, scale = scale)
+            if image_filename.lower().endswith(".png"):
+                with open(image_filename, "wb") as f:
+                    f.write(png)
+                return
+            
+            screenshot = Image.open(io.BytesIO(png)).convert("RGBA")
+            image = Image.new("RGBA", screenshot.size, (255, 255, 255, 255))
+            image.alpha_composite(screenshot)
+            image = image.convert("RGB")
+        else:
+            self.Render()
+            image = RasterizeDrawing(self.dwg, self.width, self.height, scale = scale)
+            
+        image.save(image_filename)
+        
+    def SaveJSON(self, filename, folder = None, compact = False):
         """
         Saves the current stimulus as a JSON file.
 
@@ -379,66 +558,22 @@ class Stimulus:
             Name of the json file.
         folder : string, optional
             Name of the folder in which the json file needs to be saved.
+        compact : Boolean, optional
+            If True, the stimulus is saved in the compact, versioned format
+            of GetJSON(compact = True), without indentation. The default is False.
 
         """
         json_filename = "%s.json"%filename
-        csv_filename = "%s.csv"%filename
         if folder is not None:
             json_filename = os.path.join(folder, json_filename)
-            csv_filename  = os.path.join(folder, csv_filename)
-
-        self.Render() 
-                    
-        json_data = {'stimulus' : {'stimulustype':     str(type(self))[str(type(self)).find("'")+1:str(type(self)).find(">")-1].replace("octa.Stimulus.", ""),
-                                   'n_elements'   :    self._n_elements if hasattr(self, '_n_elements') else None,
-                                   'n_rows'   :        self._n_rows if hasattr(self, '_n_rows') else None,
-                                   'n_cols'   :        self._n_cols if hasattr(self, '_n_cols') else None,
-                                   'row_spacing'   :   self.row_spacing if hasattr(self, 'row_spacing') else None,
-                                   'col_spacing'   :   self.col_spacing if hasattr(self, 'col_spacing') else None,
-                                   'shape'   :         self._shape if hasattr(self, '_shape') else None,
-                                   'shape_boundingbox': self._shape_boundingbox if hasattr(self, '_shape_boundingbox') else None,
-                                   'autosize_method'   : self._autosize_method,
-                                   'x_margin'   :      self.x_margin,
-                                   'y_margin'   :      self.y_margin,
-                                   'size'       :      self.size,                                   
-                                   'width':            self.width,
-                                   'height':           self.height,
-                                   'background_color': self.background_color,
-                                   'background_shape': jsonpickle.encode(self.background_shape),
-                                   'stim_mask':        jsonpickle.encode(self.stim_mask),
-                                   'stim_orientation': self.stim_orientation,
-                                   'stim_mirrorvalue':self.stim_mirrorvalue,
-                                   'stim_link'       : self.stim_link,
-                                   'stim_classlabel': self.stim_classlabel,
-                                   'stim_idlabel':    self.stim_idlabel
-                                   },
-                     'positions': {'positiontype':          self.positions._position_type,
-                                   'positionparameters':    jsonpickle.encode(self.positions._position_parameters),
-                                   'jitter':         self.positions._jitter,
-                                   'jitterparameters': jsonpickle.encode(self.positions._jitter_parameters),                                   
-                                   'deviation':             self.positions._deviation,
-                                   'deviationparameters':   jsonpickle.encode(self.positions._deviation_parameters)                                   
-                                   },
-                     'elements': { 'element_id'   :    jsonpickle.encode(list(range(len(self.dwg_elements)))),
-                                   'positions'    :    jsonpickle.encode(self.positions),
-                                   'shapes'       :    jsonpickle.encode(self._shapes) if hasattr(self, '_shapes') else jsonpickle.encode(self.shapes),
-                                   'boundingboxes' :  jsonpickle.encode(self._boundingboxes) if hasattr(self, '_boundingboxes') else jsonpickle.encode(self.boundingboxes),
-                                   'fillcolors'     :  jsonpickle.encode(self._fillcolors) if hasattr(self, '_fillcolors') else jsonpickle.encode(self.fillcolors),
-                                   'orientations'  :   jsonpickle.encode(self._orientations) if hasattr(self, '_orientations') else jsonpickle.encode(self.orientations),
-                                   'borderwidths'   :  jsonpickle.encode(self._borderwidths) if hasattr(self, '_borderwidths') else jsonpickle.encode(self.borderwidths),
-                                   'bordercolors'   :  jsonpickle.encode(self._bordercolors) if hasattr(self, '_bordercolors') else jsonpickle.encode(self.bordercolors),
-                                   'opacities'      :  jsonpickle.encode(self._opacities) if hasattr(self, '_opacities') else jsonpickle.encode(self.opacities),
-                                   'mirrorvalues'       :    jsonpickle.encode(self._mirrorvalues) if hasattr(self, '_mirrorvalues') else jsonpickle.encode(self.mirrorvalues),
-                                   'links'       :      jsonpickle.encode(self._links) if hasattr(self, '_links') else jsonpickle.encode(self.links),
-                                   'idlabels'           :    jsonpickle.encode(self._idlabels) if hasattr(self, '_idlabels') else jsonpickle.encode(self.idlabels),
-                                   'classlabels'        :    jsonpickle.encode(self._classlabels) if hasattr(self, '_classlabels') else jsonpickle.encode(self.classlabels),
-                                   'data'         :    jsonpickle.encode(self._data) if hasattr(self, '_data') else jsonpickle.encode(self.data),
-                                   'overrides'    :    jsonpickle.encode(self._attribute_overrides),
-                                   'element_order':    jsonpickle.encode(self._element_presentation_order)
-                                   }}
+        
+        json_data = self.GetJSON(compact = compact)
         
         with open(json_filename, 'w') as output_file:
-            json.dump(json_data, output_file, indent = 4)
+            if compact:
+                json.dump(json_data, output_file, separators = (',', ':'))
+            else:
+                json.dump(json_data, output_file, indent = 4)
         
     def GetElementsDF(self):
         """
@@ -447,7 +582,7 @@ class Stimulus:
         """
         self.Render() 
             
-        df = pd.DataFrame(self.dwg_elements, columns = ['element_id', 'position', 'shape', 'boundingbox', 'fillcolor', 'orientation', 'borderwidth', 'bordercolor', 'opacity', 'mirrorvalue', 'link', 'idlabel', 'classlabel', 'data'])
+        df = pd.DataFrame({column: self.dwg_elements.GetColumn(column) for column in ElementTable.columns}, columns = ElementTable.columns)
         
         return df
     
@@ -470,14 +605,25 @@ class Stimulus:
         # if self.dwg_elements is None:
         self.Render()  
                              
-        df = pd.DataFrame(self.dwg_elements, columns = ['element_id', 'position', 'shape', 'boundingbox', 'fillcolor', 'orientation', 'borderwidth', 'bordercolor', 'opacity', 'mirrorvalue', 'link', 'idlabel', 'classlabel', 'data'])
+        df = pd.DataFrame({column: self.dwg_elements.GetColumn(column) for column in ElementTable.columns}, columns = ElementTable.columns)
         df.to_csv(csv_filename, index = False)
    
-    def GetJSON(self):
+    def GetJSON(self, compact = False):
         """
         Gives the JSON info concerning the current stimulus.
+        
+        Parameters
+        ----------
+        compact : Boolean, optional
+            If True, the JSON data only contains plain values: shapes are
+            stored by their registered name and patterns by their class name
+            and attributes, instead of as jsonpickle strings. This format has
+            a schema version and does not require the stimulus to be rendered.
+            The default is False.
 
         """
+        if compact:
+            return StimulusToDict(self)
         
         self.Render()  
                  
@@ -502,7 +648,8 @@ class Stimulus:
                                    'stim_mirrorvalue':self.stim_mirrorvalue,
                                    'stim_link'       : self.stim_link,
                                    'stim_classlabel': self.stim_classlabel,
-                                   'stim_idlabel':    self.stim_idlabel
+                                   'stim_idlabel':    self.stim_idlabel,
+                                   'seed':            self.seed
                                    },
                      'positions': {'positiontype':          self.positions._position_type,
                                    'positionparameters':    jsonpickle.encode(self.positions._position_parameters),
@@ -547,8 +694,6 @@ class Stimulus:
             A stimulus object with parameters extracted from the JSON file.
 
         """
-        stimulus = None
-        
         if folder is not None:
             json_filename  = os.path.join(folder, filename + '.json')
         else:
@@ -557,152 +702,223 @@ class Stimulus:
         with open(json_filename, 'r') as input_file:
             data = json.load(input_file)
             
-            
-            # Define stimulus characteristics
-            
-            if data['stimulus']['size'] == 'auto':
-                stimulus_size = None
-            else:
-                stimulus_size = (data['stimulus']['width'], data['stimulus']['height'])
+        return Stimulus.LoadFromJSONData(data)
+    
+    def LoadFromJSONData(data):
+        """
+        Creates a stimulus object from JSON data, as returned by GetJSON.
+
+        Parameters
+        ----------
+        data : dict
+            JSON data of the stimulus.
+
+        Returns
+        -------
+        Stimulus
+            A stimulus object with parameters extracted from the JSON data.
+
+        """
+        if 'schema' in data:
+            return StimulusFromDict(data)
+        
+        stimulus = None
+        
+        # Define stimulus characteristics
+        
+        if data['stimulus']['size'] == 'auto':
+            stimulus_size = None
+        else:
+            stimulus_size = (data['stimulus']['width'], data['stimulus']['height'])
 
     
-            if data['stimulus']['stimulustype'] == "Grid":
-            
-                stimulus = Grid(data['stimulus']['n_rows'], 
-                                data['stimulus']['n_cols'], 
-                                data['stimulus']['row_spacing'],
-                                data['stimulus']['col_spacing'], 
-                                data['stimulus']['x_margin'], 
-                                data['stimulus']['y_margin'],
-                                stimulus_size,
-                                data['stimulus']['background_color'],
-                                jsonpickle.decode(data['stimulus']['background_shape']),
-                                jsonpickle.decode(data['stimulus']['stim_mask']),
-                                data['stimulus']['stim_orientation'],
-                                data['stimulus']['stim_mirrorvalue'],
-                                data['stimulus']['stim_link'],
-                                data['stimulus']['stim_classlabel'],
-                                data['stimulus']['stim_idlabel'])
-            
-            elif data['stimulus']['stimulustype'] == "Outline":
-               stimulus = Outline(data['stimulus']['n_elements'], 
-                                data['stimulus']['shape'],
-                                data['stimulus']['shape_boundingbox'],
-                                data['stimulus']['x_margin'], 
-                                data['stimulus']['y_margin'],
-                                stimulus_size,
-                                data['stimulus']['background_color'],
-                                jsonpickle.decode(data['stimulus']['background_shape']),
-                                jsonpickle.decode(data['stimulus']['stim_mask']),
-                                data['stimulus']['stim_orientation'],
-                                data['stimulus']['stim_mirrorvalue'],
-                                data['stimulus']['stim_link'],
-                                data['stimulus']['stim_classlabel'],
-                                data['stimulus']['stim_idlabel'])
-                
-            elif data['stimulus']['stimulustype'] == "Concentric":
-               stimulus = Concentric(data['stimulus']['n_elements'], 
-                                data['stimulus']['x_margin'], 
-                                data['stimulus']['y_margin'],
-                                stimulus_size,
-                                data['stimulus']['background_color'],
-                                jsonpickle.decode(data['stimulus']['background_shape']),
-                                jsonpickle.decode(data['stimulus']['stim_mask']),
-                                data['stimulus']['stim_orientation'],
-                                data['stimulus']['stim_mirrorvalue'],
-                                data['stimulus']['stim_link'],
-                                data['stimulus']['stim_classlabel'],
-                                data['stimulus']['stim_idlabel'])
-               
-            else:
-               stimulus = Stimulus(                                
-                                data['stimulus']['x_margin'], 
-                                data['stimulus']['y_margin'],
-                                stimulus_size,
-                                data['stimulus']['background_color'],
-                                jsonpickle.decode(data['stimulus']['background_shape']),
-                                jsonpickle.decode(data['stimulus']['stim_mask']),
-                                data['stimulus']['stim_orientation'],
-                                data['stimulus']['stim_mirrorvalue'],
-                                data['stimulus']['stim_link'],
-                                data['stimulus']['stim_classlabel'],
-                                data['stimulus']['stim_idlabel'])
-            
-            stimulus._autosize_method = data['stimulus']['autosize_method']
-            
-            # Define position characteristics                                
-            stimulus.positions._position_type       = data['positions']['positiontype']
-            stimulus.positions._position_parameters = jsonpickle.decode(data['positions']['positionparameters'])
-            stimulus.positions._jitter       = data['positions']['jitter']
-            stimulus.positions._jitter_parameters = jsonpickle.decode(data['positions']['jitterparameters'])
-            stimulus.positions._deviation           = data['positions']['deviation']
-            stimulus.positions._deviation_parameters = jsonpickle.decode(data['positions']['deviationparameters'])
-
-            if stimulus.positions._position_type == "RectGrid":
-                stimulus.positions = Positions.CreateRectGrid(n_rows = stimulus.positions._position_parameters['n_rows'], 
-                                                            n_cols = stimulus.positions._position_parameters['n_cols'], 
-                                                            row_spacing = stimulus.positions._position_parameters['row_spacing'], 
-                                                            col_spacing= stimulus.positions._position_parameters['col_spacing'])
-            elif stimulus.positions._position_type == "SineGrid":
-                stimulus.positions = Positions.CreateSineGrid(n_rows = stimulus.positions._position_parameters['n_rows'], 
-                                                              n_cols = stimulus.positions._position_parameters['n_cols'], 
-                                                              row_spacing = stimulus.positions._position_parameters['row_spacing'], 
-                                                              col_spacing= stimulus.positions._position_parameters['col_spacing'],
-                                                              A = stimulus.positions._position_parameters['A'],  
-                                                              f = stimulus.positions._position_parameters['f'], 
-                                                              axis = stimulus.positions._position_parameters['axis'])
-            elif stimulus.positions._position_type == "CustomPositions":
-                stimulus.positions = Positions.CreateCustomPositions(x = stimulus.positions._position_parameters['x'].pattern, 
-                                                                     y = stimulus.positions._position_parameters['y'].pattern)
-            elif stimulus.positions._position_type == "Circle":
-                stimulus.positions = Positions.CreateCircle(radius = stimulus.positions._position_parameters['radius'], 
-                                                            n_elements = stimulus.positions._position_parameters['n_elements'], 
-                                                            starting_point = stimulus.positions._position_parameters['starting_point'])
-            elif stimulus.positions._position_type == "Shape":
-                stimulus.positions = Positions.CreateShape(n_elements = stimulus.positions._position_parameters['n_elements'], 
-                                                           src = stimulus.positions._position_parameters['src'], 
-                                                           path = stimulus.positions._position_parameters['path'],  
-                                                           width = stimulus.positions._position_parameters['width'], 
-                                                           height = stimulus.positions._position_parameters['height'])
-            elif stimulus.positions._position_type == "RandomPositions":
-                stimulus.positions = Positions.CreateRandomPositions(n_elements = stimulus.positions._position_parameters['n_elements'],  
-                                                                     width = stimulus.positions._position_parameters['width'], 
-                                                                     height = stimulus.positions._position_parameters['height'],
-                                                                     min_distance = stimulus.positions._position_parameters['min_distance'], 
-                                                                     max_iterations = stimulus.positions._position_parameters['max_iterations'])
-                
+        if data['stimulus']['stimulustype'] == "Grid":
+        
+            stimulus = Grid(data['stimulus']['n_rows'], 
+                            data['stimulus']['n_cols'], 
+                            data['stimulus']['row_spacing'],
+                            data['stimulus']['col_spacing'], 
+                            data['stimulus']['x_margin'], 
+                            data['stimulus']['y_margin'],
+                            stimulus_size,
+                            data['stimulus']['background_color'],
+                            jsonpickle.decode(data['stimulus']['background_shape']),
+                            jsonpickle.decode(data['stimulus']['stim_mask']),
+                            data['stimulus']['stim_orientation'],
+                            data['stimulus']['stim_mirrorvalue'],
+                            data['stimulus']['stim_link'],
+                            data['stimulus']['stim_classlabel'],
+                            data['stimulus']['stim_idlabel'],
+                            seed = data['stimulus'].get('seed'))
+        
+        elif data['stimulus']['stimulustype'] == "Outline":
+           stimulus = Outline(data['stimulus']['n_elements'], 
+                            data['stimulus']['shape'],
+                            data['stimulus']['shape_boundingbox'],
+                            data['stimulus']['x_margin'], 
+                            data['stimulus']['y_margin'],
+                            stimulus_size,
+                            data['stimulus']['background_color'],
+                            jsonpickle.decode(data['stimulus']['background_shape']),
+                            jsonpickle.decode(data['stimulus']['stim_mask']),
+                            data['stimulus']['stim_orientation'],
+                            data['stimulus']['stim_mirrorvalue'],
+                            data['stimulus']['stim_link'],
+                            data['stimulus']['stim_classlabel'],
+                            data['stimulus']['stim_idlabel'],
+                            seed = data['stimulus'].get('seed'))
+            
+        elif data['stimulus']['stimulustype'] == "Concentric":
+           stimulus = Concentric(data['stimulus']['n_elements'], 
+                            data['stimulus']['x_margin'], 
+                            data['stimulus']['y_margin'],
+                            stimulus_size,
+                            data['stimulus']['background_color'],
+                            jsonpickle.decode(data['stimulus']['background_shape']),
+                            jsonpickle.decode(data['stimulus']['stim_mask']),
+                            data['stimulus']['stim_orientation'],
+                            data['stimulus']['stim_mirrorvalue'],
+                            data['stimulus']['stim_link'],
+                            data['stimulus']['stim_classlabel'],
+                            data['stimulus']['stim_idlabel'],
+                            seed = data['stimulus'].get('seed'))
            
-            # Define element characteristics
-            stimulus.positions                   = jsonpickle.decode(data['elements']['positions'])
-            stimulus._boundingboxes             = jsonpickle.decode(data['elements']['boundingboxes'])
-            stimulus._shapes                     = jsonpickle.decode(data['elements']['shapes'])
-            stimulus._fillcolors                 = jsonpickle.decode(data['elements']['fillcolors'])
-            stimulus._opacities                  = jsonpickle.decode(data['elements']['opacities'])
-            stimulus._bordercolors               = jsonpickle.decode(data['elements']['bordercolors'])
-            stimulus._borderwidths               = jsonpickle.decode(data['elements']['borderwidths'])
-            stimulus._orientations               = jsonpickle.decode(data['elements']['orientations'])
-            stimulus._data                       = jsonpickle.decode(data['elements']['data'])
-            stimulus._attribute_overrides        = jsonpickle.decode(data['elements']['overrides'])
-            stimulus._element_presentation_order = jsonpickle.decode(data['elements']['element_order'])
-            stimulus._idlabels                  = jsonpickle.decode(data['elements']['idlabels'])
-            stimulus._classlabels               = jsonpickle.decode(data['elements']['classlabels'])
-            stimulus._mirrorvalues              = jsonpickle.decode(data['elements']['mirrorvalues'])
-            stimulus._links                      = jsonpickle.decode(data['elements']['links'])
-                          
+        else:
+           stimulus = Stimulus(                                
+                            data['stimulus']['x_margin'], 
+                            data['stimulus']['y_margin'],
+                            stimulus_size,
+                            data['stimulus']['background_color'],
+                            jsonpickle.decode(data['stimulus']['background_shape']),
+                            jsonpickle.decode(data['stimulus']['stim_mask']),
+                            data['stimulus']['stim_orientation'],
+                            data['stimulus']['stim_mirrorvalue'],
+                            data['stimulus']['stim_link'],
+                            data['stimulus']['stim_classlabel'],
+                            data['stimulus']['stim_idlabel'],
+                            seed = data['stimulus'].get('seed'))
+        
+        stimulus._autosize_method = data['stimulus']['autosize_method']
+        
+        # Define position characteristics                                
+        stimulus.positions._position_type       = data['positions']['positiontype']
+        stimulus.positions._position_parameters = jsonpickle.decode(data['positions']['positionparameters'])
+        stimulus.positions._jitter       = data['positions']['jitter']
+        stimulus.positions._jitter_parameters = jsonpickle.decode(data['positions']['jitterparameters'])
+        stimulus.positions._deviation           = data['positions']['deviation']
+        stimulus.positions._deviation_parameters = jsonpickle.decode(data['positions']['deviationparameters'])
+
+        if stimulus.positions._position_type == "RectGrid":
+            stimulus.positions = Positions.CreateRectGrid(n_rows = stimulus.positions._position_parameters['n_rows'], 
+                                                        n_cols = stimulus.positions._position_parameters['n_cols'], 
+                                                        row_spacing = stimulus.positions._position_parameters['row_spacing'], 
+                                                        col_spacing= stimulus.positions._position_parameters['col_spacing'])
+        elif stimulus.positions._position_type == "SineGrid":
+            stimulus.positions = Positions.CreateSineGrid(n_rows = stimulus.positions._position_parameters['n_rows'], 
+                                                          n_cols = stimulus.positions._position_parameters['n_cols'], 
+                                                          row_spacing = stimulus.positions._position_parameters['row_spacing'], 
+                                                          col_spacing= stimulus.positions._position_parameters['col_spacing'],
+                                                          A = stimulus.positions._position_parameters['A'],  
+                                                          f = stimulus.positions._position_parameters['f'], 
+                                                          axis = stimulus.positions._position_parameters['axis'])
+        elif stimulus.positions._position_type == "CustomPositions":
+            stimulus.positions = Positions.CreateCustomPositions(x = stimulus.positions._position_parameters['x'].pattern, 
+                                                                 y = stimulus.positions._position_parameters['y'].pattern)
+        elif stimulus.positions._position_type == "Circle":
+            stimulus.positions = Positions.CreateCircle(radius = stimulus.positions._position_parameters['radius'], 
+                                                        n_elements = stimulus.positions._position_parameters['n_elements'], 
+                                                        starting_point = stimulus.positions._position_parameters['starting_point'])
+        elif stimulus.positions._position_type == "Shape":
+            stimulus.positions = Positions.CreateShape(n_elements = stimulus.positions._position_parameters['n_elements'], 
+                                                       src = stimulus.positions._position_parameters['src'], 
+                                                       path = stimulus.positions._position_parameters['path'],  
+                                                       width = stimulus.positions._position_parameters['width'], 
+                                                       height = stimulus.positions._position_parameters['height'])
+        elif stimulus.positions._position_type == "RandomPositions":
+            stimulus.positions = Positions.CreateRandomPositions(n_elements = stimulus.positions._position_parameters['n_elements'],  
+                                                                 width = stimulus.positions._position_parameters['width'], 
+                                                                 height = stimulus.positions._position_parameters['height'],
+                                                                 min_distance = stimulus.positions._position_parameters['min_distance'], 
+                                                                 max_iterations = stimulus.positions._position_parameters['max_iterations'],
+                                                                 seed = stimulus.positions._position_parameters.get('seed'),
+                                                                 boundingboxes = stimulus.positions._position_parameters.get('boundingboxes'))
+            
+           
+        # Define element characteristics
+        stimulus.positions                   = jsonpickle.decode(data['elements']['positions'])
+        if not hasattr(stimulus.positions, '_xy'):
+            stimulus.positions.__setstate__(dict(vars(stimulus.positions)))
+        stimulus._boundingboxes             = jsonpickle.decode(data['elements']['boundingboxes'])
+        stimulus._shapes                     = jsonpickle.decode(data['elements']['shapes'])
+        stimulus._fillcolors                 = jsonpickle.decode(data['elements']['fillcolors'])
+        stimulus._opacities                  = jsonpickle.decode(data['elements']['opacities'])
+        stimulus._bordercolors               = jsonpickle.decode(data['elements']['bordercolors'])
+        stimulus._borderwidths               = jsonpickle.decode(data['elements']['borderwidths'])
+        stimulus._orientations               = jsonpickle.decode(data['elements']['orientations'])
+        stimulus._data                       = jsonpickle.decode(data['elements']['data'])
+        stimulus._attribute_overrides        = jsonpickle.decode(data['elements']['overrides'])
+        stimulus._element_presentation_order = jsonpickle.decode(data['elements']['element_order'])
+        stimulus._idlabels                  = jsonpickle.decode(data['elements']['idlabels'])
+        stimulus._classlabels               = jsonpickle.decode(data['elements']['classlabels'])
+        stimulus._mirrorvalues              = jsonpickle.decode(data['elements']['mirrorvalues'])
+        stimulus._links                      = jsonpickle.decode(data['elements']['links'])
+                      
         return stimulus
     
-                           
-    def Render(self):
+                       
+    def Render(self, reseed = False):
         """
         Prepares the SVG stimulus. The stimulus parameters are first parsed, then
         a new drawing is instantiated to which all the individual elements are added.
+        
+        The drawing is reused as long as the stimulus does not change. If only
+        individual elements changed (set_element_* methods and swaps), only
+        the svg nodes of those elements are generated again.
+        
+        All random components are derived from the seed of the stimulus, so
+        rendering the same stimulus again gives the same realization of
+        randomized patterns and position jitter. Assign a new seed or use
+        reseed = True to get a new realization.
+        
+        Parameters
+        ----------
+        reseed : bool, optional
+            If True, a new seed is drawn from the global random module before
+            rendering. The default is False.
 
         """
-        self.__CalculateStimulusValues()
-        self.__AutoCalculateSize()
-        self.__ParseDrawingParameters()
-        self.__StartNewDrawing()
-        self.__AddDrawingElements()
+        if reseed:
+            self.seed = None
+            
+        render_state = self.__GetRenderState()
+        
+        # In symbol mode, a changed element can change which geometries are
+        # shared, so the elements are all generated again
+        if (self.dwg is None or self._render_dirty or not _same_render_state(render_state, self._render_state)
+            or (self.use_symbols and len(self._dirty_elements) > 0)):
+            self.__CalculateStimulusValues()
+            self.__AutoCalculateSize()
+            self.__ParseDrawingParameters()
+            self.__StartNewDrawing()
+            self.__AddDrawingElements()
+        elif len(self._dirty_elements) > 0:
+            self.__UpdateDrawingElements()
+            
+        self._render_state = render_state
+        self._render_dirty = False
+        self._dirty_elements = set()
+        
+    def __GetRenderState(self):
+        """
+        Collects the generated element attribute patterns and the position
+        parameters. Patterns or positions that were changed in place give a
+        different state, so that they are also rendered again.
+
+        """
+        patterns = tuple(getattr(self, attr).generate_cached(self._derive_seed(attr)) for attr in self._element_attributes)
+        positions = _freeze_value(vars(self.positions)) if self.positions is not None else None
+        
+        return (positions, patterns)
         
             
     def Show(self):
@@ -712,7 +928,7 @@ class Stimulus:
         """
         
         self.Render()             
-        display(SVG(self.dwg.tostring()))
+        display(SVG(self.GetSVG()))
             
         
     def __CalculateStimulusValues(self):
@@ -720,112 +936,41 @@ class Stimulus:
         Gets the actual element positions and adds them to the stimulus properties.
 
         """
-        self._calculated_positions = self.positions.GetPositions()
+        xy = self.positions.GetPositionArray(random.Random(self._derive_seed("positions")))
+        self._calculated_positions = (xy[:, 0], xy[:, 1])
         
     def __ParseDrawingParameters(self):
         """
-        Uses the stimulus parameter properties to create a dictionary with
+        Uses the stimulus parameter properties to create a table with the
         parameters for each individual shape.
 
         """
-        self.dwg_elements = []
-        
-        boundingboxes = self.boundingboxes
-        fillcolors     = self.fillcolors
-        opacities      = self.opacities
-        bordercolors   = self.bordercolors
-        borderwidths   = self.borderwidths
-        orientations   = self.orientations
-        datas          = self.data
-        shapes         = self.shapes
-        idlabels      = self.idlabels
-        classlabels   = self.classlabels
-        mirrorvalues  = self.mirrorvalues
-        links          = self.links
         x, y           = self._calculated_positions
+        n_elements     = len(self._element_presentation_order)
+        attributes     = self.__GetElementAttributes()
+
+        x_positions = x[:n_elements] + self._x_offset
+        y_positions = y[:n_elements] + self._y_offset
+
+        self.dwg_elements = ElementTable(x_positions, y_positions, attributes, self._attribute_overrides, self._element_presentation_order)
         
-        for i in range(len(self._element_presentation_order)):
-            idx = self._element_presentation_order[i]
-                   
-            x_i           = x[i] + self._x_offset
-            y_i           = y[i] + self._y_offset
-            
-            if 'boundingbox' in self._attribute_overrides[idx]:
-                boundingbox = self._attribute_overrides[idx]['boundingbox']
-            else:
-                boundingbox = boundingboxes[idx]
-                
-            if 'fillcolor' in self._attribute_overrides[idx]:
-                fillcolor = self._attribute_overrides[idx]['fillcolor']
-            else:
-                fillcolor = fillcolors[idx]
-                
-            if 'opacity' in self._attribute_overrides[idx]:
-                opacity = self._attribute_overrides[idx]['opacity']
-            else:
-                opacity = opacities[idx]
-                
-            if 'bordercolor' in self._attribute_overrides[idx]:
-                bordercolor = self._attribute_overrides[idx]['bordercolor']
-            else:
-                bordercolor = bordercolors[idx]
-            
-            if 'borderwidth' in self._attribute_overrides[idx]:
-                borderwidth = self._attribute_overrides[idx]['borderwidth']
-            else:
-                borderwidth = borderwidths[idx]
-            
-            if 'orientation' in self._attribute_overrides[idx]:
-                orientation = self._attribute_overrides[idx]['orientation']
-            else:
-                orientation = orientations[idx]
-            
-            if 'data' in self._attribute_overrides[idx]:
-                data = self._attribute_overrides[idx]['data']
-            else:
-                data = datas[idx]
-                            
-            if 'shape' in self._attribute_overrides[idx]:
-                shape = self._attribute_overrides[idx]['shape']
-            else:
-                shape = shapes[idx]
-                
-            if 'mirrorvalues' in self._attribute_overrides[idx]:
-                mirrorvalue = self._attribute_overrides[idx]['mirrorvalues']
-            else:
-                mirrorvalue = mirrorvalues[idx]
-                
-            if 'links' in self._attribute_overrides[idx]:
-                link = self._attribute_overrides[idx]['links']
-            else:
-                link = links[idx]
-                
-            if 'classlabels' in self._attribute_overrides[idx]:
-                classlabel = self._attribute_overrides[idx]['classlabels']
-            else:
-                classlabel = classlabels[idx]
-                
-            if 'idlabels' in self._attribute_overrides[idx]:
-                idlabel = self._attribute_overrides[idx]['idlabels']
-            else:
-                idlabel = idlabels[idx]
-                
-            element_parameters = {'element_id'   : i,
-                                  'position'     : (x_i, y_i), 
-                                  'shape'        : shape, 
-                                  'boundingbox' : boundingbox, 
-                                  'fillcolor'    : fillcolor,
-                                  'orientation'  : orientation,
-                                  'borderwidth'  : borderwidth,
-                                  'bordercolor'  : bordercolor,
-                                  'opacity'      : opacity, 
-                                  'mirrorvalue' : mirrorvalue,
-                                  'link'         : link,
-                                  'classlabel'  : classlabel,
-                                  'idlabel'     : idlabel,
-                                  'data'         : data}
-            
-            self.dwg_elements.append(element_parameters)
+    def __GetElementAttributes(self):
+        """
+        Returns a dictionary with the pattern values of each element attribute.
+
+        """
+        return {'shape'       : self.shapes,
+                'boundingbox' : self.boundingboxes,
+                'fillcolor'   : self.fillcolors,
+                'orientation' : self.orientations,
+                'borderwidth' : self.borderwidths,
+                'bordercolor' : self.bordercolors,
+                'opacity'     : self.opacities,
+                'mirrorvalue' : self.mirrorvalues,
+                'link'        : self.links,
+                'idlabel'     : self.idlabels,
+                'classlabel'  : self.classlabels,
+                'data'        : self.data}
                         
             
     def __StartNewDrawing(self):        
@@ -922,7 +1067,7 @@ class Stimulus:
         if (type(self.stim_orientation) == int) or (type(self.stim_orientation) == float):
             rotation_transform = "rotate(%d, %d, %d)"%(self.stim_orientation, self.width/2, self.height/2)
         elif type(self.stim_orientation) == list:
-            self.rotation_animation = "svgwrite.animate.AnimateTransform('rotate','transform', from_= '" + str(self.stim_orientation[1]) + " " + str(self.width/2) + " " + str(self.height/2) + "', to = '" + str(self.stim_orientation[2]) + " " + str(self.width/2) + " " + str(self.height/2) + "', " + self.stim_orientation[3] + ")"
+            self.rotation_animation = RotationAnimation(self.stim_orientation[1], self.stim_orientation[2], (self.width/2, self.height/2), self.stim_orientation[3])
             rotation_transform = "rotate(%d, %d, %d)"%(int(self.stim_orientation[1]), self.width/2, self.height/2)
             
         if (mirror_transform != "") | (rotation_transform != ""):
@@ -938,46 +1083,20 @@ class Stimulus:
             
         elif type(self.background_color) == list:
             if self.background_color[0] == "set":                
-                self.background_color_animation = "svgwrite.animate.Set(attributeName = 'fill'," + self.background_color[2] + ")"
-                self.background_color = self.background_color[1]
-                self.background = self.dwg.rect(insert = (0, 0), size = (self.width, self.height), fill = self.background_color) 
+                self.background_color_animation = ParseAnimation("set", 'fill', self.background_color[2])
+                self.background = self.dwg.rect(insert = (0, 0), size = (self.width, self.height), fill = self.background_color[1]) 
         
             elif self.background_color[0] == "animate":
-                self.background_color_animation = "svgwrite.animate.Animate(attributeName = 'fill'," + self.background_color[2] + ")"
-                self.background_color = self.background_color[1]
-                self.background = self.dwg.rect(insert = (0, 0), size = (self.width, self.height), fill = self.background_color) 
+                self.background_color_animation = ParseAnimation("animate", 'fill', self.background_color[2])
+                self.background = self.dwg.rect(insert = (0, 0), size = (self.width, self.height), fill = self.background_color[1]) 
         
             else:
                 self.background_color_animation = ""
-            
-                gradient = ""
-                if self.background_color[0] == "radial":
-                    gradient = self.dwg.radialGradient()               
-                elif self.background_color[0] == "horizontal":
-                    gradient = self.dwg.linearGradient((0, 0), (1, 0))
-                elif self.background_color[0] == "vertical":
-                    gradient = self.dwg.linearGradient((0, 0), (0, 1))
-                elif self.background_color[0] == "diagonal":
-                    gradient = self.dwg.linearGradient((0, 0), (1, 1))
-                    
-                else:
-                    self.background = self.dwg.rect(insert = (0, 0), size = (self.width, self.height), fill = self.background_color) 
-        
-                    
-                if gradient != "":
-                    self.dwg.defs.add(gradient)
-                    
-                    # define the gradient colors
-                    n_colors = len(self.background_color)-1
-                    stepsize = 1 / (n_colors - 1)
-                    for i in range(n_colors):
-                        gradient.add_stop_color(i*stepsize, self.background_color[i+1])
-            
-                    self.background = self.dwg.rect(insert = (0, 0), size = (self.width, self.height), fill = gradient.get_paint_server() )
+                self.background = self.dwg.rect(insert = (0, 0), size = (self.width, self.height), fill = CreatePaintServer(self.dwg, self.background_color))
                 
                 
         if self.background_color_animation != "":
-            self.background.add(eval(self.background_color_animation))
+            self.background.add(self.background_color_animation.create())
             
         self.stim.add(self.background)  
             
@@ -989,11 +1108,58 @@ class Stimulus:
             self.stim['id']        = self.stim_idlabel
         
         if self.rotation_animation != "":
-            self.stim.add(eval(self.rotation_animation))  
+            self.stim.add(self.rotation_animation.create())  
            
         if self.stim_link != None:       
-            link = 'self.dwg.add(self.dwg.a(href = "' + str(self.stim_link) + '", target="_blank"' + '))'
-            self.stim = eval(link).add(self.stim)
+            self.stim = Link(self.stim_link).create(self.dwg).add(self.stim)
+            
+    @property
+    def seed(self):
+        """
+        The seed for the random components of the stimulus
+        
+        """
+        return self._seed
+    
+    @seed.setter
+    def seed(self, seed):
+        """
+        Sets the seed for the random components of the stimulus. Assigning
+        a new seed gives a new realization of the random element attributes
+        and position jitter.
+        
+        Parameters
+        ----------
+        seed: int or None
+            The new seed. If None, a seed is drawn from the global random module.
+
+        """
+        if seed is None:
+            seed = random.randrange(2**32)
+        assert type(seed) == int, "seed must be an integer"
+        
+        self._seed = seed
+        self._rng = random.Random(seed)
+        
+    def _derive_seed(self, purpose):
+        """
+        Derives a seed for a single random component of the stimulus, so that
+        each component gets its own reproducible stream of random numbers.
+
+        Parameters
+        ----------
+        purpose: string
+            Name of the random component, e.g. the name of an element attribute.
+
+        Returns
+        -------
+        int
+            Seed for the random component.
+
+        """
+        digest = hashlib.sha256(("%d:%s"%(self._seed, purpose)).encode("ascii")).digest()
+        
+        return int.from_bytes(digest[:4], "little")
             
     @property
     def x_margin(self):
@@ -1066,18 +1232,16 @@ class Stimulus:
         if len(x) == 0:
             return
         
-        min_x = x[0]
-        max_x = x[0]
-        min_y = y[0]
-        max_y = y[0]
+        min_x = max_x = x[0].item()
+        min_y = max_y = y[0].item()
         
         boundingboxes = self.boundingboxes
         
         if self._autosize_method == "maximum_boundingbox":
-            min_position_x = min(x)
-            max_position_x = max(x)
-            min_position_y = min(y)
-            max_position_y = max(y)
+            min_position_x = x.min().item()
+            max_position_x = x.max().item()
+            min_position_y = y.min().item()
+            max_position_y = y.max().item()
             
             max_boundingbox_x = max(list(list(zip(*boundingboxes))[0]))
             max_boundingbox_y = max(list(list(zip(*boundingboxes))[1]))
@@ -1089,16 +1253,12 @@ class Stimulus:
             max_y = max_position_y + max_boundingbox_y//2
             
         elif self._autosize_method == "tight_fit":
-            for i in range(len(x)):
-                if (x[i] - boundingboxes[i][0]//2) < min_x:
-                    min_x = x[i] -  boundingboxes[i][0]//2
-                if (x[i] +  boundingboxes[i][0]//2) > max_x:
-                    max_x = x[i] +  boundingboxes[i][0]//2 
-                    
-                if (y[i] -  boundingboxes[i][1]//2) < min_y: 
-                    min_y = y[i] -  boundingboxes[i][1]//2
-                if (y[i] +  boundingboxes[i][1]//2) > max_y: 
-                    max_y = y[i] +  boundingboxes[i][1]//2
+            half_boundingboxes = np.array(boundingboxes[:len(x)]) // 2
+            
+            min_x = min(min_x, (x - half_boundingboxes[:, 0]).min().item())
+            max_x = max(max_x, (x + half_boundingboxes[:, 0]).max().item())
+            min_y = min(min_y, (y - half_boundingboxes[:, 1]).min().item())
+            max_y = max(max_y, (y + half_boundingboxes[:, 1]).max().item())
                 
         self.width = abs(max_x - min_x) + sum(self.x_margin)
         self.height = abs(max_y - min_y) + sum(self.y_margin)
@@ -1112,10 +1272,148 @@ class Stimulus:
         Adds the provided stimulus elements to the svg drawing.
 
         """                
+        self._element_node_offset = len(self.stim.elements)
+        self._symbols = {}
+        self._symbol_counts = self.__CountSymbolGeometries()
+        # Keep track of the gradients used by the background and by each element
+        self._background_gradients = CollectGradientUses(self.dwg)
+        self._element_nodes = []
+        self._element_gradients = []
         for i in range(len(self.dwg_elements)):
-            if not self.dwg_elements[i]['shape'] == None:
-                el = self.dwg_elements[i]['shape'](**self.dwg_elements[i])
-                self.stim.add(el.generate(self.dwg))
+            self._element_nodes.append(self.__GenerateElementNode(i))
+            self._element_gradients.append(CollectGradientUses(self.dwg))
+        self._element_svg = [None] * len(self._element_nodes)
+        
+        for node, _, _ in self._element_nodes:
+            if node is not None:
+                self.stim.add(node)
+                
+    def __UpdateDrawingElements(self):
+        """
+        Generates the svg nodes of the changed elements again and replaces
+        them in the svg drawing.
+
+        """
+        attributes = self.__GetElementAttributes()
+        
+        for i in range(len(self.dwg_elements)):
+            idx = self._element_presentation_order[i]
+            if idx not in self._dirty_elements:
+                continue
+            
+            self.dwg_elements.SetElement(i, {column: attributes[column][idx] for column in attributes}, self._attribute_overrides[idx])
+            
+            # Remove the definitions and links that were added by the previous node
+            _, old_defs, old_links = self._element_nodes[i]
+            removed = set(id(node) for node in old_defs + old_links)
+            self.dwg.defs.elements = [node for node in self.dwg.defs.elements if id(node) not in removed]
+            self.dwg.elements = [node for node in self.dwg.elements if id(node) not in removed]
+            
+            self._element_nodes[i] = self.__GenerateElementNode(i)
+            self._element_gradients[i] = CollectGradientUses(self.dwg)
+            self._element_svg[i] = None
+            
+        # Remove the gradients that are no longer used, and define the others
+        # in the same order as a full render
+        KeepGradients(self.dwg, itertools.chain(self._background_gradients, *self._element_gradients))
+
+        self.stim.elements[self._element_node_offset:] = [node for node, _, _ in self._element_nodes if node is not None]
+
+        # Links are drawn after the stimulus, in the same order as the elements
+        link_nodes = [link for _, _, links in self._element_nodes for link in links]
+        link_ids = set(id(node) for node in link_nodes)
+        self.dwg.elements = [node for node in self.dwg.elements if id(node) not in link_ids] + link_nodes
+        
+    def __GenerateElementNode(self, i):
+        """
+        Generates the svg node of the element at presentation position i.
+
+        Returns
+        -------
+        tuple
+            The svg node (or None if the element has no shape), and the lists
+            of definitions and links that the element added to the drawing.
+
+        """
+        element_parameters = self.dwg_elements[i]
+        if element_parameters['shape'] == None:
+            return (None, [], [])
+        
+        n_defs = len(self.dwg.defs.elements)
+        n_links = len(self.dwg.elements)
+        
+        el = element_parameters['shape'](**element_parameters)
+        if self.use_symbols and _has_static_geometry(el) and self._symbol_counts[_symbol_key(element_parameters)] > 1:
+            node = self.__GenerateSymbolUse(el, element_parameters)
+        else:
+            node = el.generate(self.dwg)
+            
+        # Symbols and gradients are shared between elements and stay in the drawing
+        shared = set(id(node) for node in list(self._symbols.values()) + GetGradients(self.dwg))
+        new_defs = [node for node in self.dwg.defs.elements[n_defs:] if id(node) not in shared]
+        
+        return (node, new_defs, self.dwg.elements[n_links:])
+    
+    def __CountSymbolGeometries(self):
+        """
+        Counts how many elements without animations or hyperlinks have each
+        geometry. In symbol mode, only geometries that occur more than once
+        are defined as a symbol.
+
+        """
+        counts = collections.Counter()
+        if not self.use_symbols:
+            return counts
+        
+        for i in range(len(self.dwg_elements)):
+            element_parameters = self.dwg_elements[i]
+            if element_parameters['shape'] != None and _has_static_geometry(element_parameters['shape'](**element_parameters)):
+                counts[_symbol_key(element_parameters)] += 1
+                
+        return counts
+    
+    def __GenerateSymbolUse(self, el, element_parameters):
+        """
+        Generates a use node that refers to the symbol with the geometry of
+        the element. The symbol is created the first time a geometry occurs.
+
+        """
+        key = _symbol_key(element_parameters)
+        symbol = self._symbols.get(key)
+        if symbol is None:
+            # Generate the geometry centered at the origin, without presentation attributes
+            origin_parameters = dict(element_parameters, position = (0, 0), orientation = 0, mirrorvalue = "",
+                                     fillcolor = "none", bordercolor = "none", classlabel = "", idlabel = "", link = "")
+            origin_el = element_parameters['shape'](**origin_parameters)
+            geometry = origin_el.generate(self.dwg)
+            
+            # Keep only the part of the transform that does not depend on orientation and mirroring
+            geometry_transform = origin_el.create_geometry_transform()
+            
+            for attribute in Stimulus._instance_attributes:
+                geometry.attribs.pop(attribute, None)
+            if geometry_transform != "":
+                geometry['transform'] = geometry_transform
+                
+            symbol = self.dwg.symbol(overflow = "visible")
+            symbol.add(geometry)
+            self.dwg.defs.add(symbol)
+            self._symbols[key] = symbol
+        
+        node = self.dwg.use(symbol, transform = " ".join([el.create_mirror_transform(), el.rotation_transform,
+                                                          "translate(%f, %f)"%(el.position[0], el.position[1])]))
+        
+        if not isinstance(el, (Image_, FitImage_)):
+            node['fill'] = el.create_fillcolor(self.dwg)
+        node['opacity'] = el.opacity
+        node['stroke'] = el.create_bordercolor(self.dwg)
+        node['stroke-width'] = el.borderwidth
+        if el.classlabel != "":
+            node['class'] = el.classlabel
+        if el.idlabel != "":
+            node['id'] = el.idlabel
+            
+        return node
                 
     def CalculateCenter(self):
         """
@@ -1123,8 +1421,8 @@ class Stimulus:
         """       
         x, y = self._calculated_positions
         
-        self._x_center = sum(x)/len(x)
-        self._y_center  = sum(y)/len(y)
+        self._x_center = x.sum().item()/len(x)
+        self._y_center  = y.sum().item()/len(y)
         
         return (self._x_center, self._y_center)
         
@@ -1138,11 +1436,15 @@ class Grid(Stimulus):
     _element_attributes = ["_boundingboxes", "_orientations", "_bordercolors", "_borderwidths", "_fillcolors", "_opacities", "_shapes",
                           "_classlabels", "_idlabels", "_mirrorvalues", "_links" ,"_data"]
     
+    _render_attributes = Stimulus._render_attributes | frozenset(_element_attributes + ["_n_rows", "_n_cols", "row_spacing", "col_spacing",
+                                                                                        "_attribute_overrides", "_element_presentation_order"])
+    
     def __init__(self, n_rows, n_cols, row_spacing = 50, col_spacing= 50, 
                  x_margin = 20, y_margin = 20, size = None, 
                  background_color = "white", background_shape = None, 
                  stim_mask = None, stim_orientation = 0, stim_mirrorvalue = None, 
-                 stim_link = None, stim_classlabel = None, stim_idlabel = None):
+                 stim_link = None, stim_classlabel = None, stim_idlabel = None,
+                 seed = None):
         """
         Instantiates a Grid stimulus object.
 
@@ -1186,13 +1488,17 @@ class Grid(Stimulus):
             If specified, defines the class label that can be used to add javascript or css changes to the stimulus. 
         stim_idlabel: string, optional
             If specified, defines the id label that can be used to add javascript or css changes to the stimulus.        
+        seed: int, optional
+            Seed for all random components of the stimulus. If None, a seed
+            is drawn from the global random module.
 
         """
 
         super().__init__(x_margin = x_margin, y_margin = y_margin, size = size, 
                          background_color = background_color, background_shape = background_shape, 
                          stim_mask = stim_mask, stim_orientation = stim_orientation, stim_mirrorvalue = stim_mirrorvalue, 
-                         stim_link = stim_link, stim_classlabel = stim_classlabel, stim_idlabel = stim_idlabel)
+                         stim_link = stim_link, stim_classlabel = stim_classlabel, stim_idlabel = stim_idlabel,
+                         seed = seed)
         
         # Initialize the positions of each element
         self._n_rows = n_rows
@@ -1311,7 +1617,7 @@ class Grid(Stimulus):
         contains the element.
         
         """
-        return self._boundingboxes.generate().pattern
+        return list(self._boundingboxes.generate_cached(self._derive_seed("_boundingboxes")).pattern)
     
     
     @boundingboxes.setter
@@ -1350,6 +1656,7 @@ class Grid(Stimulus):
             
         """
         element_id = self._parse_element_id(element_id)
+        self._dirty_elements.add(element_id)
         boundingbox_value = Grid._check_boundingbox_value(boundingbox_value)                
         self._attribute_overrides[element_id]['boundingbox'] = boundingbox_value
         
@@ -1387,7 +1694,7 @@ class Grid(Stimulus):
                
         # 1. Sample n element ids to change
         if element_id is None:
-            changes = random.sample(range(n_elements), n_changes)
+            changes = self._rng.sample(range(n_elements), n_changes)
         else:
             changes = element_id
             
@@ -1421,7 +1728,7 @@ class Grid(Stimulus):
         The shape for each element in the grid.
         
         """
-        return self._shapes.generate().pattern
+        return list(self._shapes.generate_cached(self._derive_seed("_shapes")).pattern)
         
     
     @shapes.setter
@@ -1446,7 +1753,9 @@ class Grid(Stimulus):
         self._shapes.n_cols = self._n_cols
 
 
-        if (self._shapes.generate().patterndirection == "Grid") & (self._shapes.generate().patterntype in ["Tiled", "TiledElement"]):
+        generated_shapes = self._shapes.generate_cached(self._derive_seed("_shapes"))
+
+        if (generated_shapes.patterndirection == "Grid") & (generated_shapes.patterntype in ["Tiled", "TiledElement"]):
             
             datalist = []
             patternlist = self._shapes.source_grid.pattern
@@ -1471,7 +1780,7 @@ class Grid(Stimulus):
                     else:
                         datalist.append("")
 
-            self.data = eval(str(self._shapes.generate().patternclass + self._shapes.generate().patterntype) + str(self._shapes.generate().patterndirection) + "(" + str("GridPattern." + self._shapes.source_grid.patterntype) + str(self._shapes.source_grid.patterndirection) + "(" + str(datalist) + ", " + str(self._shapes.source_grid.n_rows) + ", " + str(self._shapes.source_grid.n_cols) + "), (" + str(int(self._shapes.generate().n_rows/self._shapes.source_grid.n_rows)) + ", " + str(int(self._shapes.generate().n_cols/self._shapes.source_grid.n_cols)) + "))")
+            self.data = eval(str(generated_shapes.patternclass + generated_shapes.patterntype) + str(generated_shapes.patterndirection) + "(" + str("GridPattern." + self._shapes.source_grid.patterntype) + str(self._shapes.source_grid.patterndirection) + "(" + str(datalist) + ", " + str(self._shapes.source_grid.n_rows) + ", " + str(self._shapes.source_grid.n_cols) + "), (" + str(int(generated_shapes.n_rows/self._shapes.source_grid.n_rows)) + ", " + str(int(generated_shapes.n_cols/self._shapes.source_grid.n_cols)) + "))")
         
         else:
             
@@ -1496,7 +1805,7 @@ class Grid(Stimulus):
                     else:
                         datalist.append("")
 
-            self.data = eval(str(self._shapes.generate().patternclass + self._shapes.generate().patterntype) + str(self._shapes.generate().patterndirection) + "(" + str(datalist) + ")")
+            self.data = eval(str(generated_shapes.patternclass + generated_shapes.patterntype) + str(generated_shapes.patterndirection) + "(" + str(datalist) + ")")
  
        
     def set_element_shape(self, element_id, shape_value):
@@ -1513,6 +1822,7 @@ class Grid(Stimulus):
 
         """
         element_id = self._parse_element_id(element_id)
+        self._dirty_elements.add(element_id)
         
         self._attribute_overrides[element_id]['shape'] = shape_value
         
@@ -1571,7 +1881,7 @@ class Grid(Stimulus):
                
         # 1. Sample n element ids to change
         if element_id is None:
-            changes = random.sample(range(n_elements), n_changes)
+            changes = self._rng.sample(range(n_elements), n_changes)
         else:
             changes = element_id
             
@@ -1616,7 +1926,7 @@ class Grid(Stimulus):
                
         # 1. Sample n element ids to remove
         if element_id is None:
-            removals = random.sample(range(n_elements), n_removals)
+            removals = self._rng.sample(range(n_elements), n_removals)
         else:
             removals = element_id
             
@@ -1630,7 +1940,7 @@ class Grid(Stimulus):
         The bordercolor for each element in the grid.
         
         """
-        return self._bordercolors.generate().pattern
+        return list(self._bordercolors.generate_cached(self._derive_seed("_bordercolors")).pattern)
     
     
     @bordercolors.setter
@@ -1668,6 +1978,7 @@ class Grid(Stimulus):
 
         """
         element_id = self._parse_element_id(element_id)
+        self._dirty_elements.add(element_id)
         
         self._attribute_overrides[element_id]['bordercolor'] = bordercolor_value
         
@@ -1706,7 +2017,7 @@ class Grid(Stimulus):
                
         # 1. Sample n element ids to change
         if element_id is None:
-            changes = random.sample(range(n_elements), n_changes)
+            changes = self._rng.sample(range(n_elements), n_changes)
         else:
             changes = element_id
             
@@ -1720,7 +2031,7 @@ class Grid(Stimulus):
         The fillcolor for each element in the grid.
         
         """
-        return self._fillcolors.generate().pattern
+        return list(self._fillcolors.generate_cached(self._derive_seed("_fillcolors")).pattern)
         
     
     @fillcolors.setter
@@ -1753,6 +2064,7 @@ class Grid(Stimulus):
 
         """
         element_id = self._parse_element_id(element_id)
+        self._dirty_elements.add(element_id)
         
         self._attribute_overrides[element_id]['fillcolor'] = fillcolor_value
         
@@ -1791,7 +2103,7 @@ class Grid(Stimulus):
                
         # 1. Sample n element ids to change
         if element_id is None:
-            changes = random.sample(range(n_elements), n_changes)
+            changes = self._rng.sample(range(n_elements), n_changes)
         else:
             changes = element_id
             
@@ -1805,7 +2117,7 @@ class Grid(Stimulus):
         The opacity for each element in the grid.
         
         """
-        return self._opacities.generate().pattern
+        return list(self._opacities.generate_cached(self._derive_seed("_opacities")).pattern)
         
     
     @opacities.setter
@@ -1843,6 +2155,7 @@ class Grid(Stimulus):
 
         """
         element_id = self._parse_element_id(element_id)
+        self._dirty_elements.add(element_id)
         
         self._attribute_overrides[element_id]['opacity'] = opacity_value
                     
@@ -1880,7 +2193,7 @@ class Grid(Stimulus):
                
         # 1. Sample n element ids to change
         if element_id is None:
-            changes = random.sample(range(n_elements), n_changes)
+            changes = self._rng.sample(range(n_elements), n_changes)
         else:
             changes = element_id
             
@@ -1894,7 +2207,7 @@ class Grid(Stimulus):
         The borderwidths for each element in the grid.
         
         """
-        return self._borderwidths.generate().pattern
+        return list(self._borderwidths.generate_cached(self._derive_seed("_borderwidths")).pattern)
         
     
     @borderwidths.setter
@@ -1932,6 +2245,7 @@ class Grid(Stimulus):
 
         """
         element_id = self._parse_element_id(element_id)
+        self._dirty_elements.add(element_id)
         
         self._attribute_overrides[element_id]['borderwidth'] = borderwidth_value
                        
@@ -1969,7 +2283,7 @@ class Grid(Stimulus):
                
         # 1. Sample n element ids to change
         if element_id is None:
-            changes = random.sample(range(n_elements), n_changes)
+            changes = self._rng.sample(range(n_elements), n_changes)
         else:
             changes = element_id
             
@@ -1983,7 +2297,7 @@ class Grid(Stimulus):
         The orientations for each element in the grid.
         
         """
-        return self._orientations.generate().pattern            
+        return list(self._orientations.generate_cached(self._derive_seed("_orientations")).pattern)            
     
     @orientations.setter
     def orientations(self, orientations):
@@ -2020,6 +2334,7 @@ class Grid(Stimulus):
             Orientation of the element.
         """
         element_id = self._parse_element_id(element_id)
+        self._dirty_elements.add(element_id)
         
         self._attribute_overrides[element_id]['orientation'] = orientation_value
             
@@ -2057,7 +2372,7 @@ class Grid(Stimulus):
                
         # 1. Sample n element ids to change
         if element_id is None:
-            changes = random.sample(range(n_elements), n_changes)
+            changes = self._rng.sample(range(n_elements), n_changes)
         else:
             changes = element_id
             
@@ -2071,7 +2386,7 @@ class Grid(Stimulus):
         The data for each element in the grid.
         
         """
-        return self._data.generate().pattern
+        return list(self._data.generate_cached(self._derive_seed("_data")).pattern)
         
     @data.setter
     def data(self, data):
@@ -2107,6 +2422,7 @@ class Grid(Stimulus):
             Data string for the element.
         """
         element_id = self._parse_element_id(element_id)
+        self._dirty_elements.add(element_id)
         
         self._attribute_overrides[element_id]['data'] = data_value
 
@@ -2144,7 +2460,7 @@ class Grid(Stimulus):
                
         # 1. Sample n element ids to change
         if element_id is None:
-            changes = random.sample(range(n_elements), n_changes)
+            changes = self._rng.sample(range(n_elements), n_changes)
         else:
             changes = element_id
             
@@ -2158,7 +2474,7 @@ class Grid(Stimulus):
         The class labels for each grid element
 
         """
-        return self._classlabels.generate().pattern
+        return list(self._classlabels.generate_cached(self._derive_seed("_classlabels")).pattern)
     
     @classlabels.setter
     def classlabels(self, classlabels):
@@ -2195,6 +2511,7 @@ class Grid(Stimulus):
         """
 
         element_id = self._parse_element_id(element_id)
+        self._dirty_elements.add(element_id)
         
         self._attribute_overrides[element_id]['classlabels'] = classlabel_value
         
@@ -2231,7 +2548,7 @@ class Grid(Stimulus):
                
         # 1. Sample n element ids to change
         if element_id is None:
-            changes = random.sample(range(n_elements), n_changes)
+            changes = self._rng.sample(range(n_elements), n_changes)
         else:
             changes = element_id
             
@@ -2245,7 +2562,7 @@ class Grid(Stimulus):
         The ids for each grid element
 
         """
-        return self._idlabels.generate().pattern
+        return list(self._idlabels.generate_cached(self._derive_seed("_idlabels")).pattern)
     
     @idlabels.setter
     def idlabels(self, idlabels):
@@ -2280,6 +2597,7 @@ class Grid(Stimulus):
             An idlabel string.
         """
         element_id = self._parse_element_id(element_id)
+        self._dirty_elements.add(element_id)
         
         self._attribute_overrides[element_id]['idlabels'] = idlabel_value
         
@@ -2316,7 +2634,7 @@ class Grid(Stimulus):
                
         # 1. Sample n element ids to change
         if element_id is None:
-            changes = random.sample(range(n_elements), n_changes)
+            changes = self._rng.sample(range(n_elements), n_changes)
         else:
             changes = element_id
             
@@ -2330,7 +2648,7 @@ class Grid(Stimulus):
         The mirror value for each grid element
 
         """
-        return self._mirrorvalues.generate().pattern
+        return list(self._mirrorvalues.generate_cached(self._derive_seed("_mirrorvalues")).pattern)
     
     @mirrorvalues.setter
     def mirrorvalues(self, mirrorvalues):
@@ -2367,6 +2685,7 @@ class Grid(Stimulus):
         """
 
         element_id = self._parse_element_id(element_id)
+        self._dirty_elements.add(element_id)
         
         self._attribute_overrides[element_id]['mirrorvalues'] = mirror_value
     
@@ -2404,7 +2723,7 @@ class Grid(Stimulus):
                
         # 1. Sample n element ids to change
         if element_id is None:
-            changes = random.sample(range(n_elements), n_changes)
+            changes = self._rng.sample(range(n_elements), n_changes)
         else:
             changes = element_id
             
@@ -2418,7 +2737,7 @@ class Grid(Stimulus):
         The link for each grid element
 
         """
-        return self._links.generate().pattern
+        return list(self._links.generate_cached(self._derive_seed("_links")).pattern)
     
     @links.setter
     def links(self, links):
@@ -2455,6 +2774,7 @@ class Grid(Stimulus):
         """
 
         element_id = self._parse_element_id(element_id)
+        self._dirty_elements.add(element_id)
         
         self._attribute_overrides[element_id]['links'] = link
     
@@ -2492,7 +2812,7 @@ class Grid(Stimulus):
                
         # 1. Sample n element ids to change
         if element_id is None:
-            changes = random.sample(range(n_elements), n_changes)
+            changes = self._rng.sample(range(n_elements), n_changes)
         else:
             changes = element_id
             
@@ -2516,27 +2836,27 @@ class Grid(Stimulus):
             
         if direction == "AcrossElements":
                
-            new_order = Pattern(self._element_presentation_order)._SetRandomizeAcrossElements()
+            new_order = Pattern(self._element_presentation_order)._SetRandomizeAcrossElements(rng = self._rng)
             self._element_presentation_order = new_order.pattern
             
         elif direction == "AcrossRows":
                
-            new_order = Pattern(self._element_presentation_order)._SetRandomizeAcrossRows(n_rows = self.n_rows, n_cols = self.n_cols)
+            new_order = Pattern(self._element_presentation_order)._SetRandomizeAcrossRows(n_rows = self.n_rows, n_cols = self.n_cols, rng = self._rng)
             self._element_presentation_order = new_order.pattern
                 
         elif direction == "AcrossColumns":
                
-            new_order = Pattern(self._element_presentation_order)._SetRandomizeAcrossColumns(n_rows = self.n_rows, n_cols = self.n_cols)
+            new_order = Pattern(self._element_presentation_order)._SetRandomizeAcrossColumns(n_rows = self.n_rows, n_cols = self.n_cols, rng = self._rng)
             self._element_presentation_order = new_order.pattern        
         
         elif direction == "AcrossLeftDiagonal":
                
-            new_order = Pattern(self._element_presentation_order)._SetRandomizeAcrossLeftDiagonal(n_rows = self.n_rows, n_cols = self.n_cols)
+            new_order = Pattern(self._element_presentation_order)._SetRandomizeAcrossLeftDiagonal(n_rows = self.n_rows, n_cols = self.n_cols, rng = self._rng)
             self._element_presentation_order = new_order.pattern
 
         elif direction == "AcrossRightDiagonal":
                
-            new_order = Pattern(self._element_presentation_order)._SetRandomizeAcrossRightDiagonal(n_rows = self.n_rows, n_cols = self.n_cols)
+            new_order = Pattern(self._element_presentation_order)._SetRandomizeAcrossRightDiagonal(n_rows = self.n_rows, n_cols = self.n_cols, rng = self._rng)
             self._element_presentation_order = new_order.pattern
             
     def swap_elements(self, n_swap_pairs = 1, swap_pairs = None):
@@ -2569,30 +2889,15 @@ class Grid(Stimulus):
         assert n_elements >= n_swap_pairs * 2, 'Maximal number of swaps possible is %d, but %d were requested'%(n_elements//2, n_swap_pairs)
               
         if swap_pairs is None:
-            # 1. Generate all available swap positions
-            candidate_swap_positions = set()
-            for i in range(n_elements):
-                for j in range(i+1, n_elements):
-                    candidate_swap_positions.add((i,j))
-                
-            # 2. Select the required number of swap positions
-            selected_swap_pairs = []
-            for i in range(n_swap_pairs):
-                selected_pair = random.sample(sorted(candidate_swap_positions), 1)[0]
-                selected_swap_pairs.append(selected_pair)
-                
-                removable_positions = set()
-                for p in candidate_swap_positions:
-                    if selected_pair[0] in p or selected_pair[1] in p:
-                        removable_positions.add(p)
-                        
-                candidate_swap_positions.difference_update(removable_positions)
+            # 1-2. Select the required number of swap positions
+            selected_swap_pairs = self._select_swap_pairs(n_swap_pairs)
         else:
             selected_swap_pairs = swap_pairs
             
         # 3. Perform the swap
         for swap_pair in selected_swap_pairs:
             self._element_presentation_order[swap_pair[0]], self._element_presentation_order[swap_pair[1]] = self._element_presentation_order[swap_pair[1]], self._element_presentation_order[swap_pair[0]]
+            self._dirty_elements.update([self._element_presentation_order[swap_pair[0]], self._element_presentation_order[swap_pair[1]]])
             
             
     def swap_distinct_elements(self, n_swap_pairs = 1, distinction_features = ['shapes', 'boundingboxes', 'fillcolors', 'orientations', 'opacities', 'mirrorvalues', 'links', 'classlabels', 'idlabels']):
@@ -2623,32 +2928,13 @@ class Grid(Stimulus):
             fingerprint = "|".join([str(features[f][idx]) for f in distinction_features])
             element_fingerprints.append(fingerprint)
             
-        # 1. Generate all available swap positions
-        n_elements = self.n_rows * self.n_cols
-        
-        candidate_swap_positions = set()
-        for i in range(n_elements):
-            for j in range(i+1, n_elements):
-                if element_fingerprints[i] != element_fingerprints[j]:
-                    candidate_swap_positions.add((i,j))
-        
-        # 2. Select the required number of swap positions
-        selected_swap_pairs = []
-        for i in range(n_swap_pairs):
-            assert len(candidate_swap_positions) > 0, "Distinct swaps exhausted, try again with a lower number of pairs"
-            selected_pair = random.sample(sorted(candidate_swap_positions), 1)[0]
-            selected_swap_pairs.append(selected_pair)
-            
-            removable_positions = set()
-            for p in candidate_swap_positions:
-                if selected_pair[0] in p or selected_pair[1] in p:
-                    removable_positions.add(p)
-                    
-            candidate_swap_positions.difference_update(removable_positions)
+        # 1-2. Select the required number of swap positions
+        selected_swap_pairs = self._select_swap_pairs(n_swap_pairs, element_fingerprints)
             
         # 3. Perform the swap
         for swap_pair in selected_swap_pairs:
             self._element_presentation_order[swap_pair[0]], self._element_presentation_order[swap_pair[1]] = self._element_presentation_order[swap_pair[1]], self._element_presentation_order[swap_pair[0]]
+            self._dirty_elements.update([self._element_presentation_order[swap_pair[0]], self._element_presentation_order[swap_pair[1]]])
 
     def swap_features(self, n_swap_pairs = 1, feature_dimensions = ['fillcolors'], swap_pairs = None):
         """
@@ -2673,27 +2959,8 @@ class Grid(Stimulus):
             n_swap_pairs = len(swap_pairs)  
             
         if swap_pairs is None:
-            # 1. Generate all available swap positions
-            n_elements = self.n_rows * self.n_cols
-            
-            candidate_swap_positions = set()
-            for i in range(n_elements):
-                for j in range(i+1, n_elements):
-                    candidate_swap_positions.add((i,j))
-            
-            # 2. Select the required number of swap positions
-            selected_swap_pairs = []
-            for i in range(n_swap_pairs):
-                assert len(candidate_swap_positions) > 0, "Distinct swaps exhausted, try again with a lower number of pairs"
-                selected_pair = random.sample(sorted(candidate_swap_positions), 1)[0]
-                selected_swap_pairs.append(selected_pair)
-                
-                removable_positions = set()
-                for p in candidate_swap_positions:
-                    if selected_pair[0] in p or selected_pair[1] in p:
-                        removable_positions.add(p)
-                        
-                candidate_swap_positions.difference_update(removable_positions)
+            # 1-2. Select the required number of swap positions
+            selected_swap_pairs = self._select_swap_pairs(n_swap_pairs)
         else:
             selected_swap_pairs = swap_pairs
             
@@ -2702,6 +2969,7 @@ class Grid(Stimulus):
             
             swap_element_0 = self._parse_element_id(swap_pair[0])
             swap_element_1 = self._parse_element_id(swap_pair[1])
+            self._dirty_elements.update([swap_element_0, swap_element_1])
             
             if 'shapes' in feature_dimensions:
                 self._attribute_overrides[swap_element_0]['shape'] , self._attribute_overrides[swap_element_1]['shape'] = self.shapes[swap_pair[1]], self.shapes[swap_pair[0]]
@@ -2757,34 +3025,15 @@ class Grid(Stimulus):
             fingerprint = "|".join([str(features[f][idx]) for f in feature_dimensions])
             element_fingerprints.append(fingerprint)
             
-        # 1. Generate all available swap positions
-        n_elements = self.n_rows * self.n_cols
-        
-        candidate_swap_positions = set()
-        for i in range(n_elements):
-            for j in range(i+1, n_elements):
-                if element_fingerprints[i] != element_fingerprints[j]:
-                    candidate_swap_positions.add((i,j))
-        
-        # 2. Select the required number of swap positions
-        selected_swap_pairs = []
-        for i in range(n_swap_pairs):
-            assert len(candidate_swap_positions) > 0, "Distinct swaps exhausted, try again with a lower number of pairs"
-            selected_pair = random.sample(sorted(candidate_swap_positions), 1)[0]
-            selected_swap_pairs.append(selected_pair)
-            
-            removable_positions = set()
-            for p in candidate_swap_positions:
-                if selected_pair[0] in p or selected_pair[1] in p:
-                    removable_positions.add(p)
-                    
-            candidate_swap_positions.difference_update(removable_positions)
+        # 1-2. Select the required number of swap positions
+        selected_swap_pairs = self._select_swap_pairs(n_swap_pairs, element_fingerprints)
             
         # 3. Perform the swap
         for swap_pair in selected_swap_pairs:
             
             swap_element_0 = self._parse_element_id(swap_pair[0])
             swap_element_1 = self._parse_element_id(swap_pair[1])
+            self._dirty_elements.update([swap_element_0, swap_element_1])
             
             if 'shapes' in feature_dimensions:
                 self._attribute_overrides[swap_element_0]['shape'] , self._attribute_overrides[swap_element_1]['shape'] = self.shapes[swap_pair[1]], self.shapes[swap_pair[0]]
@@ -2812,6 +3061,80 @@ class Grid(Stimulus):
                 self._attribute_overrides[swap_element_0]['link'] , self._attribute_overrides[swap_element_1]['link']  = self.links[swap_pair[1]], self.links[swap_pair[0]]
  
            
+    def _select_swap_pairs(self, n_swap_pairs, fingerprints = None):
+        """
+        Randomly selects pairs of elements to swap. An element is used in at
+        most one pair, and each pair is drawn uniformly from all pairs of
+        elements that have not been used yet.
+        
+        The pairs are drawn directly instead of from a list of all possible
+        pairs. Without fingerprints, this is the same as taking consecutive
+        elements from a random permutation. With fingerprints, the unused
+        elements are grouped per fingerprint: the first element is drawn with
+        a weight equal to its number of possible partners, and the second
+        element uniformly from the elements with another fingerprint.
+
+        Parameters
+        ----------
+        n_swap_pairs: int
+            Number of element pairs to select.
+        fingerprints: list, optional
+            A fingerprint for each element. If provided, only elements with
+            different fingerprints are paired.
+
+        Returns
+        -------
+        list
+            List of (i, j) tuples with i < j.
+
+        """
+        n_elements = self.n_rows * self.n_cols
+        
+        if fingerprints is None:
+            assert n_elements >= n_swap_pairs * 2, "Distinct swaps exhausted, try again with a lower number of pairs"
+            selected_elements = self._rng.sample(range(n_elements), n_swap_pairs * 2)
+            
+            return [tuple(sorted(selected_elements[2*i : 2*i+2])) for i in range(n_swap_pairs)]
+        
+        # Unused elements per fingerprint, with the position of each element
+        # in its group so elements can be removed in constant time
+        groups = dict()
+        for idx in range(n_elements):
+            groups.setdefault(fingerprints[idx], []).append(idx)
+        positions = dict()
+        for group in groups.values():
+            for position, idx in enumerate(group):
+                positions[idx] = position
+        
+        def remove(idx):
+            group = groups[fingerprints[idx]]
+            last = group.pop()
+            if last != idx:
+                group[positions[idx]] = last
+                positions[last] = positions[idx]
+        
+        n_unused = n_elements
+        selected_swap_pairs = []
+        for i in range(n_swap_pairs):
+            keys = [key for key in groups if len(groups[key]) > 0]
+            first_weights = [len(groups[key]) * (n_unused - len(groups[key])) for key in keys]
+            assert sum(first_weights) > 0, "Distinct swaps exhausted, try again with a lower number of pairs"
+            
+            first_key = self._rng.choices(keys, weights = first_weights)[0]
+            first = self._rng.choice(groups[first_key])
+            
+            second_weights = [0 if key == first_key else len(groups[key]) for key in keys]
+            second_key = self._rng.choices(keys, weights = second_weights)[0]
+            second = self._rng.choice(groups[second_key])
+            
+            remove(first)
+            remove(second)
+            n_unused -= 2
+            
+            selected_swap_pairs.append((min(first, second), max(first, second)))
+            
+        return selected_swap_pairs
+            
     def _is_modifiable(self):
         """
         Inspects the _fixed_grid attribute of each of the element properties.
@@ -2892,7 +3215,8 @@ class Concentric(Grid):
     def __init__(self, n_elements, x_margin = 20, y_margin = 20, size = None, 
                  background_color = "white", background_shape = None, 
                  stim_mask = None, stim_orientation = 0, stim_mirrorvalue = None, 
-                 stim_link = None, stim_classlabel = None, stim_idlabel = None):
+                 stim_link = None, stim_classlabel = None, stim_idlabel = None,
+                 seed = None):
         """
         Instantiates a Concentric (Grid) stimulus.
 
@@ -2930,13 +3254,17 @@ class Concentric(Grid):
             If specified, defines the class label that can be used to add javascript or css changes to the stimulus. 
         stim_idlabel: string, optional
             If specified, defines the id label that can be used to add javascript or css changes to the stimulus.        
+        seed: int, optional
+            Seed for all random components of the stimulus. If None, a seed
+            is drawn from the global random module.
 
         """
         
         super().__init__(n_rows = 1, n_cols = n_elements, x_margin = x_margin, y_margin = y_margin, size = size, 
                          background_color = background_color, background_shape = background_shape, 
                          stim_mask = stim_mask, stim_orientation = stim_orientation, stim_mirrorvalue = stim_mirrorvalue, 
-                         stim_link = stim_link, stim_classlabel = stim_classlabel, stim_idlabel = stim_idlabel)
+                         stim_link = stim_link, stim_classlabel = stim_classlabel, stim_idlabel = stim_idlabel,
+                         seed = seed)
         
         # Initialize the positions of each element
         self._n_elements = n_elements
@@ -2956,7 +3284,8 @@ class Outline(Grid):
                  x_margin = 20, y_margin = 20, size = None, 
                  background_color = "white", background_shape = None, 
                  stim_mask = None, stim_orientation = 0, stim_mirrorvalue = None, 
-                 stim_link = None, stim_classlabel = None, stim_idlabel = None):
+                 stim_link = None, stim_classlabel = None, stim_idlabel = None,
+                 seed = None):
         """
         Instantiates an Outline (Grid) stimulus.
 
@@ -2998,13 +3327,17 @@ class Outline(Grid):
             If specified, defines the class label that can be used to add javascript or css changes to the stimulus. 
         stim_idlabel: string, optional
             If specified, defines the id label that can be used to add javascript or css changes to the stimulus.        
+        seed: int, optional
+            Seed for all random components of the stimulus. If None, a seed
+            is drawn from the global random module.
 
         """
         
         super().__init__(n_rows = 1, n_cols = n_elements, x_margin = x_margin, y_margin = y_margin, size = size,
                          background_color = background_color, background_shape = background_shape, 
                          stim_mask = stim_mask, stim_orientation = stim_orientation, stim_mirrorvalue = stim_mirrorvalue, 
-                         stim_link = stim_link, stim_classlabel = stim_classlabel, stim_idlabel = stim_idlabel)
+                         stim_link = stim_link, stim_classlabel = stim_classlabel, stim_idlabel = stim_idlabel,
+                         seed = seed)
         
         # Initialize the positions of each element
         self._n_elements = n_elements
@@ -0,0 +1,363 @@
+"""
+StimulusJSON code for the OCTA toolbox
+Module to save and load stimuli as compact JSON and NDJSON
+
+The Order & Complexity Toolbox for Aesthetics (OCTA) Python library is a tool for researchers
+to create stimuli varying in order and complexity on different dimensions.
+Copyright (C) 2021  Eline Van Geert, Christophe Bossens, and Johan Wagemans
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU Lesser General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU Lesser General Public License for more details.
+
+You should have received a copy of the GNU Lesser General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+Contact: eline.vangeert@kuleuven.be
+
+"""
+import os
+import json
+
+import numpy as np
+import svgwrite
+
+from .Positions import Positions
+from .patterns import GridPattern as _grid_patterns
+from .patterns.Pattern import Pattern
+from .shapes.Shape import Shape
+from .shapes.Animations import AnimationSpec
+from .shapes.Ellipse import Ellipse
+from .shapes.Rectangle import Rectangle
+from .shapes.Triangle import Triangle
+from .shapes.Polygon import Polygon, Polygon_
+from .shapes.RegularPolygon import RegularPolygon, RegularPolygon_
+from .shapes.Path import Path, Path_
+from .shapes.PathSvg import PathSvg, PathSvg_
+from .shapes.Image import Image, Image_
+from .shapes.FitImage import FitImage, FitImage_
+from .shapes.Text import Text, Text_
+
+SCHEMA = "octa-stimulus"
+SCHEMA_VERSION = 1
+
+# Element attributes that are stored, by name of the stimulus property
+element_attributes = ['shapes', 'boundingboxes', 'fillcolors', 'orientations', 'borderwidths', 'bordercolors',
+                      'opacities', 'mirrorvalues', 'links', 'idlabels', 'classlabels', 'data']
+
+# Shape types by name: base class, factory function and the class attributes
+# that are the arguments of the factory function
+_shape_types = {}
+
+# Classes of which the attributes are stored as object state
+_object_types = {'Positions': Positions, 'Pattern': Pattern}
+_object_types.update({name: value for name, value in vars(_grid_patterns).items()
+                      if isinstance(value, type) and issubclass(value, Pattern)})
+
+def RegisterShapeType(name, shape_class, factory = None, arguments = ()):
+    """
+    Registers a shape class, so that it can be saved and loaded by name.
+
+    Parameters
+    ----------
+    name : string
+        Name of the shape type in the JSON data.
+    shape_class : class
+        Base class of the shape.
+    factory : function, optional
+        Function that creates a subclass of shape_class, e.g. Polygon.
+    arguments : list, optional
+        Class attributes of the subclass that are passed to the factory
+        function, in order, e.g. ['n_sides'].
+
+    """
+    _shape_types[name] = (shape_class, factory, list(arguments))
+
+RegisterShapeType("Ellipse", Ellipse)
+RegisterShapeType("Rectangle", Rectangle)
+RegisterShapeType("Triangle", Triangle)
+RegisterShapeType("Polygon", Polygon_, Polygon, ['n_sides'])
+RegisterShapeType("RegularPolygon", RegularPolygon_, RegularPolygon, ['n_sides'])
+RegisterShapeType("Path", Path_, Path, ['path', 'xsizepath', 'ysizepath'])
+RegisterShapeType("PathSvg", PathSvg_, PathSvg, ['source'])
+RegisterShapeType("Image", Image_, Image, ['source'])
+RegisterShapeType("FitImage", FitImage_, FitImage, ['source'])
+RegisterShapeType("Text", Text_, Text, ['text'])
+
+def StimulusToDict(stimulus):
+    """
+    Converts a stimulus to JSON data with plain values. The stimulus does not
+    need to be rendered.
+
+    Parameters
+    ----------
+    stimulus : Stimulus
+        Stimulus to convert.
+
+    Returns
+    -------
+    dict
+        JSON data of the stimulus.
+
+    """
+    parameters = {}
+    stimulustype = type(stimulus).__name__
+    if stimulustype == "Grid":
+        parameters.update(n_rows = stimulus._n_rows, n_cols = stimulus._n_cols,
+                          row_spacing = stimulus.row_spacing, col_spacing = stimulus.col_spacing)
+    elif stimulustype == "Outline":
+        parameters.update(n_elements = stimulus._n_elements, shape = stimulus._shape, shape_boundingbox = stimulus._shape_boundingbox)
+    elif stimulustype == "Concentric":
+        parameters.update(n_elements = stimulus._n_elements)
+
+    parameters.update(x_margin = stimulus.x_margin, y_margin = stimulus.y_margin,
+                      size = None if stimulus.size == "auto" else stimulus.size,
+                      background_color = stimulus.background_color, background_shape = stimulus.background_shape,
+                      stim_mask = stimulus.stim_mask, stim_orientation = stimulus.stim_orientation,
+                      stim_mirrorvalue = stimulus.stim_mirrorvalue, stim_link = stimulus.stim_link,
+                      stim_classlabel = stimulus.stim_classlabel, stim_idlabel = stimulus.stim_idlabel,
+                      seed = stimulus.seed)
+
+    elements = {}
+    for attribute in element_attributes:
+        pattern = getattr(stimulus, '_' + attribute, None)
+        if pattern is not None:
+            elements[attribute] = pattern
+    if hasattr(stimulus, '_attribute_overrides'):
+        elements['overrides'] = stimulus._attribute_overrides
+        elements['element_order'] = stimulus._element_presentation_order
+
+    return {'schema':          SCHEMA,
+            'version':         SCHEMA_VERSION,
+            'stimulustype':    stimulustype,
+            'parameters':      _encode(parameters),
+            'autosize_method': stimulus._autosize_method,
+            'use_symbols':     stimulus.use_symbols,
+            'positions':       _encode(stimulus.positions),
+            'elements':        _encode(elements)}
+
+def StimulusFromDict(data):
+    """
+    Creates a stimulus from JSON data, as returned by StimulusToDict.
+
+    Parameters
+    ----------
+    data : dict
+        JSON data of the stimulus.
+
+    Returns
+    -------
+    Stimulus
+        A stimulus object with the parameters in the JSON data.
+
+    """
+    from .Stimulus import Stimulus, Grid, Outline, Concentric
+
+    if data.get('schema') != SCHEMA:
+        raise ValueError("WARNING: data is not in the %s format"%SCHEMA)
+    if data['version'] > SCHEMA_VERSION:
+        raise ValueError("WARNING: version %s of the %s format is not supported"%(data['version'], SCHEMA))
+
+    stimulus_classes = {"Stimulus": Stimulus, "Grid": Grid, "Outline": Outline, "Concentric": Concentric}
+    decoder = _Decoder()
+
+    stimulus = stimulus_classes[data['stimulustype']](**decoder.decode(data['parameters']))
+    stimulus._autosize_method = data['autosize_method']
+    stimulus.use_symbols = data.get('use_symbols', False)
+    stimulus.positions = decoder.decode(data['positions'])
+
+    elements = decoder.decode(data['elements'])
+    for attribute in element_attributes:
+        if attribute in elements:
+            setattr(stimulus, '_' + attribute, elements[attribute])
+    if 'overrides' in elements:
+        stimulus._attribute_overrides = elements['overrides']
+        stimulus._element_presentation_order = elements['element_order']
+
+    return stimulus
+
+def SaveNDJSON(stimuli, filename, folder = None):
+    """
+    Saves stimuli to a single NDJSON file, with the JSON data of one
+    stimulus per line. The stimuli are written one at a time, so a generator
+    can be used to save large stimulus sets.
+
+    Parameters
+    ----------
+    stimuli : iterable
+        Stimuli to save.
+    filename : string
+        Name of the NDJSON file, without extension.
+    folder : string, optional
+        Name of the folder in which the file needs to be saved.
+
+    Returns
+    -------
+    int
+        Number of stimuli that were saved.
+
+    """
+    ndjson_filename = "%s.ndjson"%filename
+    if folder is not None:
+        ndjson_filename = os.path.join(folder, ndjson_filename)
+
+    n_stimuli = 0
+    with open(ndjson_filename, 'w') as output_file:
+        for stimulus in stimuli:
+            output_file.write(json.dumps(StimulusToDict(stimulus), separators = (',', ':')))
+            output_file.write("\n")
+            n_stimuli += 1
+
+    return n_stimuli
+
+def LoadNDJSON(filename, folder = None):
+    """
+    Loads the stimuli in an NDJSON file one at a time. Each stimulus is only
+    read and created when the generator reaches it.
+
+    Parameters
+    ----------
+    filename : string
+        Name of the NDJSON file, without extension.
+    folder : string, optional
+        Name of the folder that contains the file.
+
+    Yields
+    ------
+    Stimulus
+        The next stimulus in the file.
+
+    """
+    ndjson_filename = "%s.ndjson"%filename
+    if folder is not None:
+        ndjson_filename = os.path.join(folder, ndjson_filename)
+
+    with open(ndjson_filename, 'r') as input_file:
+        for line in input_file:
+            if line.strip() != "":
+                yield StimulusFromDict(json.loads(line))
+
+def _encode(value):
+    """
+    Converts a value to plain JSON values. Values that JSON cannot represent
+    directly are stored as a dictionary with a single key that starts with '~'.
+
+    """
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    if isinstance(value, list):
+        return [_encode(item) for item in value]
+    if isinstance(value, tuple):
+        return {'~tuple': [_encode(item) for item in value]}
+    if isinstance(value, dict):
+        if all(isinstance(key, str) and not key.startswith('~') for key in value):
+            return {key: _encode(item) for key, item in value.items()}
+        return {'~dict': [[_encode(key), _encode(item)] for key, item in value.items()]}
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, np.ndarray):
+        return {'~array': _encode(value.tolist()), 'dtype': str(value.dtype)}
+    if isinstance(value, type):
+        return _encode_shape_type(value)
+    if isinstance(value, Shape):
+        # Shape objects, e.g. a background shape, are stored with their parameters.
+        # The rotation is computed from the position the shape was created with,
+        # which the stimulus may have changed afterwards, so it is stored as well.
+        parameters = {p: getattr(value, p) for p in value.parameters if hasattr(value, p)}
+        if parameters.get('link', "") != "":
+            parameters['link'] = value.link.href
+        encoded = _encode_shape_type(type(value))
+        encoded['parameters'] = _encode(parameters)
+        encoded['rotation'] = _encode({'rotation_transform': value.rotation_transform,
+                                       'rotation_animation': value.rotation_animation})
+        return encoded
+    if isinstance(value, AnimationSpec):
+        return {'~animation': value.element_class.__name__, 'args': _encode(value.args), 'kwargs': _encode(value.kwargs)}
+
+    object_name = type(value).__name__
+    if _object_types.get(object_name) is type(value):
+        return {'~object': object_name, 'state': _encode(vars(value))}
+
+    raise ValueError("WARNING: values of type %s cannot be saved as JSON"%object_name)
+
+def _encode_shape_type(shape_class):
+    """
+    Converts a shape class to its registered name and factory arguments.
+
+    """
+    for name, (base, factory, arguments) in _shape_types.items():
+        if shape_class is base:
+            return {'~shape': name}
+
+    for name, (base, factory, arguments) in _shape_types.items():
+        if factory is not None and issubclass(shape_class, base):
+            encoded = {'~shape': name, 'arguments': [_encode(getattr(shape_class, a)) for a in arguments]}
+            if getattr(shape_class, 'name', base.__name__) != base.__name__:
+                encoded['name'] = shape_class.name
+            return encoded
+
+    raise ValueError("WARNING: shape class %s is not registered"%shape_class.__name__)
+
+class _Decoder:
+    """
+    Converts JSON values back to the original values. Shape classes with the
+    same description are created only once per decoder, so that elements
+    with the same shape keep sharing a single class.
+
+    """
+    def __init__(self):
+        self._shape_classes = {}
+
+    def decode(self, value):
+        if isinstance(value, list):
+            return [self.decode(item) for item in value]
+        if not isinstance(value, dict):
+            return value
+
+        if '~tuple' in value:
+            return tuple(self.decode(item) for item in value['~tuple'])
+        if '~dict' in value:
+            return {self.decode(key): self.decode(item) for key, item in value['~dict']}
+        if '~array' in value:
+            return np.array(self.decode(value['~array']), dtype = value['dtype'])
+        if '~shape' in value:
+            shape_class = self.decode_shape_type(value)
+            if 'parameters' in value:
+                shape = shape_class(**self.decode(value['parameters']))
+                for name, item in self.decode(value.get('rotation', {})).items():
+                    setattr(shape, name, item)
+                return shape
+            return shape_class
+        if '~animation' in value:
+            return AnimationSpec(getattr(svgwrite.animate, value['~animation']), self.decode(value['args']), self.decode(value['kwargs']))
+        if '~object' in value:
+            object_class = _object_types[value['~object']]
+            decoded = object_class.__new__(object_class)
+            state = self.decode(value['state'])
+            if hasattr(decoded, '__setstate__'):
+                decoded.__setstate__(state)
+            else:
+                for name, item in state.items():
+                    setattr(decoded, name, item)
+            return decoded
+
+        return {key: self.decode(item) for key, item in value.items()}
+
+    def decode_shape_type(self, value):
+        key = json.dumps([value['~shape'], value.get('arguments'), value.get('name')])
+        shape_class = self._shape_classes.get(key)
+        if shape_class is None:
+            base, factory, arguments = _shape_types[value['~shape']]
+            if 'arguments' in value:
+                shape_class = factory(*self.decode(value['arguments']), name = value.get('name'))
+            else:
+                shape_class = base
+            self._shape_classes[key] = shape_class
+
+        return shape_class
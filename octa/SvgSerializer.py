@@ -0,0 +1,205 @@
+"""
+SVG serializer code for the OCTA toolbox
+Module to convert svgwrite drawings to SVG text without building an XML tree
+
+The Order & Complexity Toolbox for Aesthetics (OCTA) Python library is a tool for researchers
+to create stimuli varying in order and complexity on different dimensions.
+Copyright (C) 2021  Eline Van Geert, Christophe Bossens, and Johan Wagemans
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU Lesser General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU Lesser General Public License for more details.
+
+You should have received a copy of the GNU Lesser General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+Contact: eline.vangeert@kuleuven.be
+
+"""
+import io
+
+from xml.etree.ElementTree import _escape_attrib, _escape_cdata
+from svgwrite.etree import etree, CDATA_TPL
+from svgwrite.base import BaseElement
+from svgwrite.drawing import Drawing
+from svgwrite.shapes import Polyline
+from svgwrite.path import Path
+from svgwrite.text import TSpan, TRef, TextPath
+from svgwrite.container import Use, Script
+from svgwrite.gradients import _AbstractGradient
+from svgwrite.animate import Set
+from svgwrite.filters import Filter
+from svgwrite.utils import strlist, pretty_xml
+
+# Elements of which the svgwrite get_xml method only refers the 'xlink:href'
+# attribute to the id of the linked element
+_update_id_elements = (TRef, Use, _AbstractGradient, Set, Filter)
+
+_known_get_xml = set([BaseElement.get_xml, Drawing.get_xml, Polyline.get_xml, Path.get_xml, TSpan.get_xml,
+                      TRef.get_xml, TextPath.get_xml, Use.get_xml, _AbstractGradient.get_xml, Set.get_xml,
+                      Filter.get_xml, Script.get_xml])
+
+def SerializeDrawing(dwg, serialized = None):
+    """
+    Converts an svgwrite drawing to SVG text. The result is identical to
+    dwg.tostring(), but the attribute values are not validated and no
+    ElementTree is built.
+
+    Parameters
+    ----------
+    dwg : svgwrite.Drawing
+        Drawing to convert.
+    serialized : dict, optional
+        Text of elements that were serialized before, with the id of the
+        element as key and a tuple with the element and its text as value.
+
+    Returns
+    -------
+    string
+        SVG text of the drawing.
+
+    """
+    dwg.attribs['xmlns'] = "http://www.w3.org/2000/svg"
+    dwg.attribs['xmlns:xlink'] = "http://www.w3.org/1999/xlink"
+    dwg.attribs['xmlns:ev'] = "http://www.w3.org/2001/xml-events"
+    dwg.attribs['baseProfile'] = dwg.profile
+    dwg.attribs['version'] = dwg.version
+
+    output = io.StringIO()
+    _write_element(output.write, dwg, serialized if serialized is not None else {})
+
+    return output.getvalue()
+
+def SerializeElement(element):
+    """
+    Converts a single svgwrite element and its subelements to SVG text.
+
+    Parameters
+    ----------
+    element : svgwrite element
+        Element to convert.
+
+    Returns
+    -------
+    string
+        SVG text of the element.
+
+    """
+    output = io.StringIO()
+    _write_element(output.write, element, {})
+
+    return output.getvalue()
+
+def WriteDrawing(dwg, filename, svg = None, pretty = False, indent = 2):
+    """
+    Writes an svgwrite drawing to an SVG file. The file is identical to the
+    file written by dwg.saveas(filename, pretty, indent).
+
+    Parameters
+    ----------
+    dwg : svgwrite.Drawing
+        Drawing to write.
+    filename : string
+        Name of the SVG file.
+    svg : string, optional
+        SVG text of the drawing, if it is already available.
+    pretty : Boolean, optional
+        Indicates whether the XML needs to be indented. The default is False.
+    indent : int, optional
+        Number of spaces used for indentation. The default is 2.
+
+    """
+    if svg is None:
+        svg = SerializeDrawing(dwg)
+    if pretty:
+        svg = pretty_xml(svg, indent = indent)
+
+    stylesheet_template = '<?xml-stylesheet href="%s" type="text/css" title="%s" alternate="%s" media="%s"?>\n'
+
+    with open(filename, mode = 'w', encoding = 'utf-8') as f:
+        f.write('<?xml version="1.0" encoding="utf-8" ?>\n')
+        for stylesheet in dwg._stylesheets:
+            f.write(stylesheet_template % stylesheet)
+        f.write(svg)
+
+def _write_element(write, element, serialized):
+    """
+    Writes the SVG text of an element and its subelements, following the
+    serialization of svgwrite and ElementTree.
+
+    """
+    cached = serialized.get(id(element))
+    if cached is not None and cached[0] is element:
+        write(cached[1])
+        return
+
+    if type(element).get_xml not in _known_get_xml:
+        # Elements with their own XML conversion (e.g. title or metadata)
+        write(etree.tostring(element.get_xml(), encoding = 'unicode'))
+        return
+
+    attribs = element.attribs
+    if isinstance(element, Polyline):
+        attribs['points'] = _points_to_string(element)
+    elif isinstance(element, Path):
+        attribs['d'] = str(strlist(element.commands, ' '))
+    elif isinstance(element, _update_id_elements) or isinstance(element, TextPath):
+        element.update_id()
+
+    tiny = element.profile == 'tiny'
+
+    write("<" + element.elementname)
+    for attribute, value in sorted(attribs.items()):
+        if value is None:
+            continue
+        if isinstance(value, float) and tiny:
+            value = round(value, 4)
+        value = str(value)
+        if value:
+            write(' %s="%s"' % (attribute, _escape_attrib(value)))
+
+    text = None
+    if isinstance(element, (TSpan, TextPath)):
+        text = str(element.text)
+
+    content = None
+    if isinstance(element, Script) and element._content:
+        content = element._content
+
+    if text or len(element.elements) > 0 or content:
+        write(">")
+        if text:
+            write(_escape_cdata(text))
+        for subelement in element.elements:
+            _write_element(write, subelement, serialized)
+        if content:
+            write(CDATA_TPL % content)
+        write("</" + element.elementname + ">")
+    else:
+        write(" />")
+
+def _points_to_string(element):
+    """
+    Converts the points of a polyline or polygon to a string, as in svgwrite.
+
+    """
+    tiny = element.profile == 'tiny'
+    strings = []
+    for point in element.points:
+        if len(point) != 2:
+            raise TypeError('got %s values, but expected 2 values.' % len(point))
+        x, y = point
+        if tiny:
+            if isinstance(x, float):
+                x = round(x, 4)
+            if isinstance(y, float):
+                y = round(y, 4)
+        strings.append("%s,%s" % (x, y))
+
+    return ' '.join(strings)
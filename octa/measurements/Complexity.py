@@ -89,17 +89,8 @@ def CalculateElementsLOCE(self, distinction_features = ['shapes', 'boundingboxes
     if 'idlabels' in distinction_features:
         features.append("idlabel")
         
-    element_list = [{k: dic[k] for k in features} for dic in self.dwg_elements]
-    feature_list = {k: [dic[k] for dic in element_list] for k in element_list[0]}
-    
-    # Create a list of unique fingerprints for each element    
-    element_fingerprints = []
-    for idx in range(self.n_cols * self.n_rows):
-        fingerprint = "|".join([str(feature_list[f][idx]) for f in features])
-        element_fingerprints.append(fingerprint)
-     
-    # Calculate number of different elements in display       
-    LOCE = len(set(element_fingerprints))
+    # Calculate number of different elements in display
+    LOCE = self.dwg_elements.CountUniqueElements(features)
     
     return LOCE
 
@@ -122,59 +113,59 @@ def CalculateElementsLOC(self, distinction_features = ['shapes', 'boundingboxes'
     if self.dwg_elements is None:
         self.Render()
         
-    n_shape_values = len(set([d['shape'] for d in self.dwg_elements])) 
+    n_shape_values = len(set(self.dwg_elements.GetUniqueValues('shape'))) 
 
-    n_size_values = len(set([d['boundingbox'] for d in self.dwg_elements])) 
+    n_size_values = len(set(self.dwg_elements.GetUniqueValues('boundingbox'))) 
         
     l = list()
-    for d in self.dwg_elements:
-        if type(d['fillcolor']) == list:
-            l.append(tuple(d['fillcolor']))           
+    for value in self.dwg_elements.GetUniqueValues('fillcolor'):
+        if type(value) == list:
+            l.append(tuple(value))
         else:
-            l.append(d['fillcolor'])
+            l.append(value)
     n_fillcolor_values = len(set(l)) 
         
     l = list()
-    for d in self.dwg_elements:
-        if type(d['orientation']) == list:
-            l.append(tuple(d['orientation']))          
+    for value in self.dwg_elements.GetUniqueValues('orientation'):
+        if type(value) == list:
+            l.append(tuple(value))
         else:
-            l.append(d['orientation'])
+            l.append(value)
     n_orientation_values = len(set(l)) 
         
-    n_data_values = len(set([d['data'] for d in self.dwg_elements])) 
+    n_data_values = len(set(self.dwg_elements.GetUniqueValues('data'))) 
     
     l = list()
-    for d in self.dwg_elements:
-        if type(d['borderwidth']) == list:
-            l.append(tuple(d['borderwidth']))          
+    for value in self.dwg_elements.GetUniqueValues('borderwidth'):
+        if type(value) == list:
+            l.append(tuple(value))
         else:
-            l.append(d['borderwidth'])
+            l.append(value)
     n_borderwidth_values = len(set(l)) 
     
     l = list()
-    for d in self.dwg_elements:
-        if type(d['bordercolor']) == list:
-            l.append(tuple(d['bordercolor']))           
+    for value in self.dwg_elements.GetUniqueValues('bordercolor'):
+        if type(value) == list:
+            l.append(tuple(value))
         else:
-            l.append(d['bordercolor'])
+            l.append(value)
     n_bordercolor_values = len(set(l))  
     
     l = list()
-    for d in self.dwg_elements:
-        if type(d['opacity']) == list:
-            l.append(tuple(d['opacity']))           
+    for value in self.dwg_elements.GetUniqueValues('opacity'):
+        if type(value) == list:
+            l.append(tuple(value))
         else:
-            l.append(d['opacity'])
+            l.append(value)
     n_opacity_values = len(set(l)) 
     
-    n_mirror_values = len(set([d['mirrorvalue'] for d in self.dwg_elements])) 
+    n_mirror_values = len(set(self.dwg_elements.GetUniqueValues('mirrorvalue'))) 
     
-    n_link_values = len(set([d['link'] for d in self.dwg_elements])) 
+    n_link_values = len(set(self.dwg_elements.GetUniqueValues('link'))) 
     
-    n_classlabel_values = len(set([d['classlabel'] for d in self.dwg_elements])) 
+    n_classlabel_values = len(set(self.dwg_elements.GetUniqueValues('classlabel'))) 
     
-    n_idlabel_values = len(set([d['idlabel'] for d in self.dwg_elements])) 
+    n_idlabel_values = len(set(self.dwg_elements.GetUniqueValues('idlabel'))) 
         
     LOC = 0
     
@@ -224,59 +215,59 @@ def CalculateElementsLOCI(self, distinction_features = ['shapes', 'boundingboxes
     if self.dwg_elements is None:
         self.Render()
         
-    id_shape_values = len(set([d['shape'] for d in self.dwg_elements])) == 1
+    id_shape_values = len(set(self.dwg_elements.GetUniqueValues('shape'))) == 1
 
-    id_size_values = len(set([d['boundingbox'] for d in self.dwg_elements])) == 1
+    id_size_values = len(set(self.dwg_elements.GetUniqueValues('boundingbox'))) == 1
     
     l = list()
-    for d in self.dwg_elements:
-        if type(d['fillcolor']) == list:
-            l.append(tuple(d['fillcolor']))           
+    for value in self.dwg_elements.GetUniqueValues('fillcolor'):
+        if type(value) == list:
+            l.append(tuple(value))
         else:
-            l.append(d['fillcolor'])
+            l.append(value)
     id_fillcolor_values = len(set(l))  == 1
         
     l = list()
-    for d in self.dwg_elements:
-        if type(d['orientation']) == list:
-            l.append(tuple(d['orientation']))          
+    for value in self.dwg_elements.GetUniqueValues('orientation'):
+        if type(value) == list:
+            l.append(tuple(value))
         else:
-            l.append(d['orientation'])
+            l.append(value)
     id_orientation_values = len(set(l))  == 1
         
-    id_data_values = len(set([d['data'] for d in self.dwg_elements])) == 1
+    id_data_values = len(set(self.dwg_elements.GetUniqueValues('data'))) == 1
     
     l = list()
-    for d in self.dwg_elements:
-        if type(d['borderwidth']) == list:
-            l.append(tuple(d['borderwidth']))          
+    for value in self.dwg_elements.GetUniqueValues('borderwidth'):
+        if type(value) == list:
+            l.append(tuple(value))
         else:
-            l.append(d['borderwidth'])
+            l.append(value)
     id_borderwidth_values = len(set(l))  == 1
     
     l = list()
-    for d in self.dwg_elements:
-        if type(d['bordercolor']) == list:
-            l.append(tuple(d['bordercolor']))           
+    for value in self.dwg_elements.GetUniqueValues('bordercolor'):
+        if type(value) == list:
+            l.append(tuple(value))
         else:
-            l.append(d['bordercolor'])
+            l.append(value)
     id_bordercolor_values = len(set(l))  == 1
     
     l = list()
-    for d in self.dwg_elements:
-        if type(d['opacity']) == list:
-            l.append(tuple(d['opacity']))           
+    for value in self.dwg_elements.GetUniqueValues('opacity'):
+        if type(value) == list:
+            l.append(tuple(value))
         else:
-            l.append(d['opacity'])
+            l.append(value)
     id_opacity_values = len(set(l))  == 1
         
-    id_mirrorvalues = len(set([d['mirrorvalue'] for d in self.dwg_elements])) == 1
+    id_mirrorvalues = len(set(self.dwg_elements.GetUniqueValues('mirrorvalue'))) == 1
         
-    id_link_values = len(set([d['link'] for d in self.dwg_elements])) == 1
+    id_link_values = len(set(self.dwg_elements.GetUniqueValues('link'))) == 1
         
-    id_classlabel_values = len(set([d['classlabel'] for d in self.dwg_elements])) == 1
+    id_classlabel_values = len(set(self.dwg_elements.GetUniqueValues('classlabel'))) == 1
         
-    id_idlabel_values = len(set([d['idlabel'] for d in self.dwg_elements])) == 1
+    id_idlabel_values = len(set(self.dwg_elements.GetUniqueValues('idlabel'))) == 1
         
     LOCI = 0
     
@@ -21,6 +21,8 @@ along with this program.  If not, see <https://www.gnu.org/licenses/>.
 Contact: eline.vangeert@kuleuven.be
 
 """
+import numpy as np
+
 def GetPatterns(self, features = ['shapes', 'boundingboxes', 'fillcolors', 'orientations', 'data']):
     """
     Provides a list of the applied pattern for each of the specified features
@@ -358,24 +360,16 @@ def CalculatePatternDeviants(self, distinction_features = ['shapes', 'boundingbo
     features = sorted(features)
     distinction_features = sorted(distinction_features)
         
-    element_list = [{k: dic[k] for k in features} for dic in self.dwg_elements]
-    feature_list = {k: [dic[k] for dic in element_list] for k in element_list[0]}
-    
-    
     pattern_list = {}
     for i in range(len(distinction_features)):
         pattern_list[features[i]] = getattr(self, distinction_features[i])
         
-    deviants = []  
+    deviants = np.zeros(len(self.dwg_elements), dtype = bool)
     for f in features:
-        if feature_list[f] != pattern_list[f]:
-            for i in range(len(element_list)):
-                if feature_list[f][i] != pattern_list[f][i]:
-                    if i not in deviants:
-                        deviants.append(i) 
+        deviants |= self.dwg_elements.GetDeviants(f, pattern_list[f])
         
         
-    return len(deviants)
+    return int(deviants.sum())
 
 def CalculatePositionDeviants(self):
     """
@@ -390,25 +384,13 @@ def CalculatePositionDeviants(self):
     if self.dwg_elements is None:
         self.Render()          
     
-    xpatternpositions = self.positions.x
-    ypatternpositions = self.positions.y
-    xactualpositions = self.positions.GetPositions()[0]
-    yactualpositions = self.positions.GetPositions()[1]
+    pattern_positions = self.positions.xy
+    xactualpositions, yactualpositions = self._calculated_positions
+    n_positions = len(xactualpositions)
     
-    shapes = [dic['shape'] for dic in self.dwg_elements]
+    shapes = self.dwg_elements.GetColumn('shape')
     
-    deviants = []  
-    if (xpatternpositions != xactualpositions) or (ypatternpositions != yactualpositions) or (None in shapes):
-        
-        for i in range(len(xactualpositions)):
-            if xpatternpositions[i] != xactualpositions[i]:
-                if i not in deviants:
-                    deviants.append(i) 
-            if ypatternpositions[i] != yactualpositions[i]:
-                if i not in deviants:
-                    deviants.append(i)   
-            if shapes[i] is None:
-                if i not in deviants:
-                    deviants.append(i) 
+    deviants = (pattern_positions[:n_positions, 0] != xactualpositions) | (pattern_positions[:n_positions, 1] != yactualpositions)
+    deviants[:len(shapes)] |= np.array([shape is None for shape in shapes[:n_positions]], dtype = bool)
         
-    return len(deviants)
\ No newline at end of file
+    return int(deviants.sum())
\ No newline at end of file
@@ -23,7 +23,114 @@ Contact: eline.vangeert@kuleuven.be
 
 """
 
-from .Pattern import Pattern
+import functools
+import random
+import weakref
+
+import numpy as np
+
+from .Pattern import Pattern, _gather
+
+# Generated patterns, stored per GridPattern instance together with the key
+# that was used to create them. A weak mapping is used so the cache does not
+# end up in pickled/jsonpickled stimuli and disappears with its pattern.
+_generation_cache = weakref.WeakKeyDictionary()
+
+def _freeze_value(value):
+    """
+    Converts a (possibly nested) pattern value into a hashable representation
+    that can be compared between calls.
+
+    Parameters
+    ----------
+    value : any type
+        Value to convert.
+
+    Returns
+    -------
+    tuple
+        Hashable representation of the value.
+
+    """
+    if isinstance(value, GridPattern):
+        return (GridPattern, value._cache_key())
+    if isinstance(value, Pattern):
+        return (Pattern, _freeze_value(value.pattern))
+    if isinstance(value, (list, tuple)):
+        return (type(value), tuple(_freeze_value(v) for v in value))
+    if isinstance(value, dict):
+        return (dict, tuple((k, _freeze_value(v)) for k, v in value.items()))
+    if isinstance(value, np.ndarray):
+        return (np.ndarray, value.dtype.str, value.shape, value.tobytes())
+    try:
+        hash(value)
+    except TypeError:
+        return ("id", id(value))
+    
+    return (type(value), value)
+
+@functools.lru_cache(maxsize = 1024)
+def _index_map(pattern_class, n_rows, n_cols, n_values):
+    """
+    Computes for each cell of the grid which value of the source pattern is
+    placed in it. The map only depends on the pattern class, the grid
+    dimensions and the number of source values, so it is computed once and
+    reused for all patterns with the same layout.
+
+    Parameters
+    ----------
+    pattern_class : type
+        GridPattern subclass that defines the layout.
+    n_rows : int
+        Number of rows in the 2D grid.
+    n_cols : int
+        Number of columns in the 2D grid.
+    n_values : int
+        Number of values in the source pattern.
+
+    Returns
+    -------
+    numpy.ndarray
+        Read-only array with the index of the source value for each cell.
+
+    """
+    indices = pattern_class._layout(Pattern(list(range(n_values))), n_rows, n_cols)
+    index_map = np.array(indices, dtype = np.intp)
+    index_map.setflags(write = False)
+
+    return index_map
+
+def _n_layers(n_rows, n_cols):
+    """
+    Number of layers from the outside to the center of the grid.
+
+    """
+    minimal_n = min(n_rows, n_cols)
+    if minimal_n % 2 == 0: 
+        return int(minimal_n / 2)
+    else:
+        return int((minimal_n + 1 )/2)
+
+def _layer_layout(layer_values, n_rows, n_cols):
+    """
+    Fills each layer of the grid with a value, starting from the outer layer.
+
+    """
+    patternmatrix = [[0 for x in range(n_cols)] for y in range(n_rows)] 
+    
+    for layer in range(_n_layers(n_rows, n_cols)):
+        width = n_cols - (2*layer)
+        start_row = layer
+        start_col = layer
+        end_row = n_rows - layer - 1
+        end_col = n_cols - layer
+        patternmatrix[start_row][start_col:end_col] = [layer_values[layer]] * (width)
+        patternmatrix[end_row][start_col:end_col] = [layer_values[layer]] * (width)
+        for row in patternmatrix[start_row:end_row]:
+            row[start_col] = layer_values[layer] 
+            row[end_col-1] = layer_values[layer] 
+   
+    return [item for sublist in patternmatrix for item in sublist]
 
 class GridPattern(Pattern):
     """
@@ -42,7 +149,14 @@ class GridPattern(Pattern):
         patterndirection : string
             Indicates the pattern direction used.
 
-    """      
+    """
+    _cache_attributes = ["pattern", "n_rows", "n_cols", "_jitter", "_jitter_parameters", "_randomization"]
+    
+    # Layouts that are built from a few list repetitions are faster to run
+    # directly on the values than to gather through an index map. Subclasses
+    # with such a layout set this to False.
+    _indexed_layout = True
+    
     def __init__(self, pattern, n_rows = 5, n_cols = 5, patterntype = None, patterndirection = None, patternclass = "GridPattern."):
 
         assert type(pattern) == list or type(pattern) == Pattern, "Provided pattern must be a list"
@@ -78,14 +192,167 @@ class GridPattern(Pattern):
         return result
     
     
-    def generate(self):
+    def generate(self, rng = None):
         """
         Abstract method. Needs to be implemented by specific grid pattern
         generation algorithms.
 
+        Parameters
+        ----------
+        rng : random.Random, optional
+            Random number generator used for jitter and randomizations.
+            The default is the global random module.
+
+        """
+        pass
+    
+    @staticmethod
+    def _layout(indices, n_rows, n_cols):
+        """
+        Abstract method. Grid pattern generation algorithms that only
+        rearrange the values of a source pattern implement it to place a
+        pattern of value indices in the grid.
+
+        Parameters
+        ----------
+        indices : Pattern
+            Pattern with the indices 0 to n-1 of the source values.
+        n_rows : int
+            Number of rows in the 2D grid.
+        n_cols : int
+            Number of columns in the 2D grid.
+
+        Returns
+        -------
+        list
+            Index of the source value for each cell of the grid.
+
         """
         pass
     
+    def _GatherPattern(self, values):
+        """
+        Places the source values in the grid, using the cached index map of
+        the layout of this pattern class. Layouts that are cheap to compute
+        are applied to the values directly.
+
+        Parameters
+        ----------
+        values : list
+            Source values.
+
+        Returns
+        -------
+        Pattern
+            Values for each cell of the grid.
+
+        """
+        if not self._indexed_layout:
+            return Pattern(self._layout(Pattern(list(values)), self.n_rows, self.n_cols))
+        
+        index_map = _index_map(type(self), self.n_rows, self.n_cols, len(values))
+        
+        return Pattern(_gather(values, index_map))
+    
+    def generate_cached(self, seed = None):
+        """
+        Returns the generated pattern, reusing the result of a previous call
+        as long as the pattern values, grid dimensions, jitter/randomization
+        settings and seed are unchanged.
+        
+        When a seed is provided, the random components of the pattern are
+        drawn from a random number generator initialized with that seed, so
+        the same seed always gives the same realization. Without a seed the
+        global random module is used, and the stored result acts as one
+        realization of the pattern until ClearCache is called.
+
+        Parameters
+        ----------
+        seed : int, optional
+            Seed for the random components of the pattern.
+
+        Returns
+        -------
+        GridPattern
+            Generated GridPattern object instance.
+
+        """
+        key = (seed,) + self._cache_key()
+        cached = _generation_cache.get(self)
+        if cached is None or cached[0] != key:
+            rng = None if seed is None else random.Random(seed)
+            cached = (key, self.generate(rng))
+            _generation_cache[self] = cached
+            
+        return cached[1]
+    
+    def ClearCache(self):
+        """
+        Removes the stored result of generate_cached, so that the pattern is
+        generated again on the next call.
+
+        """
+        _generation_cache.pop(self, None)
+        
+    def _cache_key(self):
+        """
+        Creates the key that identifies the generated pattern.
+
+        Returns
+        -------
+        tuple
+            Hashable key based on the attributes in _cache_attributes.
+
+        """
+        return (type(self),) + tuple(_freeze_value(getattr(self, attr, None)) for attr in self._cache_attributes)
+    
+    def _is_random(self):
+        """
+        Indicates whether generating the pattern involves random sampling.
+
+        Returns
+        -------
+        Boolean
+            True if jitter or a randomization is applied to the pattern.
+
+        """
+        return self._jitter is not None or self._randomization is not None
+    
+    def _ApplyRandomComponents(self, result, rng = None):
+        """
+        Applies the jitter and randomization settings to a generated pattern.
+
+        Parameters
+        ----------
+        result : Pattern
+            Generated pattern values.
+        rng : random.Random, optional
+            Random number generator that provides the samples. The default
+            is the global random module.
+
+        Returns
+        -------
+        Pattern
+            Pattern with jitter and randomization applied.
+
+        """
+        if self._jitter is not None:
+            result = result._CalculateJitter(distribution = self._jitter, distribution_parameters = self._jitter_parameters, rng = rng)
+
+        if self._randomization is not None:
+            if self._randomization == "RandomizeAcrossElements":
+                result = result._SetRandomizeAcrossElements(rng = rng)
+            elif self._randomization == "RandomizeAcrossRows":
+                result = result._SetRandomizeAcrossRows(n_rows = self.n_rows, n_cols = self.n_cols, rng = rng)
+            elif self._randomization == "RandomizeAcrossColumns":
+                result = result._SetRandomizeAcrossColumns(n_rows = self.n_rows, n_cols = self.n_cols, rng = rng)
+            elif self._randomization == "RandomizeAcrossLeftDiagonal":
+                result = result._SetRandomizeAcrossLeftDiagonal(n_rows = self.n_rows, n_cols = self.n_cols, rng = rng)
+            elif self._randomization == "RandomizeAcrossRightDiagonal":
+                result = result._SetRandomizeAcrossRightDiagonal(n_rows = self.n_rows, n_cols = self.n_cols, rng = rng)
+
+        return result
+    
     def AddNormalJitter(self, mu = 0, std = 1, axis = None):
         """
         Adds a sample from a random normal distribution to each element in the generated GridPattern.
@@ -213,27 +480,14 @@ class ElementRepeatAcrossElements(GridPattern):
     """
     _fixed_grid = False
     
-    def generate(self):
-        required_count = self.n_rows * self.n_cols
+    @staticmethod
+    def _layout(indices, n_rows, n_cols):
+        return indices.RepeatElementsToSize(n_rows * n_cols).pattern
 
-        result = self.RepeatElementsToSize(required_count)
+    def generate(self, rng = None):
+        result = self._GatherPattern(self.pattern)
 
-        if self._jitter is not None:
-            result = result._CalculateJitter(distribution = self._jitter, distribution_parameters = self._jitter_parameters)                 
-
-        if self._randomization is not None:
-            if self._randomization == "RandomizeAcrossElements":
-                result = result._SetRandomizeAcrossElements()    
-            elif self._randomization == "RandomizeAcrossRows":
-                result = result._SetRandomizeAcrossRows(n_rows = self.n_rows, n_cols = self.n_cols)     
-            elif self._randomization == "RandomizeAcrossColumns":
-                result = result._SetRandomizeAcrossColumns(n_rows = self.n_rows, n_cols = self.n_cols)    
-            elif self._randomization == "RandomizeAcrossLeftDiagonal":
-                result = result._SetRandomizeAcrossLeftDiagonal(n_rows = self.n_rows, n_cols = self.n_cols)    
-            elif self._randomization == "RandomizeAcrossRightDiagonal":
-                result = result._SetRandomizeAcrossRightDiagonal(n_rows = self.n_rows, n_cols = self.n_cols)    
-            elif self._randomization == "RandomizeAcrossLayers":
-                result = result._SetRandomizeAcrossLayers(n_rows = self.n_rows, n_cols = self.n_cols)    
+        result = self._ApplyRandomComponents(result, rng)
 
         
         self.patterntype = "ElementRepeat"
@@ -254,32 +508,18 @@ class ElementRepeatAcrossColumns(GridPattern):
             
     """ 
     _fixed_grid = False
+    _indexed_layout = False
     
-    def generate(self):
-        p = Pattern(self.pattern)
-        
-        required_count = self.n_cols
+    @staticmethod
+    def _layout(indices, n_rows, n_cols):
+        p = indices.RepeatElementsToSize(n_cols)
 
-        p = p.RepeatElementsToSize(required_count) 
-        
-        result = p.RepeatPattern(self.n_rows)
+        return p.RepeatPattern(n_rows).pattern
 
-        if self._jitter is not None:
-            result = result._CalculateJitter(distribution = self._jitter, distribution_parameters = self._jitter_parameters)                 
+    def generate(self, rng = None):
+        result = self._GatherPattern(self.pattern)
 
-        if self._randomization is not None:
-            if self._randomization == "RandomizeAcrossElements":
-                result = result._SetRandomizeAcrossElements()   
-            elif self._randomization == "RandomizeAcrossRows":
-                result = result._SetRandomizeAcrossRows(n_rows = self.n_rows, n_cols = self.n_cols)       
-            elif self._randomization == "RandomizeAcrossColumns":
-                result = result._SetRandomizeAcrossColumns(n_rows = self.n_rows, n_cols = self.n_cols)     
-            elif self._randomization == "RandomizeAcrossLeftDiagonal":
-                result = result._SetRandomizeAcrossLeftDiagonal(n_rows = self.n_rows, n_cols = self.n_cols)    
-            elif self._randomization == "RandomizeAcrossRightDiagonal":
-                result = result._SetRandomizeAcrossRightDiagonal(n_rows = self.n_rows, n_cols = self.n_cols)    
-            elif self._randomization == "RandomizeAcrossLayers":
-                result = result._SetRandomizeAcrossLayers(n_rows = self.n_rows, n_cols = self.n_cols)      
+        result = self._ApplyRandomComponents(result, rng)
             
         self.patterntype = "ElementRepeat"
         self.patterndirection = "AcrossColumns"
@@ -299,33 +539,18 @@ class ElementRepeatAcrossRows(GridPattern):
             
     """   
     _fixed_grid = False
+    _indexed_layout = False
     
-    def generate(self):
-
-        p = Pattern(self.pattern)
-        
-        required_count = self.n_rows
+    @staticmethod
+    def _layout(indices, n_rows, n_cols):
+        p = indices.RepeatElementsToSize(n_rows)
 
-        p = p.RepeatElementsToSize(required_count) 
-        
-        result = p.RepeatElements(self.n_cols)
+        return p.RepeatElements(n_cols).pattern
 
-        if self._jitter is not None:
-            result = result._CalculateJitter(distribution = self._jitter, distribution_parameters = self._jitter_parameters)                 
+    def generate(self, rng = None):
+        result = self._GatherPattern(self.pattern)
 
-        if self._randomization is not None:
-            if self._randomization == "RandomizeAcrossElements":
-                result = result._SetRandomizeAcrossElements()   
-            elif self._randomization == "RandomizeAcrossRows":
-                result = result._SetRandomizeAcrossRows(n_rows = self.n_rows, n_cols = self.n_cols)     
-            elif self._randomization == "RandomizeAcrossColumns":
-                result = result._SetRandomizeAcrossColumns(n_rows = self.n_rows, n_cols = self.n_cols)     
-            elif self._randomization == "RandomizeAcrossLeftDiagonal":
-                result = result._SetRandomizeAcrossLeftDiagonal(n_rows = self.n_rows, n_cols = self.n_cols)    
-            elif self._randomization == "RandomizeAcrossRightDiagonal":
-                result = result._SetRandomizeAcrossRightDiagonal(n_rows = self.n_rows, n_cols = self.n_cols)    
-            elif self._randomization == "RandomizeAcrossLayers":
-                result = result._SetRandomizeAcrossLayers(n_rows = self.n_rows, n_cols = self.n_cols)        
+        result = self._ApplyRandomComponents(result, rng)
          
         self.patterntype = "ElementRepeat"
         self.patterndirection = "AcrossRows"
@@ -346,39 +571,22 @@ class ElementRepeatAcrossRightDiagonal(GridPattern):
     """   
     _fixed_grid = False
     
-    def generate(self):       
-        
-        p = Pattern(self.pattern)
-        
-        required_count = (self.n_rows + self.n_cols) - 1
+    @staticmethod
+    def _layout(indices, n_rows, n_cols):
+        p = indices.RepeatElementsToSize((n_rows + n_cols) - 1)
+        shifted_pattern = list(p.pattern)
 
-        p = p.RepeatElementsToSize(required_count) 
-        
-        shifted_pattern  = list(p.pattern)
-        
         result = []
-        for i in range(self.n_rows):
-            result.extend(shifted_pattern[:self.n_cols])
+        for i in range(n_rows):
+            result.extend(shifted_pattern[:n_cols])
             shifted_pattern = shifted_pattern[1:]  + [shifted_pattern[0]]
-            
-        result = Pattern(result)
 
-        if self._jitter is not None:
-            result = result._CalculateJitter(distribution = self._jitter, distribution_parameters = self._jitter_parameters)                 
+        return result
 
-        if self._randomization is not None:
-            if self._randomization == "RandomizeAcrossElements":
-                result = result._SetRandomizeAcrossElements()   
-            elif self._randomization == "RandomizeAcrossRows":
-                result = result._SetRandomizeAcrossRows(n_rows = self.n_rows, n_cols = self.n_cols)      
-            elif self._randomization == "RandomizeAcrossColumns":
-                result = result._SetRandomizeAcrossColumns(n_rows = self.n_rows, n_cols = self.n_cols)     
-            elif self._randomization == "RandomizeAcrossLeftDiagonal":
-                result = result._SetRandomizeAcrossLeftDiagonal(n_rows = self.n_rows, n_cols = self.n_cols)    
-            elif self._randomization == "RandomizeAcrossRightDiagonal":
-                result = result._SetRandomizeAcrossRightDiagonal(n_rows = self.n_rows, n_cols = self.n_cols)    
-            elif self._randomization == "RandomizeAcrossLayers":
-                result = result._SetRandomizeAcrossLayers(n_rows = self.n_rows, n_cols = self.n_cols)       
+    def generate(self, rng = None):
+        result = self._GatherPattern(self.pattern)
+
+        result = self._ApplyRandomComponents(result, rng)
                  
         self.patterntype = "ElementRepeat"
         self.patterndirection = "AcrossRightDiagonal"
@@ -400,39 +608,22 @@ class ElementRepeatAcrossLeftDiagonal(GridPattern):
 
     """ 
     _fixed_grid = False
-    def generate(self):  
-        
-        p = Pattern(self.pattern)
-        
-        required_count = (self.n_rows + self.n_cols) - 1
+    @staticmethod
+    def _layout(indices, n_rows, n_cols):
+        p = indices.RepeatElementsToSize((n_rows + n_cols) - 1)
+        shifted_pattern = list(p.pattern[::-1])
 
-        p = p.RepeatElementsToSize(required_count)
-        
-        shifted_pattern  = list(p.pattern[::-1])
-        
         result = []
-        for i in range(self.n_rows):
-            result.extend(shifted_pattern[-self.n_cols:])
+        for i in range(n_rows):
+            result.extend(shifted_pattern[-n_cols:])
             shifted_pattern = [shifted_pattern[-1]] + shifted_pattern[:-1]
-            
-        result = Pattern(result)
-        
-        if self._jitter is not None:
-            result = result._CalculateJitter(distribution = self._jitter, distribution_parameters = self._jitter_parameters)                 
 
-        if self._randomization is not None:
-            if self._randomization == "RandomizeAcrossElements":
-                result = result._SetRandomizeAcrossElements()   
-            elif self._randomization == "RandomizeAcrossRows":
-                result = result._SetRandomizeAcrossRows(n_rows = self.n_rows, n_cols = self.n_cols)      
-            elif self._randomization == "RandomizeAcrossColumns":
-                result = result._SetRandomizeAcrossColumns(n_rows = self.n_rows, n_cols = self.n_cols)      
-            elif self._randomization == "RandomizeAcrossLeftDiagonal":
-                result = result._SetRandomizeAcrossLeftDiagonal(n_rows = self.n_rows, n_cols = self.n_cols)    
-            elif self._randomization == "RandomizeAcrossRightDiagonal":
-                result = result._SetRandomizeAcrossRightDiagonal(n_rows = self.n_rows, n_cols = self.n_cols)    
-            elif self._randomization == "RandomizeAcrossLayers":
-                result = result._SetRandomizeAcrossLayers(n_rows = self.n_rows, n_cols = self.n_cols)      
+        return result
+
+    def generate(self, rng = None):
+        result = self._GatherPattern(self.pattern)
+
+        result = self._ApplyRandomComponents(result, rng)
                  
         self.patterntype = "ElementRepeat"
         self.patterndirection = "AcrossLeftDiagonal"
@@ -451,58 +642,20 @@ class ElementRepeatAcrossLayers(GridPattern):
 
     """ 
     _fixed_grid = False
-    def generate(self):  
+    @staticmethod
+    def _layout(indices, n_rows, n_cols):
+        n_layers = _n_layers(n_rows, n_cols)
+        p = indices.RepeatElementsToSize(n_layers)
+
+        return _layer_layout(p.pattern[:n_layers][::-1], n_rows, n_cols)
+
+    def generate(self, rng = None):
         assert (self.n_rows > 2), "number of rows in the Grid should be more than 2 to apply this pattern"
         assert (self.n_cols > 2), "number of columns in the Grid should be more than 2 to apply this pattern"
-        
-        p = Pattern(self.pattern)
-        
-        n_rows = self.n_rows
-        n_cols = self.n_cols
-        
-        minimal_n = min(n_rows, n_cols)
-        if minimal_n % 2 == 0: 
-            n_layers = int(minimal_n / 2)
-        else:
-            n_layers = int((minimal_n + 1 )/2)
-        
-        p = p.RepeatElementsToSize(n_layers)
-        # if len(p.pattern) < n_layers:
-        #     p = p.RepeatPattern( int(n_layers/len(self.pattern)) + 1, n_layers)
-        p.pattern = p.pattern[:n_layers][::-1]
-        
-        patternmatrix = [[0 for x in range(n_cols)] for y in range(n_rows)] 
-        
-        for layer in range(n_layers):
-            width = n_cols - (2*layer)
-            start_row = layer
-            start_col = layer
-            end_row = n_rows - layer - 1
-            end_col = n_cols - layer
-            patternmatrix[start_row][start_col:end_col] = [p.pattern[layer]] * (width)
-            patternmatrix[end_row][start_col:end_col] = [p.pattern[layer]] * (width)
-            for row in patternmatrix[start_row:end_row]:
-                row[start_col] = p.pattern[layer] 
-                row[end_col-1] = p.pattern[layer] 
-       
-        result = Pattern([item for sublist in patternmatrix for item in sublist])
 
-        if self._jitter is not None:
-            result = result._CalculateJitter(distribution = self._jitter, distribution_parameters = self._jitter_parameters)                 
+        result = self._GatherPattern(self.pattern)
 
-        if self._randomization is not None:
-            if self._randomization == "RandomizeAcrossElements":
-                result = result._SetRandomizeAcrossElements()   
-            elif self._randomization == "RandomizeAcrossRows":
-                result = result._SetRandomizeAcrossRows(n_rows = self.n_rows, n_cols = self.n_cols)       
-            elif self._randomization == "RandomizeAcrossColumns":
-                result = result._SetRandomizeAcrossColumns(n_rows = self.n_rows, n_cols = self.n_cols)       
-            elif self._randomization == "RandomizeAcrossLeftDiagonal":
-                result = result._SetRandomizeAcrossLeftDiagonal(n_rows = self.n_rows, n_cols = self.n_cols)    
-            elif self._randomization == "RandomizeAcrossRightDiagonal":
-                result = result._SetRandomizeAcrossRightDiagonal(n_rows = self.n_rows, n_cols = self.n_cols)    
-            elif self._randomization == "RandomizeAcrossLayers":
-                result = result._SetRandomizeAcrossLayers(n_rows = self.n_rows, n_cols = self.n_cols)    
+        result = self._ApplyRandomComponents(result, rng)
                              
         self.patterntype = "ElementRepeat"
         self.patterndirection = "AcrossLayers"
@@ -522,28 +675,17 @@ class RepeatAcrossElements(GridPattern):
     """
     _fixed_grid = False
     
-    def generate(self):
-        required_count = self.n_rows * self.n_cols
-        current_count = len(self.pattern)
-        
-        result = self.RepeatPattern(1 + int(required_count/current_count), required_count)
+    @staticmethod
+    def _layout(indices, n_rows, n_cols):
+        required_count = n_rows * n_cols
+        current_count = len(indices.pattern)
 
-        if self._jitter is not None:
-            result = result._CalculateJitter(distribution = self._jitter, distribution_parameters = self._jitter_parameters)                 
+        return indices.RepeatPattern(1 + int(required_count/current_count), required_count).pattern
 
-        if self._randomization is not None:
-            if self._randomization == "RandomizeAcrossElements":
-                result = result._SetRandomizeAcrossElements()   
-            elif self._randomization == "RandomizeAcrossRows":
-                result = result._SetRandomizeAcrossRows(n_rows = self.n_rows, n_cols = self.n_cols)      
-            elif self._randomization == "RandomizeAcrossColumns":
-                result = result._SetRandomizeAcrossColumns(n_rows = self.n_rows, n_cols = self.n_cols)      
-            elif self._randomization == "RandomizeAcrossLeftDiagonal":
-                result = result._SetRandomizeAcrossLeftDiagonal(n_rows = self.n_rows, n_cols = self.n_cols)    
-            elif self._randomization == "RandomizeAcrossRightDiagonal":
-                result = result._SetRandomizeAcrossRightDiagonal(n_rows = self.n_rows, n_cols = self.n_cols)    
-            elif self._randomization == "RandomizeAcrossLayers":
-                result = result._SetRandomizeAcrossLayers(n_rows = self.n_rows, n_cols = self.n_cols)       
+    def generate(self, rng = None):
+        result = self._GatherPattern(self.pattern)
+
+        result = self._ApplyRandomComponents(result, rng)
          
         self.patterntype = "Repeat"
         self.patterndirection = "AcrossElements"
@@ -565,32 +707,20 @@ class RepeatAcrossColumns(GridPattern):
 
     """ 
     _fixed_grid = False
+    _indexed_layout = False
     
-    def generate(self):
-        p = Pattern(self.pattern)
-        
-        if len(p.pattern) < self.n_cols:
-            p = p.RepeatPattern( int(self.n_cols/len(self.pattern)) + 1, self.n_cols)
-        p.pattern = p.pattern[:self.n_cols]
-        
-        result = p.RepeatPattern(self.n_rows)
+    @staticmethod
+    def _layout(indices, n_rows, n_cols):
+        p = indices
+        if len(p.pattern) < n_cols:
+            p = p.RepeatPattern( int(n_cols/len(indices.pattern)) + 1, n_cols)
 
-        if self._jitter is not None:
-            result = result._CalculateJitter(distribution = self._jitter, distribution_parameters = self._jitter_parameters)                 
+        return Pattern(p.pattern[:n_cols]).RepeatPattern(n_rows).pattern
 
-        if self._randomization is not None:
-            if self._randomization == "RandomizeAcrossElements":
-                result = result._SetRandomizeAcrossElements()   
-            elif self._randomization == "RandomizeAcrossRows":
-                result = result._SetRandomizeAcrossRows(n_rows = self.n_rows, n_cols = self.n_cols)      
-            elif self._randomization == "RandomizeAcrossColumns":
-                result = result._SetRandomizeAcrossColumns(n_rows = self.n_rows, n_cols = self.n_cols)     
-            elif self._randomization == "RandomizeAcrossLeftDiagonal":
-                result = result._SetRandomizeAcrossLeftDiagonal(n_rows = self.n_rows, n_cols = self.n_cols)    
-            elif self._randomization == "RandomizeAcrossRightDiagonal":
-                result = result._SetRandomizeAcrossRightDiagonal(n_rows = self.n_rows, n_cols = self.n_cols)    
-            elif self._randomization == "RandomizeAcrossLayers":
-                result = result._SetRandomizeAcrossLayers(n_rows = self.n_rows, n_cols = self.n_cols)       
+    def generate(self, rng = None):
+        result = self._GatherPattern(self.pattern)
+
+        result = self._ApplyRandomComponents(result, rng)
          
         self.patterntype = "Repeat"
         self.patterndirection = "AcrossColumns"
@@ -611,33 +741,20 @@ class RepeatAcrossRows(GridPattern):
             
     """   
     _fixed_grid = False
+    _indexed_layout = False
     
-    def generate(self):
-        p = Pattern(self.pattern)
-        N = len(p.pattern)
-        
-        if N < self.n_rows:
-            p = p.RepeatPattern( int(self.n_rows / N) + 1, self.n_rows)
-        p.pattern = p.pattern[:self.n_rows]
-        
-        result = p.RepeatElements(self.n_cols)
+    @staticmethod
+    def _layout(indices, n_rows, n_cols):
+        p = indices
+        if len(p.pattern) < n_rows:
+            p = p.RepeatPattern( int(n_rows/len(indices.pattern)) + 1, n_rows)
 
-        if self._jitter is not None:
-            result = result._CalculateJitter(distribution = self._jitter, distribution_parameters = self._jitter_parameters)                 
+        return Pattern(p.pattern[:n_rows]).RepeatElements(n_cols).pattern
 
-        if self._randomization is not None:
-            if self._randomization == "RandomizeAcrossElements":
-                result = result._SetRandomizeAcrossElements()   
-            elif self._randomization == "RandomizeAcrossRows":
-                result = result._SetRandomizeAcrossRows(n_rows = self.n_rows, n_cols = self.n_cols)      
-            elif self._randomization == "RandomizeAcrossColumns":
-                result = result._SetRandomizeAcrossColumns(n_rows = self.n_rows, n_cols = self.n_cols)      
-            elif self._randomization == "RandomizeAcrossLeftDiagonal":
-                result = result._SetRandomizeAcrossLeftDiagonal(n_rows = self.n_rows, n_cols = self.n_cols)    
-            elif self._randomization == "RandomizeAcrossRightDiagonal":
-                result = result._SetRandomizeAcrossRightDiagonal(n_rows = self.n_rows, n_cols = self.n_cols)    
-            elif self._randomization == "RandomizeAcrossLayers":
-                result = result._SetRandomizeAcrossLayers(n_rows = self.n_rows, n_cols = self.n_cols)       
+    def generate(self, rng = None):
+        result = self._GatherPattern(self.pattern)
+
+        result = self._ApplyRandomComponents(result, rng)
                
         self.patterntype = "Repeat"
         self.patterndirection = "AcrossRows"
@@ -658,34 +775,22 @@ class RepeatAcrossRightDiagonal(GridPattern):
     """   
     _fixed_grid = False
     
-    def generate(self):       
-        p = Pattern(self.pattern)
-        p = p.RepeatPattern( int( self.n_cols / len(self.pattern)) + 1 )
-        shifted_pattern  = list(p.pattern)
-        
+    @staticmethod
+    def _layout(indices, n_rows, n_cols):
+        p = indices.RepeatPattern( int( n_cols / len(indices.pattern)) + 1 )
+        shifted_pattern = list(p.pattern)
+
         result = []
-        for i in range(self.n_rows):
-            result.extend(shifted_pattern[:self.n_cols])
+        for i in range(n_rows):
+            result.extend(shifted_pattern[:n_cols])
             shifted_pattern = shifted_pattern[1:]  + [shifted_pattern[0]]
-                    
-        result = Pattern(result)
 
-        if self._jitter is not None:
-            result = result._CalculateJitter(distribution = self._jitter, distribution_parameters = self._jitter_parameters)                 
+        return result
 
-        if self._randomization is not None:
-            if self._randomization == "RandomizeAcrossElements":
-                result = result._SetRandomizeAcrossElements()   
-            elif self._randomization == "RandomizeAcrossRows":
-                result = result._SetRandomizeAcrossRows(n_rows = self.n_rows, n_cols = self.n_cols)      
-            elif self._randomization == "RandomizeAcrossColumns":
-                result = result._SetRandomizeAcrossColumns(n_rows = self.n_rows, n_cols = self.n_cols)      
-            elif self._randomization == "RandomizeAcrossLeftDiagonal":
-                result = result._SetRandomizeAcrossLeftDiagonal(n_rows = self.n_rows, n_cols = self.n_cols)    
-            elif self._randomization == "RandomizeAcrossRightDiagonal":
-                result = result._SetRandomizeAcrossRightDiagonal(n_rows = self.n_rows, n_cols = self.n_cols)    
-            elif self._randomization == "RandomizeAcrossLayers":
-                result = result._SetRandomizeAcrossLayers(n_rows = self.n_rows, n_cols = self.n_cols)      
+    def generate(self, rng = None):
+        result = self._GatherPattern(self.pattern)
+
+        result = self._ApplyRandomComponents(result, rng)
                  
         self.patterntype = "Repeat"
         self.patterndirection = "AcrossRightDiagonal"
@@ -706,35 +811,23 @@ class RepeatAcrossLeftDiagonal(GridPattern):
 
     """ 
     _fixed_grid = False
-    def generate(self):  
-        p = Pattern(self.pattern[::-1])
-        p = p.RepeatPattern( int( self.n_cols / len(self.pattern)) + 1 )
-        
+    @staticmethod
+    def _layout(indices, n_rows, n_cols):
+        p = Pattern(indices.pattern[::-1])
+        p = p.RepeatPattern( int( n_cols / len(indices.pattern)) + 1 )
         shifted_pattern = list(p.pattern)
-        
+
         result = []
-        for i in range(self.n_rows):
-            result.extend(shifted_pattern[-self.n_cols:])
+        for i in range(n_rows):
+            result.extend(shifted_pattern[-n_cols:])
             shifted_pattern = [shifted_pattern[-1]] + shifted_pattern[:-1]
-                    
-        result = Pattern(result)
 
-        if self._jitter is not None:
-            result = result._CalculateJitter(distribution = self._jitter, distribution_parameters = self._jitter_parameters)                 
+        return result
 
-        if self._randomization is not None:
-            if self._randomization == "RandomizeAcrossElements":
-                result = result._SetRandomizeAcrossElements()   
-            elif self._randomization == "RandomizeAcrossRows":
-                result = result._SetRandomizeAcrossRows(n_rows = self.n_rows, n_cols = self.n_cols)       
-            elif self._randomization == "RandomizeAcrossColumns":
-                result = result._SetRandomizeAcrossColumns(n_rows = self.n_rows, n_cols = self.n_cols)       
-            elif self._randomization == "RandomizeAcrossLeftDiagonal":
-                result = result._SetRandomizeAcrossLeftDiagonal(n_rows = self.n_rows, n_cols = self.n_cols)    
-            elif self._randomization == "RandomizeAcrossRightDiagonal":
-                result = result._SetRandomizeAcrossRightDiagonal(n_rows = self.n_rows, n_cols = self.n_cols)    
-            elif self._randomization == "RandomizeAcrossLayers":
-                result = result._SetRandomizeAcrossLayers(n_rows = self.n_rows, n_cols = self.n_cols)    
+    def generate(self, rng = None):
+        result = self._GatherPattern(self.pattern)
+
+        result = self._ApplyRandomComponents(result, rng)
                  
         self.patterntype = "Repeat"
         self.patterndirection = "AcrossLeftDiagonal"
@@ -754,57 +847,22 @@ class RepeatAcrossLayers(GridPattern):
 
     """ 
     _fixed_grid = False
-    def generate(self):  
+    @staticmethod
+    def _layout(indices, n_rows, n_cols):
+        n_layers = _n_layers(n_rows, n_cols)
+        p = indices
+        if len(p.pattern) < n_layers:
+            p = p.RepeatPattern( int(n_layers/len(indices.pattern)) + 1, n_layers)
+
+        return _layer_layout(p.pattern[:n_layers][::-1], n_rows, n_cols)
+
+    def generate(self, rng = None):
         assert (self.n_rows > 2), "number of rows in the Grid should be more than 2 to apply this pattern"
         assert (self.n_cols > 2), "number of columns in the Grid should be more than 2 to apply this pattern"
-        
-        p = Pattern(self.pattern)
-        
-        n_rows = self.n_rows
-        n_cols = self.n_cols
-        
-        minimal_n = min(n_rows, n_cols)
-        if minimal_n % 2 == 0: 
-            n_layers = int(minimal_n / 2)
-        else:
-            n_layers = int((minimal_n + 1 )/2)
-        
-        if len(p.pattern) < n_layers:
-            p = p.RepeatPattern( int(n_layers/len(self.pattern)) + 1, n_layers)
-        p.pattern = p.pattern[:n_layers][::-1]
-        
-        patternmatrix = [[0 for x in range(n_cols)] for y in range(n_rows)] 
-        
-        for layer in range(n_layers):
-            width = n_cols - (2*layer)
-            start_row = layer
-            start_col = layer
-            end_row = n_rows - layer - 1
-            end_col = n_cols - layer
-            patternmatrix[start_row][start_col:end_col] = [p.pattern[layer]] * (width)
-            patternmatrix[end_row][start_col:end_col] = [p.pattern[layer]] * (width)
-            for row in patternmatrix[start_row:end_row]:
-                row[start_col] = p.pattern[layer] 
-                row[end_col-1] = p.pattern[layer] 
-       
-        result = Pattern([item for sublist in patternmatrix for item in sublist])
- 
-        if self._jitter is not None:
-            result = result._CalculateJitter(distribution = self._jitter, distribution_parameters = self._jitter_parameters)                 
 
-        if self._randomization is not None:
-            if self._randomization == "RandomizeAcrossElements":
-                result = result._SetRandomizeAcrossElements()   
-            elif self._randomization == "RandomizeAcrossRows":
-                result = result._SetRandomizeAcrossRows(n_rows = self.n_rows, n_cols = self.n_cols)       
-            elif self._randomization == "RandomizeAcrossColumns":
-                result = result._SetRandomizeAcrossColumns(n_rows = self.n_rows, n_cols = self.n_cols)       
-            elif self._randomization == "RandomizeAcrossLeftDiagonal":
-                result = result._SetRandomizeAcrossLeftDiagonal(n_rows = self.n_rows, n_cols = self.n_cols)    
-            elif self._randomization == "RandomizeAcrossRightDiagonal":
-                result = result._SetRandomizeAcrossRightDiagonal(n_rows = self.n_rows, n_cols = self.n_cols)    
-            elif self._randomization == "RandomizeAcrossLayers":
-                result = result._SetRandomizeAcrossLayers(n_rows = self.n_rows, n_cols = self.n_cols)    
+        result = self._GatherPattern(self.pattern)
+
+        result = self._ApplyRandomComponents(result, rng)
                             
         self.patterntype = "Repeat"
         self.patterndirection = "AcrossLayers"
@@ -826,13 +884,14 @@ class MirrorAcrossElements(GridPattern):
     """
     _fixed_grid = False
         
-    def generate(self):
-        p = Pattern(self.pattern)
-        required_count = self.n_rows * self.n_cols
-        
+    @staticmethod
+    def _layout(indices, n_rows, n_cols):
+        p = Pattern(indices.pattern)
+        required_count = n_rows * n_cols
+
         if len(p.pattern) < int(required_count/2) + 1:
             p = p.RepeatPattern(int(required_count/2) + 1)
-        
+
         if required_count%2 == 0:
             m1 = p.pattern[:int(required_count/2)]
             m2 = m1[::-1]
@@ -841,25 +900,13 @@ class MirrorAcrossElements(GridPattern):
             m1 = p.pattern[:int((required_count+1)/2)]
             m2 = m1[::-1]
             p.pattern = m1 + m2[1:]
-            
-        result = p
 
-        if self._jitter is not None:
-            result = result._CalculateJitter(distribution = self._jitter, distribution_parameters = self._jitter_parameters)                 
+        return p.pattern
 
-        if self._randomization is not None:
-            if self._randomization == "RandomizeAcrossElements":
-                result = result._SetRandomizeAcrossElements()   
-            elif self._randomization == "RandomizeAcrossRows":
-                result = result._SetRandomizeAcrossRows(n_rows = self.n_rows, n_cols = self.n_cols)      
-            elif self._randomization == "RandomizeAcrossColumns":
-                result = result._SetRandomizeAcrossColumns(n_rows = self.n_rows, n_cols = self.n_cols)       
-            elif self._randomization == "RandomizeAcrossLeftDiagonal":
-                result = result._SetRandomizeAcrossLeftDiagonal(n_rows = self.n_rows, n_cols = self.n_cols)    
-            elif self._randomization == "RandomizeAcrossRightDiagonal":
-                result = result._SetRandomizeAcrossRightDiagonal(n_rows = self.n_rows, n_cols = self.n_cols)    
-            elif self._randomization == "RandomizeAcrossLayers":
-                result = result._SetRandomizeAcrossLayers(n_rows = self.n_rows, n_cols = self.n_cols)     
+    def generate(self, rng = None):
+        result = self._GatherPattern(self.pattern)
+
+        result = self._ApplyRandomComponents(result, rng)
          
         self.patterntype = "Mirror"
         self.patterndirection = "AcrossElements"
@@ -885,40 +932,30 @@ class MirrorAcrossRows(GridPattern):
 
     """
     _fixed_grid = False
+    _indexed_layout = False
     
-    def generate(self):
-        p = Pattern(self.pattern)
-        
-        if len(p.pattern) < int(self.n_rows/2) + 1:
-            p = p.RepeatPattern(int(self.n_rows/2) + 1)
-        
-        if self.n_rows%2 == 0:
-            m1 = p.pattern[:int(self.n_rows/2)]
+    @staticmethod
+    def _layout(indices, n_rows, n_cols):
+        p = Pattern(indices.pattern)
+
+        if len(p.pattern) < int(n_rows/2) + 1:
+            p = p.RepeatPattern(int(n_rows/2) + 1)
+
+        if n_rows%2 == 0:
+            m1 = p.pattern[:int(n_rows/2)]
             m2 = m1[::-1]
             p.pattern = m1 + m2
         else:
-            m1 = p.pattern[:int((self.n_rows+1)/2)]
+            m1 = p.pattern[:int((n_rows+1)/2)]
             m2 = m1[::-1]
             p.pattern = m1 + m2[1:]
-            
-        result = p.RepeatElements(self.n_cols)
 
-        if self._jitter is not None:
-            result = result._CalculateJitter(distribution = self._jitter, distribution_parameters = self._jitter_parameters)                 
+        return p.RepeatElements(n_cols).pattern
 
-        if self._randomization is not None:
-            if self._randomization == "RandomizeAcrossElements":
-                result = result._SetRandomizeAcrossElements()   
-            elif self._randomization == "RandomizeAcrossRows":
-                result = result._SetRandomizeAcrossRows(n_rows = self.n_rows, n_cols = self.n_cols)      
-            elif self._randomization == "RandomizeAcrossColumns":
-                result = result._SetRandomizeAcrossColumns(n_rows = self.n_rows, n_cols = self.n_cols)     
-            elif self._randomization == "RandomizeAcrossLeftDiagonal":
-                result = result._SetRandomizeAcrossLeftDiagonal(n_rows = self.n_rows, n_cols = self.n_cols)    
-            elif self._randomization == "RandomizeAcrossRightDiagonal":
-                result = result._SetRandomizeAcrossRightDiagonal(n_rows = self.n_rows, n_cols = self.n_cols)    
-            elif self._randomization == "RandomizeAcrossLayers":
-                result = result._SetRandomizeAcrossLayers(n_rows = self.n_rows, n_cols = self.n_cols)        
+    def generate(self, rng = None):
+        result = self._GatherPattern(self.pattern)
+
+        result = self._ApplyRandomComponents(result, rng)
          
         self.patterntype = "Mirror"
         self.patterndirection = "AcrossRows"
@@ -943,39 +980,30 @@ class MirrorAcrossColumns(GridPattern):
             
     """
     _fixed_grid = False
+    _indexed_layout = False
     
-    def generate(self):
-        p = Pattern(self.pattern)
-        if len(p.pattern) < int(self.n_cols/2) + 1:
-            p = p.RepeatPattern(int(self.n_cols/2) + 1)
-            
-        if self.n_cols%2 == 0:
-            m1 = p.pattern[:int(self.n_cols/2)]
+    @staticmethod
+    def _layout(indices, n_rows, n_cols):
+        p = Pattern(indices.pattern)
+
+        if len(p.pattern) < int(n_cols/2) + 1:
+            p = p.RepeatPattern(int(n_cols/2) + 1)
+
+        if n_cols%2 == 0:
+            m1 = p.pattern[:int(n_cols/2)]
             m2 = m1[::-1]
             p.pattern = m1 + m2
         else:
-            m1 = p.pattern[:int((self.n_cols+1)/2)]
+            m1 = p.pattern[:int((n_cols+1)/2)]
             m2 = m1[::-1]
             p.pattern = m1 + m2[1:]
-            
-        result = p.RepeatPattern(self.n_rows)
- 
-        if self._jitter is not None:
-            result = result._CalculateJitter(distribution = self._jitter, distribution_parameters = self._jitter_parameters)                 
 
-        if self._randomization is not None:
-            if self._randomization == "RandomizeAcrossElements":
-                result = result._SetRandomizeAcrossElements()   
-            elif self._randomization == "RandomizeAcrossRows":
-                result = result._SetRandomizeAcrossRows(n_rows = self.n_rows, n_cols = self.n_cols)      
-            elif self._randomization == "RandomizeAcrossColumns":
-                result = result._SetRandomizeAcrossColumns(n_rows = self.n_rows, n_cols = self.n_cols)      
-            elif self._randomization == "RandomizeAcrossLeftDiagonal":
-                result = result._SetRandomizeAcrossLeftDiagonal(n_rows = self.n_rows, n_cols = self.n_cols)    
-            elif self._randomization == "RandomizeAcrossRightDiagonal":
-                result = result._SetRandomizeAcrossRightDiagonal(n_rows = self.n_rows, n_cols = self.n_cols)    
-            elif self._randomization == "RandomizeAcrossLayers":
-                result = result._SetRandomizeAcrossLayers(n_rows = self.n_rows, n_cols = self.n_cols)      
+        return p.RepeatPattern(n_rows).pattern
+
+    def generate(self, rng = None):
+        result = self._GatherPattern(self.pattern)
+
+        result = self._ApplyRandomComponents(result, rng)
         
         self.patterntype = "Mirror"
         self.patterndirection = "AcrossColumns"
@@ -998,42 +1026,27 @@ class MirrorAcrossLeftDiagonal(GridPattern):
         """
     _fixed_grid = False    
     
-    def generate(self):
-        p = Pattern(self.pattern)
-        n = self.n_rows + self.n_cols
-               
-        max_elements = int(n/2)
-        p = p.RepeatPattern(int(n/len(p.pattern)), max_elements)
-        
-        
+    @staticmethod
+    def _layout(indices, n_rows, n_cols):
+        n = n_rows + n_cols
+        p = indices.RepeatPattern(int(n/len(indices.pattern)), int(n/2))
+
         if n%2 == 0:
             shifter = p.pattern + p.pattern[:-1][::-1]
         else:
             shifter = p.pattern + p.pattern[::-1]
-          
+
         result = []
-        for i in range(self.n_rows):
-            result.extend(shifter[:self.n_cols][::-1])
+        for i in range(n_rows):
+            result.extend(shifter[:n_cols][::-1])
             shifter = shifter[1:] + [shifter[0]]
-                    
-        result = Pattern(result)
 
-        if self._jitter is not None:
-            result = result._CalculateJitter(distribution = self._jitter, distribution_parameters = self._jitter_parameters)                 
+        return result
 
-        if self._randomization is not None:
-            if self._randomization == "RandomizeAcrossElements":
-                result = result._SetRandomizeAcrossElements()   
-            elif self._randomization == "RandomizeAcrossRows":
-                result = result._SetRandomizeAcrossRows(n_rows = self.n_rows, n_cols = self.n_cols)       
-            elif self._randomization == "RandomizeAcrossColumns":
-                result = result._SetRandomizeAcrossColumns(n_rows = self.n_rows, n_cols = self.n_cols)     
-            elif self._randomization == "RandomizeAcrossLeftDiagonal":
-                result = result._SetRandomizeAcrossLeftDiagonal(n_rows = self.n_rows, n_cols = self.n_cols)    
-            elif self._randomization == "RandomizeAcrossRightDiagonal":
-                result = result._SetRandomizeAcrossRightDiagonal(n_rows = self.n_rows, n_cols = self.n_cols)    
-            elif self._randomization == "RandomizeAcrossLayers":
-                result = result._SetRandomizeAcrossLayers(n_rows = self.n_rows, n_cols = self.n_cols)      
+    def generate(self, rng = None):
+        result = self._GatherPattern(self.pattern)
+
+        result = self._ApplyRandomComponents(result, rng)
  
         self.patterntype = "Mirror"
         self.patterndirection = "AcrossLeftDiagonal"
@@ -1056,42 +1069,27 @@ class MirrorAcrossRightDiagonal(GridPattern):
     """
     _fixed_grid = False
     
-    def generate(self):
-        p = Pattern(self.pattern)
-        n = self.n_rows + self.n_cols
-               
-        max_elements = int(n/2)
-        p = p.RepeatPattern(int(n/len(p.pattern)), max_elements)
-        
-        
+    @staticmethod
+    def _layout(indices, n_rows, n_cols):
+        n = n_rows + n_cols
+        p = indices.RepeatPattern(int(n/len(indices.pattern)), int(n/2))
+
         if n%2 == 0:
             shifter = p.pattern + p.pattern[:-1][::-1]
         else:
             shifter = p.pattern + p.pattern[::-1]
-            
+
         result = []
-        for i in range(self.n_rows):
-            result.extend(shifter[:self.n_cols])
-            shifter = shifter[1:] + [shifter[0]]            
-                    
-        result = Pattern(result)
+        for i in range(n_rows):
+            result.extend(shifter[:n_cols])
+            shifter = shifter[1:] + [shifter[0]]
 
-        if self._jitter is not None:
-            result = result._CalculateJitter(distribution = self._jitter, distribution_parameters = self._jitter_parameters)                 
+        return result
 
-        if self._randomization is not None:
-            if self._randomization == "RandomizeAcrossElements":
-                result = result._SetRandomizeAcrossElements()   
-            elif self._randomization == "RandomizeAcrossRows":
-                result = result._SetRandomizeAcrossRows(n_rows = self.n_rows, n_cols = self.n_cols)       
-            elif self._randomization == "RandomizeAcrossColumns":
-                result = result._SetRandomizeAcrossColumns(n_rows = self.n_rows, n_cols = self.n_cols)     
-            elif self._randomization == "RandomizeAcrossLeftDiagonal":
-                result = result._SetRandomizeAcrossLeftDiagonal(n_rows = self.n_rows, n_cols = self.n_cols)    
-            elif self._randomization == "RandomizeAcrossRightDiagonal":
-                result = result._SetRandomizeAcrossRightDiagonal(n_rows = self.n_rows, n_cols = self.n_cols)    
-            elif self._randomization == "RandomizeAcrossLayers":
-                result = result._SetRandomizeAcrossLayers(n_rows = self.n_rows, n_cols = self.n_cols)      
+    def generate(self, rng = None):
+        result = self._GatherPattern(self.pattern)
+
+        result = self._ApplyRandomComponents(result, rng)
          
         self.patterntype = "Mirror"
         self.patterndirection = "AcrossRightDiagonal"
@@ -1110,27 +1108,15 @@ class MirrorAcrossLayers(GridPattern):
 
     """ 
     _fixed_grid = False
-    def generate(self):  
-        assert (self.n_rows > 2), "number of rows in the Grid should be more than 2 to apply this pattern"
-        assert (self.n_cols > 2), "number of columns in the Grid should be more than 2 to apply this pattern"
-        
-        p = Pattern(self.pattern)
-        
-        n_rows = self.n_rows
-        n_cols = self.n_cols
-        
-        minimal_n = min(n_rows, n_cols)
-        if minimal_n % 2 == 0: 
-            n_layers = int(minimal_n / 2)
-        else:
-            n_layers = int((minimal_n + 1 )/2)
-        
-        # max_elements = int(n_layers/2)
-        
+    @staticmethod
+    def _layout(indices, n_rows, n_cols):
+        n_layers = _n_layers(n_rows, n_cols)
+        p = Pattern(indices.pattern)
+
         if len(p.pattern) < int(n_layers/2) + 1:
             p = Pattern(p.pattern[::-1])
             p = p.RepeatPattern(int(n_layers/2) + 1)
-        
+
         if n_layers%2 == 0:
             m1 = p.pattern[:int(n_layers/2)]
             m2 = m1[::-1]
@@ -1139,39 +1125,16 @@ class MirrorAcrossLayers(GridPattern):
             m1 = p.pattern[:int((n_layers+1)/2)]
             m2 = m1[::-1]
             p.pattern = m1 + m2[1:]
-            
-        patternmatrix = [[0 for x in range(n_cols)] for y in range(n_rows)] 
-        
-        for layer in range(n_layers):
-            width = n_cols - (2*layer)
-            start_row = layer
-            start_col = layer
-            end_row = n_rows - layer - 1
-            end_col = n_cols - layer
-            patternmatrix[start_row][start_col:end_col] = [p.pattern[layer]] * (width)
-            patternmatrix[end_row][start_col:end_col] = [p.pattern[layer]] * (width)
-            for row in patternmatrix[start_row:end_row]:
-                row[start_col] = p.pattern[layer] 
-                row[end_col-1] = p.pattern[layer] 
-       
-        result = Pattern([item for sublist in patternmatrix for item in sublist])
 
-        if self._jitter is not None:
-            result = result._CalculateJitter(distribution = self._jitter, distribution_parameters = self._jitter_parameters)                 
+        return _layer_layout(p.pattern, n_rows, n_cols)
 
-        if self._randomization is not None:
-            if self._randomization == "RandomizeAcrossElements":
-                result = result._SetRandomizeAcrossElements()   
-            elif self._randomization == "RandomizeAcrossRows":
-                result = result._SetRandomizeAcrossRows(n_rows = self.n_rows, n_cols = self.n_cols)       
-            elif self._randomization == "RandomizeAcrossColumns":
-                result = result._SetRandomizeAcrossColumns(n_rows = self.n_rows, n_cols = self.n_cols)     
-            elif self._randomization == "RandomizeAcrossLeftDiagonal":
-                result = result._SetRandomizeAcrossLeftDiagonal(n_rows = self.n_rows, n_cols = self.n_cols)    
-            elif self._randomization == "RandomizeAcrossRightDiagonal":
-                result = result._SetRandomizeAcrossRightDiagonal(n_rows = self.n_rows, n_cols = self.n_cols)    
-            elif self._randomization == "RandomizeAcrossLayers":
-                result = result._SetRandomizeAcrossLayers(n_rows = self.n_rows, n_cols = self.n_cols)      
+    def generate(self, rng = None):
+        assert (self.n_rows > 2), "number of rows in the Grid should be more than 2 to apply this pattern"
+        assert (self.n_cols > 2), "number of columns in the Grid should be more than 2 to apply this pattern"
+
+        result = self._GatherPattern(self.pattern)
+
+        result = self._ApplyRandomComponents(result, rng)
                              
         self.patterntype = "Mirror"
         self.patterndirection = "AcrossLayers"
@@ -1189,6 +1152,7 @@ class GradientAcrossElements(GridPattern):
 
     """
     _fixed_grid = False
+    _cache_attributes = ["start_value", "end_value", "n_rows", "n_cols", "_jitter", "_jitter_parameters", "_randomization"]
     
     def __init__(self, start_value, end_value, n_rows = 5, n_cols = 5):
         self.start_value = start_value
@@ -1199,26 +1163,15 @@ class GradientAcrossElements(GridPattern):
         self._jitter_parameters = {}
         self._randomization = None
         
-    def generate(self):
-        n_elements = self.n_rows * self.n_cols
-        result = Pattern.CreateGradientPattern(self.start_value, self.end_value, n_elements)
+    @staticmethod
+    def _layout(indices, n_rows, n_cols):
+        return indices.pattern
 
-        if self._jitter is not None:
-            result = result._CalculateJitter(distribution = self._jitter, distribution_parameters = self._jitter_parameters)                 
+    def generate(self, rng = None):
+        values = Pattern.CreateGradientPattern(self.start_value, self.end_value, self.n_rows * self.n_cols).pattern
+        result = self._GatherPattern(values)
 
-        if self._randomization is not None:
-            if self._randomization == "RandomizeAcrossElements":
-                result = result._SetRandomizeAcrossElements()   
-            elif self._randomization == "RandomizeAcrossRows":
-                result = result._SetRandomizeAcrossRows(n_rows = self.n_rows, n_cols = self.n_cols)      
-            elif self._randomization == "RandomizeAcrossColumns":
-                result = result._SetRandomizeAcrossColumns(n_rows = self.n_rows, n_cols = self.n_cols)      
-            elif self._randomization == "RandomizeAcrossLeftDiagonal":
-                result = result._SetRandomizeAcrossLeftDiagonal(n_rows = self.n_rows, n_cols = self.n_cols)    
-            elif self._randomization == "RandomizeAcrossRightDiagonal":
-                result = result._SetRandomizeAcrossRightDiagonal(n_rows = self.n_rows, n_cols = self.n_cols)    
-            elif self._randomization == "RandomizeAcrossLayers":
-                result = result._SetRandomizeAcrossLayers(n_rows = self.n_rows, n_cols = self.n_cols)       
+        result = self._ApplyRandomComponents(result, rng)
  
         self.pattern = result.pattern
         self.patterntype = "Gradient"
@@ -1238,6 +1191,8 @@ class GradientAcrossRows(GridPattern):
 
     """
     _fixed_grid = False
+    _indexed_layout = False
+    _cache_attributes = ["start_value", "end_value", "n_rows", "n_cols", "_jitter", "_jitter_parameters", "_randomization"]
     
     def __init__(self, start_value, end_value, n_rows = 5, n_cols = 5):
         self.start_value = start_value
@@ -1248,26 +1203,15 @@ class GradientAcrossRows(GridPattern):
         self._jitter_parameters = {}
         self._randomization = None
         
-    def generate(self):
-        p = Pattern.CreateGradientPattern(self.start_value, self.end_value, self.n_rows)
-        result = p.RepeatElements(self.n_cols)
+    @staticmethod
+    def _layout(indices, n_rows, n_cols):
+        return indices.RepeatElements(n_cols).pattern
 
-        if self._jitter is not None:
-            result = result._CalculateJitter(distribution = self._jitter, distribution_parameters = self._jitter_parameters)                 
+    def generate(self, rng = None):
+        values = Pattern.CreateGradientPattern(self.start_value, self.end_value, self.n_rows).pattern
+        result = self._GatherPattern(values)
 
-        if self._randomization is not None:
-            if self._randomization == "RandomizeAcrossElements":
-                result = result._SetRandomizeAcrossElements()   
-            elif self._randomization == "RandomizeAcrossRows":
-                result = result._SetRandomizeAcrossRows(n_rows = self.n_rows, n_cols = self.n_cols)      
-            elif self._randomization == "RandomizeAcrossColumns":
-                result = result._SetRandomizeAcrossColumns(n_rows = self.n_rows, n_cols = self.n_cols)        
-            elif self._randomization == "RandomizeAcrossLeftDiagonal":
-                result = result._SetRandomizeAcrossLeftDiagonal(n_rows = self.n_rows, n_cols = self.n_cols)    
-            elif self._randomization == "RandomizeAcrossRightDiagonal":
-                result = result._SetRandomizeAcrossRightDiagonal(n_rows = self.n_rows, n_cols = self.n_cols)    
-            elif self._randomization == "RandomizeAcrossLayers":
-                result = result._SetRandomizeAcrossLayers(n_rows = self.n_rows, n_cols = self.n_cols)    
+        result = self._ApplyRandomComponents(result, rng)
          
         self.pattern = result.pattern
         self.patterntype = "Gradient"
@@ -1287,6 +1231,8 @@ class GradientAcrossColumns(GridPattern):
 
     """
     _fixed_grid = False
+    _indexed_layout = False
+    _cache_attributes = ["start_value", "end_value", "n_rows", "n_cols", "_jitter", "_jitter_parameters", "_randomization"]
     
     def __init__(self, start_value, end_value, n_rows = 5, n_cols = 5):
         self.start_value = start_value
@@ -1297,26 +1243,15 @@ class GradientAcrossColumns(GridPattern):
         self._jitter_parameters = {}
         self._randomization = None
         
-    def generate(self):      
-        p = Pattern.CreateGradientPattern(self.start_value, self.end_value, self.n_cols)
-        result = p.RepeatPattern(self.n_rows)
- 
-        if self._jitter is not None:
-            result = result._CalculateJitter(distribution = self._jitter, distribution_parameters = self._jitter_parameters)                 
+    @staticmethod
+    def _layout(indices, n_rows, n_cols):
+        return indices.RepeatPattern(n_rows).pattern
 
-        if self._randomization is not None:
-            if self._randomization == "RandomizeAcrossElements":
-                result = result._SetRandomizeAcrossElements()   
-            elif self._randomization == "RandomizeAcrossRows":
-                result = result._SetRandomizeAcrossRows(n_rows = self.n_rows, n_cols = self.n_cols)       
-            elif self._randomization == "RandomizeAcrossColumns":
-                result = result._SetRandomizeAcrossColumns(n_rows = self.n_rows, n_cols = self.n_cols)      
-            elif self._randomization == "RandomizeAcrossLeftDiagonal":
-                result = result._SetRandomizeAcrossLeftDiagonal(n_rows = self.n_rows, n_cols = self.n_cols)    
-            elif self._randomization == "RandomizeAcrossRightDiagonal":
-                result = result._SetRandomizeAcrossRightDiagonal(n_rows = self.n_rows, n_cols = self.n_cols)    
-            elif self._randomization == "RandomizeAcrossLayers":
-                result = result._SetRandomizeAcrossLayers(n_rows = self.n_rows, n_cols = self.n_cols)     
+    def generate(self, rng = None):
+        values = Pattern.CreateGradientPattern(self.start_value, self.end_value, self.n_cols).pattern
+        result = self._GatherPattern(values)
+
+        result = self._ApplyRandomComponents(result, rng)
         
         self.pattern = result.pattern
         self.patterntype = "Gradient"
@@ -1336,6 +1271,7 @@ class GradientAcrossLeftDiagonal(GridPattern):
 
     """
     _fixed_grid = False
+    _cache_attributes = ["start_value", "end_value", "n_rows", "n_cols", "_jitter", "_jitter_parameters", "_randomization"]
     
     def __init__(self, start_value, end_value, n_rows = 5, n_cols = 5):
         self.start_value = start_value
@@ -1346,33 +1282,22 @@ class GradientAcrossLeftDiagonal(GridPattern):
         self._jitter_parameters = {}
         self._randomization = None
         
-    def generate(self):
-        n_elements = self.n_rows + self.n_cols - 1
-        shifter = Pattern.CreateGradientPattern(self.start_value, self.end_value, n_elements).pattern
-          
+    @staticmethod
+    def _layout(indices, n_rows, n_cols):
+        shifter = list(indices.pattern)
+
         result = []
-        for i in range(self.n_rows):
-            result.extend(shifter[:self.n_cols][::-1])
+        for i in range(n_rows):
+            result.extend(shifter[:n_cols][::-1])
             shifter = shifter[1:] + [shifter[0]]
-                    
-        result = Pattern(result)
- 
-        if self._jitter is not None:
-            result = result._CalculateJitter(distribution = self._jitter, distribution_parameters = self._jitter_parameters)                 
 
-        if self._randomization is not None:
-            if self._randomization == "RandomizeAcrossElements":
-                result = result._SetRandomizeAcrossElements()   
-            elif self._randomization == "RandomizeAcrossRows":
-                result = result._SetRandomizeAcrossRows(n_rows = self.n_rows, n_cols = self.n_cols)      
-            elif self._randomization == "RandomizeAcrossColumns":
-                result = result._SetRandomizeAcrossColumns(n_rows = self.n_rows, n_cols = self.n_cols)      
-            elif self._randomization == "RandomizeAcrossLeftDiagonal":
-                result = result._SetRandomizeAcrossLeftDiagonal(n_rows = self.n_rows, n_cols = self.n_cols)    
-            elif self._randomization == "RandomizeAcrossRightDiagonal":
-                result = result._SetRandomizeAcrossRightDiagonal(n_rows = self.n_rows, n_cols = self.n_cols)    
-            elif self._randomization == "RandomizeAcrossLayers":
-                result = result._SetRandomizeAcrossLayers(n_rows = self.n_rows, n_cols = self.n_cols)       
+        return result
+
+    def generate(self, rng = None):
+        values = Pattern.CreateGradientPattern(self.start_value, self.end_value, self.n_rows + self.n_cols - 1).pattern
+        result = self._GatherPattern(values)
+
+        result = self._ApplyRandomComponents(result, rng)
                 
         self.pattern = Pattern(result).pattern
         self.patterntype = "Gradient"
@@ -1392,6 +1317,7 @@ class GradientAcrossRightDiagonal(GridPattern):
 
     """
     _fixed_grid = False
+    _cache_attributes = ["start_value", "end_value", "n_rows", "n_cols", "_jitter", "_jitter_parameters", "_randomization"]
     
     def __init__(self, start_value, end_value, n_rows = 5, n_cols = 5):
         self.start_value = start_value
@@ -1402,33 +1328,22 @@ class GradientAcrossRightDiagonal(GridPattern):
         self._jitter_parameters = {}
         self._randomization = None
         
-    def generate(self):
-        n_elements = self.n_rows + self.n_cols - 1
-        shifter = Pattern.CreateGradientPattern(self.start_value, self.end_value, n_elements).pattern
-            
+    @staticmethod
+    def _layout(indices, n_rows, n_cols):
+        shifter = list(indices.pattern)
+
         result = []
-        for i in range(self.n_rows):
-            result.extend(shifter[:self.n_cols])
+        for i in range(n_rows):
+            result.extend(shifter[:n_cols])
             shifter = shifter[1:] + [shifter[0]]
-                    
-        result = Pattern(result)
 
-        if self._jitter is not None:
-            result = result._CalculateJitter(distribution = self._jitter, distribution_parameters = self._jitter_parameters)                 
+        return result
 
-        if self._randomization is not None:
-            if self._randomization == "RandomizeAcrossElements":
-                result = result._SetRandomizeAcrossElements()   
-            elif self._randomization == "RandomizeAcrossRows":
-                result = result._SetRandomizeAcrossRows(n_rows = self.n_rows, n_cols = self.n_cols)       
-            elif self._randomization == "RandomizeAcrossColumns":
-                result = result._SetRandomizeAcrossColumns(n_rows = self.n_rows, n_cols = self.n_cols)     
-            elif self._randomization == "RandomizeAcrossLeftDiagonal":
-                result = result._SetRandomizeAcrossLeftDiagonal(n_rows = self.n_rows, n_cols = self.n_cols)    
-            elif self._randomization == "RandomizeAcrossRightDiagonal":
-                result = result._SetRandomizeAcrossRightDiagonal(n_rows = self.n_rows, n_cols = self.n_cols)    
-            elif self._randomization == "RandomizeAcrossLayers":
-                result = result._SetRandomizeAcrossLayers(n_rows = self.n_rows, n_cols = self.n_cols)      
+    def generate(self, rng = None):
+        values = Pattern.CreateGradientPattern(self.start_value, self.end_value, self.n_rows + self.n_cols - 1).pattern
+        result = self._GatherPattern(values)
+
+        result = self._ApplyRandomComponents(result, rng)
                  
         self.pattern = Pattern(result).pattern
         self.patterntype = "Gradient"
@@ -1448,6 +1363,7 @@ class GradientAcrossLayers(GridPattern):
 
     """ 
     _fixed_grid = False
+    _cache_attributes = ["start_value", "end_value", "n_rows", "n_cols", "_jitter", "_jitter_parameters", "_randomization"]
     
     def __init__(self, start_value, end_value, n_rows = 5, n_cols = 5):
         self.start_value = start_value
@@ -1458,54 +1374,18 @@ class GradientAcrossLayers(GridPattern):
         self._jitter_parameters = {}
         self._randomization = None
            
-    def generate(self):  
+    @staticmethod
+    def _layout(indices, n_rows, n_cols):
+        return _layer_layout(indices.pattern[::-1], n_rows, n_cols)
+
+    def generate(self, rng = None):
         assert (self.n_rows > 2), "number of rows in the Grid should be more than 2 to apply this pattern"
         assert (self.n_cols > 2), "number of columns in the Grid should be more than 2 to apply this pattern"
-               
-        n_rows = self.n_rows
-        n_cols = self.n_cols
-        
-        minimal_n = min(n_rows, n_cols)
-        if minimal_n % 2 == 0: 
-            n_layers = int(minimal_n / 2)
-        else:
-            n_layers = int((minimal_n + 1 )/2)
-        
-        p = Pattern.CreateGradientPattern(self.start_value, self.end_value, n_layers)
-        p.pattern = p.pattern[::-1]
-          
-        patternmatrix = [[0 for x in range(n_cols)] for y in range(n_rows)] 
-        
-        for layer in range(n_layers):
-            width = n_cols - (2*layer)
-            start_row = layer
-            start_col = layer
-            end_row = n_rows - layer - 1
-            end_col = n_cols - layer
-            patternmatrix[start_row][start_col:end_col] = [p.pattern[layer]] * (width)
-            patternmatrix[end_row][start_col:end_col] = [p.pattern[layer]] * (width)
-            for row in patternmatrix[start_row:end_row]:
-                row[start_col] = p.pattern[layer] 
-                row[end_col-1] = p.pattern[layer] 
-       
-        result = Pattern([item for sublist in patternmatrix for item in sublist])
 
-        if self._jitter is not None:
-            result = result._CalculateJitter(distribution = self._jitter, distribution_parameters = self._jitter_parameters)                 
+        values = Pattern.CreateGradientPattern(self.start_value, self.end_value, _n_layers(self.n_rows, self.n_cols)).pattern
+        result = self._GatherPattern(values)
 
-        if self._randomization is not None:
-            if self._randomization == "RandomizeAcrossElements":
-                result = result._SetRandomizeAcrossElements()   
-            elif self._randomization == "RandomizeAcrossRows":
-                result = result._SetRandomizeAcrossRows(n_rows = self.n_rows, n_cols = self.n_cols)       
-            elif self._randomization == "RandomizeAcrossColumns":
-                result = result._SetRandomizeAcrossColumns(n_rows = self.n_rows, n_cols = self.n_cols)     
-            elif self._randomization == "RandomizeAcrossLeftDiagonal":
-                result = result._SetRandomizeAcrossLeftDiagonal(n_rows = self.n_rows, n_cols = self.n_cols)    
-            elif self._randomization == "RandomizeAcrossRightDiagonal":
-                result = result._SetRandomizeAcrossRightDiagonal(n_rows = self.n_rows, n_cols = self.n_cols)    
-            elif self._randomization == "RandomizeAcrossLayers":
-                result = result._SetRandomizeAcrossLayers(n_rows = self.n_rows, n_cols = self.n_cols)      
+        result = self._ApplyRandomComponents(result, rng)
                              
         self.pattern = Pattern(result).pattern
         self.patterntype = "Gradient"
@@ -1532,6 +1412,7 @@ class TiledGrid(GridPattern):
 
     """
     _fixed_grid = True
+    _cache_attributes = ["source_grid", "tile_multiplier", "_jitter", "_jitter_parameters", "_randomization"]
     
     def __init__(self, source_grid, tile_multiplier):
         assert type(tile_multiplier) == int or type(tile_multiplier) == list or type(tile_multiplier) == tuple, "tile_multiplier needs to be int, list or tuple"
@@ -1557,10 +1438,18 @@ class TiledGrid(GridPattern):
         
         return (n_rows, n_cols)
     
-    def generate(self):            
+    def ClearCache(self):
+        super().ClearCache()
+        self.source_grid.ClearCache()
+        
+    def _is_random(self):
+        return super()._is_random() or self.source_grid._is_random()
+    
+    def generate(self, rng = None):            
         result = []
         
-        source_pattern = self.source_grid.generate().pattern
+        source_seed = None if rng is None else rng.randrange(2**32)
+        source_pattern = self.source_grid.generate_cached(source_seed).pattern
         n_rows, n_cols = self.source_grid.n_rows, self.source_grid.n_cols
         
         for r in range(n_rows):
@@ -1572,22 +1461,7 @@ class TiledGrid(GridPattern):
                     
         result = Pattern(result)
 
-        if self._jitter is not None:
-            result = result._CalculateJitter(distribution = self._jitter, distribution_parameters = self._jitter_parameters)                 
-
-        if self._randomization is not None:
-            if self._randomization == "RandomizeAcrossElements":
-                result = result._SetRandomizeAcrossElements()   
-            elif self._randomization == "RandomizeAcrossRows":
-                result = result._SetRandomizeAcrossRows(n_rows = self.n_rows, n_cols = self.n_cols)      
-            elif self._randomization == "RandomizeAcrossColumns":
-                result = result._SetRandomizeAcrossColumns(n_rows = self.n_rows, n_cols = self.n_cols)       
-            elif self._randomization == "RandomizeAcrossLeftDiagonal":
-                result = result._SetRandomizeAcrossLeftDiagonal(n_rows = self.n_rows, n_cols = self.n_cols)    
-            elif self._randomization == "RandomizeAcrossRightDiagonal":
-                result = result._SetRandomizeAcrossRightDiagonal(n_rows = self.n_rows, n_cols = self.n_cols)    
-            elif self._randomization == "RandomizeAcrossLayers":
-                result = result._SetRandomizeAcrossLayers(n_rows = self.n_rows, n_cols = self.n_cols)     
+        result = self._ApplyRandomComponents(result, rng)
          
         self.pattern = source_pattern #Pattern(result).pattern 
         self.patterntype = "Tiled"
@@ -1615,6 +1489,8 @@ class TiledElementGrid(GridPattern):
     """
     
     _fixed_grid = True
+    _cache_attributes = ["source_grid", "tile_multiplier", "_jitter", "_jitter_parameters", "_randomization"]
+    
     def __init__(self, source_grid, tile_multiplier):
         assert type(tile_multiplier) == int or type(tile_multiplier) == list or type(tile_multiplier) == tuple, "tile_multiplier needs to be int, list or tuple"
         if type(tile_multiplier) == int:
@@ -1639,10 +1515,18 @@ class TiledElementGrid(GridPattern):
         
         return (n_rows, n_cols)
     
-    def generate(self):
+    def ClearCache(self):
+        super().ClearCache()
+        self.source_grid.ClearCache()
+        
+    def _is_random(self):
+        return super()._is_random() or self.source_grid._is_random()
+    
+    def generate(self, rng = None):
         result = []
     
-        source_pattern = self.source_grid.generate().pattern
+        source_seed = None if rng is None else rng.randrange(2**32)
+        source_pattern = self.source_grid.generate_cached(source_seed).pattern
         n_rows, n_cols = self.source_grid.n_rows, self.source_grid.n_cols
         
         for r in range(n_rows):
@@ -1656,22 +1540,7 @@ class TiledElementGrid(GridPattern):
                     
         result = Pattern(result)
  
-        if self._jitter is not None:
-            result = result._CalculateJitter(distribution = self._jitter, distribution_parameters = self._jitter_parameters)                 
-
-        if self._randomization is not None:
-            if self._randomization == "RandomizeAcrossElements":
-                result = result._SetRandomizeAcrossElements()   
-            elif self._randomization == "RandomizeAcrossRows":
-                result = result._SetRandomizeAcrossRows(n_rows = self.n_rows, n_cols = self.n_cols)       
-            elif self._randomization == "RandomizeAcrossColumns":
-                result = result._SetRandomizeAcrossColumns(n_rows = self.n_rows, n_cols = self.n_cols)        
-            elif self._randomization == "RandomizeAcrossLeftDiagonal":
-                result = result._SetRandomizeAcrossLeftDiagonal(n_rows = self.n_rows, n_cols = self.n_cols)    
-            elif self._randomization == "RandomizeAcrossRightDiagonal":
-                result = result._SetRandomizeAcrossRightDiagonal(n_rows = self.n_rows, n_cols = self.n_cols)    
-            elif self._randomization == "RandomizeAcrossLayers":
-                result = result._SetRandomizeAcrossLayers(n_rows = self.n_rows, n_cols = self.n_cols)    
+        result = self._ApplyRandomComponents(result, rng)
         
         self.pattern = source_pattern 
         self.patterntype = "TiledElement"
@@ -1696,6 +1565,7 @@ class RandomPattern(GridPattern):
         GridPattern
     """
     _fixed_grid = False
+    _cache_attributes = GridPattern._cache_attributes + ["counts"]
     
     def __init__(self, pattern, n_rows = 5, n_cols = 5, patterntype = None, patterndirection = None, counts = None):
         super().__init__(pattern, n_rows, n_cols)
@@ -1710,8 +1580,11 @@ class RandomPattern(GridPattern):
         if self.counts is not None:
             assert len(self.counts) == len(self.pattern), "Count and pattern must have same length"
             assert sum(self.counts) == self.n_rows * self.n_cols, "Counts must sum to pattern length"
+    
+    def _is_random(self):
+        return True
             
-    def generate(self):
+    def generate(self, rng = None):
         n_elements = self.n_rows * self.n_cols
         self.check_counts()
         
@@ -1729,24 +1602,9 @@ class RandomPattern(GridPattern):
                 
             p.pattern = elements
             
-        result = p.RandomizeOrder()
-
-        if self._jitter is not None:
-            result = result._CalculateJitter(distribution = self._jitter, distribution_parameters = self._jitter_parameters)                 
+        result = p.RandomizeOrder(rng = rng)
 
-        if self._randomization is not None:
-            if self._randomization == "RandomizeAcrossElements":
-                result = result._SetRandomizeAcrossElements()   
-            elif self._randomization == "RandomizeAcrossRows":
-                result = result._SetRandomizeAcrossRows(n_rows = self.n_rows, n_cols = self.n_cols)       
-            elif self._randomization == "RandomizeAcrossColumns":
-                result = result._SetRandomizeAcrossColumns(n_rows = self.n_rows, n_cols = self.n_cols)        
-            elif self._randomization == "RandomizeAcrossLeftDiagonal":
-                result = result._SetRandomizeAcrossLeftDiagonal(n_rows = self.n_rows, n_cols = self.n_cols)    
-            elif self._randomization == "RandomizeAcrossRightDiagonal":
-                result = result._SetRandomizeAcrossRightDiagonal(n_rows = self.n_rows, n_cols = self.n_cols)    
-            elif self._randomization == "RandomizeAcrossLayers":
-                result = result._SetRandomizeAcrossLayers(n_rows = self.n_rows, n_cols = self.n_cols)   
+        result = self._ApplyRandomComponents(result, rng)
          
         self.patterntype = "RandomPattern"
         self.patterndirection = ""
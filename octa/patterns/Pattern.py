@@ -24,9 +24,136 @@ Contact: eline.vangeert@kuleuven.be
 
 """
 import colour
+import functools
 import random
 import types
 
+import numpy as np
+
+def _numpy_generator(rng = None):
+    """
+    Creates a NumPy random generator that draws its seed from the provided
+    random number generator, so that vectorized sampling follows the same
+    seed as the rest of the stimulus.
+
+    Parameters
+    ----------
+    rng : random.Random or numpy.random.Generator, optional
+        Source of randomness. A NumPy generator is returned unchanged.
+        The default is the global random module.
+
+    Returns
+    -------
+    numpy.random.Generator
+        Generator for vectorized sampling.
+
+    """
+    if isinstance(rng, np.random.Generator):
+        return rng
+    if rng is None:
+        rng = random
+        
+    return np.random.default_rng(rng.getrandbits(64))
+
+def _gather(values, index_map):
+    """
+    Selects the values at the positions in the index map.
+
+    Parameters
+    ----------
+    values : list
+        Source values.
+    index_map : numpy.ndarray
+        Integer array with positions in values. Can have more than one
+        dimension.
+
+    Returns
+    -------
+    list
+        Selected values, nested as the index map.
+
+    """
+    table = np.empty(len(values), dtype = object)
+    for i, value in enumerate(values):
+        table[i] = value
+
+    return table[index_map].tolist()
+
+# Group of each grid cell for the randomizations, as a function of the row
+# and column of the cell
+_randomization_groups = {'Elements':      lambda row, col, n_rows, n_cols: np.zeros_like(row),
+                         'Rows':          lambda row, col, n_rows, n_cols: col,
+                         'Columns':       lambda row, col, n_rows, n_cols: row,
+                         'LeftDiagonal':  lambda row, col, n_rows, n_cols: row + col,
+                         'RightDiagonal': lambda row, col, n_rows, n_cols: row - col + n_cols - 1}
+
+@functools.lru_cache(maxsize = 256)
+def _randomization_plan(direction, n_rows, n_cols):
+    """
+    Computes the groups of grid cells within which the values are shuffled
+    for a randomization direction.
+
+    Parameters
+    ----------
+    direction : string
+        'Elements', 'Rows', 'Columns', 'LeftDiagonal' or 'RightDiagonal'.
+    n_rows : int
+        Number of rows in the 2D grid.
+    n_cols : int
+        Number of columns in the 2D grid.
+
+    Returns
+    -------
+    cells : numpy.ndarray
+        Index of each grid cell, sorted by group.
+    groups : numpy.ndarray
+        Group of each cell in cells, as a float so that random keys in
+        [0, 1) can be added to it.
+
+    """
+    if direction not in _randomization_groups:
+        raise ValueError("WARNING: %s is not a valid randomization direction"%direction)
+
+    row, col = np.divmod(np.arange(n_rows * n_cols), n_cols)
+    groups = _randomization_groups[direction](row, col, n_rows, n_cols)
+
+    cells = np.argsort(groups, kind = 'stable')
+    sorted_groups = groups[cells].astype(np.float64)
+
+    cells.setflags(write = False)
+    sorted_groups.setflags(write = False)
+
+    return cells, sorted_groups
+
+def _shuffle_within_groups(n_values, direction, n_rows, n_cols, n_randomizations, rng = None):
+    """
+    Creates independent random permutations that only move values within
+    the groups of a randomization direction. Values after the last grid
+    cell keep their position.
+
+    Returns
+    -------
+    numpy.ndarray
+        Array of shape (n_randomizations, n_values) with, for each position,
+        the position of the value that is placed there.
+
+    """
+    cells, groups = _randomization_plan(direction, n_rows, n_cols)
+    if n_values < len(cells):
+        raise IndexError("pattern has fewer values than the grid has cells")
+
+    generator = _numpy_generator(rng)
+
+    # Sorting the group plus a random key in [0, 1) keeps the groups in place
+    # and shuffles the cells within each group
+    keys = generator.random((n_randomizations, len(cells)))
+    order = np.argsort(groups + keys, axis = 1)
+
+    permutations = np.tile(np.arange(n_values), (n_randomizations, 1))
+    permutations[:, cells] = cells[order]
+
+    return permutations
+
 class Pattern:
     def __init__(self, pattern, patterntype = "", patterndirection = "", patternclass = "Pattern"):
         """
@@ -217,7 +344,7 @@ class Pattern:
         
         return new_pattern
     
-    def _CalculateJitter(self, distribution, distribution_parameters):
+    def _CalculateJitter(self, distribution, distribution_parameters, rng = None):
         """
         Adds a sample from a random normal distribution to each element in the pattern.
 
@@ -227,6 +354,9 @@ class Pattern:
             Options are 'normal' or 'uniform'
         distribution_parameters : dictionary
             Provides parameters for the specified distribution.
+        rng : random.Random or numpy.random.Generator, optional
+            Random number generator that provides the samples. The default
+            is the global random module.
 
         Returns
         -------
@@ -243,7 +373,7 @@ class Pattern:
              std = distribution_parameters['std'] 
              axis = distribution_parameters['axis'] 
          
-             p = Pattern(values).AddNormalJitter(mu = mu , std = std, axis = axis)  
+             p = Pattern(values).AddNormalJitter(mu = mu , std = std, axis = axis, rng = rng)  
              
         if distribution == "uniform":
      
@@ -252,12 +382,12 @@ class Pattern:
              max_val = distribution_parameters['max_val']  
              axis = distribution_parameters['axis']        
          
-             p = Pattern(values).AddUniformJitter(min_val = min_val, max_val = max_val, axis = axis) 
+             p = Pattern(values).AddUniformJitter(min_val = min_val, max_val = max_val, axis = axis, rng = rng) 
              
         return p
             
     
-    def AddNormalJitter(self, mu = 0, std = 1, axis = None):
+    def AddNormalJitter(self, mu = 0, std = 1, axis = None, rng = None):
         """
         Adds a sample from a random normal distribution to each element in the pattern.
 
@@ -270,6 +400,9 @@ class Pattern:
         axis : string, optional
             String that contains the axis to which jitter should be applied.
             Possible values are "x", "y", "xy" or "x=y". 
+        rng : random.Random or numpy.random.Generator, optional
+            Random number generator that provides the samples. The default
+            is the global random module.
 
         Returns
         -------
@@ -277,45 +410,12 @@ class Pattern:
             Updated Pattern instance.
 
         """
-        result = []
-        if type(self.pattern[0]) == int or type(self.pattern[0]) == float:
-            for i in range(len(self.pattern)):
-                result.append(self.pattern[i] + random.normalvariate(mu, std))
-        elif type(self.pattern[0]) == tuple:
-            if axis is None:
-                for i in range(len(self.pattern)):
-                    xresult = self.pattern[i][0] + random.normalvariate(mu, std)
-                    yresult = self.pattern[i][1] + random.normalvariate(mu, std)
-                    result.append((xresult, yresult))
-            elif axis == 'x':
-                for i in range(len(self.pattern)):
-                    xresult = self.pattern[i][0] + random.normalvariate(mu, std)
-                    yresult = self.pattern[i][1]
-                    result.append((xresult, yresult))
-            elif axis == 'y':
-                for i in range(len(self.pattern)):
-                    xresult = self.pattern[i][0]
-                    yresult = self.pattern[i][1] + random.normalvariate(mu, std)
-                    result.append((xresult, yresult))
-            elif axis == 'xy':
-                for i in range(len(self.pattern)):
-                    xresult = self.pattern[i][0] + random.normalvariate(mu, std)
-                    yresult = self.pattern[i][1] + random.normalvariate(mu, std)
-                    result.append((xresult, yresult)) 
-            elif axis == 'x=y':
-                for i in range(len(self.pattern)):
-                    randomvalue = random.normalvariate(mu, std)
-                    xresult = self.pattern[i][0] + randomvalue
-                    yresult = self.pattern[i][1] + randomvalue
-                    result.append((xresult, yresult))  
-        else:
-            raise ValueError("WARNING: AddNormalJitter has not been applied as the pattern contains list elements")
-            result = self.pattern
+        generator = _numpy_generator(rng)
         
-        return Pattern(result)
+        return self._AddJitter(lambda size: generator.normal(mu, std, size), axis, "AddNormalJitter")
     
     
-    def AddUniformJitter(self, min_val = -1, max_val = 1, axis = None):
+    def AddUniformJitter(self, min_val = -1, max_val = 1, axis = None, rng = None):
         """
         Adds a sample from a uniform distribution to each element in the pattern.
 
@@ -328,6 +428,9 @@ class Pattern:
         axis : string, optional
             String that contains the axis to which jitter should be applied.
             Possible values are "x", "y", "xy" or "x=y". 
+        rng : random.Random or numpy.random.Generator, optional
+            Random number generator that provides the samples. The default
+            is the global random module.
 
         Returns
         -------
@@ -335,55 +438,84 @@ class Pattern:
             Updated Pattern instance.
 
         """
-        result = []
+        generator = _numpy_generator(rng)
+        
+        return self._AddJitter(lambda size: generator.uniform(min_val, max_val, size), axis, "AddUniformJitter")
+    
+    def _AddJitter(self, sample, axis, method_name):
+        """
+        Adds jitter to each element in the pattern. The jitter values for all
+        elements are drawn at once.
+
+        Parameters
+        ----------
+        sample : function
+            Function that returns an array of jitter values of a given size.
+        axis : string
+            String that contains the axis to which jitter should be applied.
+            Possible values are "x", "y", "xy" or "x=y". 
+        method_name : string
+            Name of the calling method, used in error messages.
+
+        Returns
+        -------
+        Pattern
+            Updated Pattern instance.
+
+        """
+        n_elements = len(self.pattern)
+        
         if type(self.pattern[0]) == int or type(self.pattern[0]) == float:
-            for i in range(len(self.pattern)):
-                result.append(self.pattern[i] + random.uniform(min_val, max_val))
+            values = np.asarray(self.pattern, dtype = float)
+            
+            return Pattern((values + sample(n_elements)).tolist())
+        
         elif type(self.pattern[0]) == tuple:
-            if axis is None:
-                for i in range(len(self.pattern)):
-                    xresult = self.pattern[i][0] + random.uniform(min_val, max_val)
-                    yresult = self.pattern[i][1] + random.uniform(min_val, max_val)
-                    result.append((xresult, yresult))
+            # Coordinates without jitter keep their original values
+            x = [value[0] for value in self.pattern]
+            y = [value[1] for value in self.pattern]
+            
+            if axis is None or axis == 'xy':
+                offsets = sample((2, n_elements))
+                x = (np.asarray(x, dtype = float) + offsets[0]).tolist()
+                y = (np.asarray(y, dtype = float) + offsets[1]).tolist()
             elif axis == 'x':
-                for i in range(len(self.pattern)):
-                    xresult = self.pattern[i][0] + random.uniform(min_val, max_val)
-                    yresult = self.pattern[i][1]
-                    result.append((xresult, yresult))
+                x = (np.asarray(x, dtype = float) + sample(n_elements)).tolist()
             elif axis == 'y':
-                for i in range(len(self.pattern)):
-                    xresult = self.pattern[i][0]
-                    yresult = self.pattern[i][1] + random.uniform(min_val, max_val)
-                    result.append((xresult, yresult))
-            elif axis == 'xy':
-                for i in range(len(self.pattern)):
-                    xresult = self.pattern[i][0] + random.uniform(min_val, max_val)
-                    yresult = self.pattern[i][1] + random.uniform(min_val, max_val)
-                    result.append((xresult, yresult)) 
+                y = (np.asarray(y, dtype = float) + sample(n_elements)).tolist()
             elif axis == 'x=y':
-                for i in range(len(self.pattern)):
-                    randomvalue = random.uniform(min_val, max_val)
-                    xresult = self.pattern[i][0] + randomvalue
-                    yresult = self.pattern[i][1] + randomvalue
-                    result.append((xresult, yresult)) 
-        else:
-            raise ValueError("WARNING: AddUniformJitter has not been applied as the pattern contains list elements")
-            result = self.pattern
+                offsets = sample(n_elements)
+                x = (np.asarray(x, dtype = float) + offsets).tolist()
+                y = (np.asarray(y, dtype = float) + offsets).tolist()
+            else:
+                raise ValueError("WARNING: %s has not been applied as axis %s is not supported"%(method_name, axis))
+                
+            return Pattern(list(zip(x, y)))
         
-        return Pattern(result)
+        else:
+            raise ValueError("WARNING: %s has not been applied as the pattern contains list elements"%method_name)
     
-    def RandomizeOrder(self):
+    def RandomizeOrder(self, rng = None):
         """
         Randomizes the order of the elements in the pattern.
 
+        Parameters
+        ----------
+        rng : random.Random or numpy.random.Generator, optional
+            Random number generator that provides the samples. The default
+            is the global random module.
+
         Returns
         -------
         Pattern
             Updated Pattern instance.
 
         """
+        if rng is None:
+            rng = random
+
         idx = list(range(len(self.pattern)))
-        random.shuffle(idx)
+        rng.shuffle(idx)
         
         result = []
         for i in range(len(self.pattern)):
@@ -391,18 +523,27 @@ class Pattern:
         
         return Pattern(result)
     
-    def _SetRandomizeAcrossElements(self):
+    def _SetRandomizeAcrossElements(self, rng = None):
         """
         Randomizes the order of the elements in the pattern.
 
+        Parameters
+        ----------
+        rng : random.Random or numpy.random.Generator, optional
+            Random number generator that provides the samples. The default
+            is the global random module.
+
         Returns
         -------
         Pattern
             Updated Pattern instance.
 
         """        
+        if rng is None:
+            rng = random
+
         idx = list(range(len(self.pattern)))
-        random.shuffle(idx)
+        rng.shuffle(idx)
         
         result = []
         for i in range(len(self.pattern)):
@@ -410,120 +551,64 @@ class Pattern:
         
         return Pattern(result)
     
-    def _SetRandomizeAcrossColumns(self, n_rows, n_cols):
+    def _SetRandomizeAcrossColumns(self, n_rows, n_cols, rng = None):
         """
         Randomizes the order of the elements across the columns of the pattern.
         """   
-   
-        p = self.pattern
-        result = []
-        for row in range(n_rows):
-            
-            startindex = row * n_cols
-            endindex = (row * n_cols) + n_cols
-            rowvalues = p[startindex:endindex]
-            
-            idx = list(range(n_cols))
-            random.shuffle(idx)
-            
-            for i in range(len(rowvalues)):
-                result.append(rowvalues[idx[i]])
-            
-        return Pattern(result)
+        return self.CreateRandomizations("Columns", n_rows, n_cols, rng = rng)[0]
     
-    def _SetRandomizeAcrossRows(self, n_rows, n_cols):
+    def _SetRandomizeAcrossRows(self, n_rows, n_cols, rng = None):
         """
         Randomizes the order of the elements across the rows of the pattern.
         """   
-   
-        p = self.pattern
-        result = p.copy()
-        for column in range(n_cols):
-            
-            indices = []
-            for row in range(n_rows):
-                indices.append(column + row * n_cols)
-            
-            idx = list(range(n_rows))
-            random.shuffle(idx)
-            
-            for i in range(n_rows):
-                value = p[indices[i]]
-                result[indices[idx[i]]] = value
-            
-        return Pattern(result)
+        return self.CreateRandomizations("Rows", n_rows, n_cols, rng = rng)[0]
     
-    def _SetRandomizeAcrossRightDiagonal(self, n_rows, n_cols):
+    def _SetRandomizeAcrossRightDiagonal(self, n_rows, n_cols, rng = None):
         """
         Randomizes the order of the elements across the left diagonal of the pattern.
         """   
-   
-        p = self.pattern
-        newp = p.copy()
-        required_count = (n_rows + n_cols) - 1
-        
-        s = Pattern(list(range(required_count)))        
-        shifted_pattern  = list(s.pattern[::-1])
-        result = []
-        for i in range(n_rows):
-            result.extend(shifted_pattern[-n_cols:])
-            shifted_pattern = [shifted_pattern[-1]] + shifted_pattern[:-1]          
-        result = Pattern(result)
-        
-        for serie in range(required_count):
-            
-            indices = []
-            for i in range(len(result.pattern)):
-                if result.pattern[i] == serie:
-                    indices.append(i)
-                
-            n_elements = len(indices)
-                
-            if n_elements > 1:
-                
-                idx = list(range(n_elements))
-                random.shuffle(idx)
-                
-                for i in range(n_elements):
-                    newp[indices[idx[i]]] = p[indices[i]]
-            
-        return Pattern(newp)        
+        return self.CreateRandomizations("RightDiagonal", n_rows, n_cols, rng = rng)[0]
 
-    def _SetRandomizeAcrossLeftDiagonal(self, n_rows, n_cols):
+    def _SetRandomizeAcrossLeftDiagonal(self, n_rows, n_cols, rng = None):
         """
         Randomizes the order of the elements across the right diagonal of the pattern.
         """   
-   
-        p = self.pattern
-        newp = p.copy()
-        required_count = (n_rows + n_cols) - 1
+        return self.CreateRandomizations("LeftDiagonal", n_rows, n_cols, rng = rng)[0]
+    
+    def CreateRandomizations(self, direction, n_rows, n_cols, n_randomizations = 1, rng = None):
+        """
+        Creates independent randomizations of the pattern placed in a 2D grid.
+        The values are only shuffled within groups of grid cells: within each
+        row for 'Columns', within each column for 'Rows', and within each
+        diagonal for 'LeftDiagonal' and 'RightDiagonal'. For 'Elements', all
+        values in the grid are shuffled.
         
-        s = Pattern(list(range(required_count)))        
-        shifted_pattern  = list(s.pattern)        
-        result = []
-        for i in range(n_rows):
-            result.extend(shifted_pattern[:n_cols])
-            shifted_pattern = shifted_pattern[1:]  + [shifted_pattern[0]]                    
-        result = Pattern(result)
+        The groups are computed once for each grid size and direction, and
+        all randomizations are drawn at once.
+
+        Parameters
+        ----------
+        direction : string
+            'Elements', 'Rows', 'Columns', 'LeftDiagonal' or 'RightDiagonal'.
+        n_rows : int
+            Number of rows in the 2D grid.
+        n_cols : int
+            Number of columns in the 2D grid.
+        n_randomizations : int, optional
+            Number of randomizations. The default is 1.
+        rng : random.Random or numpy.random.Generator, optional
+            Random number generator that provides the samples. The default
+            is the global random module.
+
+        Returns
+        -------
+        list
+            Randomized Pattern instances.
+
+        """
+        permutations = _shuffle_within_groups(len(self.pattern), direction, n_rows, n_cols, n_randomizations, rng)
         
-        for serie in range(required_count):
-            
-            indices = []
-            for i in range(len(result.pattern)):
-                if result.pattern[i] == serie:
-                    indices.append(i)
-                
-            n_elements = len(indices)
-                
-            if n_elements > 1:
-                
-                idx = list(range(n_elements))
-                random.shuffle(idx)
-                
-                for i in range(n_elements):
-                    newp[indices[idx[i]]] = p[indices[i]]
-            
-        return Pattern(newp)   
+        return [Pattern(values) for values in _gather(self.pattern, permutations)]
     
     def CreateGradientPattern(start_value, end_value, n_elements):
         """
@@ -0,0 +1,185 @@
+# -*- coding: utf-8 -*-
+"""
+The Order & Complexity Toolbox for Aesthetics (OCTA) Python library is a tool for researchers 
+to create stimuli varying in order and complexity on different dimensions. 
+Copyright (C) 2021  Eline Van Geert, Christophe Bossens, and Johan Wagemans
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU Lesser General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU Lesser General Public License for more details.
+
+You should have received a copy of the GNU Lesser General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+Contact: eline.vangeert@kuleuven.be
+
+"""
+import ast
+from functools import lru_cache
+
+import svgwrite
+
+_animation_classes = {"set": svgwrite.animate.Set, "animate": svgwrite.animate.Animate}
+
+class AnimationSpec:
+    """
+    Description of an svg animation element: the svgwrite class and the
+    arguments to create it with. A new element is created for every shape
+    that uses the animation.
+
+    Parameters
+    ----------
+    element_class : class
+        svgwrite animation class, e.g. svgwrite.animate.Animate.
+    args : tuple
+        Positional arguments of the class.
+    kwargs : tuple
+        Keyword arguments of the class, as (name, value) pairs.
+
+    """
+    def __init__(self, element_class, args, kwargs):
+        self.element_class = element_class
+        self.args = args
+        self.kwargs = kwargs
+        
+    def create(self):
+        return self.element_class(*self.args, **dict(self.kwargs))
+    
+    def __eq__(self, other):
+        if not isinstance(other, AnimationSpec):
+            return False
+        
+        return (self.element_class, self.args, self.kwargs) == (other.element_class, other.args, other.kwargs)
+    
+    def __hash__(self):
+        return hash((self.element_class, self.args, self.kwargs))
+    
+    def __repr__(self):
+        arguments = [repr(arg) for arg in self.args] + ["%s = %r"%(name, value) for name, value in self.kwargs]
+        
+        return "%s(%s)"%(self.element_class.__name__, ", ".join(arguments))
+    
+class Link:
+    """
+    Hyperlink around a shape or stimulus, opened in a new window.
+
+    Parameters
+    ----------
+    href : string
+        Target of the link.
+
+    """
+    def __init__(self, href):
+        self.href = str(href)
+        
+    def create(self, dwg):
+        return dwg.add(dwg.a(href = self.href, target = "_blank"))
+    
+    def __eq__(self, other):
+        return isinstance(other, Link) and self.href == other.href
+    
+    def __hash__(self):
+        return hash(self.href)
+    
+    def __repr__(self):
+        return "Link(%r)"%self.href
+
+@lru_cache(maxsize = 1024)
+def ParseAnimation(mode, attribute, arguments):
+    """
+    Creates the animation of a shape attribute.
+
+    Parameters
+    ----------
+    mode : string
+        "set" or "animate".
+    attribute : string
+        Name of the svg attribute, e.g. 'fill'.
+    arguments : string
+        Additional arguments of the animation, e.g. "dur = '2s', values = 'red;blue'".
+
+    Returns
+    -------
+    AnimationSpec
+        Description of the animation.
+
+    """
+    args, kwargs = _ParseArguments(arguments)
+    
+    return AnimationSpec(_animation_classes[mode], args, (('attributeName', attribute),) + kwargs)
+
+def RotationAnimation(start, end, center, arguments):
+    """
+    Creates an animated rotation around a center point.
+
+    Parameters
+    ----------
+    start : int, float or string
+        Orientation at the start of the animation.
+    end : int, float or string
+        Orientation at the end of the animation.
+    center : tuple
+        x- and y-coordinate of the rotation center.
+    arguments : string
+        Additional arguments of the animation, e.g. "dur = '2s'".
+
+    Returns
+    -------
+    AnimationSpec
+        Description of the animation.
+
+    """
+    args, kwargs = _ParseArguments(arguments)
+    
+    from_ = str(start) + " " + str(center[0]) + " " + str(center[1])
+    to = str(end) + " " + str(center[0]) + " " + str(center[1])
+    
+    return AnimationSpec(svgwrite.animate.AnimateTransform, ('rotate', 'transform') + args, (('from_', from_), ('to', to)) + kwargs)
+
+@lru_cache(maxsize = 1024)
+def _ParseArguments(arguments):
+    """
+    Parses a string of Python call arguments without evaluating code.
+    Arguments must be literal values, or dict() calls with literal keyword
+    values to unpack with **.
+
+    """
+    try:
+        call = ast.parse("f(" + arguments + ")", mode = "eval").body
+    except SyntaxError:
+        raise ValueError("WARNING: animation arguments %r could not be parsed"%arguments)
+    
+    args = tuple(_ArgumentValue(node) for node in call.args)
+    kwargs = []
+    for keyword in call.keywords:
+        if keyword.arg is None:
+            value = _ArgumentValue(keyword.value)
+            if not isinstance(value, dict):
+                raise ValueError("WARNING: only a dictionary can be unpacked in animation arguments")
+            kwargs.extend(value.items())
+        else:
+            kwargs.append((keyword.arg, _ArgumentValue(keyword.value)))
+    
+    return args, tuple(kwargs)
+
+def _ArgumentValue(node):
+    """
+    Returns the value of a single animation argument.
+
+    """
+    try:
+        return ast.literal_eval(node)
+    except ValueError:
+        pass
+    
+    if (isinstance(node, ast.Call) and isinstance(node.func, ast.Name) and node.func.id == "dict" 
+        and len(node.args) == 0 and all(keyword.arg is not None for keyword in node.keywords)):
+        return {keyword.arg: _ArgumentValue(keyword.value) for keyword in node.keywords}
+    
+    raise ValueError("WARNING: animation argument %r is not a literal value"%ast.unparse(node))
@@ -0,0 +1,177 @@
+# -*- coding: utf-8 -*-
+"""
+The Order & Complexity Toolbox for Aesthetics (OCTA) Python library is a tool for researchers 
+to create stimuli varying in order and complexity on different dimensions. 
+Copyright (C) 2021  Eline Van Geert, Christophe Bossens, and Johan Wagemans
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU Lesser General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU Lesser General Public License for more details.
+
+You should have received a copy of the GNU Lesser General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+Contact: eline.vangeert@kuleuven.be
+
+"""
+import os
+import base64
+import hashlib
+import threading
+from collections import OrderedDict
+from urllib.request import urlopen
+
+_media_types = {".svg": "image/svg+xml", ".png": "image/png", ".jpg": "image/jpeg", ".jpeg": "image/jpeg",
+                ".bmp": "image/bmp", ".gif": "image/gif", ".ico": "image/vnd.microsoft.icon",
+                ".tif": "image/tiff", ".tiff": "image/tiff", ".webp": "image/webp"}
+
+class _AssetCache:
+    """
+    Least recently used cache of encoded image data. Sources with the same
+    content share a single data string, and the total size of the stored
+    data strings is kept below a byte budget.
+
+    """
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.n_bytes = 0
+        self._entries = OrderedDict()   # source key -> content digest
+        self._data = {}                 # content digest -> [data string, number of source keys]
+        self._lock = threading.Lock()
+        
+    def get(self, key):
+        with self._lock:
+            digest = self._entries.get(key)
+            if digest is None:
+                return None
+            self._entries.move_to_end(key)
+            
+            return self._data[digest][0]
+    
+    def put(self, key, imgdata):
+        digest = hashlib.sha256(imgdata.encode()).digest()
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            
+            if digest in self._data:
+                self._data[digest][1] += 1
+                imgdata = self._data[digest][0]
+            else:
+                self._data[digest] = [imgdata, 1]
+                self.n_bytes += len(imgdata)
+            self._entries[key] = digest
+            
+            self._evict()
+            
+        return imgdata
+    
+    def resize(self, max_bytes):
+        with self._lock:
+            self.max_bytes = max_bytes
+            self._evict()
+    
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._data.clear()
+            self.n_bytes = 0
+            
+    def _remove(self, key):
+        digest = self._entries.pop(key)
+        entry = self._data[digest]
+        entry[1] -= 1
+        if entry[1] == 0:
+            del self._data[digest]
+            self.n_bytes -= len(entry[0])
+            
+    def _evict(self):
+        while self.n_bytes > self.max_bytes and len(self._entries) > 0:
+            self._remove(next(iter(self._entries)))
+
+_asset_cache = _AssetCache(256 * 1024 * 1024)
+
+def GetImageData(source):
+    """
+    Returns the image data to use in an svg image element. Image files are
+    embedded as base64 encoded data URI, other sources are returned as is.
+    
+    Encoded images are kept in a process-wide cache. Local files are
+    encoded again when their modification time or size changes.
+
+    Parameters
+    ----------
+    source : string
+        URL or path of the image file.
+
+    Returns
+    -------
+    string
+        Data URI of the image, or the source itself.
+
+    """
+    key = _source_key(source)
+    imgdata = _asset_cache.get(key)
+    if imgdata is None:
+        imgdata = _asset_cache.put(key, _EncodeImage(source))
+        
+    return imgdata
+
+def SetAssetCacheSize(max_bytes):
+    """
+    Sets the maximum total size of the encoded images in the cache. The
+    least recently used images are removed first. The default is 256 MB.
+
+    Parameters
+    ----------
+    max_bytes : int
+        Maximum number of bytes.
+
+    """
+    _asset_cache.resize(max_bytes)
+    
+def ClearAssetCache():
+    """
+    Removes all encoded images from the cache.
+
+    """
+    _asset_cache.clear()
+
+def _source_key(source):
+    """
+    Returns the cache key of a source. For local files, the key includes the
+    modification time and size, so that changed files get a new key.
+
+    """
+    try:
+        stat = os.stat(source)
+        return (source, stat.st_mtime_ns, stat.st_size)
+    except (OSError, ValueError, TypeError):
+        return (source, None, None)
+
+def _EncodeImage(source):
+    """
+    Reads an image and encodes it as data URI.
+
+    """
+    ext = tuple(_media_types.keys())
+    
+    try:
+        image_data = urlopen(source).read()
+        encoded = base64.b64encode(image_data).decode()
+    except ValueError:  # invalid URL
+        if source.endswith(ext):
+            image_data = open(source, "rb").read() # read file in binary format
+            encoded = base64.b64encode(image_data).decode() # read image in base64 encoding
+    
+    for extension, media_type in _media_types.items():
+        if source.endswith(extension):
+            return 'data:{};base64,{}'.format(media_type, encoded)
+        
+    return source
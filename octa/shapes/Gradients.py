@@ -0,0 +1,145 @@
+# -*- coding: utf-8 -*-
+"""
+The Order & Complexity Toolbox for Aesthetics (OCTA) Python library is a tool for researchers 
+to create stimuli varying in order and complexity on different dimensions. 
+Copyright (C) 2021  Eline Van Geert, Christophe Bossens, and Johan Wagemans
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU Lesser General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU Lesser General Public License for more details.
+
+You should have received a copy of the GNU Lesser General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+Contact: eline.vangeert@kuleuven.be
+
+"""
+import weakref
+
+# Gradients that were added to the definitions of each drawing, by color value
+_gradient_registry = weakref.WeakKeyDictionary()
+
+# Gradient colors that were requested from each drawing since they were last collected
+_gradient_uses = weakref.WeakKeyDictionary()
+
+def CreatePaintServer(dwg, color):
+    """
+    Returns the fill or stroke value for a color. Gradient colors are added
+    to the definitions of the drawing only once, and all elements with the
+    same gradient refer to the same definition.
+
+    Parameters
+    ----------
+    dwg : svgwrite.Drawing
+        Drawing in which the color is used.
+    color : string or list
+        Color string, or a list with the gradient type ("radial",
+        "horizontal", "vertical" or "diagonal") followed by the colors.
+
+    Returns
+    -------
+    string
+        Color string or reference to the gradient definition.
+
+    """
+    if len(color) < 2:
+        return color
+    elif color[0] not in ["radial", "horizontal", "vertical", "diagonal"]:
+        return color
+    
+    key = tuple(color)
+    gradients = _gradient_registry.setdefault(dwg, {})
+    _gradient_uses.setdefault(dwg, []).append(key)
+    if key in gradients:
+        return gradients[key].get_paint_server()
+    
+    if color[0] == "radial":
+        gradient = dwg.radialGradient()
+    elif color[0] == "horizontal":
+        gradient = dwg.linearGradient((0, 0), (1, 0))
+    elif color[0] == "vertical":
+        gradient = dwg.linearGradient((0, 0), (0, 1))
+    elif color[0] == "diagonal":
+        gradient = dwg.linearGradient((0, 0), (1, 1))
+        
+    dwg.defs.add(gradient)
+    # define the gradient colors
+    n_colors = len(color)-1
+    stepsize = 1 / (n_colors - 1)
+    for i in range(n_colors):
+        gradient.add_stop_color(i*stepsize, color[i+1])
+        
+    gradients[key] = gradient
+        
+    return gradient.get_paint_server()
+
+def GetGradients(dwg):
+    """
+    Returns the gradient definitions that are shared between the elements
+    of a drawing.
+
+    Parameters
+    ----------
+    dwg : svgwrite.Drawing
+        Drawing with the gradients.
+
+    Returns
+    -------
+    list
+        Gradient elements in the definitions of the drawing.
+
+    """
+    return list(_gradient_registry.get(dwg, {}).values())
+
+def CollectGradientUses(dwg):
+    """
+    Returns the gradient colors that were requested from a drawing since
+    the previous call, and starts a new collection.
+
+    Parameters
+    ----------
+    dwg : svgwrite.Drawing
+        Drawing with the gradients.
+
+    Returns
+    -------
+    list
+        Gradient colors as tuples, once for every request.
+
+    """
+    return _gradient_uses.pop(dwg, [])
+
+def KeepGradients(dwg, colors):
+    """
+    Removes the gradient definitions of a drawing that are not used by any
+    of the given colors. The remaining gradients are placed after the other
+    definitions, in the order in which the colors first use them.
+
+    Parameters
+    ----------
+    dwg : svgwrite.Drawing
+        Drawing with the gradients.
+    colors : iterable
+        Gradient colors that are still used, as returned by
+        CollectGradientUses.
+
+    Returns
+    -------
+    None.
+
+    """
+    gradients = _gradient_registry.get(dwg, {})
+    kept = {}
+    for color in colors:
+        if color in gradients and color not in kept:
+            kept[color] = gradients[color]
+            
+    removed = set(id(node) for node in gradients.values())
+    dwg.defs.elements = [node for node in dwg.defs.elements if id(node) not in removed] + list(kept.values())
+    _gradient_registry[dwg] = kept
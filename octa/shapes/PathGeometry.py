@@ -0,0 +1,236 @@
+# -*- coding: utf-8 -*-
+"""
+The Order & Complexity Toolbox for Aesthetics (OCTA) Python library is a tool for researchers 
+to create stimuli varying in order and complexity on different dimensions. 
+Copyright (C) 2021  Eline Van Geert, Christophe Bossens, and Johan Wagemans
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU Lesser General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU Lesser General Public License for more details.
+
+You should have received a copy of the GNU Lesser General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+Contact: eline.vangeert@kuleuven.be
+
+"""
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+
+import numpy as np
+import svgpathtools
+from svgpathtools import parse_path
+
+from .Assets import _source_key
+
+_max_files = 256
+_file_geometries = OrderedDict()
+_file_outlines = OrderedDict()
+_file_lock = threading.Lock()
+
+# Number of points at which each path segment is sampled for the arc-length tables
+_samples_per_segment = 128
+
+@lru_cache(maxsize = 4096)
+def GetPathData(d):
+    """
+    Returns the path data of a d string, as written by svgpathtools. Every
+    distinct d string is parsed only once.
+
+    Parameters
+    ----------
+    d : string
+        Path data.
+
+    Returns
+    -------
+    string
+        Normalized path data.
+
+    """
+    return parse_path(d).d()
+
+def GetSvgFileGeometry(source):
+    """
+    Parses the paths in an SVG file. The result is kept per process, and a
+    file is parsed again when its modification time or size changes.
+
+    Parameters
+    ----------
+    source : string
+        Path of the SVG file.
+
+    Returns
+    -------
+    attributes : list
+        Attributes of each path in the file.
+    d : string
+        Normalized path data of all paths in the file combined.
+    bbox : tuple
+        Minimum x, maximum x, minimum y and maximum y of the paths.
+
+    """
+    return _CachedFileResult(_file_geometries, source, _ParseSvgFile)
+
+def GetSvgFileOutline(source):
+    """
+    Gets the outline of the shape in an SVG file, which is the first path in
+    the file. The result is kept per process, and a file is read again when
+    its modification time or size changes.
+
+    Parameters
+    ----------
+    source : string
+        Path of the SVG file.
+
+    Returns
+    -------
+    d : string
+        Path data of the first path in the file.
+    size : tuple
+        Largest width and largest height of the paths in the file.
+
+    """
+    return _CachedFileResult(_file_outlines, source, _ParseSvgOutline)
+
+@lru_cache(maxsize = 256)
+def GetArcLengthTable(d):
+    """
+    Samples a path at regular parameter values and computes the distance
+    along the path to each sample. Every distinct d string is sampled only
+    once.
+
+    Parameters
+    ----------
+    d : string
+        Path data.
+
+    Returns
+    -------
+    points : numpy.ndarray
+        Read-only array of shape (m, 2) with the sampled (x,y) coordinates.
+    lengths : numpy.ndarray
+        Read-only array with the distance along the path to each point.
+    bbox : tuple
+        Minimum x, maximum x, minimum y and maximum y of the path.
+
+    """
+    path = parse_path(d)
+    if len(path) == 0:
+        raise ValueError("WARNING: path '%s' does not contain any segments"%d)
+    
+    t = np.linspace(0, 1, _samples_per_segment + 1)
+    samples = np.concatenate([np.asarray(segment.point(t), dtype = complex) for segment in path])
+    
+    # Moving from the end of a segment to the start of the next one, e.g. to
+    # start a new subpath, does not add to the length
+    steps = np.abs(np.diff(samples))
+    steps[_samples_per_segment::_samples_per_segment + 1] = 0
+    
+    points = np.column_stack((samples.real, samples.imag))
+    lengths = np.concatenate(([0.0], np.cumsum(steps)))
+    
+    points.setflags(write = False)
+    lengths.setflags(write = False)
+    
+    return points, lengths, path.bbox()
+
+def SampleArcLength(d, n_points):
+    """
+    Places points at equal distances along a path, starting at the start
+    of the path. For a closed path, the distance between the last point
+    and the first point is the same as between the other points.
+
+    Parameters
+    ----------
+    d : string
+        Path data.
+    n_points : int
+        Number of points.
+
+    Returns
+    -------
+    numpy.ndarray
+        Array of shape (n_points, 2) with the (x,y) coordinates.
+
+    """
+    points, lengths, bbox = GetArcLengthTable(d)
+    
+    targets = lengths[-1] * np.arange(n_points) / n_points
+    
+    # Each target lies between two samples, in which it is interpolated
+    i = np.clip(np.searchsorted(lengths, targets, side = 'right') - 1, 0, len(lengths) - 2)
+    step = lengths[i + 1] - lengths[i]
+    fraction = np.divide(targets - lengths[i], step, out = np.zeros_like(targets), where = step > 0)
+    
+    return points[i] + fraction[:, np.newaxis] * (points[i + 1] - points[i])
+
+def ClearGeometryCache():
+    """
+    Removes all parsed paths and SVG files from the cache.
+
+    """
+    with _file_lock:
+        _file_geometries.clear()
+        _file_outlines.clear()
+    GetPathData.cache_clear()
+    GetArcLengthTable.cache_clear()
+
+def _CachedFileResult(cache, source, parse):
+    """
+    Returns the result of parse(source), reusing the stored result for a
+    local file with the same modification time and size.
+
+    """
+    key = _source_key(source)
+    if key[1] is None:
+        # Not a local file, e.g. an open file object
+        return parse(source)
+    
+    with _file_lock:
+        result = cache.get(key)
+        if result is not None:
+            cache.move_to_end(key)
+            return result
+    
+    result = parse(source)
+    with _file_lock:
+        cache[key] = result
+        while len(cache) > _max_files:
+            cache.popitem(last = False)
+            
+    return result
+
+def _ParseSvgFile(source):
+    """
+    Reads the paths of an SVG file and computes their combined bounding box.
+
+    """
+    paths, attributes = svgpathtools.svg2paths(source)
+    
+    allpaths = [path.bbox() for path in paths]
+    bbox = (min([item[0] for item in allpaths]), max([item[1] for item in allpaths]),
+            min([item[2] for item in allpaths]), max([item[3] for item in allpaths]))
+    
+    d = " ".join([item["d"] for item in attributes if 'd' in item])
+    
+    return (attributes, GetPathData(d), bbox)
+
+def _ParseSvgOutline(source):
+    """
+    Reads the first path of an SVG file and the largest size of its paths.
+
+    """
+    paths, attributes = svgpathtools.svg2paths(source)
+    
+    allpaths = [path.bbox() for path in paths]
+    size = (max([item[1] - item[0] for item in allpaths]), max([item[3] - item[2] for item in allpaths]))
+    
+    return (paths[0].d(), size)
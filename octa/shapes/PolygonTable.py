@@ -0,0 +1,99 @@
+# -*- coding: utf-8 -*-
+"""
+The Order & Complexity Toolbox for Aesthetics (OCTA) Python library is a tool for researchers 
+to create stimuli varying in order and complexity on different dimensions. 
+Copyright (C) 2021  Eline Van Geert, Christophe Bossens, and Johan Wagemans
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU Lesser General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU Lesser General Public License for more details.
+
+You should have received a copy of the GNU Lesser General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+Contact: eline.vangeert@kuleuven.be
+
+"""
+from math import sin, cos, pi
+from functools import lru_cache
+
+import numpy as np
+
+@lru_cache(maxsize = None)
+def UnitPolygon(n_sides):
+    """
+    Returns the vertices of a polygon with n_sides on the unit circle, with
+    the first vertex at the top.
+
+    Parameters
+    ----------
+    n_sides : int
+        Number of vertices.
+
+    Returns
+    -------
+    vertices : numpy.ndarray
+        Array of shape (n_sides, 2) with the x- and y-coordinate of each vertex.
+    bbox : tuple
+        Minimum x, maximum x, minimum y and maximum y of the vertices.
+
+    """
+    vertices = np.array([(sin((i*2*pi/n_sides) + pi), cos((i*2*pi/n_sides) + pi)) for i in range(n_sides)], dtype = float)
+    vertices.flags.writeable = False
+    
+    bbox = (vertices[:, 0].min(), vertices[:, 0].max(), vertices[:, 1].min(), vertices[:, 1].max())
+    
+    return vertices, bbox
+
+def PolygonPoints(n_sides, positions, boundingboxes, regular = False):
+    """
+    Computes the vertices of polygons with the same number of sides for
+    many elements at once. Each polygon is centered on its position and
+    scaled to fill its boundingbox.
+
+    Parameters
+    ----------
+    n_sides : int
+        Number of vertices of each polygon.
+    positions : array_like
+        Array of shape (n_elements, 2) with the position of each element.
+    boundingboxes : array_like
+        Array of shape (n_elements, 2) with the boundingbox of each element.
+    regular : Boolean, optional
+        Indicates whether the polygons keep equal sides, using the same
+        scaling in both directions. The default is False.
+
+    Returns
+    -------
+    numpy.ndarray
+        Array of shape (n_elements, n_sides, 2) with the vertices.
+
+    """
+    vertices, (min_x, max_x, min_y, max_y) = UnitPolygon(n_sides)
+    
+    positions = np.asarray(positions, dtype = float).reshape(-1, 2)
+    boundingboxes = np.asarray(boundingboxes, dtype = float).reshape(-1, 2)
+    x, y = positions[:, 0], positions[:, 1]
+    
+    # The offsets and scaling are computed at the element position, as when
+    # the polygon was first drawn around the position and then centered
+    x_offset = x - ((x + min_x) + (x + max_x)) / 2
+    y_offset = y - ((y + min_y) + (y + max_y)) / 2
+    
+    x_scaling = (1/(((x + max_x) - (x + min_x))/2))*(boundingboxes[:, 0]/2)
+    y_scaling = (1/(((y + max_y) - (y + min_y))/2))*(boundingboxes[:, 1]/2)
+    
+    if regular:
+        x_scaling = y_scaling = np.minimum(x_scaling, y_scaling)
+        
+    points = np.empty((len(positions), n_sides, 2))
+    points[:, :, 0] = x[:, None] + x_scaling[:, None] * (vertices[None, :, 0] + x_offset[:, None])
+    points[:, :, 1] = y[:, None] + y_scaling[:, None] * (vertices[None, :, 1] + y_offset[:, None])
+    
+    return points
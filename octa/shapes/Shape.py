@@ -0,0 +1,235 @@
+# -*- coding: utf-8 -*-
+"""
+The Order & Complexity Toolbox for Aesthetics (OCTA) Python library is a tool for researchers 
+to create stimuli varying in order and complexity on different dimensions. 
+Copyright (C) 2021  Eline Van Geert, Christophe Bossens, and Johan Wagemans
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU Lesser General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU Lesser General Public License for more details.
+
+You should have received a copy of the GNU Lesser General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+Contact: eline.vangeert@kuleuven.be
+
+"""
+import copyreg
+import threading
+import weakref
+
+from .Gradients import CreatePaintServer
+from .Animations import ParseAnimation, RotationAnimation, Link
+
+class Shape:
+    """
+    Base class of all shapes. It holds the parameters that all shapes have
+    in common and converts them to the values used in generate().
+    
+    Shape instances use __slots__ instead of an instance dictionary. The
+    set method of each parameter is looked up once per shape class.
+
+    """
+    __slots__ = ('position', 'boundingbox', 'orientation', 'rotation_animation', 'rotation_transform',
+                 'bordercolor', 'bordercolor_animation', 'borderwidth', 'borderwidth_animation',
+                 'fillcolor', 'fillcolor_animation', 'opacity', 'opacity_animation',
+                 'classlabel', 'idlabel', 'mirrorvalue', 'link', 'data')
+    
+    parameters = ['position', 'boundingbox', 'orientation' ,'bordercolor', 'borderwidth', 'fillcolor', 'opacity', 'classlabel', 'idlabel', 'mirrorvalue', 'link']
+    
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls._set_methods = tuple((p, getattr(cls, 'set_%s'%p)) for p in cls.parameters)
+    
+    def __init__(self, **kwargs):
+        for p, set_method in self._set_methods:
+            set_method(self, kwargs.get(p))
+                
+    def set_position(self, position):
+        if position == None:
+            position = (0, 0)
+        
+        self.position = position
+    
+    def set_boundingbox(self, boundingbox):
+        if boundingbox == None:
+            boundingbox = (10, 10)
+        
+        self.boundingbox = boundingbox
+    
+    def set_orientation(self, orientation):
+        if orientation == None:
+            orientation = 0
+            
+        self.orientation = orientation
+        
+        if type(self.orientation) == list:
+            self.rotation_animation = RotationAnimation(self.orientation[1], self.orientation[2], self.position, self.orientation[3])
+            self.rotation_transform = "rotate(%d, %d, %d)"%(int(self.orientation[1]), self.position[0], self.position[1])
+        else:
+            self.rotation_animation = ""
+            self.rotation_transform = "rotate(%d, %d, %d)"%(self.orientation, self.position[0], self.position[1])
+    
+    def set_bordercolor(self, bordercolor):
+        if bordercolor == None:
+            bordercolor = "none"
+            
+        self.bordercolor, self.bordercolor_animation = _split_animation(bordercolor, 'stroke')
+    
+    def set_borderwidth(self, borderwidth):
+        if borderwidth == None:
+            borderwidth = 0
+            
+        self.borderwidth, self.borderwidth_animation = _split_animation(borderwidth, 'stroke-width')
+        
+    def set_fillcolor(self, fillcolor):
+        if fillcolor == None:
+            fillcolor = "none"
+            
+        self.fillcolor, self.fillcolor_animation = _split_animation(fillcolor, 'fill')
+                
+    def set_opacity(self, opacity):
+        if opacity == None:
+            opacity = 1
+            
+        self.opacity, self.opacity_animation = _split_animation(opacity, 'opacity')
+    
+    def set_classlabel(self, classlabel):
+        if classlabel == None:
+            classlabel = ""
+            
+        self.classlabel = classlabel
+    
+    def set_idlabel(self, idlabel):
+        if idlabel == None:
+            idlabel = ""
+            
+        self.idlabel = idlabel
+    
+    def set_mirrorvalue(self, mirrorvalue):
+        if mirrorvalue == None:
+            mirrorvalue = ""
+            
+        self.mirrorvalue = mirrorvalue
+        
+    def set_link(self, link):
+        if link == "":
+            setlink = ""
+        else:             
+            setlink = Link(link)
+            
+        self.link = setlink
+        
+    def set_data(self, data):
+        if data == None:
+            data = ""
+            
+        self.data = data
+    
+    def create_mirror_transform(self):
+        mirror_transform = ""
+        if self.mirrorvalue == "vertical":
+            mirror_transform = "scale(-1, 1) translate(%f, 0)"%(-2*self.position[0])
+        elif self.mirrorvalue == "horizontal":
+            mirror_transform = "scale(1, -1), translate(0, %f)"%(-2*self.position[1])
+        elif self.mirrorvalue == "horizontalvertical":
+            mirror_transform = "scale(-1, -1) translate(%f, %f)"%(-2*self.position[0], -2*self.position[1])
+                
+        return mirror_transform     
+    
+    def create_geometry_transform(self):
+        return ""
+        
+    def create_fillcolor(self, dwg):
+        return CreatePaintServer(dwg, self.fillcolor)
+
+    def create_bordercolor(self, dwg):
+        return CreatePaintServer(dwg, self.bordercolor)
+    
+def _split_animation(value, attribute):
+    """
+    Splits a parameter value into its static value and its animation. An
+    animated value is a list with "set" or "animate", the initial value and
+    the arguments of the animation.
+
+    """
+    if type(value) == list and len(value) > 0 and value[0] in ("set", "animate"):
+        return value[1], ParseAnimation(value[0], attribute, value[2])
+    
+    return value, ""
+
+
+class ShapeClass(type):
+    """
+    Metaclass of the shape classes that are created by the shape factories,
+    such as Polygon(n_sides) or Image(src). A factory returns the same class
+    for the same arguments, so these classes can be compared, used as
+    dictionary keys and pickled. A pickled class is created again by
+    calling its factory with the same arguments.
+
+    """
+    pass
+
+# Shape classes created by the factories, by factory and arguments. Classes
+# that are no longer used are removed.
+_shape_classes = weakref.WeakValueDictionary()
+_shape_classes_lock = threading.Lock()
+
+def CreateShapeClass(factory, arguments, base, attributes):
+    """
+    Returns the shape class of a shape factory call. The class is created
+    the first time the factory is called with these arguments; later calls
+    return the same class.
+
+    Parameters
+    ----------
+    factory : function
+        Shape factory, e.g. Polygon.
+    arguments : tuple
+        Arguments of the factory call, including the name.
+    base : type
+        Shape class from which the new class derives, e.g. Polygon_.
+    attributes : dict
+        Class attributes of the new class. The 'name' attribute is used as
+        the name of the class.
+
+    Returns
+    -------
+    ShapeClass
+        The shape class.
+
+    """
+    key = (factory, tuple((type(argument), argument) for argument in arguments))
+    try:
+        hash(key)
+    except TypeError:
+        key = None
+
+    with _shape_classes_lock:
+        shape_class = _shape_classes.get(key) if key is not None else None
+        if shape_class is None:
+            attributes = dict(attributes, __module__ = base.__module__, __slots__ = (), _factory = factory, _factory_arguments = tuple(arguments))
+            shape_class = ShapeClass(str(attributes['name']), (base,), attributes)
+            if key is not None:
+                _shape_classes[key] = shape_class
+
+    return shape_class
+
+def _reduce_shape_class(shape_class):
+    """
+    Pickles a factory shape class as a call of its factory.
+
+    """
+    if '_factory' not in vars(shape_class):
+        # A class that derives from a factory class is pickled by reference
+        return shape_class.__qualname__
+
+    return (shape_class._factory, shape_class._factory_arguments)
+
+copyreg.pickle(ShapeClass, _reduce_shape_class)
@@ -0,0 +1,53 @@
+# -*- coding: utf-8 -*-
+"""
+Tests for animation and link specifications.
+
+"""
+
+import pytest
+import svgwrite
+
+from octa.Stimulus import Grid
+from octa.patterns import GridPattern
+from octa.shapes.Animations import ParseAnimation, RotationAnimation, Link
+
+def test_literal_arguments():
+    animation = ParseAnimation("animate", "fill", "values = 'red;blue', dur = '2s', repeatCount = 'indefinite'")
+
+    assert animation.element_class is svgwrite.animate.Animate
+    assert dict(animation.kwargs) == {'attributeName': 'fill', 'values': 'red;blue', 'dur': '2s', 'repeatCount': 'indefinite'}
+
+def test_dict_arguments_are_unpacked():
+    first  = ParseAnimation("set", "opacity", "to = 0, **{'begin': '1s'}")
+    second = ParseAnimation("set", "opacity", "to = 0, **dict(begin = '1s')")
+
+    assert first == second
+    assert dict(first.kwargs)['begin'] == '1s'
+
+@pytest.mark.parametrize("arguments", ["dur = __import__('os').getcwd()",
+                                       "dur = '%ds' % 3",
+                                       "dur = duration",
+                                       "**svgwrite.__dict__",
+                                       "dur = dict(**{'a': 1})",
+                                       "dur = '2s'; x"])
+def test_code_is_rejected(arguments):
+    with pytest.raises(ValueError):
+        ParseAnimation("animate", "fill", arguments)
+
+def test_rotation_animation():
+    animation = RotationAnimation(0, 90, (10, 20), "dur = '3s'")
+
+    assert animation.element_class is svgwrite.animate.AnimateTransform
+    assert dict(animation.kwargs)['from_'] == "0 10 20"
+    assert dict(animation.kwargs)['to'] == "90 10 20"
+
+def test_animations_and_links_in_svg():
+    stimulus = Grid(2, 2, background_color = ["animate", "white", "values = 'white;grey', dur = '2s'"])
+    stimulus.fillcolors = GridPattern.RepeatAcrossElements([["set", "red", "to = 'blue', begin = '1s'"], "green"])
+    stimulus.links = GridPattern.RepeatAcrossElements(["https://example.org", ""])
+    svg = stimulus.GetSVG()
+
+    assert '<set attributeName="fill" begin="1s" to="blue" />' in svg
+    assert '<animate attributeName="fill" dur="2s" values="white;grey" />' in svg
+    assert svg.count('xlink:href="https://example.org"') == 2
+    assert Link("a") == Link("a")
@@ -0,0 +1,58 @@
+# -*- coding: utf-8 -*-
+"""
+Tests for .octa archives.
+
+"""
+
+import numpy as np
+import pytest
+
+from octa.Archive import SaveArchive, Archive
+from octa.Stimulus import Grid, Outline, Concentric
+
+from test_json import _grid, _masked_concentric
+
+MAKERS = [lambda: _grid(1), _masked_concentric, lambda: Outline(12, seed = 3), lambda: Grid(3, 3), lambda: Concentric(3)]
+
+@pytest.fixture
+def archive(tmp_path):
+    n_saved = SaveArchive((make() for make in MAKERS), "stimuli", folder = str(tmp_path))
+    assert n_saved == len(MAKERS)
+
+    return Archive("stimuli", folder = str(tmp_path))
+
+@pytest.mark.parametrize("i", range(len(MAKERS)))
+def test_archive_reproduces_svg(archive, i):
+    assert archive.GetStimulus(i).GetSVG() == MAKERS[i]().GetSVG()
+
+@pytest.mark.parametrize("i", range(len(MAKERS)))
+def test_archive_elements_match_stimulus(archive, i):
+    expected = MAKERS[i]().GetElementsDF()
+    result = archive.GetElementsDF(i)
+
+    assert result.equals(expected)
+    for a, b in zip(result['position'], expected['position']):
+        assert [type(v) for v in a] == [type(v) for v in b]
+
+def test_archive_columns(archive):
+    assert len(archive) == len(MAKERS)
+    assert archive.n_elements == archive.element_offsets[-1]
+
+    x = archive.GetColumn('x', 3)
+    np.testing.assert_array_equal(x, Grid(3, 3).GetElementsDF()['position'].map(lambda p: p[0]))
+
+    codes = archive.GetColumn('shape_code', 3)
+    assert [archive.GetPalette('shape')[code] for code in codes] == Grid(3, 3).GetElementsDF()['shape'].tolist()
+
+def test_empty_archive(tmp_path):
+    assert SaveArchive([], "empty", folder = str(tmp_path)) == 0
+
+    archive = Archive("empty", folder = str(tmp_path))
+    assert len(archive) == 0
+    assert archive.GetColumn('boundingbox').shape == (0, 2)
+
+def test_not_an_archive(tmp_path):
+    (tmp_path / "other.octa").write_bytes(b"not an archive")
+
+    with pytest.raises(ValueError):
+        Archive("other", folder = str(tmp_path))
@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*-
+"""
+Tests for the image asset cache.
+
+"""
+
+import base64
+import os
+
+import PIL.Image
+import pytest
+
+from octa.shapes import Assets
+from octa.shapes.Assets import GetImageData, SetAssetCacheSize, ClearAssetCache
+from octa.Stimulus import Grid
+from octa.patterns import GridPattern
+from octa.shapes import Image, FitImage
+
+@pytest.fixture
+def cache():
+    ClearAssetCache()
+    yield Assets._asset_cache
+    SetAssetCacheSize(256 * 1024 * 1024)
+    ClearAssetCache()
+
+def _png(path, color = (255, 0, 0), size = (4, 3)):
+    PIL.Image.new("RGB", size, color).save(path)
+
+    return str(path)
+
+def test_file_is_encoded_once(cache, tmp_path):
+    source = _png(tmp_path / "red.png")
+    data = GetImageData(source)
+
+    assert data == "data:image/png;base64," + base64.b64encode(open(source, "rb").read()).decode()
+    assert GetImageData(source) is data
+    assert len(cache._entries) == 1
+
+def test_equal_files_share_data(cache, tmp_path):
+    first  = GetImageData(_png(tmp_path / "first.png"))
+    second = GetImageData(_png(tmp_path / "second.png"))
+
+    assert first is second
+    assert cache.n_bytes == len(first)
+
+def test_changed_file_is_encoded_again(cache, tmp_path):
+    source = _png(tmp_path / "image.png")
+    before = GetImageData(source)
+
+    _png(tmp_path / "image.png", size = (40, 30))
+    os.utime(source, ns = (0, 0))
+
+    assert GetImageData(source) != before
+
+def test_least_recently_used_images_are_removed(cache, tmp_path):
+    sources = [_png(tmp_path / ("%d.png"%i), color = (i, 0, 0)) for i in range(3)]
+    sizes = [len(GetImageData(source)) for source in sources]
+
+    GetImageData(sources[0])
+    SetAssetCacheSize(sizes[0] + sizes[2])
+
+    assert [key[0] for key in cache._entries] == [sources[2], sources[0]]
+    assert cache.n_bytes == sizes[0] + sizes[2]
+
+    ClearAssetCache()
+    assert cache.n_bytes == 0 and len(cache._entries) == 0
+
+def test_other_sources_are_kept(cache):
+    assert GetImageData("not_an_image") == "not_an_image"
+
+def test_stimulus_images_use_cache(cache, tmp_path):
+    source = _png(tmp_path / "red.png")
+    stimulus = Grid(3, 3)
+    stimulus.shapes = GridPattern.RepeatAcrossElements([Image(source), FitImage(source)])
+    svg = stimulus.GetSVG()
+
+    assert len(cache._entries) == 1
+    assert svg.count(GetImageData(source)) == 9
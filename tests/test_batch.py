@@ -0,0 +1,61 @@
+# -*- coding: utf-8 -*-
+"""
+Tests for the batch generation of stimuli.
+
+"""
+
+import csv
+import inspect
+
+import pytest
+
+from octa.Batch import GenerateStimuli, StimulusSeed
+from octa.Stimulus import Stimulus, Grid
+from octa.patterns import GridPattern
+
+def make_stimulus(index, seed = None):
+    stimulus = Grid(4, 4, seed = seed)
+    stimulus.fillcolors = GridPattern.RepeatAcrossElements(["red", "green", "blue"]).RandomizeAcrossElements()
+    stimulus.positions.SetPositionJitter(distribution = "uniform", min_val = -2, max_val = 2)
+
+    return stimulus
+
+def _read_svgs(folder, results):
+    return [(folder / ("%s.svg"%result['filename'])).read_text() for result in results]
+
+@pytest.mark.parametrize("n_workers", [1, 2])
+def test_same_seed_gives_same_files(tmp_path, n_workers):
+    first  = GenerateStimuli(make_stimulus, 6, folder = str(tmp_path / "first"), seed = 3, n_workers = 1)
+    second = GenerateStimuli(make_stimulus, 6, folder = str(tmp_path / "second"), seed = 3, n_workers = n_workers)
+
+    assert [r['seed'] for r in first] == [r['seed'] for r in second] == [StimulusSeed(3, i) for i in range(6)]
+    assert _read_svgs(tmp_path / "first", first) == _read_svgs(tmp_path / "second", second)
+    assert len(set(_read_svgs(tmp_path / "first", first))) > 1
+
+def test_specifications_are_regenerated(tmp_path):
+    specs = [make_stimulus(i, seed = 10 + i).GetJSON(compact = True) for i in range(3)]
+    results = GenerateStimuli(specs, folder = str(tmp_path / "batch"), seed = 1, n_workers = 1)
+
+    for spec, result in zip(specs, results):
+        make_stimulus(0, seed = spec['parameters']['seed']).SaveSVG("expected", folder = str(tmp_path))
+        expected = (tmp_path / "expected.svg").read_text()
+        assert (tmp_path / "batch" / ("%s.svg"%result['filename'])).read_text() == expected
+
+def test_manifest(tmp_path):
+    GenerateStimuli(make_stimulus, 3, folder = str(tmp_path), formats = ["svg", "csv"], seed = 7, n_workers = 1)
+
+    with open(tmp_path / "manifest.csv") as manifest_file:
+        rows = list(csv.DictReader(manifest_file))
+
+    assert [int(row['index']) for row in rows] == [0, 1, 2]
+    assert all(row['formats'] == "svg;csv" for row in rows)
+
+def test_default_backend_matches_savepng():
+    batch_default = inspect.signature(GenerateStimuli).parameters['backend'].default
+
+    assert batch_default == inspect.signature(Stimulus.SavePNG).parameters['backend'].default
+    assert batch_default == inspect.signature(Stimulus.SaveJPG).parameters['backend'].default
+
+def test_unknown_format_raises(tmp_path):
+    with pytest.raises(ValueError):
+        GenerateStimuli(make_stimulus, 1, folder = str(tmp_path), formats = ["gif"])
@@ -0,0 +1,93 @@
+# -*- coding: utf-8 -*-
+"""
+Tests for the columnar element table.
+
+"""
+
+import numpy as np
+
+from octa.ElementTable import ElementTable
+from octa.Stimulus import Grid
+from octa.patterns import GridPattern
+from octa.shapes import Ellipse, Rectangle
+from octa.measurements import Complexity, Order
+
+def _attributes(n_elements, **columns):
+    attributes = {column: [None] * n_elements for column in ElementTable.attribute_columns}
+    attributes.update(columns)
+
+    return attributes
+
+def _table():
+    attributes = _attributes(4, shape = [Ellipse, Rectangle, Ellipse, Rectangle], fillcolor = ["red", "red", "blue", "blue"],
+                             boundingbox = [(10, 10)] * 4, orientation = [0, 0, 1, 1.0])
+    overrides = [{}, {'fillcolor': "green"}, {}, {'links': "https://example.org"}]
+
+    return ElementTable([0, 10, 20, 30], [5, 5, 5, 5], attributes, overrides, [0, 3, 2, 1])
+
+def test_rows_in_presentation_order():
+    table = _table()
+    rows = list(table)
+
+    assert len(table) == 4
+    assert [row['element_id'] for row in rows] == [0, 1, 2, 3]
+    assert [row['position'] for row in rows] == [(0, 5), (10, 5), (20, 5), (30, 5)]
+    assert [row['shape'] for row in rows] == [Ellipse, Rectangle, Ellipse, Rectangle]
+    assert [row['fillcolor'] for row in rows] == ["red", "blue", "blue", "green"]
+    assert [row['link'] for row in rows] == [None, "https://example.org", None, None]
+    assert table[-1] == rows[-1]
+    assert all(type(value) == int for value in table.GetColumn('position')[0])
+
+def test_repeated_values_are_stored_once():
+    codes, categories = _table().GetCategories('boundingbox')
+
+    assert categories == [(10, 10)]
+    assert codes.tolist() == [0, 0, 0, 0]
+
+def test_overrides_are_tracked():
+    table = _table()
+
+    assert table.overridden['fillcolor'].tolist() == [False, False, False, True]
+    assert table.overridden['link'].tolist() == [False, True, False, False]
+
+    values = {column: None for column in ElementTable.attribute_columns}
+    values['fillcolor'] = "red"
+    table.SetElement(3, values, {})
+
+    assert table[3]['fillcolor'] == "red"
+    assert not table.overridden['fillcolor'].any()
+
+def test_unique_values_and_deviants():
+    table = _table()
+
+    assert sorted(table.GetUniqueValues('fillcolor')) == ["blue", "green", "red"]
+    # 1 and 1.0 are kept apart but are not deviants of each other
+    assert table.GetUniqueValues('orientation') == [0, 1, 1.0]
+    assert table.GetDeviants('orientation', [0, 1, 1.0, 1]).tolist() == [False, False, False, True]
+    assert table.CountUniqueElements(['shape']) == 2
+    assert table.CountUniqueElements(['shape', 'fillcolor']) == 4
+    assert table.CountUniqueElements([]) == 1
+
+def test_empty_table():
+    table = ElementTable([], [], _attributes(0), [], [])
+
+    assert len(table) == 0
+    assert list(table) == []
+    assert table.CountUniqueElements(['shape']) == 0
+
+def test_measurements():
+    # Values computed with the list-of-dictionaries implementation
+    stimulus = Grid(3, 4)
+    stimulus.shapes = GridPattern.RepeatAcrossRows([Ellipse, Rectangle])
+    stimulus.fillcolors = GridPattern.RepeatAcrossColumns(["red", "blue"])
+    stimulus.set_element_fillcolor(5, "green")
+    stimulus.swap_elements(swap_pairs = [(0, 11)])
+    stimulus.Render()
+
+    assert Complexity.CalculateElementsN(stimulus) == 12
+    assert Complexity.CalculateElementsLOCE(stimulus) == 5
+    assert Complexity.CalculateElementsLOC(stimulus) == 8
+    assert Complexity.CalculateElementsLOCI(stimulus) == 2
+    assert Order.CalculatePatternDeviants(stimulus) == 3
+    assert Order.CalculatePositionDeviants(stimulus) == 0
+    assert np.array_equal(stimulus.dwg_elements.x, stimulus.GetElementsDF()['position'].map(lambda p: p[0]))
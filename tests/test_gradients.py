@@ -0,0 +1,80 @@
+# -*- coding: utf-8 -*-
+"""
+Tests for the shared gradient definitions.
+
+"""
+
+import re
+
+import svgwrite
+
+from octa.Stimulus import Grid
+from octa.patterns import GridPattern
+from octa.shapes.Gradients import CreatePaintServer, GetGradients, CollectGradientUses, KeepGradients
+
+def _gradient_references(svg):
+    return re.findall(r'fill="url\(#([^)]*)\)', svg)
+
+def test_same_gradient_is_defined_once():
+    stimulus = Grid(4, 4)
+    stimulus.fillcolors = GridPattern.RepeatAcrossElements([["radial", "white", "blue"], "red", ["vertical", "red", "green", "blue"]])
+    stimulus.bordercolors = GridPattern.RepeatAcrossElements([["radial", "white", "blue"]])
+    stimulus.borderwidths = GridPattern.RepeatAcrossElements([2])
+    svg = stimulus.GetSVG()
+
+    assert svg.count("<radialGradient") == 1
+    assert svg.count("<linearGradient") == 1
+    assert len(set(_gradient_references(svg))) == 2
+    assert len(_gradient_references(svg)) == 11
+    assert svg.count('stroke="url(#') == 16
+
+def test_gradient_stops():
+    dwg = svgwrite.Drawing()
+    reference = CreatePaintServer(dwg, ["horizontal", "red", "green", "blue"])
+
+    assert CreatePaintServer(dwg, ["horizontal", "red", "green", "blue"]) == reference
+    assert CreatePaintServer(dwg, ["vertical", "red", "green", "blue"]) != reference
+    assert CreatePaintServer(dwg, "red") == "red"
+    assert CreatePaintServer(dwg, ["set", "red"]) == ["set", "red"]
+
+    gradients = GetGradients(dwg)
+    assert len(gradients) == 2
+    assert re.findall(r'offset="([^"]*)"', gradients[0].tostring()) == ["0.0", "0.5", "1.0"]
+
+def test_drawings_have_their_own_gradients():
+    first, second = svgwrite.Drawing(), svgwrite.Drawing()
+
+    CreatePaintServer(first, ["radial", "white", "blue"])
+    CreatePaintServer(second, ["radial", "white", "blue"])
+
+    assert GetGradients(first)[0] in first.defs.elements
+    assert GetGradients(second)[0] in second.defs.elements
+    assert GetGradients(first)[0] is not GetGradients(second)[0]
+
+def test_changed_elements_reuse_gradients():
+    stimulus = Grid(3, 3)
+    stimulus.fillcolors = GridPattern.RepeatAcrossElements([["radial", "white", "blue"]])
+    stimulus.GetSVG()
+
+    stimulus.set_element_fillcolor(4, ["radial", "white", "blue"])
+    stimulus.set_element_fillcolor(5, ["diagonal", "white", "red"])
+    svg = stimulus.GetSVG()
+
+    assert svg.count("<radialGradient") == 1
+    assert svg.count("<linearGradient") == 1
+
+def test_unused_gradients_are_removed_from_drawing():
+    dwg = svgwrite.Drawing()
+    dwg.defs.add(dwg.clipPath())
+    for color in [["radial", "white", "blue"], ["vertical", "red", "blue"], ["radial", "white", "blue"], "red"]:
+        CreatePaintServer(dwg, color)
+
+    uses = CollectGradientUses(dwg)
+    assert uses == [("radial", "white", "blue"), ("vertical", "red", "blue"), ("radial", "white", "blue")]
+    assert CollectGradientUses(dwg) == []
+
+    KeepGradients(dwg, [("vertical", "red", "blue")])
+
+    assert GetGradients(dwg) == dwg.defs.elements[1:]
+    assert [node.elementname for node in dwg.defs.elements] == ["clipPath", "linearGradient"]
+
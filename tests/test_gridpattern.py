@@ -0,0 +1,96 @@
+# -*- coding: utf-8 -*-
+"""
+Tests for the GridPattern generators.
+
+"""
+
+import random
+
+import pytest
+
+from octa.patterns import GridPattern, Pattern
+
+LAYOUT_CLASSES = [getattr(GridPattern, name) for name in dir(GridPattern)
+                  if name.split("Across")[0] in ("Repeat", "ElementRepeat", "Mirror") and "Across" in name]
+
+GRADIENT_CLASSES = [getattr(GridPattern, name) for name in dir(GridPattern) if name.startswith("GradientAcross")]
+
+def _direct_layout(pattern_class, values, n_rows, n_cols):
+    return pattern_class._layout(Pattern(list(values)), n_rows, n_cols)
+
+@pytest.mark.parametrize("pattern_class", LAYOUT_CLASSES, ids = lambda c: c.__name__)
+@pytest.mark.parametrize("n_rows, n_cols", [(3, 3), (4, 7), (8, 5), (10, 10)])
+@pytest.mark.parametrize("n_values", [1, 2, 3, 5, 12])
+def test_generated_pattern_matches_direct_layout(pattern_class, n_rows, n_cols, n_values):
+    values = ["v%d"%i for i in range(n_values)]
+    try:
+        expected = _direct_layout(pattern_class, values, n_rows, n_cols)
+    except Exception as error:
+        with pytest.raises(type(error)):
+            pattern_class(list(values), n_rows, n_cols).generate()
+        return
+
+    result = pattern_class(list(values), n_rows, n_cols).generate()
+
+    assert result.pattern == expected
+    assert len(result.pattern) == n_rows * n_cols
+
+@pytest.mark.parametrize("pattern_class", GRADIENT_CLASSES, ids = lambda c: c.__name__)
+def test_gradient_pattern_fills_grid(pattern_class):
+    result = pattern_class(1, 9, 6, 4).generate()
+
+    assert len(result.pattern) == 24
+    assert result.pattern == pattern_class(1, 9, 6, 4).generate().pattern
+
+def test_index_map_is_shared_and_read_only():
+    first  = GridPattern._index_map(GridPattern.RepeatAcrossLayers, 6, 6, 3)
+    second = GridPattern._index_map(GridPattern.RepeatAcrossLayers, 6, 6, 3)
+
+    assert first is second
+    assert not first.flags.writeable
+
+def test_generated_values_are_not_copies():
+    value = {"key": 1}
+    result = GridPattern.RepeatAcrossLayers([value, [1, 2]], 4, 4).generate()
+
+    assert any(x is value for x in result.pattern)
+
+def test_generate_cached_reuses_result():
+    pattern = GridPattern.RepeatAcrossElements(["a", "b"], 3, 3).RandomizeAcrossElements()
+
+    assert pattern.generate_cached(1) is pattern.generate_cached(1)
+    assert pattern.generate_cached(1).pattern == pattern.generate(random.Random(1)).pattern
+
+@pytest.mark.parametrize("change", [lambda p: setattr(p, "n_rows", 4),
+                                    lambda p: p.pattern.append("c"),
+                                    lambda p: p.AddUniformJitter(0, 1),
+                                    lambda p: p.RandomizeAcrossRows()])
+def test_generate_cached_follows_changes(change):
+    pattern = GridPattern.RepeatAcrossElements([1, 2], 3, 3)
+    cached = pattern.generate_cached(1)
+
+    change(pattern)
+
+    assert pattern.generate_cached(1) is not cached
+    assert pattern.generate_cached(1).pattern == pattern.generate(random.Random(1)).pattern
+
+def test_clear_cache_draws_new_realization():
+    pattern = GridPattern.RepeatAcrossElements(list(range(25)), 5, 5).RandomizeAcrossElements()
+    first = pattern.generate_cached()
+
+    assert pattern.generate_cached() is first
+
+    pattern.ClearCache()
+
+    assert pattern.generate_cached() is not first
+
+def test_grid_getters_follow_pattern_changes():
+    from octa.Stimulus import Grid
+
+    stimulus = Grid(2, 2)
+    stimulus.fillcolors = GridPattern.RepeatAcrossElements(["red", "blue"])
+    assert stimulus.fillcolors == ["red", "blue", "red", "blue"]
+
+    stimulus._fillcolors.pattern[1] = "green"
+    assert stimulus.fillcolors == ["red", "green", "red", "green"]
+    assert 'fill="green"' in stimulus.GetSVG()
@@ -0,0 +1,97 @@
+# -*- coding: utf-8 -*-
+"""
+Tests for saving and loading stimuli as JSON and NDJSON.
+
+"""
+
+import json
+
+import pytest
+
+from octa.Stimulus import Stimulus, Grid, Outline, Concentric
+from octa.StimulusJSON import SaveNDJSON, LoadNDJSON
+from octa.patterns import GridPattern
+from octa.shapes import Ellipse, Rectangle, Polygon, Text, RegularPolygon
+
+def _grid(seed = 1):
+    stimulus = Grid(4, 5, seed = seed, background_color = ["animate", "white", "values = 'white;grey', dur = '2s'"],
+                    background_shape = "Ellipse")
+    stimulus.shapes = GridPattern.RepeatAcrossElements([Polygon(6), Ellipse, Text("a"), RegularPolygon(5)])
+    stimulus.fillcolors = GridPattern.GradientAcrossRows("red", "blue")
+    stimulus.boundingboxes = GridPattern.RepeatAcrossElements([(20, 20), (30, 15)])
+    stimulus._fillcolors.RandomizeAcrossElements()
+    stimulus.set_element_fillcolor(1, "green")
+    stimulus.set_element_shape(3, Rectangle)
+    stimulus.positions.SetPositionJitter(distribution = "normal", mu = 0, std = 2)
+    stimulus.swap_distinct_elements(2)
+
+    return stimulus
+
+def _masked_concentric():
+    return Concentric(4, seed = 4, size = (300, 300),
+                      stim_mask = Ellipse(position = (0, 0), boundingbox = (100, 100), orientation = 30))
+
+STIMULI = {"grid":       _grid,
+           "outline":    lambda: Outline(12, seed = 3),
+           "concentric": _masked_concentric}
+
+@pytest.mark.parametrize("make", STIMULI.values(), ids = STIMULI.keys())
+def test_compact_json_round_trip_reproduces_svg(make):
+    stimulus = make()
+    svg = stimulus.GetSVG()
+
+    loaded = Stimulus.LoadFromJSONData(json.loads(json.dumps(stimulus.GetJSON(compact = True))))
+    loaded.Render()
+
+    assert loaded.GetSVG() == svg
+
+@pytest.mark.parametrize("make", STIMULI.values(), ids = STIMULI.keys())
+def test_compact_json_of_unrendered_stimulus_reproduces_svg(make):
+    data = json.loads(json.dumps(make().GetJSON(compact = True)))
+
+    loaded = Stimulus.LoadFromJSONData(data)
+    loaded.Render()
+
+    assert loaded.GetSVG() == make().GetSVG()
+
+@pytest.mark.parametrize("make", STIMULI.values(), ids = STIMULI.keys())
+def test_legacy_json_round_trip_reproduces_svg(make):
+    stimulus = make()
+    svg = stimulus.GetSVG()
+
+    loaded = Stimulus.LoadFromJSONData(json.loads(json.dumps(stimulus.GetJSON())))
+    loaded.Render()
+
+    assert loaded.GetSVG() == svg
+
+def test_ndjson_round_trip_reproduces_svg(tmp_path):
+    stimuli = [_grid(seed) for seed in range(3)] + [_masked_concentric()]
+    svgs = [stimulus.GetSVG() for stimulus in stimuli]
+
+    n_saved = SaveNDJSON(stimuli, "stimuli", folder = str(tmp_path))
+    loaded = list(LoadNDJSON("stimuli", folder = str(tmp_path)))
+
+    assert n_saved == len(stimuli)
+    for stimulus, svg in zip(loaded, svgs):
+        stimulus.Render()
+        assert stimulus.GetSVG() == svg
+
+def test_named_shape_class_round_trip():
+    stimulus = Grid(3, 3)
+    stimulus.shapes = GridPattern.RepeatAcrossElements([RegularPolygon(5, name = "pentagon"), Ellipse])
+    svg = stimulus.GetSVG()
+
+    loaded = Stimulus.LoadFromJSONData(json.loads(json.dumps(stimulus.GetJSON(compact = True))))
+
+    assert loaded._shapes.pattern[0] is RegularPolygon(5, name = "pentagon")
+    assert loaded.GetSVG() == svg
+
+def test_shapes_keep_sharing_a_class():
+    stimulus = _grid()
+    loaded = Stimulus.LoadFromJSONData(json.loads(json.dumps(stimulus.GetJSON(compact = True))))
+
+    assert loaded._shapes.pattern[0] is Polygon(6)
+
+def test_unknown_schema_raises():
+    with pytest.raises(ValueError):
+        Stimulus.LoadFromJSONData({"schema": "other", "version": 1})
@@ -0,0 +1,73 @@
+# -*- coding: utf-8 -*-
+"""
+Tests for the parsed path geometry cache.
+
+"""
+
+import os
+
+import pytest
+from svgpathtools import parse_path
+
+from octa.shapes import PathGeometry
+from octa.shapes.PathGeometry import GetPathData, GetSvgFileGeometry, GetSvgFileOutline, ClearGeometryCache
+from octa.Stimulus import Grid
+from octa.patterns import GridPattern
+from octa.shapes import Path, PathSvg
+
+TRIANGLE = "M 0 0 L 10 0 L 5 10 Z"
+SQUARE = "M 0 0 L 20 0 L 20 20 L 0 20 Z"
+
+@pytest.fixture(autouse = True)
+def clear_cache():
+    ClearGeometryCache()
+    yield
+    ClearGeometryCache()
+
+def _svg_file(path, *ds):
+    path.write_text('<svg xmlns="http://www.w3.org/2000/svg" width="20" height="20">%s</svg>'%"".join('<path d="%s"/>'%d for d in ds))
+
+    return str(path)
+
+def test_path_data_is_parsed_once():
+    assert GetPathData(TRIANGLE) == parse_path(TRIANGLE).d()
+
+    GetPathData(TRIANGLE)
+    assert GetPathData.cache_info().hits == 1
+
+def test_svg_file_is_parsed_once(tmp_path):
+    source = _svg_file(tmp_path / "shape.svg", TRIANGLE, SQUARE)
+    attributes, d, bbox = GetSvgFileGeometry(source)
+
+    assert d == parse_path(TRIANGLE + " " + SQUARE).d()
+    assert bbox == (0, 20, 0, 20)
+    assert [a['d'] for a in attributes] == [TRIANGLE, SQUARE]
+    assert GetSvgFileGeometry(source) is GetSvgFileGeometry(source)
+    assert GetSvgFileOutline(source) == (parse_path(TRIANGLE).d(), (20, 20))
+
+def test_changed_file_is_parsed_again(tmp_path):
+    source = _svg_file(tmp_path / "shape.svg", TRIANGLE)
+    before = GetSvgFileGeometry(source)
+
+    _svg_file(tmp_path / "shape.svg", TRIANGLE, SQUARE)
+    os.utime(source, ns = (0, 0))
+
+    assert GetSvgFileGeometry(source) != before
+    assert GetSvgFileGeometry(source)[2] == (0, 20, 0, 20)
+
+def test_number_of_files_is_limited(tmp_path, monkeypatch):
+    monkeypatch.setattr(PathGeometry, "_max_files", 2)
+    sources = [_svg_file(tmp_path / ("%d.svg"%i), TRIANGLE) for i in range(3)]
+    for source in sources:
+        GetSvgFileGeometry(source)
+
+    assert [key[0] for key in PathGeometry._file_geometries] == sources[1:]
+
+def test_shapes_use_parsed_geometry(tmp_path):
+    source = _svg_file(tmp_path / "shape.svg", SQUARE)
+    stimulus = Grid(2, 2)
+    stimulus.shapes = GridPattern.RepeatAcrossElements([Path(TRIANGLE, 10, 10), PathSvg(source)])
+    svg = stimulus.GetSVG()
+
+    assert svg.count('d="%s"'%parse_path(TRIANGLE).d()) == 2
+    assert svg.count('d="%s"'%parse_path(SQUARE).d()) == 2
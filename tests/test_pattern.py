@@ -5,11 +5,102 @@ Created on Mon May 18 15:07:44 2020
 @author: Christophe
 """
 
-# The following import ensures that the octa module can be loaded from the 
-# parent directory in an editor such as Spyder
-import os
-os.chdir('..')
+import random
+
+import numpy as np
+import pytest
 
-import matplotlib.pyplot as plt
 from octa.patterns import Pattern
+from octa.patterns.Pattern import _randomization_plan
+
+def test_normal_jitter_on_numbers():
+    values = list(range(2000))
+    result = Pattern(values).AddNormalJitter(mu = 5, std = 2, rng = random.Random(1))
+
+    offsets = np.asarray(result.pattern) - values
+    assert all(type(value) == float for value in result.pattern)
+    assert abs(offsets.mean() - 5) < 0.2
+    assert abs(offsets.std() - 2) < 0.2
+
+def test_uniform_jitter_stays_in_range():
+    result = Pattern([10] * 1000).AddUniformJitter(min_val = -3, max_val = 1, rng = random.Random(1))
+
+    assert min(result.pattern) >= 7 and max(result.pattern) < 11
+
+def test_jitter_is_reproducible_with_rng():
+    first  = Pattern([1, 2, 3]).AddNormalJitter(rng = random.Random(3))
+    second = Pattern([1, 2, 3]).AddNormalJitter(rng = random.Random(3))
+    third  = Pattern([1, 2, 3]).AddNormalJitter(rng = random.Random(4))
+
+    assert first.pattern == second.pattern
+    assert first.pattern != third.pattern
+
+@pytest.mark.parametrize("axis", [None, "xy", "x", "y", "x=y"])
+def test_jitter_on_tuples(axis):
+    values = [(10, 20), (30, 40), (50, 60)]
+    result = Pattern(values).AddUniformJitter(min_val = 1, max_val = 2, axis = axis, rng = random.Random(1))
+
+    dx = [new[0] - old[0] for new, old in zip(result.pattern, values)]
+    dy = [new[1] - old[1] for new, old in zip(result.pattern, values)]
+
+    assert all(type(value) == tuple for value in result.pattern)
+    assert all(d == 0 for d in dy) if axis == "x" else all(1 <= d < 2 for d in dy)
+    assert all(d == 0 for d in dx) if axis == "y" else all(1 <= d < 2 for d in dx)
+    if axis == "x=y":
+        assert dx == pytest.approx(dy)
+
+@pytest.mark.parametrize("values, axis", [([(1, 2)], "z"), ([[1, 2]], None)])
+def test_unsupported_jitter_raises(values, axis):
+    with pytest.raises(ValueError):
+        Pattern(values).AddNormalJitter(axis = axis)
+
+GROUPS = {"Elements":      lambda row, col: 0,
+          "Columns":       lambda row, col: row,
+          "Rows":          lambda row, col: col,
+          "LeftDiagonal":  lambda row, col: row + col,
+          "RightDiagonal": lambda row, col: row - col}
+
+@pytest.mark.parametrize("direction", GROUPS.keys())
+@pytest.mark.parametrize("n_rows, n_cols", [(3, 3), (4, 6), (5, 2)])
+def test_randomizations_stay_within_groups(direction, n_rows, n_cols):
+    n_cells = n_rows * n_cols
+    # Two values after the grid, which keep their position
+    values = list(range(n_cells + 2))
+    group = lambda cell: GROUPS[direction](*divmod(cell, n_cols))
+
+    randomizations = Pattern(values).CreateRandomizations(direction, n_rows, n_cols, n_randomizations = 20, rng = random.Random(1))
+
+    assert len(randomizations) == 20
+    for randomization in randomizations:
+        assert sorted(randomization.pattern) == values
+        assert randomization.pattern[n_cells:] == values[n_cells:]
+        assert all(group(value) == group(position) for position, value in enumerate(randomization.pattern[:n_cells]))
+    assert len(set(tuple(r.pattern) for r in randomizations)) > 1
+
+def test_randomizations_are_reproducible():
+    first  = Pattern(list(range(16))).CreateRandomizations("Rows", 4, 4, n_randomizations = 3, rng = random.Random(2))
+    second = Pattern(list(range(16))).CreateRandomizations("Rows", 4, 4, n_randomizations = 3, rng = random.Random(2))
+
+    assert [p.pattern for p in first] == [p.pattern for p in second]
+    assert first[0].pattern == Pattern(list(range(16)))._SetRandomizeAcrossRows(4, 4, rng = random.Random(2)).pattern
+
+def test_randomizations_are_uniform():
+    randomizations = Pattern(["a", "b", "c"]).CreateRandomizations("Elements", 1, 3, n_randomizations = 6000, rng = random.Random(3))
+    counts = {}
+    for randomization in randomizations:
+        counts[tuple(randomization.pattern)] = counts.get(tuple(randomization.pattern), 0) + 1
+
+    assert len(counts) == 6
+    assert all(abs(count - 1000) < 150 for count in counts.values())
+
+def test_randomization_plan_is_shared_and_read_only():
+    cells, groups = _randomization_plan("LeftDiagonal", 4, 5)
+
+    assert _randomization_plan("LeftDiagonal", 4, 5)[0] is cells
+    assert not cells.flags.writeable and not groups.flags.writeable
 
+def test_invalid_randomizations_raise():
+    with pytest.raises(ValueError):
+        Pattern(list(range(9))).CreateRandomizations("Layers", 3, 3)
+    with pytest.raises(IndexError):
+        Pattern(list(range(8))).CreateRandomizations("Rows", 3, 3)
@@ -0,0 +1,69 @@
+# -*- coding: utf-8 -*-
+"""
+Tests for the precomputed polygon vertex tables.
+
+"""
+
+import re
+from math import sin, cos, pi
+
+import numpy as np
+import pytest
+
+from octa.shapes.PolygonTable import UnitPolygon, PolygonPoints
+from octa.Stimulus import Grid
+from octa.patterns import GridPattern
+from octa.shapes import Polygon, RegularPolygon
+
+def _reference_points(n_sides, position, boundingbox, regular):
+    # Polygon vertices computed one element at a time
+    points = [(position[0] + sin((i*2*pi/n_sides) + pi), position[1] + cos((i*2*pi/n_sides) + pi)) for i in range(n_sides)]
+
+    min_x, max_x = min(p[0] for p in points), max(p[0] for p in points)
+    min_y, max_y = min(p[1] for p in points), max(p[1] for p in points)
+
+    x_offset = position[0] - (min_x + max_x) / 2
+    y_offset = position[1] - (min_y + max_y) / 2
+
+    x_scaling = (1/((max_x - min_x)/2))*(boundingbox[0]/2)
+    y_scaling = (1/((max_y - min_y)/2))*(boundingbox[1]/2)
+    if regular:
+        x_scaling = y_scaling = min(x_scaling, y_scaling)
+
+    return [(position[0] + x_scaling * (sin((i*2*pi/n_sides) + pi) + x_offset),
+             position[1] + y_scaling * (cos((i*2*pi/n_sides) + pi) + y_offset)) for i in range(n_sides)]
+
+POSITIONS = [(0, 0), (25, 75), (312.5, 40.25)]
+BOUNDINGBOXES = [(10, 10), (45, 20), (7.5, 33)]
+
+@pytest.mark.parametrize("n_sides", [3, 4, 5, 6, 8, 12])
+@pytest.mark.parametrize("regular", [False, True])
+def test_points_match_reference(n_sides, regular):
+    points = PolygonPoints(n_sides, POSITIONS, BOUNDINGBOXES, regular = regular)
+
+    assert points.shape == (3, n_sides, 2)
+    for i in range(3):
+        np.testing.assert_allclose(points[i], _reference_points(n_sides, POSITIONS[i], BOUNDINGBOXES[i], regular), rtol = 1e-12, atol = 1e-9)
+
+def test_unit_polygon_is_shared_and_read_only():
+    vertices, bbox = UnitPolygon(5)
+
+    assert UnitPolygon(5)[0] is vertices
+    assert not vertices.flags.writeable
+    assert bbox == (vertices[:, 0].min(), vertices[:, 0].max(), vertices[:, 1].min(), vertices[:, 1].max())
+    np.testing.assert_allclose(vertices[0], (0, -1), atol = 1e-12)
+
+@pytest.mark.parametrize("shape, regular", [(Polygon(7), False), (RegularPolygon(7), True)])
+def test_stimulus_points(shape, regular):
+    stimulus = Grid(2, 3)
+    stimulus.shapes = GridPattern.RepeatAcrossElements([shape])
+    stimulus.boundingboxes = GridPattern.RepeatAcrossElements([(30, 30), (40, 20)])
+    svg = stimulus.GetSVG()
+    elements = stimulus.GetElementsDF()
+
+    drawn = [np.array([[float(v) for v in point.split(",")] for point in points.split()])
+             for points in re.findall(r'points="([^"]*)"', svg)]
+
+    assert len(drawn) == 6
+    for points, position, boundingbox in zip(drawn, elements['position'], elements['boundingbox']):
+        np.testing.assert_allclose(points, _reference_points(7, position, boundingbox, regular), atol = 1e-6)
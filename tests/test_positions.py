@@ -5,24 +5,150 @@ Created on Wed May 13 11:59:23 2020
 @author: Christophe
 """
 
-# The following import ensures that the octa module can be loaded from the 
-# parent directory in an editor such as Spyder
-import os
-os.chdir('..')
+import random
+import re
+
+import numpy as np
+import pytest
 
-import matplotlib.pyplot as plt
 from octa.Positions import Positions
+from octa.shapes.PathGeometry import SampleArcLength
+from octa.Stimulus import Grid, Stimulus
+
+def _distances(p):
+    xy = np.asarray(p.xy, dtype = float)
+    distances = np.sqrt(((xy[:, np.newaxis, :] - xy[np.newaxis, :, :])**2).sum(axis = 2))
+
+    return distances[np.triu_indices(len(xy), 1)]
+
+def test_random_positions_keep_minimum_distance():
+    p = Positions.CreateRandomPositions(10, seed = 1)
+
+    assert len(p) == 10
+    assert _distances(p).min() >= 30
+
+def test_random_positions_are_reproducible_with_seed():
+    first  = Positions.CreateRandomPositions(20, min_distance = 20, seed = 5)
+    second = Positions.CreateRandomPositions(20, min_distance = 20, seed = 5)
+
+    assert first.x == second.x and first.y == second.y
+
+def test_random_positions_fail_if_elements_do_not_fit():
+    # Algorithm should fail if the number of elements and the minimum distance are
+    # incompatible
+    with pytest.raises(AssertionError):
+        Positions.CreateRandomPositions(10, width = 50, height = 50, min_distance = 40, max_iterations = 2, seed = 1)
+
+def test_dense_random_positions_fill_area():
+    # 80 elements at distance 25 need Poisson-disk sampling in a 300 x 300 area
+    p = Positions.CreateRandomPositions(80, min_distance = 25, seed = 2)
+    xy = np.asarray(p.xy, dtype = float)
+
+    assert len(p) == 80
+    assert _distances(p).min() >= 25
+    assert xy.min() >= 0 and xy.max() <= 300
+
+def test_random_positions_keep_boundingboxes_apart():
+    boundingboxes = [(20, 20), (40, 10)]
+    p = Positions.CreateRandomPositions(30, min_distance = 0, boundingboxes = boundingboxes, seed = 2)
+
+    radii = np.array([0.5 * np.hypot(*boundingboxes[i % 2]) for i in range(30)])
+    required = (radii[:, np.newaxis] + radii[np.newaxis, :])[np.triu_indices(30, 1)]
+    assert np.all(_distances(p) >= required - 1e-9)
+
+def test_sine_grid_only_moves_one_axis():
+    p = Positions.CreateSineGrid(10, 10, 30, 30, A = 20, f = 0.1, axis = "y")
+    grid = Positions.CreateRectGrid(10, 10, 30, 30)
+
+    assert p.y == grid.y
+    assert p.x != grid.x
+
+@pytest.mark.parametrize("x, y", [([10, 50, 90], [10, 50, 90]),
+                                  (np.array([10, 50, 90]), np.array([10, 50, 90])),
+                                  ([np.int64(10), 50, 90], [10, 50, 90])])
+def test_integer_coordinates_stay_integer(x, y):
+    p = Positions.CreateCustomPositions(x, y)
+    p.Translate(5, 5)
+
+    assert p.xy.dtype == np.int64
+    assert all(type(value) == int for value in p.x + p.y)
+
+def test_integer_positions_give_integer_stimulus_size():
+    stimulus = Grid(3, 3)
+    stimulus.positions.SetPositionDeviations([0], [5], [3])
+    svg = stimulus.GetSVG()
+
+    assert re.search(r'<svg[^>]* height="184"[^>]* width="184"', svg)
+    assert stimulus.GetElementsDF()['position'][0] == (47, 45)
+    assert type(stimulus.GetElementsDF()['position'][0][0]) == int
+
+def test_float_coordinates_are_stored_as_floats():
+    p = Positions.CreateCustomPositions([10, 50.5], [10, 50])
+
+    assert p.xy.dtype == np.float64
+
+def test_position_array_is_read_only():
+    p = Positions.CreateRectGrid(2, 2)
+
+    with pytest.raises(ValueError):
+        p.xy[0, 0] = 1
+
+def test_transforms():
+    p = Positions.CreateCustomPositions([0, 10], [0, 0])
+    p.Rotate(90, center = (0, 0))
+
+    np.testing.assert_allclose(p.xy, [[0, 0], [0, 10]], atol = 1e-12)
+
+    p.Scale(2, center = (0, 0))
+    np.testing.assert_allclose(p.xy, [[0, 0], [0, 20]], atol = 1e-12)
+
+    p.Shear(shear_x = 1, center = (0, 0))
+    np.testing.assert_allclose(p.xy, [[0, 0], [20, 20]], atol = 1e-12)
+
+    p.Transform([[1, 0], [0, 1]], offset = (1, 2))
+    np.testing.assert_allclose(p.xy, [[1, 2], [21, 22]], atol = 1e-12)
+
+def test_transformed_positions_are_stored_as_custom_positions():
+    stimulus = Stimulus()
+    stimulus.positions = Positions.CreateRectGrid(2, 3).Translate(10, 20)
+
+    assert stimulus.positions._position_type == "CustomPositions"
+    assert stimulus.positions._position_parameters['x'].pattern == stimulus.positions.x
+
+@pytest.mark.parametrize("axis", ["xy", "x", "y", "x=y"])
+def test_position_jitter(axis):
+    p = Positions.CreateRectGrid(5, 5).SetPositionJitter(axis = axis, distribution = "uniform", min_val = 1, max_val = 2)
+    grid = Positions.CreateRectGrid(5, 5)
+
+    xy = p.GetPositionArray(random.Random(1))
+    offsets = xy - grid.GetPositionArray()
+
+    assert np.array_equal(xy, p.GetPositionArray(random.Random(1)))
+    assert np.all(offsets[:, 0] == 0) if axis == "y" else np.all((offsets[:, 0] >= 1) & (offsets[:, 0] < 2))
+    assert np.all(offsets[:, 1] == 0) if axis == "x" else np.all((offsets[:, 1] >= 1) & (offsets[:, 1] < 2))
+    if axis == "x=y":
+        assert np.allclose(offsets[:, 0], offsets[:, 1])
+
+def test_shape_positions_on_square():
+    p = Positions.CreateShape(8, path = "M 0 0 L 10 0 L 10 10 L 0 10 Z", width = 100, height = 100)
 
-# Generate a pattern
-p = Positions.CreateRandomPattern(10)
+    np.testing.assert_allclose(p.x, [0, 50, 100, 100, 100, 50, 0, 0], atol = 1e-9)
+    np.testing.assert_allclose(p.y, [0, 0, 0, 50, 100, 100, 100, 50], atol = 1e-9)
 
-# Algorithm should fail if the number of elements and the minimum distance are
-# incompatible
-p = Positions.CreateRandomPattern(10, min_distance = 20)
+def test_shape_positions_are_equally_spaced(tmp_path):
+    # A circle of radius 10 made of two arcs
+    circle = "M 0 10 A 10 10 0 0 1 20 10 A 10 10 0 0 1 0 10 Z"
+    (tmp_path / "circle.svg").write_text('<svg xmlns="http://www.w3.org/2000/svg"><path d="%s"/></svg>'%circle)
 
-plt.plot(p.x, p.y, '.')
-#%%
-p = Positions.CreateSineGrid(10, 10, 30, 30, A = 20, f = 0.1, axis = "y")
+    for p in [Positions.CreateShape(12, path = circle, width = 20, height = 20),
+              Positions.CreateShape(12, src = str(tmp_path / "circle.svg"), width = 20, height = 20)]:
+        xy = p.GetPositionArray()
+        steps = np.hypot(*(np.roll(xy, -1, axis = 0) - xy).T)
 
+        np.testing.assert_allclose(steps, 2 * 10 * np.sin(np.pi / 12), rtol = 1e-3)
 
-plt.plot(p.x, p.y, '.')
\ No newline at end of file
+def test_arc_length_sampling():
+    # The control points of this curve make its parameter speed uneven
+    np.testing.assert_allclose(SampleArcLength("M 0 0 C 1 0 2 0 30 0", 6)[:, 0], [0, 5, 10, 15, 20, 25], atol = 1e-3)
+    # Moving to a new subpath does not add to the length
+    np.testing.assert_allclose(SampleArcLength("M 0 0 L 10 0 M 100 100 L 110 100", 4), [[0, 0], [5, 0], [100, 100], [105, 100]])
@@ -0,0 +1,67 @@
+# -*- coding: utf-8 -*-
+"""
+Tests for the Pillow raster backend.
+
+"""
+
+import pytest
+from PIL import Image
+
+from octa.Stimulus import Grid
+from octa.patterns import GridPattern
+from octa.shapes import Rectangle, Ellipse, Text
+from octa.Rasterizer import RasterizeDrawing
+
+def _grid(use_symbols = False):
+    stimulus = Grid(2, 2, x_margin = 10, y_margin = 10, row_spacing = 50, col_spacing = 50)
+    stimulus.shapes = GridPattern.RepeatAcrossElements([Rectangle, Ellipse])
+    stimulus.boundingboxes = GridPattern.RepeatAcrossElements([(40, 40)])
+    stimulus.fillcolors = GridPattern.RepeatAcrossElements(["red", "blue", "lime", "black"])
+    stimulus.use_symbols = use_symbols
+    stimulus.Render()
+
+    return stimulus
+
+def _pixel(image, xy):
+    return image.getpixel(xy)[:3]
+
+@pytest.mark.parametrize("use_symbols", [False, True])
+def test_elements_are_drawn(use_symbols):
+    stimulus = _grid(use_symbols)
+    image = RasterizeDrawing(stimulus.dwg, stimulus.width, stimulus.height)
+
+    assert image.size == (stimulus.width, stimulus.height)
+    assert _pixel(image, (2, 2)) == (255, 255, 255)
+    assert _pixel(image, (35, 35)) == (255, 0, 0)
+    assert _pixel(image, (85, 35)) == (0, 0, 255)
+    assert _pixel(image, (35, 85)) == (0, 255, 0)
+    assert _pixel(image, (85, 85)) == (0, 0, 0)
+    # Ellipse corners stay empty, rectangle corners are filled
+    assert _pixel(image, (62, 12)) == (255, 255, 255)
+    assert _pixel(image, (12, 12)) == (255, 0, 0)
+
+def test_scale():
+    stimulus = _grid()
+    image = RasterizeDrawing(stimulus.dwg, stimulus.width, stimulus.height, scale = 2)
+
+    assert image.size == (2 * stimulus.width, 2 * stimulus.height)
+    assert _pixel(image, (70, 70)) == (255, 0, 0)
+
+def test_save_png_and_jpg(tmp_path):
+    stimulus = _grid()
+    stimulus.SavePNG("grid", folder = str(tmp_path), backend = "pil")
+    stimulus.SaveJPG("grid", folder = str(tmp_path), backend = "pil")
+
+    with Image.open(tmp_path / "grid.png") as png, Image.open(tmp_path / "grid.jpg") as jpg:
+        assert png.size == jpg.size == (stimulus.width, stimulus.height)
+        assert _pixel(png, (35, 35)) == (255, 0, 0)
+
+@pytest.mark.parametrize("change", [lambda s: setattr(s, "fillcolors", GridPattern.RepeatAcrossElements([["radial", "white", "red"]])),
+                                    lambda s: setattr(s, "shapes", GridPattern.RepeatAcrossElements([Text("A")]))])
+def test_unsupported_content_raises(change):
+    stimulus = _grid()
+    change(stimulus)
+    stimulus.Render()
+
+    with pytest.raises(ValueError):
+        RasterizeDrawing(stimulus.dwg, stimulus.width, stimulus.height)
@@ -0,0 +1,108 @@
+# -*- coding: utf-8 -*-
+"""
+Tests for reusing the rendered drawing of a stimulus.
+
+"""
+
+import re
+
+import pytest
+
+from octa.Stimulus import Grid
+from octa.patterns import GridPattern
+from octa.shapes import Ellipse, Rectangle, Triangle
+
+def _normalize(svg):
+    # Automatically generated ids differ between drawings
+    return re.sub(r'(xlink:href|id)="[^"]*"|url\(#[^)]*\)', '', svg)
+
+def _grid():
+    stimulus = Grid(4, 4, seed = 2)
+    stimulus.shapes = GridPattern.RepeatAcrossElements([Ellipse, Rectangle, Triangle])
+    stimulus.fillcolors = GridPattern.RepeatAcrossRows(["red", ["radial", "white", "blue"]])
+    stimulus.links = GridPattern.RepeatAcrossElements(["", "https://example.org"])
+    stimulus.GetSVG()
+
+    return stimulus
+
+CHANGES = {
+    "shape":         lambda s: s.set_element_shape(3, Ellipse),
+    "boundingbox":   lambda s: s.set_element_boundingbox(0, (12, 30)),
+    "fillcolor":     lambda s: s.set_element_fillcolor(5, ["horizontal", "green", "yellow"]),
+    "bordercolor":   lambda s: s.set_element_bordercolor(6, "black"),
+    "borderwidth":   lambda s: s.set_element_borderwidth(6, 3),
+    "opacity":       lambda s: s.set_element_opacity(7, 0.5),
+    "orientation":   lambda s: s.set_element_orientation(8, 45),
+    "mirrorvalue":   lambda s: s.set_element_mirrorvalue(9, "horizontal"),
+    "link":          lambda s: s.set_element_link(1, ""),
+    "classlabel":    lambda s: s.set_element_classlabel(2, "target"),
+    "idlabel":       lambda s: s.set_element_idlabel(2, "first"),
+    "many":          lambda s: s.set_element_fillcolors("purple", n_changes = 4),
+    "swap_elements": lambda s: s.swap_elements(n_swap_pairs = 3),
+    "swap_features": lambda s: s.swap_distinct_features(n_swap_pairs = 2, feature_dimensions = ['shapes', 'fillcolors']),
+    }
+
+@pytest.mark.parametrize("change", CHANGES.values(), ids = CHANGES.keys())
+def test_incremental_render_equals_full_render(change):
+    stimulus = _grid()
+    change(stimulus)
+    incremental = stimulus.GetSVG()
+
+    stimulus._render_dirty = True
+
+    assert _normalize(incremental) == _normalize(stimulus.GetSVG())
+
+GRADIENT_CHANGES = {
+    "removed":    lambda s: s.set_element_fillcolor(0, "yellow"),
+    "replaced":   lambda s: s.set_element_fillcolor(0, ["vertical", "white", "blue"]),
+    "border":     lambda s: s.set_element_bordercolor(0, "black"),
+    "background": lambda s: s.set_element_fillcolor(1, "yellow"),
+    }
+
+@pytest.mark.parametrize("change", GRADIENT_CHANGES.values(), ids = GRADIENT_CHANGES.keys())
+def test_unused_gradients_are_removed(change):
+    stimulus = Grid(2, 2, background_color = ["radial", "red", "green"])
+    stimulus.fillcolors = GridPattern.RepeatAcrossElements([["radial", "white", "blue"], "red", ["radial", "red", "green"], "red"])
+    stimulus.bordercolors = GridPattern.RepeatAcrossElements([["diagonal", "white", "blue"], "none", "none", "none"])
+    stimulus.borderwidths = GridPattern.RepeatAcrossElements([2])
+    stimulus.GetSVG()
+
+    change(stimulus)
+    incremental = stimulus.GetSVG()
+
+    stimulus._render_dirty = True
+    full = stimulus.GetSVG()
+
+    assert _normalize(incremental) == _normalize(full)
+    assert incremental.count("Gradient") == full.count("Gradient")
+
+def test_only_changed_elements_are_generated_again():
+    stimulus = _grid()
+    nodes = list(stimulus._element_nodes)
+
+    stimulus.set_element_fillcolor(5, "green")
+    stimulus.Render()
+
+    assert [i for i in range(16) if stimulus._element_nodes[i] is not nodes[i]] == [5]
+
+def test_unchanged_stimulus_reuses_drawing():
+    stimulus = _grid()
+    dwg = stimulus.dwg
+
+    stimulus.Render()
+
+    assert stimulus.dwg is dwg
+
+@pytest.mark.parametrize("change", [lambda s: s._fillcolors.pattern.append("green"),
+                                    lambda s: setattr(s, "background_color", "grey"),
+                                    lambda s: s.positions.SetPositionJitter(distribution = "uniform", min_val = 0, max_val = 1)],
+                         ids = ["pattern", "background", "positions"])
+def test_stimulus_changes_give_full_render(change):
+    stimulus = _grid()
+    dwg = stimulus.dwg
+
+    change(stimulus)
+    svg = stimulus.GetSVG()
+
+    assert stimulus.dwg is not dwg
+    assert _normalize(svg) == _normalize(Grid.LoadFromJSONData(stimulus.GetJSON()).GetSVG())
@@ -0,0 +1,236 @@
+# -*- coding: utf-8 -*-
+"""
+Tests for the RenderPool backend and its optional dependency.
+
+"""
+
+import base64
+import io
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+
+import pytest
+
+import octa
+
+PACKAGE_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(octa.__file__)))
+
+def _loaded_modules(code):
+    result = subprocess.run([sys.executable, "-c", "import sys\n" + code + "\nprint(' '.join(sys.modules))"],
+                            capture_output = True, text = True, cwd = PACKAGE_ROOT)
+    assert result.returncode == 0, result.stderr
+
+    return result.stdout.split()
+
+def test_stimulus_import_does_not_load_renderpool():
+    assert "octa.RenderPool" not in _loaded_modules("import octa.Stimulus, octa.Batch")
+
+def test_pil_backend_does_not_load_renderpool(tmp_path):
+    modules = _loaded_modules("from octa.Stimulus import Grid\n"
+                              "Grid(3, 3).SavePNG('grid', folder = %r, backend = 'pil')"%str(tmp_path))
+
+    assert "octa.RenderPool" not in modules
+    assert (tmp_path / "grid.png").exists()
+
+def test_unknown_backend_raises(tmp_path):
+    from octa.Stimulus import Grid
+
+    with pytest.raises(ValueError):
+        Grid(3, 3).SavePNG("grid", folder = str(tmp_path), backend = "cairo")
+    with pytest.raises(ValueError):
+        Grid(3, 3).SaveJPG("grid", folder = str(tmp_path), backend = object())
+
+@pytest.fixture
+def render_pool(monkeypatch):
+    module = pytest.importorskip("octa.RenderPool")
+    workers = []
+
+    class FakeWorker:
+        # Stands in for a browser, and records what it is asked to render
+        def __init__(self, executable, flags, timeout):
+            self.executable, self.flags, self.timeout = executable, flags, timeout
+            self.screenshots = []
+            self.busy = False
+            self.closed = False
+            workers.append(self)
+
+        def screenshot(self, svg, width, height, scale):
+            assert not self.busy, "worker used by two threads at once"
+            self.busy = True
+            if "fail" in svg:
+                self.busy = False
+                raise RuntimeError("WARNING: the stimulus could not be loaded")
+            # Earlier stimuli take longer, so they finish out of order
+            time.sleep(0.02 / (len(self.screenshots) + 1))
+            self.screenshots.append((svg, width, height, scale, threading.get_ident()))
+            self.busy = False
+            return svg.encode("utf-8")
+
+        def close(self):
+            self.closed = True
+
+    monkeypatch.setattr(module, "find_chrome", lambda executable: "chrome" if executable is None else executable)
+    monkeypatch.setattr(module, "_BrowserWorker", FakeWorker)
+
+    return module.RenderPool, workers
+
+class _Stimulus:
+    def __init__(self, svg, width, height):
+        self.svg, self.width, self.height = svg, width, height
+
+    def GetSVG(self):
+        return self.svg
+
+def test_pool_must_be_open(render_pool):
+    RenderPool, workers = render_pool
+    pool = RenderPool(n_workers = 2)
+
+    with pytest.raises(ValueError):
+        pool.RenderMany([_Stimulus("a", 10, 10)])
+
+    with pool:
+        pass
+    with pytest.raises(ValueError):
+        pool.RenderPNG(_Stimulus("a", 10, 10))
+
+def test_open_starts_and_close_stops_workers(render_pool):
+    RenderPool, workers = render_pool
+
+    with RenderPool(n_workers = 3, browser_executable = "/opt/chrome", custom_flags = ("--flag",), timeout = 5) as pool:
+        assert len(workers) == 3
+        assert all((w.executable, w.flags, w.timeout) == ("/opt/chrome", ["--flag"], 5) for w in workers)
+        assert pool._idle_workers.qsize() == 3
+
+        # Opening again keeps the running workers
+        pool.Open()
+        assert len(workers) == 3
+
+    assert all(w.closed for w in workers)
+    assert pool._workers == [] and pool._idle_workers is None
+
+def test_failed_start_closes_started_workers(render_pool, monkeypatch):
+    RenderPool, workers = render_pool
+    import octa.RenderPool as module
+    started = module._BrowserWorker
+
+    def failing_worker(*args):
+        if len(workers) == 2:
+            raise RuntimeError("WARNING: the headless browser stopped unexpectedly")
+        return started(*args)
+
+    monkeypatch.setattr(module, "_BrowserWorker", failing_worker)
+    pool = RenderPool(n_workers = 4)
+
+    with pytest.raises(RuntimeError):
+        pool.Open()
+    assert len(workers) == 2 and all(w.closed for w in workers)
+    assert pool._executor is None
+
+def test_results_keep_stimulus_order(render_pool):
+    RenderPool, workers = render_pool
+    stimuli = [_Stimulus("stimulus %d"%i, 10 + i, 20 + i) for i in range(12)]
+
+    with RenderPool(n_workers = 3) as pool:
+        images = pool.RenderMany(stimuli)
+        assert pool._idle_workers.qsize() == 3
+
+    assert images == [("stimulus %d"%i).encode("utf-8") for i in range(12)]
+    screenshots = [shot for w in workers for shot in w.screenshots]
+    assert sorted(shot[0] for shot in screenshots) == sorted(s.svg for s in stimuli)
+    assert len(set(shot[4] for shot in screenshots)) > 1
+
+def test_viewport_and_scale(render_pool):
+    RenderPool, workers = render_pool
+
+    with RenderPool() as pool:
+        pool.RenderPNG(_Stimulus("a", 120.5, 80))
+        pool.RenderMany([_Stimulus("b", 30, 40)], scale = 2.5)
+
+    assert [shot[:4] for shot in workers[0].screenshots] == [("a", 120.5, 80, 1), ("b", 30, 40, 2.5)]
+
+def test_worker_is_returned_after_error(render_pool):
+    RenderPool, workers = render_pool
+
+    with RenderPool(n_workers = 2) as pool:
+        with pytest.raises(RuntimeError):
+            pool.RenderMany([_Stimulus("a", 10, 10), _Stimulus("fail", 10, 10), _Stimulus("c", 10, 10)])
+        assert pool._idle_workers.qsize() == 2
+        assert pool.RenderPNG(_Stimulus("d", 10, 10)) == b"d"
+
+def test_stimulus_uses_pool(render_pool, tmp_path):
+    from octa.Stimulus import Grid
+
+    RenderPool, workers = render_pool
+    stimulus = Grid(2, 2)
+
+    with RenderPool() as pool:
+        stimulus.SavePNG("grid", folder = str(tmp_path), backend = pool, scale = 2)
+
+    svg, width, height, scale, _ = workers[0].screenshots[0]
+    assert svg == stimulus.GetSVG()
+    assert (width, height, scale) == (stimulus.width, stimulus.height, 2)
+    assert (tmp_path / "grid.png").read_bytes() == svg.encode("utf-8")
+
+class _FakeWebSocket:
+    # Answers DevTools commands, with an unrelated event before every reply
+    def __init__(self, results):
+        self.results = results
+        self.sent = []
+        self.messages = []
+
+    def send(self, message):
+        message = json.loads(message)
+        self.sent.append(message)
+        self.messages.append(json.dumps({"method": "Page.frameStartedLoading", "params": {}}))
+        self.messages.append(json.dumps({"id": message["id"], "result": self.results.get(message["method"], {})}))
+
+    def recv(self):
+        return self.messages.pop(0)
+
+    def close(self):
+        pass
+
+class _FakeProcess:
+    def poll(self):
+        return None
+
+def test_browser_worker_protocol(monkeypatch, tmp_path):
+    module = pytest.importorskip("octa.RenderPool")
+    png = b"\x89PNG image"
+    websocket = _FakeWebSocket({"Page.getFrameTree":       {"frameTree": {"frame": {"id": "main"}}},
+                                "Page.captureScreenshot":  {"data": base64.b64encode(png).decode("ascii")}})
+    (tmp_path / "DevToolsActivePort").write_text("9222\n/devtools/browser/id")
+    targets = [{"type": "service_worker"}, {"type": "page", "webSocketDebuggerUrl": "ws://127.0.0.1:9222/devtools/page/1"}]
+
+    monkeypatch.setattr(module.urllib.request, "urlopen", lambda url, timeout: io.BytesIO(json.dumps(targets).encode("utf-8")))
+    monkeypatch.setattr(module, "create_connection", lambda url, **kwargs: websocket if url == targets[1]["webSocketDebuggerUrl"] else None)
+
+    # Connect to a browser that is already running, without starting one
+    worker = object.__new__(module._BrowserWorker)
+    worker.timeout, worker._message_id, worker._events = 5, 0, []
+    worker._user_data_dir, worker._process = str(tmp_path), _FakeProcess()
+    worker._connect()
+
+    svg = '<svg xmlns="http://www.w3.org/2000/svg" width="10" height="20"><image href="data:image/png;base64,%s"/></svg>'%("A" * 3000000)
+    assert worker.screenshot(svg, 100.5, 40, 2) == png
+
+    calls = {message["method"]: message["params"] for message in websocket.sent}
+    assert [message["method"] for message in websocket.sent] == ["Page.enable", "Emulation.setDefaultBackgroundColorOverride",
+                                                                 "Page.getFrameTree", "Emulation.setDeviceMetricsOverride",
+                                                                 "Page.setDocumentContent", "Runtime.evaluate",
+                                                                 "Page.captureScreenshot"]
+    assert calls["Emulation.setDeviceMetricsOverride"] == {"width": 101, "height": 40, "deviceScaleFactor": 2, "mobile": False}
+    assert calls["Page.setDocumentContent"]["frameId"] == "main"
+    assert svg in calls["Page.setDocumentContent"]["html"]
+    assert calls["Runtime.evaluate"]["awaitPromise"]
+    assert calls["Page.captureScreenshot"]["clip"] == {"x": 0, "y": 0, "width": 100.5, "height": 40, "scale": 1}
+    assert "Page.frameStartedLoading" in worker._events
+
+    websocket.results["Runtime.evaluate"] = {"exceptionDetails": {"text": "Uncaught"}}
+    with pytest.raises(RuntimeError):
+        worker.screenshot(svg, 10, 20, 1)
+
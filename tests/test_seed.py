@@ -0,0 +1,64 @@
+# -*- coding: utf-8 -*-
+"""
+Tests for the seeded random components of a stimulus.
+
+"""
+
+import re
+
+from octa.Stimulus import Grid, Outline
+from octa.patterns import GridPattern
+from octa.shapes import Ellipse, Rectangle, Triangle
+
+def _normalize(svg):
+    # Automatically generated ids differ between drawings
+    return re.sub(r'(xlink:href|id)="[^"]*"|url\(#[^)]*\)', '', svg)
+
+def _random_grid(seed):
+    stimulus = Grid(5, 5, seed = seed)
+    stimulus.shapes = GridPattern.RepeatAcrossElements([Ellipse, Rectangle, Triangle]).RandomizeAcrossElements()
+    stimulus.fillcolors = GridPattern.GradientAcrossRows("red", "blue").RandomizeAcrossRows()
+    stimulus.boundingboxes = GridPattern.RepeatAcrossElements([(20, 20)]).AddNormalJitter(mu = 0, std = 3)
+    stimulus.positions.SetPositionJitter(distribution = "normal", mu = 0, std = 2)
+
+    return stimulus
+
+def _swapped_grid(seed):
+    stimulus = _random_grid(seed)
+    stimulus.set_element_fillcolors("green", n_changes = 3)
+    stimulus.swap_elements(n_swap_pairs = 2)
+    stimulus.swap_distinct_features(n_swap_pairs = 2, feature_dimensions = ['shapes'])
+
+    return stimulus
+
+def test_same_seed_gives_identical_svg():
+    assert _random_grid(4).GetSVG() == _random_grid(4).GetSVG()
+    assert _swapped_grid(4).GetSVG() == _swapped_grid(4).GetSVG()
+    assert Outline(10, seed = 2).GetSVG() == Outline(10, seed = 2).GetSVG()
+
+def test_different_seed_gives_other_realization():
+    assert _random_grid(4).GetSVG() != _random_grid(5).GetSVG()
+
+def test_repeated_render_keeps_realization():
+    stimulus = _random_grid(None)
+    first = stimulus.GetSVG()
+    stimulus._render_dirty = True
+
+    assert _normalize(stimulus.GetSVG()) == _normalize(first)
+
+def test_reseed_gives_new_realization():
+    stimulus = _random_grid(4)
+    first = stimulus.GetSVG()
+
+    stimulus.Render(reseed = True)
+
+    assert stimulus.seed != 4
+    assert _normalize(stimulus.GetSVG()) != _normalize(first)
+    assert stimulus.GetSVG() == _random_grid(stimulus.seed).GetSVG()
+
+def test_seed_survives_json_round_trip():
+    stimulus = _swapped_grid(None)
+    copy = Grid.LoadFromJSONData(stimulus.GetJSON())
+
+    assert copy.seed == stimulus.seed
+    assert copy.GetSVG() == stimulus.GetSVG()
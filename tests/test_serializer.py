@@ -0,0 +1,71 @@
+# -*- coding: utf-8 -*-
+"""
+Tests for the direct SVG serializer.
+
+"""
+
+import PIL.Image
+import pytest
+
+from octa.Stimulus import Grid, Outline, Concentric
+from octa.SvgSerializer import WriteDrawing
+from octa.patterns import GridPattern
+from octa.shapes import Ellipse, Rectangle, Triangle, Polygon, RegularPolygon, Text, Path, PathSvg, Image, FitImage
+
+from test_json import _grid, _masked_concentric
+
+@pytest.fixture
+def assets(tmp_path):
+    PIL.Image.new("RGB", (4, 3), (255, 0, 0)).save(tmp_path / "red.png")
+    (tmp_path / "star.svg").write_text('<svg xmlns="http://www.w3.org/2000/svg" width="20" height="20">'
+                                       '<path d="M 10 0 L 13 7 L 20 7 L 14 12 L 16 20 L 10 15 L 4 20 L 6 12 L 0 7 L 7 7 Z"/></svg>')
+
+    return tmp_path
+
+def _all_shapes(assets, use_symbols = False):
+    stimulus = Grid(4, 4, background_color = ["horizontal", "white", "grey"], stim_link = "https://example.org/?a=1&b=2")
+    stimulus.shapes = GridPattern.RepeatAcrossElements([Ellipse, Rectangle, Triangle, Polygon(6), RegularPolygon(5),
+                                                        Text('<"A" & \'B\'>'), Path("M 0 0 L 10 0 L 5 10 Z", 10, 10),
+                                                        PathSvg(str(assets / "star.svg")), Image(str(assets / "red.png")),
+                                                        FitImage(str(assets / "red.png"))])
+    stimulus.fillcolors = GridPattern.RepeatAcrossRows(["red", ["radial", "white", "blue"], ["set", "green", "to = 'blue', begin = '1s'"]])
+    stimulus.orientations = GridPattern.RepeatAcrossElements([0, 30, 45.5])
+    stimulus.mirrorvalues = GridPattern.RepeatAcrossElements(["", "horizontal", "verticalhorizontal"])
+    stimulus.classlabels = GridPattern.RepeatAcrossElements(["a", ""])
+    stimulus.links = GridPattern.RepeatAcrossElements(["", "https://example.org/?x=<1>"])
+    stimulus.use_symbols = use_symbols
+
+    return stimulus
+
+MAKERS = {"grid":       lambda assets: _grid(1),
+          "masked":     lambda assets: _masked_concentric(),
+          "outline":    lambda assets: Outline(12, seed = 3),
+          "concentric": lambda assets: Concentric(3),
+          "shapes":     lambda assets: _all_shapes(assets),
+          "symbols":    lambda assets: _all_shapes(assets, use_symbols = True)}
+
+@pytest.mark.parametrize("make", MAKERS.values(), ids = MAKERS.keys())
+def test_serializer_matches_svgwrite(assets, make):
+    stimulus = make(assets)
+
+    assert stimulus.GetSVG() == stimulus.GetSVG(compatibility = True)
+
+@pytest.mark.parametrize("make", MAKERS.values(), ids = MAKERS.keys())
+def test_serializer_matches_svgwrite_after_changes(assets, make):
+    stimulus = make(assets)
+    stimulus.GetSVG()
+
+    stimulus.set_element_fillcolor(1, "purple")
+    stimulus.set_element_shape(2, Text("&"))
+
+    assert stimulus.GetSVG() == stimulus.GetSVG(compatibility = True)
+
+@pytest.mark.parametrize("pretty", [False, True])
+def test_saved_file_matches_svgwrite(assets, tmp_path, pretty):
+    stimulus = _all_shapes(assets)
+    stimulus.Render()
+
+    stimulus.dwg.saveas(str(tmp_path / "expected.svg"), pretty = pretty)
+    WriteDrawing(stimulus.dwg, str(tmp_path / "written.svg"), pretty = pretty)
+
+    assert (tmp_path / "written.svg").read_text() == (tmp_path / "expected.svg").read_text()
@@ -0,0 +1,120 @@
+# -*- coding: utf-8 -*-
+"""
+Tests for the shape classes.
+
+"""
+
+import gc
+import os
+import pickle
+import subprocess
+import sys
+import weakref
+
+import svgwrite
+import pytest
+
+import octa
+
+from octa.shapes import Ellipse, Rectangle, Triangle, Polygon, RegularPolygon, Text, Path, PathSvg, Image, FitImage
+from octa.shapes.Shape import Shape
+
+SHAPES = {"Ellipse":        lambda: Ellipse,
+          "Rectangle":      lambda: Rectangle,
+          "Triangle":       lambda: Triangle,
+          "Polygon":        lambda: Polygon(6),
+          "RegularPolygon": lambda: RegularPolygon(6),
+          "Text":           lambda: Text("A"),
+          "Path":           lambda: Path("M 0 0 L 10 0 L 5 10 Z", 10, 10),
+          "PathSvg":        lambda: PathSvg("shape.svg"),
+          "Image":          lambda: Image("image.png"),
+          "FitImage":       lambda: FitImage("image.png")}
+
+@pytest.mark.parametrize("make", SHAPES.values(), ids = SHAPES.keys())
+def test_shapes_have_no_instance_dictionary(make):
+    el = make()(position = (10, 20))
+
+    assert not hasattr(el, "__dict__")
+    with pytest.raises(AttributeError):
+        el.unknown_attribute = 1
+
+@pytest.mark.parametrize("make", SHAPES.values(), ids = SHAPES.keys())
+def test_set_methods_follow_parameters(make):
+    shape = make()
+
+    assert [p for p, _ in shape._set_methods] == shape.parameters
+    assert all(set_method is getattr(shape, "set_%s"%p) for p, set_method in shape._set_methods)
+
+def test_default_values():
+    el = Rectangle(link = "")
+
+    assert el.position == (0, 0)
+    assert el.boundingbox == (10, 10)
+    assert el.orientation == 0 and el.rotation_transform == "rotate(0, 0, 0)"
+    assert el.bordercolor == "none" and el.fillcolor == "none"
+    assert el.borderwidth == 0 and el.opacity == 1
+    assert el.classlabel == el.idlabel == el.mirrorvalue == el.link == ""
+    assert el.fillcolor_animation == el.rotation_animation == ""
+
+def test_parameter_values():
+    el = Ellipse(position = (10, 20), boundingbox = (30, 40), orientation = ["animate", "0", "90", "dur = '2s'"],
+                 fillcolor = ["set", "red", "to = 'blue'"], opacity = 0.5, classlabel = "a", link = "https://example.org")
+
+    assert el.rotation_transform == "rotate(0, 10, 20)"
+    assert dict(el.rotation_animation.kwargs)['to'] == "90 10 20"
+    assert el.fillcolor == "red"
+    assert dict(el.fillcolor_animation.kwargs) == {'attributeName': 'fill', 'to': 'blue'}
+    assert el.opacity == 0.5 and el.opacity_animation == ""
+
+    dwg = svgwrite.Drawing()
+    assert 'class="a"' in el.generate(dwg).tostring()
+    assert 'xlink:href="https://example.org"' in dwg.tostring()
+
+def test_factory_data_comes_from_class():
+    text = Text("hello")
+    el = text(data = "ignored", link = "")
+
+    assert "hello" in el.generate(svgwrite.Drawing()).tostring()
+    assert Polygon(5)(link = "").data == 5
+
+def test_subclasses_keep_slots():
+    class Square(Shape):
+        __slots__ = ()
+
+    assert not hasattr(Square(link = ""), "__dict__")
+
+def test_factories_return_the_same_class():
+    assert Polygon(5) is Polygon(5)
+    assert RegularPolygon(5) is RegularPolygon(5)
+    assert Text("A") is Text("A")
+    assert Image("image.png") is Image("image.png")
+    assert Path("M 0 0 L 10 0 L 5 10 Z", 10, 10) is Path("M 0 0 L 10 0 L 5 10 Z", 10, 10)
+
+    assert Polygon(5) is not Polygon(6)
+    assert Polygon(5) is not RegularPolygon(5)
+    assert Polygon(5) is not Polygon(5, name = "pentagon")
+    assert Polygon(5) is not Polygon(5.0)
+
+@pytest.mark.parametrize("make", SHAPES.values(), ids = SHAPES.keys())
+def test_pickled_classes_are_the_same_class(make):
+    shape = make()
+
+    assert pickle.loads(pickle.dumps(shape)) is shape
+    assert type(pickle.loads(pickle.dumps(shape(link = "")))) is shape
+
+def test_pickled_class_in_new_process():
+    code = ("import pickle, sys\n"
+            "from octa.shapes import Polygon\n"
+            "shape = pickle.loads(sys.stdin.buffer.read())\n"
+            "print(shape is Polygon(5), shape.__name__)")
+    result = subprocess.run([sys.executable, "-c", code], input = pickle.dumps(Polygon(5)), capture_output = True,
+                            cwd = os.path.dirname(os.path.dirname(os.path.abspath(octa.__file__))))
+
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.split() == [b"True", b"Polygon_"]
+
+def test_unused_classes_are_released():
+    reference = weakref.ref(Polygon(97))
+    gc.collect()
+
+    assert reference() is None
@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*-
+"""
+Tests for swapping elements and element features.
+
+"""
+
+import collections
+
+import pytest
+
+from octa.Stimulus import Grid
+from octa.patterns import GridPattern
+
+def _element_fillcolors(stimulus):
+    return stimulus.GetElementsDF()['fillcolor'].tolist()
+
+def _colored_grid(seed, colors = ["red", "red", "red", "blue", "green"]):
+    stimulus = Grid(5, 5, seed = seed)
+    stimulus.fillcolors = GridPattern.RepeatAcrossElements(colors)
+
+    return stimulus
+
+@pytest.mark.parametrize("seed", range(20))
+def test_distinct_pairs_differ_and_do_not_overlap(seed):
+    stimulus = _colored_grid(seed)
+    fingerprints = stimulus.fillcolors
+
+    # Five pairs can always be formed from the ten elements that are not red
+    pairs = stimulus._select_swap_pairs(5, fingerprints)
+    elements = [idx for pair in pairs for idx in pair]
+
+    assert len(pairs) == 5
+    assert len(set(elements)) == 10
+    assert all(i < j and fingerprints[i] != fingerprints[j] for i, j in pairs)
+
+@pytest.mark.parametrize("seed", range(10))
+def test_swap_distinct_features_changes_both_elements(seed):
+    stimulus = _colored_grid(seed)
+    before = _element_fillcolors(stimulus)
+
+    stimulus.swap_distinct_features(n_swap_pairs = 5, feature_dimensions = ['fillcolors'])
+    after = _element_fillcolors(stimulus)
+
+    changed = [i for i in range(25) if before[i] != after[i]]
+    assert len(changed) == 10
+    assert collections.Counter(before) == collections.Counter(after)
+
+@pytest.mark.parametrize("seed", range(10))
+def test_swap_distinct_elements_moves_distinct_elements(seed):
+    stimulus = _colored_grid(seed)
+    before = _element_fillcolors(stimulus)
+
+    stimulus.swap_distinct_elements(n_swap_pairs = 5)
+    after = _element_fillcolors(stimulus)
+
+    assert sum(a != b for a, b in zip(before, after)) == 10
+
+def test_distinct_swaps_exhausted():
+    # Only one element differs from the others, so only one pair is possible
+    stimulus = _colored_grid(1, ["red"] * 24 + ["blue"])
+
+    assert len(stimulus._select_swap_pairs(1, stimulus.fillcolors)) == 1
+    with pytest.raises(AssertionError):
+        stimulus._select_swap_pairs(2, stimulus.fillcolors)
+
+def test_distinct_pairs_are_uniform():
+    stimulus = Grid(2, 2, seed = 1)
+    counts = collections.Counter(stimulus._select_swap_pairs(1, ["a", "a", "b", "b"])[0] for _ in range(4000))
+
+    assert set(counts) == {(0, 2), (0, 3), (1, 2), (1, 3)}
+    assert all(abs(count - 1000) < 150 for count in counts.values())
+
+def test_swaps_are_reproducible():
+    first, second = _colored_grid(3), _colored_grid(3)
+    first.swap_distinct_elements(n_swap_pairs = 4)
+    second.swap_distinct_elements(n_swap_pairs = 4)
+
+    assert first.GetSVG() == second.GetSVG()
@@ -0,0 +1,66 @@
+# -*- coding: utf-8 -*-
+"""
+Tests for the symbol output mode.
+
+"""
+
+import re
+
+import pytest
+
+from octa.Stimulus import Grid
+from octa.patterns import GridPattern
+from octa.shapes import Rectangle, Ellipse, Polygon, Path
+
+def _normalize(svg):
+    # Automatically generated ids differ between drawings
+    return re.sub(r'(xlink:href|id)="[^"]*"|url\(#[^)]*\)', '', svg)
+
+def _grid(use_symbols, shapes = [Polygon(8)]):
+    stimulus = Grid(4, 4)
+    stimulus.shapes = GridPattern.RepeatAcrossElements(shapes)
+    stimulus.fillcolors = GridPattern.RepeatAcrossElements(["red", "blue", ["radial", "white", "black"]])
+    stimulus.orientations = GridPattern.RepeatAcrossElements([0, 30])
+    stimulus.mirrorvalues = GridPattern.RepeatAcrossElements(["", "vertical"])
+    stimulus.use_symbols = use_symbols
+
+    return stimulus
+
+def test_repeated_geometry_is_shared():
+    svg = _grid(True).GetSVG()
+
+    assert svg.count('<symbol') == 1
+    assert svg.count('<use') == 16
+    assert len(svg) < len(_grid(False).GetSVG())
+
+def test_unique_geometry_is_drawn_in_full():
+    stimulus = _grid(True)
+    stimulus.boundingboxes = GridPattern.RepeatAcrossElements([(10 + i, 10 + i) for i in range(16)])
+
+    plain = _grid(False)
+    plain.boundingboxes = GridPattern.RepeatAcrossElements([(10 + i, 10 + i) for i in range(16)])
+
+    assert '<symbol' not in stimulus.GetSVG()
+    assert _normalize(stimulus.GetSVG()) == _normalize(plain.GetSVG())
+
+def test_path_symbol_keeps_geometry_transform():
+    path = Path("M 0 0 L 10 0 L 10 10 L 5 15 L 0 10 Z", 10, 15)
+    svg = _grid(True, [path]).GetSVG()
+
+    symbol = re.search(r'<symbol[^>]*><path ([^>]*)/></symbol>', svg).group(1)
+    assert re.search(r'transform="translate\([^)]*\) scale\([^)]*\)"', symbol)
+    assert 'rotate' not in symbol
+
+@pytest.mark.parametrize("change", [lambda s: s.set_element_shape(3, Ellipse),
+                                    lambda s: s.set_element_boundingbox(0, (12, 12)),
+                                    lambda s: s.set_element_fillcolor(5, "green"),
+                                    lambda s: s.swap_distinct_elements(2)])
+def test_incremental_render_equals_full_render(change):
+    stimulus = _grid(True, [Polygon(8), Rectangle])
+    stimulus.GetSVG()
+    change(stimulus)
+    incremental = stimulus.GetSVG()
+
+    stimulus._render_dirty = True
+
+    assert _normalize(incremental) == _normalize(stimulus.GetSVG())